@@ -88,6 +88,160 @@ class ExposureRecommendation:
         return asdict(self)
 
 
+def calculate_atr(data: pd.DataFrame, period: int = 14) -> pd.Series:
+    """Average True Range of an OHLC frame."""
+    high = data['High']
+    low = data['Low']
+    close = data['Close']
+
+    tr1 = high - low
+    tr2 = abs(high - close.shift(1))
+    tr3 = abs(low - close.shift(1))
+
+    tr = pd.concat([tr1, tr2, tr3], axis=1).max(axis=1)
+    return tr.rolling(window=period).mean()
+
+
+def classify_volatility_regimes(data: pd.DataFrame) -> pd.Series:
+    """
+    Classify each day into volatility regime.
+
+    Returns:
+        Series with 'low', 'normal', 'high' classifications
+    """
+    # Calculate rolling volatility (20-day)
+    returns = np.log(data['Close'] / data['Close'].shift(1))
+    rolling_vol = returns.rolling(window=20).std() * np.sqrt(252) * 100  # Annualized
+
+    # Historical percentiles for regime classification
+    vol_20th = rolling_vol.quantile(0.20)
+    vol_80th = rolling_vol.quantile(0.80)
+
+    regimes = pd.Series(index=rolling_vol.index, dtype='object')
+    regimes[rolling_vol <= vol_20th] = 'low'
+    regimes[(rolling_vol > vol_20th) & (rolling_vol < vol_80th)] = 'normal'
+    regimes[rolling_vol >= vol_80th] = 'high'
+
+    return regimes.fillna('normal')
+
+
+def event_entry_regimes(historical_events: List[Dict],
+                        volatility_regimes: pd.Series) -> List[Optional[str]]:
+    """Volatility regime on each event's entry date (None if the date is unknown)."""
+    regimes = []
+    for event in historical_events:
+        regime = volatility_regimes.get(event.get('entry_date'))
+        regimes.append(None if regime is None or pd.isna(regime) else str(regime))
+    return regimes
+
+
+class ConditionalExpectancyIndex:
+    """
+    Precomputed lookup of historical "what happened next" returns.
+
+    Built once per ticker from the backtester's entry events. For every
+    holding day the events are sorted by their percentile on that day, so
+    the ±tolerance neighbourhood used by the conditional expectancy is a
+    pair of binary searches instead of a scan over every event. Prefix sums
+    give the neighbourhood count and mean in O(1) once the bounds are known.
+    Events can optionally be tagged with the volatility regime at entry.
+    """
+
+    def __init__(self,
+                 historical_events: List[Dict],
+                 entry_regimes: Optional[List[str]] = None):
+        """
+        Build the index.
+
+        Args:
+            historical_events: Entry events from find_entry_events_enhanced
+            entry_regimes: Optional volatility regime per event (same order)
+        """
+        # The list the index was built from; managers rebuild for any other list
+        self.events = historical_events
+        per_day: Dict[Tuple[int, Optional[str]], List[Tuple[float, float]]] = {}
+
+        for n, event in enumerate(historical_events):
+            progression = event.get('progression') or {}
+            if not progression:
+                continue
+            max_day = max(progression.keys())
+            final_return = progression[max_day]['cumulative_return_pct']
+            regime = entry_regimes[n] if entry_regimes is not None else None
+
+            for day, point in progression.items():
+                if day >= max_day or pd.isna(point['percentile']):
+                    continue
+                future_return = final_return - point['cumulative_return_pct']
+                per_day.setdefault((day, None), []).append((point['percentile'], future_return))
+                if regime is not None:
+                    per_day.setdefault((day, regime), []).append((point['percentile'], future_return))
+
+        self._buckets: Dict[Tuple[int, Optional[str]], Tuple[np.ndarray, np.ndarray, np.ndarray]] = {}
+        for key, pairs in per_day.items():
+            arr = np.array(pairs, dtype=float)
+            order = np.argsort(arr[:, 0], kind='stable')
+            percentiles = arr[order, 0]
+            future_returns = arr[order, 1]
+            prefix = np.concatenate(([0.0], np.cumsum(future_returns)))
+            self._buckets[key] = (percentiles, future_returns, prefix)
+
+    def _bounds(self,
+                day: int,
+                percentile: float,
+                tolerance: float,
+                regime: Optional[str]) -> Tuple[Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]], int, int]:
+        bucket = self._buckets.get((day, regime))
+        if bucket is None or pd.isna(percentile):
+            return None, 0, 0
+        percentiles = bucket[0]
+        lo = int(np.searchsorted(percentiles, percentile - tolerance, side='left'))
+        hi = int(np.searchsorted(percentiles, percentile + tolerance, side='right'))
+        # Tighten to the exact |p - current| <= tolerance test used historically
+        while lo < hi and abs(percentiles[lo] - percentile) > tolerance:
+            lo += 1
+        while hi > lo and abs(percentiles[hi - 1] - percentile) > tolerance:
+            hi -= 1
+        while lo > 0 and abs(percentiles[lo - 1] - percentile) <= tolerance:
+            lo -= 1
+        while hi < len(percentiles) and abs(percentiles[hi] - percentile) <= tolerance:
+            hi += 1
+        return bucket, lo, hi
+
+    def count(self,
+              day: int,
+              percentile: float,
+              tolerance: float = 10.0,
+              regime: Optional[str] = None) -> int:
+        """Number of historical events within ±tolerance on this day."""
+        _, lo, hi = self._bounds(day, percentile, tolerance, regime)
+        return hi - lo
+
+    def mean_future_return(self,
+                           day: int,
+                           percentile: float,
+                           tolerance: float = 10.0,
+                           regime: Optional[str] = None) -> Optional[float]:
+        """Mean return from this day to the end of the hold, or None."""
+        bucket, lo, hi = self._bounds(day, percentile, tolerance, regime)
+        if bucket is None or hi <= lo:
+            return None
+        prefix = bucket[2]
+        return float((prefix[hi] - prefix[lo]) / (hi - lo))
+
+    def median_future_return(self,
+                             day: int,
+                             percentile: float,
+                             tolerance: float = 10.0,
+                             regime: Optional[str] = None,
+                             min_samples: int = 5) -> Optional[float]:
+        """Median return from this day to the end of the hold, or None if too few samples."""
+        bucket, lo, hi = self._bounds(day, percentile, tolerance, regime)
+        if bucket is None or hi - lo < min_samples:
+            return None
+        return float(np.median(bucket[1][lo:hi]))
+
+
 class AdvancedTradeManager:
     """
     Advanced Trade Management Engine
@@ -106,7 +260,10 @@ class AdvancedTradeManager:
                  entry_idx: int,
                  entry_percentile: float,
                  entry_price: float,
-                 lookback_period: int = 500):
+                 lookback_period: int = 500,
+                 atr_series: Optional[pd.Series] = None,
+                 volatility_regimes: Optional[pd.Series] = None,
+                 expectancy_index: Optional[ConditionalExpectancyIndex] = None):
         """
         Initialize trade manager.
 
@@ -117,6 +274,9 @@ class AdvancedTradeManager:
             entry_percentile: Entry percentile value
             entry_price: Entry price
             lookback_period: Lookback for calculations
+            atr_series: Precomputed ATR (shared across simulations of one ticker)
+            volatility_regimes: Precomputed regime series (shared likewise)
+            expectancy_index: Precomputed conditional expectancy index
         """
         self.data = historical_data
         self.percentiles = rsi_ma_percentiles
@@ -126,47 +286,25 @@ class AdvancedTradeManager:
         self.lookback = lookback_period
 
         # Calculate ATR for volatility metrics
-        self.atr_series = self._calculate_atr()
+        self.atr_series = atr_series if atr_series is not None else self._calculate_atr()
 
         # Pre-calculate volatility regime history
-        self.volatility_regimes = self._classify_volatility_regimes()
+        self.volatility_regimes = (volatility_regimes if volatility_regimes is not None
+                                   else self._classify_volatility_regimes())
 
-    def _calculate_atr(self, period: int = 14) -> pd.Series:
-        """Calculate Average True Range."""
-        high = self.data['High']
-        low = self.data['Low']
-        close = self.data['Close']
+        self.expectancy_index = expectancy_index
 
-        tr1 = high - low
-        tr2 = abs(high - close.shift(1))
-        tr3 = abs(low - close.shift(1))
+        # Per-day memo: the simulation asks for the same metrics several times per day
+        self._volatility_cache: Dict[int, VolatilityMetrics] = {}
+        self._divergence_cache: Dict[int, float] = {}
 
-        tr = pd.concat([tr1, tr2, tr3], axis=1).max(axis=1)
-        atr = tr.rolling(window=period).mean()
-
-        return atr
+    def _calculate_atr(self, period: int = 14) -> pd.Series:
+        """Calculate Average True Range."""
+        return calculate_atr(self.data, period)
 
     def _classify_volatility_regimes(self) -> pd.Series:
-        """
-        Classify each day into volatility regime.
-
-        Returns:
-            Series with 'low', 'normal', 'high' classifications
-        """
-        # Calculate rolling volatility (20-day)
-        returns = np.log(self.data['Close'] / self.data['Close'].shift(1))
-        rolling_vol = returns.rolling(window=20).std() * np.sqrt(252) * 100  # Annualized
-
-        # Historical percentiles for regime classification
-        vol_20th = rolling_vol.quantile(0.20)
-        vol_80th = rolling_vol.quantile(0.80)
-
-        regimes = pd.Series(index=rolling_vol.index, dtype='object')
-        regimes[rolling_vol <= vol_20th] = 'low'
-        regimes[(rolling_vol > vol_20th) & (rolling_vol < vol_80th)] = 'normal'
-        regimes[rolling_vol >= vol_80th] = 'high'
-
-        return regimes.fillna('normal')
+        """Classify each day into volatility regime ('low', 'normal', 'high')."""
+        return classify_volatility_regimes(self.data)
 
     def calculate_volatility_metrics(self, current_idx: int) -> VolatilityMetrics:
         """
@@ -181,6 +319,10 @@ class AdvancedTradeManager:
         if current_idx >= len(self.atr_series):
             current_idx = len(self.atr_series) - 1
 
+        cached = self._volatility_cache.get(current_idx)
+        if cached is not None:
+            return cached
+
         current_atr = self.atr_series.iloc[current_idx]
         current_price = self.data['Close'].iloc[current_idx]
 
@@ -204,12 +346,14 @@ class AdvancedTradeManager:
         multipliers = {'low': 1.5, 'normal': 2.0, 'high': 2.5}
         atr_mult = multipliers.get(regime, 2.0)
 
-        return VolatilityMetrics(
+        metrics = VolatilityMetrics(
             atr=float(current_atr),
             atr_multiplier=atr_mult,
             normalized_displacement=float(atr_displacement),
             volatility_regime=str(regime)
         )
+        self._volatility_cache[current_idx] = metrics
+        return metrics
 
     def calculate_percentile_velocity(self, current_idx: int, window: int = 3) -> float:
         """
@@ -276,6 +420,10 @@ class AdvancedTradeManager:
         if current_idx < 7:
             return 0.0
 
+        cached = self._divergence_cache.get(current_idx)
+        if cached is not None:
+            return cached
+
         # Close position in daily range (0 = low, 1 = high)
         high = self.data['High'].iloc[current_idx]
         low = self.data['Low'].iloc[current_idx]
@@ -306,7 +454,9 @@ class AdvancedTradeManager:
         # If close near low of day + momentum weakening = divergence
         divergence_score = (1.0 - close_position) * 0.5 + divergence * 0.5
 
-        return np.clip(divergence_score, 0, 1)
+        divergence_score = np.clip(divergence_score, 0, 1)
+        self._divergence_cache[current_idx] = divergence_score
+        return divergence_score
 
     def calculate_exit_pressure(self,
                                current_idx: int,
@@ -502,28 +652,14 @@ class AdvancedTradeManager:
         current_price = self.data['Close'].iloc[current_idx]
         current_return = (current_price / self.entry_price - 1) * 100
 
-        # Find similar historical situations
-        similar_returns = []
-
-        for event in historical_events:
-            if days_since_entry not in event['progression']:
-                continue
-
-            hist_percentile = event['progression'][days_since_entry]['percentile']
-
-            # Check if similar percentile level (±10 points)
-            if abs(hist_percentile - current_percentile) <= 10:
-                # Look at return from this day to end of holding period
-                max_day = max(event['progression'].keys())
-
-                if max_day > days_since_entry:
-                    future_return = (event['progression'][max_day]['cumulative_return_pct'] -
-                                   event['progression'][days_since_entry]['cumulative_return_pct'])
-                    similar_returns.append(future_return)
+        # Similar historical situations (±10 percentile points on the same day)
+        index = self._expectancy_index_for(historical_events)
+        median_return = index.median_future_return(days_since_entry, current_percentile,
+                                                   tolerance=10.0, min_samples=5)
 
         # Expected return if hold
-        if similar_returns and len(similar_returns) >= 5:
-            expected_hold_return = np.median(similar_returns)
+        if median_return is not None:
+            expected_hold_return = median_return
         else:
             # Default to small positive expectancy if insufficient data
             expected_hold_return = 0.5
@@ -533,6 +669,38 @@ class AdvancedTradeManager:
 
         return expected_hold_return, expected_exit_return
 
+    def regime_expectancy(self,
+                          current_idx: int,
+                          days_since_entry: int,
+                          historical_events: List[Dict]) -> Dict:
+        """
+        Hold expectancy from historical events that entered in the current volatility regime.
+
+        Same ±10 point neighbourhood as calculate_conditional_expectancy, restricted
+        to events whose entry-day regime matches today's. Reported alongside the
+        exposure recommendation; expected_hold_return is None below 5 samples.
+        """
+        current_percentile = self.percentiles.iloc[current_idx]
+        regime = str(self.volatility_regimes.iloc[current_idx])
+        index = self._expectancy_index_for(historical_events)
+        return {
+            'regime': regime,
+            'samples': index.count(days_since_entry, current_percentile,
+                                   tolerance=10.0, regime=regime),
+            'expected_hold_return': index.median_future_return(days_since_entry, current_percentile,
+                                                               tolerance=10.0, regime=regime,
+                                                               min_samples=5)
+        }
+
+    def _expectancy_index_for(self, historical_events: List[Dict]) -> ConditionalExpectancyIndex:
+        """Return the expectancy index for this event list, building it if needed."""
+        if self.expectancy_index is None or self.expectancy_index.events is not historical_events:
+            self.expectancy_index = ConditionalExpectancyIndex(
+                historical_events,
+                event_entry_regimes(historical_events, self.volatility_regimes)
+            )
+        return self.expectancy_index
+
     def generate_exposure_recommendation(self,
                                          current_idx: int,
                                          days_since_entry: int,
@@ -678,7 +846,10 @@ def simulate_trade_with_advanced_management(
     entry_percentile: float,
     entry_price: float,
     historical_events: List[Dict],
-    max_hold_days: int = 21
+    max_hold_days: int = 21,
+    expectancy_index: Optional[ConditionalExpectancyIndex] = None,
+    atr_series: Optional[pd.Series] = None,
+    volatility_regimes: Optional[pd.Series] = None
 ) -> Dict:
     """
     Simulate a single trade using advanced management.
@@ -690,9 +861,15 @@ def simulate_trade_with_advanced_management(
         rsi_ma_percentiles=rsi_ma_percentiles,
         entry_idx=entry_idx,
         entry_percentile=entry_percentile,
-        entry_price=entry_price
+        entry_price=entry_price,
+        atr_series=atr_series,
+        volatility_regimes=volatility_regimes,
+        expectancy_index=expectancy_index
     )
 
+    close = historical_data['Close'].to_numpy()
+    percentiles = rsi_ma_percentiles.to_numpy()
+
     simulation_results = []
 
     for day in range(1, min(max_hold_days + 1, len(historical_data) - entry_idx)):
@@ -706,9 +883,10 @@ def simulate_trade_with_advanced_management(
         )
         trailing_stop = manager.calculate_trailing_stop_level(current_idx, day)
         vol_metrics = manager.calculate_volatility_metrics(current_idx)
+        regime_expectancy = manager.regime_expectancy(current_idx, day, historical_events)
 
-        current_price = historical_data['Close'].iloc[current_idx]
-        current_percentile = rsi_ma_percentiles.iloc[current_idx]
+        current_price = close[current_idx]
+        current_percentile = percentiles[current_idx]
         current_return = (current_price / entry_price - 1) * 100
 
         day_result = {
@@ -722,6 +900,7 @@ def simulate_trade_with_advanced_management(
             'exposure_recommendation': exposure_rec.to_dict(),
             'trailing_stop': float(trailing_stop),
             'volatility_metrics': vol_metrics.to_dict(),
+            'regime_expectancy': regime_expectancy,
             'triggered_stop': bool(current_price <= trailing_stop),
             'triggered_exit_signal': bool(exposure_rec.action in ['reduce_75', 'exit_all'])
         }
@@ -743,3 +922,55 @@ def simulate_trade_with_advanced_management(
 
     # Convert all nested numpy types
     return _convert_numpy_types(result)
+
+
+def simulate_trades_with_advanced_management(
+    historical_data: pd.DataFrame,
+    rsi_ma_percentiles: pd.Series,
+    entry_events: List[Dict],
+    historical_events: List[Dict],
+    max_hold_days: int = 21
+) -> List[Dict]:
+    """
+    Simulate many entries for one ticker.
+
+    ATR, volatility regimes and the conditional expectancy index (with each
+    historical event tagged by its entry-day regime) are built once and
+    shared, so each additional entry only costs its own day loop.
+
+    Args:
+        historical_data: Full OHLCV data
+        rsi_ma_percentiles: RSI-MA percentile series
+        entry_events: Events to simulate (need entry_date/entry_percentile/entry_price)
+        historical_events: Historical trade events for expectancy
+        max_hold_days: Maximum days to simulate per entry
+
+    Returns:
+        One simulation dict per entry, in input order
+    """
+    if not entry_events:
+        return []
+
+    atr_series = calculate_atr(historical_data)
+    volatility_regimes = classify_volatility_regimes(historical_data)
+    expectancy_index = ConditionalExpectancyIndex(
+        historical_events,
+        event_entry_regimes(historical_events, volatility_regimes)
+    )
+
+    simulations = []
+    for event in entry_events:
+        simulations.append(simulate_trade_with_advanced_management(
+            historical_data=historical_data,
+            rsi_ma_percentiles=rsi_ma_percentiles,
+            entry_idx=historical_data.index.get_loc(event['entry_date']),
+            entry_percentile=event['entry_percentile'],
+            entry_price=event['entry_price'],
+            historical_events=historical_events,
+            max_hold_days=max_hold_days,
+            expectancy_index=expectancy_index,
+            atr_series=atr_series,
+            volatility_regimes=volatility_regimes
+        ))
+
+    return simulations
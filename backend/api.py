@@ -64,356 +64,7 @@ from stock_statistics import (
     OXY_4H_DATA, OXY_DAILY_DATA
 )
 
-# ── Telegram long-polling background thread ───────────────────────────────────
-
-def _telegram_poll_loop() -> None:
-    """Runs forever in a daemon thread; handles Telegram bot commands."""
-    import json
-    import urllib.error
-    import urllib.parse
-    import urllib.request
-
-    token   = os.getenv("TELEGRAM_BOT_TOKEN", "")
-    chat_id = os.getenv("TELEGRAM_CHAT_ID", "")
-    if not token or not chat_id:
-        return
-
-    base = f"https://api.telegram.org/bot{token}"
-
-    def _get(method: str, params: dict | None = None) -> dict:
-        url = f"{base}/{method}"
-        if params:
-            url += "?" + urllib.parse.urlencode(params)
-        with urllib.request.urlopen(url, timeout=35) as r:
-            return json.loads(r.read())
-
-    # Remove any registered webhook so long-polling works (409 otherwise)
-    try:
-        _get("deleteWebhook", {"drop_pending_updates": "false"})
-        print("[poll] Webhook deleted — long-polling mode active")
-    except Exception as exc:
-        print(f"[poll] deleteWebhook warning: {exc}")
-
-    def _send(text: str, reply_markup: dict | None = None) -> None:
-        body_payload: dict = {
-            "chat_id": chat_id, "text": text,
-            "parse_mode": "HTML", "disable_web_page_preview": True,
-        }
-        if reply_markup is not None:
-            body_payload["reply_markup"] = reply_markup
-        payload = json.dumps(body_payload).encode()
-        req = urllib.request.Request(
-            f"{base}/sendMessage", data=payload,
-            headers={"Content-Type": "application/json"}, method="POST",
-        )
-        try:
-            with urllib.request.urlopen(req, timeout=15) as r:
-                json.loads(r.read())
-        except urllib.error.HTTPError as exc:
-            # Log the full Telegram error body so we can debug HTML issues
-            try:
-                body = exc.read().decode("utf-8", errors="replace")
-            except Exception:
-                body = str(exc)
-            print(f"[poll] send HTTP {exc.code}: {body[:400]}")
-        except Exception as exc:
-            print(f"[poll] send error: {exc}")
-
-    def _answer_callback(callback_id: str, text: str = "") -> None:
-        """Acknowledge an inline-button tap so Telegram stops the spinner."""
-        payload = json.dumps({"callback_query_id": callback_id, "text": text}).encode()
-        req = urllib.request.Request(
-            f"{base}/answerCallbackQuery", data=payload,
-            headers={"Content-Type": "application/json"}, method="POST",
-        )
-        try:
-            with urllib.request.urlopen(req, timeout=10) as r:
-                json.loads(r.read())
-        except Exception as exc:
-            print(f"[poll] answer_callback error: {exc}")
-
-    def _handle_callback(data: str, callback_id: str) -> None:
-        """Dispatch an inline-button tap (callback_query)."""
-        _answer_callback(callback_id)
-        print(f"[poll] callback: {data!r}")
-        try:
-            if data == "mr:live":
-                _send("⏳ Fetching <b>live oversold table</b>…")
-                threading.Thread(
-                    target=_run_delivery_simple, args=(chat_id, "mr"), daemon=True,
-                ).start()
-            elif data == "mr:nonoverlap":
-                from telegram_mr_handler import handle_mr_nonoverlap
-                for part in handle_mr_nonoverlap():
-                    _send(part)
-            elif data == "mr:overlap":
-                from telegram_mr_handler import handle_mr_overlap
-                for part in handle_mr_overlap():
-                    _send(part)
-            elif data in ("sortino:cov", "sortino:nocov"):
-                from telegram_sortino_handler import (
-                    handle_sortino_cov, handle_sortino_nocov, sortino_menu_markup,
-                )
-                active = "cov" if data == "sortino:cov" else "nocov"
-                parts = handle_sortino_cov() if active == "cov" else handle_sortino_nocov()
-                for part in parts[:-1]:
-                    _send(part)
-                _send(parts[-1], reply_markup=sortino_menu_markup(active))
-        except Exception as exc:
-            import traceback
-            print(f"[poll] callback error: {traceback.format_exc()}")
-            _send(f"❌ Button error: {exc}")
-
-    COMMANDS = {
-        "/update":          "all",
-        "/macro":           "macro",
-        # NOTE: /mr is handled by a dedicated branch (live / non-overlap / overlap chooser)
-        "/momentum":        "momentum",
-        "/divergence":      "divergence",
-        "/cov":             "cov",
-        "/covgreen":        "covgreen",
-        "/200sma":          "sma200",
-        "/gammawalls":      "gammawalls",
-        "/maxpain":         "maxpain",
-        # Kelly Criterion
-        "/kelly_hist":      "kelly_hist",      # historical 2000-day Kelly ranked
-        "/kelly_dyn":       "kelly_dyn",       # dynamic 252-day Kelly + percentile table
-        "/kelly_strategy":  "kelly_strategy",  # strategy trade-return Kelly by RSI-MA bucket
-    }
-
-    def _run_delivery_simple(cid: str, mt: str) -> None:
-        try:
-            from telegram_delivery import _deliver
-            _deliver(cid, mt)
-        except Exception as exc:
-            import traceback
-            print(f"[poll] delivery error ({mt}): {traceback.format_exc()}")
-            _send(f"❌ Error running {mt}: {exc}")
-
-    offset: int | None = None
-    print(f"[poll] Telegram poller started for chat_id={chat_id}")
-
-    while True:
-        try:
-            params: dict = {"timeout": 30, "allowed_updates": ["message", "callback_query"]}
-            if offset is not None:
-                params["offset"] = offset
-
-            for update in _get("getUpdates", params).get("result", []):
-                offset = update["update_id"] + 1
-
-                # ── Inline-button taps ────────────────────────────────────────
-                cb = update.get("callback_query")
-                if cb:
-                    cb_chat = ((cb.get("message") or {}).get("chat") or {})
-                    if str(cb_chat.get("id", "")) != chat_id:
-                        continue
-                    _handle_callback(cb.get("data", ""), cb.get("id", ""))
-                    continue
-
-                msg  = update.get("message") or {}
-                chat = msg.get("chat") or {}
-                text = (msg.get("text") or "").strip()
-
-                if str(chat.get("id", "")) != chat_id or not text:
-                    continue
-
-                # Strip @botname suffix Telegram appends in groups/channels
-                # e.g. "/mr@MyBot" → "/mr"
-                cmd = text.lower().split()[0].split("@")[0]
-                print(f"[poll] received: {cmd!r}")
-
-                if cmd in ("/help", "/guide"):
-                    try:
-                        from telegram_formatters import get_help_message, get_guide_message
-                        _send(get_help_message() if cmd == "/help" else get_guide_message())
-                    except Exception as exc:
-                        _send(f"❌ Error: {exc}")
-                elif cmd.startswith("/sizing"):
-                    arg = text.lower()[len("/sizing"):].strip().split("@")[0].strip()
-                    try:
-                        from telegram_sizing_reference import handle_sizing_command
-                        for part in handle_sizing_command(arg):
-                            _send(part)
-                    except Exception as exc:
-                        import traceback
-                        print(f"[poll] /sizing error: {traceback.format_exc()}")
-                        _send(f"❌ /sizing error: {exc}")
-                elif cmd.startswith("/variants"):
-                    arg = text.lower()[len("/variants"):].strip().split("@")[0].strip()
-                    try:
-                        from telegram_variance_reference import handle_variants_command
-                        for part in handle_variants_command(arg):
-                            _send(part)
-                    except Exception as exc:
-                        import traceback
-                        print(f"[poll] /variants error: {traceback.format_exc()}")
-                        _send(f"❌ /variants error: {exc}")
-                elif cmd.startswith("/options"):
-                    arg = text.lower()[len("/options"):].strip().split("@")[0].strip()
-                    arg = arg.split()[0] if arg.split() else ""
-                    _send("⏳ Scanning <b>options signals</b> (QQQ &amp; SPY)…")
-                    def _run_options(a=arg):
-                        try:
-                            from telegram_options_handler import handle_options_command
-                            for part in handle_options_command(a):
-                                _send(part)
-                        except Exception as exc:
-                            import traceback
-                            print(f"[poll] /options error: {traceback.format_exc()}")
-                            _send(f"❌ /options error: {exc}")
-                    threading.Thread(target=_run_options, daemon=True, name="options-scan").start()
-                elif cmd.startswith("/iv"):
-                    _send("⏳ Fetching <b>IV dashboard</b> (VIX / VXN / VIX9D)…")
-                    try:
-                        from telegram_options_handler import handle_iv_command
-                        for part in handle_iv_command():
-                            _send(part)
-                    except Exception as exc:
-                        import traceback
-                        print(f"[poll] /iv error: {traceback.format_exc()}")
-                        _send(f"❌ /iv error: {exc}")
-                elif cmd.startswith("/optwatch"):
-                    _send("⏳ Checking <b>RSI-MA percentiles</b> (QQQ &amp; SPY)…")
-                    def _run_optwatch():
-                        try:
-                            from telegram_options_handler import handle_optwatch_command
-                            for part in handle_optwatch_command():
-                                _send(part)
-                        except Exception as exc:
-                            _send(f"❌ /optwatch error: {exc}")
-                    threading.Thread(target=_run_optwatch, daemon=True, name="optwatch").start()
-                elif cmd.startswith("/optlog"):
-                    remainder = text[len("/optlog"):].strip().split("@")[0].strip()
-                    try:
-                        n = int(remainder.split()[0]) if remainder.split() else 10
-                    except ValueError:
-                        n = 10
-                    try:
-                        from telegram_options_handler import handle_optlog_command
-                        for part in handle_optlog_command(n):
-                            _send(part)
-                    except Exception as exc:
-                        _send(f"❌ /optlog error: {exc}")
-                elif cmd.startswith("/optbacktest"):
-                    try:
-                        from telegram_options_handler import handle_optbacktest_command
-                        for part in handle_optbacktest_command():
-                            _send(part)
-                    except Exception as exc:
-                        _send(f"❌ /optbacktest error: {exc}")
-                elif cmd == "/mr":
-                    arg = text.lower()[len("/mr"):].strip().split("@")[0].strip()
-                    arg = arg.split()[0] if arg.split() else ""
-                    try:
-                        if arg in ("nonoverlap", "nonoverlapping", "non-overlap", "no"):
-                            from telegram_mr_handler import handle_mr_nonoverlap
-                            for part in handle_mr_nonoverlap():
-                                _send(part)
-                        elif arg in ("overlap", "overlapping", "dca"):
-                            from telegram_mr_handler import handle_mr_overlap
-                            for part in handle_mr_overlap():
-                                _send(part)
-                        elif arg in ("live", "oversold"):
-                            _send("⏳ Fetching <b>live oversold table</b>…")
-                            threading.Thread(
-                                target=_run_delivery_simple, args=(chat_id, "mr"), daemon=True,
-                            ).start()
-                        else:
-                            from telegram_mr_handler import MENU_TEXT, mr_menu_markup
-                            _send(MENU_TEXT, reply_markup=mr_menu_markup())
-                    except Exception as exc:
-                        import traceback
-                        print(f"[poll] /mr error: {traceback.format_exc()}")
-                        _send(f"❌ /mr error: {exc}")
-                elif cmd == "/value":
-                    arg = text[len("/value"):].strip().split("@")[0].strip()
-                    arg = arg.split()[0] if arg.split() else ""
-                    arg_l = arg.lower()
-                    if arg_l in ("refresh", "update", "rebuild", "fetch", "live"):
-                        _send("⏳ Re-fetching <b>all fundamentals live</b> (~34 stocks, "
-                              "may take a minute)…")
-                    elif arg:
-                        _send(f"⏳ Fetching <b>{arg.upper()}</b> fundamentals (live)…")
-                    def _run_value(a=arg):
-                        try:
-                            from telegram_value_handler import handle_value_command
-                            for part in handle_value_command(a):
-                                _send(part)
-                        except Exception as exc:
-                            import traceback
-                            print(f"[poll] /value error: {traceback.format_exc()}")
-                            _send(f"❌ /value error: {exc}")
-                    threading.Thread(target=_run_value, daemon=True, name="value").start()
-                elif cmd == "/ffd":
-                    _send("⏳ Fetching <b>live FFD readings</b> for 50 tickers (~30-60s)…")
-                    def _run_ffd():
-                        try:
-                            from telegram_ffd_handler import handle_ffd_command
-                            for part in handle_ffd_command(""):
-                                _send(part)
-                        except Exception as exc:
-                            import traceback
-                            print(f"[poll] /ffd error: {traceback.format_exc()}")
-                            _send(f"❌ /ffd error: {exc}")
-                    threading.Thread(target=_run_ffd, daemon=True, name="ffd").start()
-                elif cmd == "/sortino":
-                    try:
-                        from telegram_sortino_handler import handle_sortino_cov, sortino_menu_markup
-                        parts = handle_sortino_cov()
-                        for part in parts[:-1]:
-                            _send(part)
-                        _send(parts[-1], reply_markup=sortino_menu_markup("cov"))
-                    except Exception as exc:
-                        import traceback
-                        print(f"[poll] /sortino error: {traceback.format_exc()}")
-                        _send(f"❌ /sortino error: {exc}")
-                elif cmd in ("/rsima4h", "/cov4h"):
-                    try:
-                        from telegram_delivery import _deliver
-                        msg_type = "rsima4h" if cmd == "/rsima4h" else "cov4h"
-                        _send(f"⏳ Fetching <b>{msg_type}</b>…")
-                        threading.Thread(
-                            target=_run_delivery_simple,
-                            args=(chat_id, msg_type),
-                            daemon=True,
-                        ).start()
-                    except Exception as exc:
-                        _send(f"❌ Error: {exc}")
-                elif cmd in COMMANDS:
-                    msg_type = COMMANDS[cmd]
-                    _send(f"⏳ Fetching <b>{msg_type}</b>…")
-
-                    def _run_delivery(cid: str = chat_id, mt: str = msg_type) -> None:
-                        try:
-                            from telegram_delivery import _deliver
-                            _deliver(cid, mt)
-                        except Exception as exc:
-                            import traceback
-                            print(f"[poll] delivery error ({mt}): {traceback.format_exc()}")
-                            _send(f"❌ Error running {mt}: {exc}")
-
-                    threading.Thread(
-                        target=_run_delivery, daemon=True, name=f"delivery-{msg_type}"
-                    ).start()
-
-        except (KeyboardInterrupt, SystemExit):
-            break
-        except urllib.error.HTTPError as exc:
-            if exc.code == 409:
-                # Another instance is still polling (deploy overlap) — wait it out
-                print("[poll] 409 Conflict: old instance still running, waiting 15s")
-                time.sleep(15)
-            else:
-                print(f"[poll] HTTP error {exc.code}: {exc} — retrying in 10s")
-                time.sleep(10)
-        except urllib.error.URLError as exc:
-            print(f"[poll] network error: {exc} — retrying in 10s")
-            time.sleep(10)
-        except Exception as exc:
-            print(f"[poll] unexpected error: {exc} — retrying in 5s")
-            time.sleep(5)
-
+# ── Background loops (the Telegram poller lives in telegram_poll_worker) ─────
 
 def _self_ping_loop() -> None:
     """Pings this service every 10 minutes to prevent Render free-tier sleep."""
@@ -433,19 +84,50 @@ def _self_ping_loop() -> None:
             print(f"[ping] warning: {exc}")
 
 
+def _snapshot_refresh_loop() -> None:
+    """Keeps the Telegram snapshot message cache warm so commands render from cache."""
+    from telegram_delivery import SNAPSHOT_REFRESH_SECONDS, refresh_snapshot_cache
+    while True:
+        try:
+            refresh_snapshot_cache()
+        except Exception as exc:
+            print(f"[snapshots] refresh error: {exc}")
+        time.sleep(SNAPSHOT_REFRESH_SECONDS)
+
+
+def _macro_risk_refresh_loop() -> None:
+    """Keeps the macro risk time-series store current so /api/macro-risk reads from memory."""
+    from macro_risk_metrics import MACRO_REFRESH_SECONDS, macro_store
+    while True:
+        try:
+            macro_store.refresh()
+        except Exception as exc:
+            print(f"[macro-risk] refresh error: {exc}")
+        time.sleep(MACRO_REFRESH_SECONDS)
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     token   = os.getenv("TELEGRAM_BOT_TOKEN", "")
     chat_id = os.getenv("TELEGRAM_CHAT_ID", "")
+    poller: Optional[asyncio.Task] = None
     if token and chat_id:
         from telegram_bot import set_bot_commands
+        from telegram_poll_worker import get_worker
         set_bot_commands()
-        t = threading.Thread(target=_telegram_poll_loop, daemon=True, name="telegram-poller")
-        t.start()
+        # Long-polls on the app's event loop; commands run on the worker's own pool
+        poller = asyncio.create_task(get_worker().poll_forever(), name="telegram-poller")
+        threading.Thread(target=_snapshot_refresh_loop, daemon=True, name="telegram-snapshots").start()
     else:
         print("[api] Telegram poller disabled — set TELEGRAM_BOT_TOKEN and TELEGRAM_CHAT_ID")
     threading.Thread(target=_self_ping_loop, daemon=True, name="self-ping").start()
+    if os.getenv("MACRO_RISK_REFRESH", "0").lower() in {"1", "true", "yes"}:
+        threading.Thread(target=_macro_risk_refresh_loop, daemon=True, name="macro-risk").start()
+    else:
+        print("[api] Macro risk refresh disabled — set MACRO_RISK_REFRESH=1 (requests refresh on demand)")
     yield
+    if poller is not None:
+        poller.cancel()
 
 
 # Initialize FastAPI app
@@ -1054,7 +736,10 @@ async def optimize_mapi_thresholds(
     ticker: str,
     holding_period: int = 7,
     min_win_rate: float = 0.65,
-    min_expectancy: float = 1.0
+    min_expectancy: float = 1.0,
+    step: int = 5,
+    esv_thresholds: Optional[str] = None,
+    holding_periods: Optional[str] = None,
 ):
     """
     Optimize MAPI entry thresholds for a specific ticker
@@ -1067,6 +752,9 @@ async def optimize_mapi_thresholds(
         holding_period: Days to hold position (default: 7)
         min_win_rate: Minimum win rate threshold (default: 0.65 = 65%)
         min_expectancy: Minimum return expectancy % (default: 1.0)
+        step: Grid spacing in percentile points (default: 5, min 1)
+        esv_thresholds: Optional comma-separated ESV percentile thresholds (e.g. "30,50,70")
+        holding_periods: Optional comma-separated holding periods to search (overrides holding_period)
 
     Returns:
         List of optimal threshold combinations sorted by return expectancy
@@ -1091,6 +779,14 @@ async def optimize_mapi_thresholds(
 
         df.columns = [col.lower() for col in df.columns]
 
+        try:
+            esv_list = [float(v) for v in esv_thresholds.split(",") if v.strip()] if esv_thresholds else None
+            period_list = [int(v) for v in holding_periods.split(",") if v.strip()] if holding_periods else None
+        except ValueError:
+            raise HTTPException(status_code=400, detail="esv_thresholds and holding_periods must be comma-separated numbers")
+        if period_list and any(p < 1 for p in period_list):
+            raise HTTPException(status_code=400, detail="holding_periods must be positive")
+
         # Optimize
         analyzer = MAPIAnalyzer()
         results = analyzer.optimize_thresholds(
@@ -1100,6 +796,9 @@ async def optimize_mapi_thresholds(
             holding_period=holding_period,
             min_win_rate=min_win_rate,
             min_expectancy=min_expectancy,
+            step=max(1, step),
+            esv_thresholds=esv_list,
+            holding_periods=period_list,
         )
 
         # Convert to dict
@@ -1107,6 +806,8 @@ async def optimize_mapi_thresholds(
             {
                 "composite_threshold": r.composite_threshold,
                 "edr_threshold": r.edr_threshold,
+                "esv_threshold": r.esv_threshold,
+                "holding_period": r.holding_period,
                 "total_trades": r.total_trades,
                 "winning_trades": r.winning_trades,
                 "win_rate": round(r.win_rate * 100, 1),
@@ -1150,8 +851,13 @@ async def scan_mapi_market(request: dict):
             "symbols": ["AAPL", "TSLA", "META", ...],
             "composite_threshold": 35,  // Optional, default 35
             "edr_threshold": 20,        // Optional, default 20
+            "time_budget_seconds": 45,  // Optional, default 45 (max 300)
         }
 
+    History is bulk-downloaded and MAPI is computed in a worker pool, so large
+    universes (500+ symbols) are supported; symbols not finished within the time
+    budget are listed under "timed_out".
+
     Returns:
         List of MAPISignal objects sorted by composite percentile
     """
@@ -1161,16 +867,20 @@ async def scan_mapi_market(request: dict):
         symbols = request.get("symbols", [])
         composite_threshold = request.get("composite_threshold", 35)
         edr_threshold = request.get("edr_threshold", 20)
+        time_budget = min(max(float(request.get("time_budget_seconds", 45)), 1.0), 300.0)
 
         if not symbols:
             raise HTTPException(status_code=400, detail="No symbols provided")
 
         analyzer = MAPIAnalyzer()
-        signals = analyzer.scan_market(
-            symbols=symbols,
-            composite_threshold=composite_threshold,
-            edr_threshold=edr_threshold,
+        scan = await asyncio.to_thread(
+            analyzer.scan_universe,
+            symbols,
+            composite_threshold,
+            edr_threshold,
+            time_budget,
         )
+        signals = scan.signals
 
         # Convert to dict
         signals_dict = [
@@ -1211,10 +921,16 @@ async def scan_mapi_market(request: dict):
                 "extreme_low": len(extreme_low),
                 "low": len(low),
                 "not_in_zone": len(not_in_zone),
+                "requested": len(symbols),
+                "failed": len(scan.failed),
+                "timed_out": len(scan.timed_out),
+                "elapsed_seconds": round(scan.elapsed_seconds, 2),
             },
             "signals": signals_dict,
             "extreme_low_signals": extreme_low,
             "low_signals": low,
+            "failed": scan.failed,
+            "timed_out": scan.timed_out,
         }
 
     except HTTPException:
@@ -1284,7 +1000,8 @@ async def get_macdv_dashboard(
         calculator = MACDVCalculator(fast_length=12, slow_length=26, signal_length=9, atr_length=26)
 
         # Get dashboard data
-        dashboard = calculator.get_dashboard_data(
+        dashboard = await asyncio.to_thread(
+            calculator.get_dashboard_data,
             symbols=SWING_FRAMEWORK_TICKERS,
             timeframes=tf_list
         )
@@ -1310,11 +1027,16 @@ async def get_macdv_rsi_bands(
     period: str = "10y",
     pct_lookback: int = 252,
     horizon: int = 7,
+    macdv_lo: float = 120.0,
+    macdv_hi: float = 150.0,
     force_refresh: bool = False,
 ):
     """
     MACD-V 120–150 × RSI-MA percentile band analysis (D7-style fixed forward return).
 
+    `macdv_lo`/`macdv_hi` select another MACD-V band; every band and horizon
+    is answered from the same persisted event cube.
+
     Returns:
     - Summary comparing RSI<50 vs RSI>=50 within MACD-V 120–150
     - Per-ticker + ALL table across RSI percentile bands
@@ -1331,8 +1053,13 @@ async def get_macdv_rsi_bands(
             raise HTTPException(status_code=400, detail="pct_lookback out of range")
         if horizon < 1 or horizon > 60:
             raise HTTPException(status_code=400, detail="horizon out of range")
+        if macdv_hi <= macdv_lo:
+            raise HTTPException(status_code=400, detail="macdv_hi must be greater than macdv_lo")
 
-        cache_key = _cache_key("macdv_rsi_bands_v2", ",".join(ticker_list), period, str(pct_lookback), str(horizon))
+        cache_key = _cache_key(
+            "macdv_rsi_bands_v2", ",".join(ticker_list), period, str(pct_lookback), str(horizon),
+            f"{macdv_lo:g}", f"{macdv_hi:g}",
+        )
         cache_file = os.path.join(CACHE_DIR, f"macdv_rsi_bands_{_file_safe_slug(cache_key)}.json")
 
         if not force_refresh:
@@ -1357,11 +1084,14 @@ async def get_macdv_rsi_bands(
                         "timestamp": datetime.now().isoformat(),
                     }
 
-            result = run_macdv_120_150_rsi_band_analysis(
+            result = await asyncio.to_thread(
+                run_macdv_120_150_rsi_band_analysis,
                 tickers=ticker_list,
                 period=period,
                 pct_lookback=pct_lookback,
                 horizon=horizon,
+                macdv_lo=macdv_lo,
+                macdv_hi=macdv_hi,
             )
             _write_disk_cache(cache_file, result)
 
@@ -2212,10 +1942,11 @@ async def run_advanced_backtest_endpoint(request: AdvancedBacktestRequest):
 async def simulate_trade_with_management(
     ticker: str,
     entry_percentile: float = 5.0,
-    days_to_simulate: int = 21
+    days_to_simulate: int = 21,
+    num_entries: int = 1
 ):
     """
-    Simulate a single trade with advanced trade management.
+    Simulate trades with advanced trade management.
 
     Shows day-by-day:
     - Exit pressure
@@ -2223,8 +1954,13 @@ async def simulate_trade_with_management(
     - Exposure recommendations
     - Trailing stop levels
     - Volatility metrics
+
+    `simulation` is always the most recent entry. With num_entries > 1 the
+    N most recent entries are also returned under `simulations` (newest
+    first); they share one conditional-expectancy index for the ticker.
     """
     ticker = ticker.upper()
+    num_entries = max(1, min(num_entries, 100))
 
     try:
         # Get historical data
@@ -2254,29 +1990,29 @@ async def simulate_trade_with_management(
                 detail=f"No entry events found at {entry_percentile}% threshold"
             )
 
-        # Use the most recent entry event
-        recent_event = entry_events[-1]
-        entry_date = recent_event['entry_date']
-        entry_idx = data.index.get_loc(entry_date)
-
         # Import simulation function
-        from advanced_trade_manager import simulate_trade_with_advanced_management
+        from advanced_trade_manager import simulate_trades_with_advanced_management
 
-        simulation = simulate_trade_with_advanced_management(
+        # Most recent entry events first
+        selected_events = entry_events[::-1][:num_entries]
+
+        simulations = simulate_trades_with_advanced_management(
             historical_data=data,
             rsi_ma_percentiles=percentile_ranks,
-            entry_idx=entry_idx,
-            entry_percentile=recent_event['entry_percentile'],
-            entry_price=recent_event['entry_price'],
+            entry_events=selected_events,
             historical_events=entry_events,
             max_hold_days=days_to_simulate
         )
 
-        return {
+        response = {
             "ticker": ticker,
-            "simulation": simulation,
+            "simulation": simulations[0],
             "timestamp": datetime.now().isoformat()
         }
+        if num_entries > 1:
+            response["simulations"] = simulations
+
+        return response
 
     except HTTPException:
         raise
@@ -16,7 +16,9 @@ from __future__ import annotations
 import asyncio
 import os
 import tempfile
+import threading
 import time
+from concurrent.futures import Future
 from dataclasses import dataclass
 from datetime import datetime, timedelta
 from pathlib import Path
@@ -37,6 +39,13 @@ router = APIRouter()
 _CACHE_TTL_SECONDS = int(os.getenv("DAILY_TREND_CACHE_TTL_SECONDS", "30"))
 _cache: Dict[str, Tuple[float, Dict[str, Any]]] = {}
 
+# Max symbols computed at once by /api/daily-trend/batch
+_BATCH_CONCURRENCY = int(os.getenv("DAILY_TREND_BATCH_CONCURRENCY", "8"))
+
+# Session windows in NY minutes.
+_PRE_START, _PRE_END = 4 * 60, 9 * 60 + 30  # 04:00-09:29
+_RTH_START, _RTH_END = 9 * 60 + 30, 16 * 60  # 09:30-15:59
+
 
 class DailyTrendBatchRequest(BaseModel):
     symbols: List[str] = Field(..., min_length=1, max_length=50)
@@ -119,21 +128,6 @@ def _ensure_ny_timezone(df: pd.DataFrame) -> pd.DataFrame:
     return df
 
 
-def _time_mins(ts: pd.Timestamp) -> int:
-    return int(ts.hour) * 60 + int(ts.minute)
-
-
-def _filter_session(df: pd.DataFrame, *, date_value: datetime.date, start_mins: int, end_mins: int) -> pd.DataFrame:
-    if df.empty:
-        return df
-    mask_date = pd.Index(df.index.date) == date_value
-    df_d = df.loc[mask_date]
-    if df_d.empty:
-        return df_d
-    mins = df_d.index.map(_time_mins)
-    return df_d.loc[(mins >= start_mins) & (mins < end_mins)]
-
-
 def _as_float(value: Any) -> Optional[float]:
     try:
         if value is None:
@@ -194,47 +188,164 @@ def _generate_sample_intraday(*, days: int, interval: str) -> pd.DataFrame:
     return df
 
 
-def _extract_latest_dates(df: pd.DataFrame) -> Tuple[datetime.date, Optional[datetime.date]]:
-    dates = list(pd.Index(df.index.date).unique())
-    if not dates:
-        raise ValueError("No dates in intraday series")
-    current = dates[-1]
-    prev = dates[-2] if len(dates) >= 2 else None
-    return current, prev
+@dataclass
+class IntradayBars:
+    """
+    NY-time intraday bars with a per-session offset index.
+
+    Rows are sorted, so each calendar date is the contiguous row range
+    day_starts[i]:day_starts[i + 1]; `minutes` holds each row's minute of day.
+    """
+
+    df: pd.DataFrame
+    data_source: str
+    days: int
+    fetched_at: float
+    dates: List[Any]
+    day_starts: np.ndarray
+    minutes: np.ndarray
+    monotonic_days: np.ndarray
+
+    @classmethod
+    def build(cls, df: pd.DataFrame, *, data_source: str, days: int) -> "IntradayBars":
+        df = _ensure_ny_timezone(df)
+        if not df.index.is_monotonic_increasing:
+            df = df.sort_index(kind="stable")
+        idx = pd.DatetimeIndex(df.index)
+        minutes = np.asarray(idx.hour * 60 + idx.minute, dtype=np.int64)
+        day_keys = idx.normalize()
+        breaks = np.flatnonzero(day_keys[1:] != day_keys[:-1]) + 1
+        day_starts = np.concatenate(([0], breaks, [len(idx)])).astype(np.int64) if len(idx) else np.zeros(1, np.int64)
+
+        # A DST fall-back repeats an hour; those days fall back to a mask in session()
+        drops = np.zeros(len(idx), dtype=bool)
+        drops[1:] = np.diff(minutes) < 0
+        drops[day_starts[:-1]] = False
+        monotonic_days = np.logical_not(np.add.reduceat(drops, day_starts[:-1])) if len(idx) else np.zeros(0, bool)
+
+        return cls(
+            df=df,
+            data_source=data_source,
+            days=int(days),
+            fetched_at=time.time(),
+            dates=[ts.date() for ts in day_keys[day_starts[:-1]]],
+            day_starts=day_starts,
+            minutes=minutes,
+            monotonic_days=monotonic_days,
+        )
+
+    def trimmed(self, days: int) -> "IntradayBars":
+        """The last `days` sessions, sharing this instance's frame and index."""
+        if len(self.dates) <= days:
+            return self
+        cut = int(self.day_starts[-days - 1])
+        return IntradayBars(
+            df=self.df.iloc[cut:],
+            data_source=self.data_source,
+            days=int(days),
+            fetched_at=self.fetched_at,
+            dates=self.dates[-days:],
+            day_starts=self.day_starts[-days - 1:] - cut,
+            minutes=self.minutes[cut:],
+            monotonic_days=self.monotonic_days[-days:],
+        )
+
+    def day(self, pos: int) -> pd.DataFrame:
+        return self.df.iloc[self.day_starts[pos]:self.day_starts[pos + 1]]
+
+    def session(self, pos: int, start_mins: int, end_mins: int) -> pd.DataFrame:
+        """Bars of session date `pos` with start_mins <= minute of day < end_mins."""
+        lo, hi = int(self.day_starts[pos]), int(self.day_starts[pos + 1])
+        mins = self.minutes[lo:hi]
+        if not self.monotonic_days[pos]:
+            return self.df.iloc[lo:hi].loc[(mins >= start_mins) & (mins < end_mins)]
+        first, last = np.searchsorted(mins, [start_mins, end_mins], side="left")
+        return self.df.iloc[lo + first:lo + last]
+
+
+_bars_cache: Dict[Tuple[str, str], IntradayBars] = {}
+_bars_inflight: Dict[Tuple[str, str], Future] = {}
+_bars_lock = threading.Lock()
+
+
+def _load_intraday_bars(symbol: str, *, interval: str, days: int) -> IntradayBars:
+    try:
+        df = _download_intraday(symbol, interval=interval, days=days)
+        if df is None or df.empty:
+            raise ValueError("Empty intraday dataset")
+        data_source = "yfinance"
+    except Exception as e:
+        df = _generate_sample_intraday(days=days, interval=interval)
+        df.attrs["fallback_reason"] = str(e)
+        data_source = df.attrs.get("data_source", "sample_intraday")
+    return IntradayBars.build(df, data_source=data_source, days=days)
+
+
+def _get_intraday_bars(symbol: str, *, interval: str, days: int) -> IntradayBars:
+    """
+    Intraday bars for (symbol, interval), cached for _CACHE_TTL_SECONDS.
+
+    A cached download covering at least `days` sessions is trimmed instead of
+    refetched, and concurrent callers for the same key share one download.
+    """
+    key = (symbol.upper(), interval)
+    with _bars_lock:
+        cached = _bars_cache.get(key)
+        if cached is not None and (time.time() - cached.fetched_at) < _CACHE_TTL_SECONDS and cached.days >= days:
+            return cached.trimmed(days)
+        future = _bars_inflight.get(key)
+        owner = future is None
+        if owner:
+            future = Future()
+            _bars_inflight[key] = future
+
+    if not owner:
+        bars = future.result()
+        if bars.days >= days:
+            return bars.trimmed(days)
+        # The in-flight download was shorter than needed; fetch our own span
+        return _load_intraday_bars(symbol, interval=interval, days=days)
+
+    try:
+        bars = _load_intraday_bars(symbol, interval=interval, days=days)
+    except BaseException as e:
+        with _bars_lock:
+            _bars_inflight.pop(key, None)
+        future.set_exception(e)
+        raise
+    with _bars_lock:
+        _bars_cache[key] = bars
+        _bars_inflight.pop(key, None)
+    future.set_result(bars)
+    return bars
 
 
 def _compute_levels(
-    df: pd.DataFrame,
+    bars: IntradayBars,
     *,
     orb_minutes: int,
 ) -> Tuple[Dict[str, Optional[float]], Optional[float]]:
-    current_date, prev_date = _extract_latest_dates(df)
-
-    # Session windows in NY minutes.
-    pre_start, pre_end = 4 * 60, 9 * 60 + 30  # 04:00-09:29
-    rth_start, rth_end = 9 * 60 + 30, 16 * 60  # 09:30-15:59
+    if not bars.dates:
+        raise ValueError("No dates in intraday series")
+    current = len(bars.dates) - 1
+    prev = current - 1 if current >= 1 else None
 
-    pm_df = _filter_session(df, date_value=current_date, start_mins=pre_start, end_mins=pre_end)
+    pm_df = bars.session(current, _PRE_START, _PRE_END)
 
     pmh = _as_float(pm_df["High"].max()) if not pm_df.empty else None
     pml = _as_float(pm_df["Low"].min()) if not pm_df.empty else None
 
     pdh = pdl = prev_close = None
-    if prev_date is not None:
-        prev_rth = _filter_session(df, date_value=prev_date, start_mins=rth_start, end_mins=rth_end)
-        prev_day = df.loc[pd.Index(df.index.date) == prev_date] if prev_rth.empty else prev_rth
+    if prev is not None:
+        prev_rth = bars.session(prev, _RTH_START, _RTH_END)
+        prev_day = bars.day(prev) if prev_rth.empty else prev_rth
         if not prev_day.empty:
             pdh = _as_float(prev_day["High"].max())
             pdl = _as_float(prev_day["Low"].min())
             prev_close = _as_float(prev_day["Close"].iloc[-1])
 
     # ORB: current day RTH open to open+orb_minutes.
-    orb_df = _filter_session(
-        df,
-        date_value=current_date,
-        start_mins=rth_start,
-        end_mins=rth_start + int(orb_minutes),
-    )
+    orb_df = bars.session(current, _RTH_START, _RTH_START + int(orb_minutes))
     orb_high = _as_float(orb_df["High"].max()) if not orb_df.empty else None
     orb_low = _as_float(orb_df["Low"].min()) if not orb_df.empty else None
 
@@ -286,18 +397,10 @@ def compute_daily_trend(
     if cached and (now - cached[0]) < _CACHE_TTL_SECONDS:
         return cached[1]
 
-    try:
-        df = _download_intraday(symbol, interval=interval, days=days)
-        if df is None or df.empty:
-            raise ValueError("Empty intraday dataset")
-        data_source = "yfinance"
-    except Exception as e:
-        df = _generate_sample_intraday(days=days, interval=interval)
-        df.attrs["fallback_reason"] = str(e)
-        data_source = df.attrs.get("data_source", "sample_intraday")
-
-    df = _ensure_ny_timezone(df)
-    levels, prev_close = _compute_levels(df, orb_minutes=orb_minutes)
+    bars = _get_intraday_bars(symbol, interval=interval, days=days)
+    df = bars.df
+    data_source = bars.data_source
+    levels, prev_close = _compute_levels(bars, orb_minutes=orb_minutes)
 
     price = _as_float(df["Close"].iloc[-1]) if not df.empty else None
     chg_pct = None
@@ -346,21 +449,25 @@ async def get_daily_trend(
 
 @router.post("/api/daily-trend/batch")
 async def get_daily_trend_batch(request: DailyTrendBatchRequest):
-    async def _one(sym: str) -> Tuple[str, Dict[str, Any] | None, str | None]:
-        try:
-            data = await asyncio.to_thread(
-                compute_daily_trend,
-                sym,
-                interval=request.interval,
-                days=request.days,
-                orb_minutes=request.orb_minutes,
-                include_candles=False,
-            )
-            return sym, data, None
-        except Exception as e:
-            return sym, None, str(e)
+    # Bounded so a large scan does not flood Yahoo; duplicate symbols are computed once.
+    sem = asyncio.Semaphore(max(1, _BATCH_CONCURRENCY))
 
-    tasks = [_one(sym) for sym in request.symbols]
+    async def _one(sym: str) -> Tuple[str, Dict[str, Any] | None, str | None]:
+        async with sem:
+            try:
+                data = await asyncio.to_thread(
+                    compute_daily_trend,
+                    sym,
+                    interval=request.interval,
+                    days=request.days,
+                    orb_minutes=request.orb_minutes,
+                    include_candles=False,
+                )
+                return sym, data, None
+            except Exception as e:
+                return sym, None, str(e)
+
+    tasks = [_one(sym) for sym in dict.fromkeys(s.upper() for s in request.symbols)]
     results = await asyncio.gather(*tasks)
 
     data: Dict[str, Any] = {}
@@ -11,6 +11,7 @@ from typing import Dict, Optional, Tuple
 import yfinance as yf
 import pandas as pd
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
 from datetime import datetime, timedelta
 import sys
 from pathlib import Path
@@ -19,6 +20,7 @@ from starlette.concurrency import run_in_threadpool
 # Add parent directory to path to import ticker_utils
 sys.path.insert(0, str(Path(__file__).parent.parent))
 from ticker_utils import resolve_yahoo_symbol
+from yf_batch import download_frames
 
 router = APIRouter(prefix="/api/lower-extension", tags=["Lower Extension"])
 
@@ -43,6 +45,87 @@ def _cache_set(ticker: str, length: int, lookback_days: int, payload: dict) -> N
     _METRICS_CACHE[key] = (time.time(), payload)
 
 
+# Daily bars and MBAD level series shared by /metrics, /metrics-batch and /candles
+_BARS_CACHE: dict[str, tuple[float, datetime, pd.DataFrame]] = {}
+_LEVELS_CACHE: dict[tuple[str, int], tuple[float, pd.DataFrame]] = {}
+
+
+def _get_daily_bars(symbol: str, start_date: datetime, end_date: datetime, timeout: int = 10) -> pd.DataFrame:
+    """
+    Daily OHLCV bars from start_date, served from the per-symbol bar cache when it
+    is fresh and reaches back far enough; otherwise downloaded and cached.
+    """
+    start_day = pd.Timestamp(start_date.date())
+    entry = _BARS_CACHE.get(symbol)
+    if entry is not None:
+        ts, cached_start, bars = entry
+        if (time.time() - ts) <= _METRICS_CACHE_TTL_SECONDS and cached_start <= start_date:
+            return bars[bars.index >= start_day]
+
+    data = yf.download(
+        symbol, start=start_date, end=end_date, progress=False, timeout=timeout
+    )
+    # Flatten yfinance MultiIndex columns if present
+    if isinstance(data.columns, pd.MultiIndex):
+        data.columns = [c[0] for c in data.columns]
+    if not data.empty:
+        _BARS_CACHE[symbol] = (time.time(), start_date, data)
+    return data
+
+
+def _metrics_history_start(end_date: datetime, length: int, lookback_days: int) -> datetime:
+    # Calendar-day padding so we reliably get enough trading bars for `length`
+    padding_days = int((lookback_days + length) * 2) + 10
+    return end_date - timedelta(days=padding_days)
+
+
+def _prime_bar_cache(tickers: list[str], length: int, lookback_days: int) -> None:
+    """
+    Fill the bar and level-series caches for many tickers with one multi-symbol
+    download and one stacked MBAD kernel call. Symbols already cached are skipped;
+    symbols missing from the bulk response are left to the per-ticker path.
+    """
+    end_date = datetime.now()
+    start_date = _metrics_history_start(end_date, length, lookback_days)
+    symbols = list(dict.fromkeys(resolve_yahoo_symbol(t) for t in tickers))
+    now = time.time()
+    missing = [
+        s for s in symbols
+        if s not in _BARS_CACHE
+        or (now - _BARS_CACHE[s][0]) > _METRICS_CACHE_TTL_SECONDS
+        or _BARS_CACHE[s][1] > start_date
+    ]
+
+    if missing:
+        frames = download_frames(missing, start=start_date, end=end_date, timeout=20)
+        fetched_at = time.time()
+        for symbol, bars in frames.items():
+            if not bars.empty:
+                _BARS_CACHE[symbol] = (fetched_at, start_date, bars)
+
+    pending: dict[str, pd.DataFrame] = {}
+    for symbol in symbols:
+        entry = _BARS_CACHE.get(symbol)
+        if entry is None:
+            continue
+        cached_levels = _LEVELS_CACHE.get((symbol, int(length)))
+        if cached_levels is None or cached_levels[0] != entry[0]:
+            pending[symbol] = entry[2].dropna(subset=["Open", "Close"])
+    for symbol, levels in mbad_level_series_many(pending, int(length)).items():
+        _LEVELS_CACHE[(symbol, int(length))] = (_BARS_CACHE[symbol][0], levels)
+
+
+def _get_level_series(symbol: str, length: int) -> pd.DataFrame:
+    """MBAD level series over the cached bars for symbol (call after _get_daily_bars)."""
+    bars_ts, _, bars = _BARS_CACHE[symbol]
+    entry = _LEVELS_CACHE.get((symbol, int(length)))
+    if entry is not None and entry[0] == bars_ts:
+        return entry[1]
+    levels = mbad_level_series(bars.dropna(subset=["Open", "Close"]), int(length))
+    _LEVELS_CACHE[(symbol, int(length))] = (bars_ts, levels)
+    return levels
+
+
 def get_or_calculate_mbad_levels(ticker: str, length: int = 30, lookback_days: int = 30) -> dict:
     cached = _cache_get(ticker, length, lookback_days)
     if cached is not None:
@@ -58,10 +141,63 @@ class LowerExtensionBatchRequest(BaseModel):
     lookback_days: int = 30
 
 
-def _round_to_tick(value: float, tick_size: float = 0.01) -> float:
+def _round_to_tick(value, tick_size: float = 0.01):
+    """Round a level (scalar or array) to the tick grid."""
     if tick_size <= 0:
-        return float(value)
-    return float(np.round(value / tick_size) * tick_size)
+        return value if isinstance(value, np.ndarray) else float(value)
+    rounded = np.round(value / tick_size) * tick_size
+    return rounded if isinstance(rounded, np.ndarray) else float(rounded)
+
+
+_LEVEL_COLUMNS = (
+    "lim_lower", "ext_lower", "dev_lower", "dev_lower2",
+    "basis", "dev_upper", "ext_upper", "lim_upper",
+)
+
+
+def _weighted_moments_rows(
+    src_current_to_past: np.ndarray, weights: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    PineScript-compatible weighted moments for each row of a (windows, length) array.
+    Rows are ordered current->past; each row is reduced exactly as a single window would be.
+    """
+    src = np.asarray(src_current_to_past, dtype=float)
+    weights = np.broadcast_to(np.asarray(weights, dtype=float), src.shape)
+    length = src.shape[1]
+
+    sum_w = np.sum(weights, axis=1)
+    collapsed = ~np.isfinite(sum_w) | (sum_w <= 0)
+    if collapsed.any():
+        # Fallback to unweighted moments if inferred-volume weights collapse to zero
+        weights = weights.copy()
+        weights[collapsed] = 1.0
+        sum_w = np.where(collapsed, float(length), sum_w)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean = np.sum(src * weights, axis=1) / sum_w
+        diffs = src - mean[:, None]
+
+        m2 = np.sum((diffs**2) * weights, axis=1) / sum_w
+        dev = np.sqrt(np.maximum(m2, 0.0))
+        valid = np.isfinite(dev) & (dev > 0)
+
+        m3 = np.sum((diffs**3) * weights, axis=1) / sum_w
+        m4 = np.sum((diffs**4) * weights, axis=1) / sum_w
+        m5 = np.sum((diffs**5) * weights, axis=1) / sum_w
+        m6 = np.sum((diffs**6) * weights, axis=1) / sum_w
+
+        dev2 = dev * dev
+        dev3 = dev2 * dev
+        dev4 = dev2 * dev2
+        dev5 = dev4 * dev
+        dev6 = dev3 * dev3
+
+        skew = np.where(valid, m3 / dev3, 0.0)
+        kurt = np.where(valid, m4 / dev4, 0.0)
+        hskew = np.where(valid, m5 / dev5, 0.0)
+        hkurt = np.where(valid, m6 / dev6, 0.0)
+    return mean, np.where(valid, dev, 0.0), skew, kurt, hskew, hkurt
 
 
 def _weighted_moments(
@@ -77,37 +213,93 @@ def _weighted_moments(
     if src.size == 0 or weights.size != src.size:
         return 0.0, 0.0, 0.0, 0.0, 0.0, 0.0
 
-    sum_w = float(np.sum(weights))
-    if not np.isfinite(sum_w) or sum_w <= 0:
-        # Fallback to unweighted moments if inferred-volume weights collapse to zero
-        weights = np.ones_like(src, dtype=float)
-        sum_w = float(src.size)
+    moments = _weighted_moments_rows(src[None, :], weights[None, :])
+    return tuple(float(m[0]) for m in moments)
 
-    mean = float(np.sum(src * weights) / sum_w)
-    diffs = src - mean
 
-    m2 = float(np.sum((diffs**2) * weights) / sum_w)
-    dev = float(np.sqrt(max(m2, 0.0)))
+def mbad_level_series_many(
+    frames: Dict[str, pd.DataFrame],
+    length: int,
+    *,
+    time_weighting: bool = True,
+    inferred_volume_weighting: bool = True,
+    tick_size: float = 0.01,
+) -> Dict[str, pd.DataFrame]:
+    """
+    MBAD levels and z-score for every bar of every frame, matching the provided PineScript.
+
+    Uses source=close and weights: (len-i) * abs(close[i]-open[i]) by default.
+    Bars without a full `length` window are NaN. The windows of all frames are
+    taken with sliding_window_view and reduced together in one kernel call.
+    """
+    columns = list(_LEVEL_COLUMNS) + ["zscore"]
+    outputs: Dict[str, np.ndarray] = {}
+    close_parts, open_parts, owners = [], [], []
+    for key, data in frames.items():
+        close = data["Close"].to_numpy(dtype=float)
+        open_ = data["Open"].to_numpy(dtype=float)
+        outputs[key] = np.full((len(close), len(columns)), np.nan)
+        if length < 1 or len(close) < length:
+            continue
+        # PineScript indexing: column 0 is the "current bar" of each window
+        close_parts.append(np.ascontiguousarray(sliding_window_view(close, length)[:, ::-1]))
+        open_parts.append(np.ascontiguousarray(sliding_window_view(open_, length)[:, ::-1]))
+        owners.append(key)
+
+    if owners:
+        close_windows = np.concatenate(close_parts)
+        open_windows = np.concatenate(open_parts)
+
+        time_w = np.arange(length, 0, -1, dtype=float) if time_weighting else 1.0
+        iv_w = np.abs(close_windows - open_windows) if inferred_volume_weighting else 1.0
+        weights = time_w * iv_w
+
+        mean, dev, skew, kurt, hskew, hkurt = _weighted_moments_rows(close_windows, weights)
+
+        # PineScript MBAD levels
+        levels = (
+            mean - dev * hkurt + dev * hskew,  # lim_lower
+            mean - dev * kurt + dev * skew,    # ext_lower
+            mean - dev,                        # dev_lower
+            mean - 2 * dev,                    # dev_lower2
+            mean,                              # basis
+            mean + dev,                        # dev_upper
+            mean + dev * kurt + dev * skew,    # ext_upper
+            mean + dev * hkurt + dev * hskew,  # lim_upper
+        )
+        stacked = np.empty((len(mean), len(columns)))
+        for col, level in enumerate(levels):
+            stacked[:, col] = _round_to_tick(level, tick_size)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            stacked[:, -1] = np.where(dev > 0, (close_windows[:, 0] - mean) / dev, 0.0)
 
-    if not np.isfinite(dev) or dev <= 0:
-        return mean, 0.0, 0.0, 0.0, 0.0, 0.0
+        offset = 0
+        for key, part in zip(owners, close_parts):
+            outputs[key][length - 1 :] = stacked[offset : offset + len(part)]
+            offset += len(part)
 
-    m3 = float(np.sum((diffs**3) * weights) / sum_w)
-    m4 = float(np.sum((diffs**4) * weights) / sum_w)
-    m5 = float(np.sum((diffs**5) * weights) / sum_w)
-    m6 = float(np.sum((diffs**6) * weights) / sum_w)
+    return {
+        key: pd.DataFrame(outputs[key], index=data.index, columns=columns)
+        for key, data in frames.items()
+    }
 
-    dev2 = dev * dev
-    dev3 = dev2 * dev
-    dev4 = dev2 * dev2
-    dev5 = dev4 * dev
-    dev6 = dev3 * dev3
 
-    skew = float(m3 / dev3)
-    kurt = float(m4 / dev4)
-    hskew = float(m5 / dev5)
-    hkurt = float(m6 / dev6)
-    return mean, dev, skew, kurt, hskew, hkurt
+def mbad_level_series(
+    data: pd.DataFrame,
+    length: int,
+    *,
+    time_weighting: bool = True,
+    inferred_volume_weighting: bool = True,
+    tick_size: float = 0.01,
+) -> pd.DataFrame:
+    """MBAD levels and z-score for every bar of one frame (see mbad_level_series_many)."""
+    return mbad_level_series_many(
+        {"": data},
+        length,
+        time_weighting=time_weighting,
+        inferred_volume_weighting=inferred_volume_weighting,
+        tick_size=tick_size,
+    )[""]
 
 
 def _mbad_levels_for_index(
@@ -124,47 +316,14 @@ def _mbad_levels_for_index(
     Uses source=close and weights: (len-i) * abs(close[i]-open[i]) by default.
     """
     window = data.iloc[idx - length + 1 : idx + 1]
-    close_window = window["Close"].to_numpy(dtype=float)
-    open_window = window["Open"].to_numpy(dtype=float)
-
-    # Convert to PineScript indexing: element 0 is "current bar" within the window
-    close_curr_to_past = close_window[::-1]
-    open_curr_to_past = open_window[::-1]
-
-    time_w = (np.arange(length, 0, -1, dtype=float) if time_weighting else 1.0)
-    iv_w = (
-        np.abs(close_curr_to_past - open_curr_to_past)
-        if inferred_volume_weighting
-        else 1.0
-    )
-    weights = time_w * iv_w
-
-    mean, dev, skew, kurt, hskew, hkurt = _weighted_moments(close_curr_to_past, weights)
-
-    # PineScript MBAD levels
-    lim_lower = _round_to_tick(mean - dev * hkurt + dev * hskew, tick_size)
-    ext_lower = _round_to_tick(mean - dev * kurt + dev * skew, tick_size)
-    dev_lower = _round_to_tick(mean - dev, tick_size)
-    dev_lower2 = _round_to_tick(mean - 2 * dev, tick_size)
-    basis = _round_to_tick(mean, tick_size)
-    dev_upper = _round_to_tick(mean + dev, tick_size)
-    ext_upper = _round_to_tick(mean + dev * kurt + dev * skew, tick_size)
-    lim_upper = _round_to_tick(mean + dev * hkurt + dev * hskew, tick_size)
-
-    close_val = float(data["Close"].iloc[idx])
-    zscore = float((close_val - mean) / dev) if dev > 0 else 0.0
-
-    return {
-        "lim_lower": lim_lower,
-        "ext_lower": ext_lower,
-        "dev_lower": dev_lower,
-        "dev_lower2": dev_lower2,
-        "basis": basis,
-        "dev_upper": dev_upper,
-        "ext_upper": ext_upper,
-        "lim_upper": lim_upper,
-        "zscore": zscore,
-    }
+    levels = mbad_level_series(
+        window,
+        length,
+        time_weighting=time_weighting,
+        inferred_volume_weighting=inferred_volume_weighting,
+        tick_size=tick_size,
+    ).iloc[-1]
+    return {name: float(value) for name, value in levels.items()}
 
 
 def calculate_mbad_levels(ticker: str, length: int = 30, lookback_days: int = 30):
@@ -172,21 +331,13 @@ def calculate_mbad_levels(ticker: str, length: int = 30, lookback_days: int = 30
     try:
         symbol = resolve_yahoo_symbol(ticker)
         end_date = datetime.now()
-        # Calendar-day padding so we reliably get enough trading bars for `length`
-        padding_days = int((lookback_days + length) * 2) + 10
-        start_date = end_date - timedelta(days=padding_days)
+        start_date = _metrics_history_start(end_date, length, lookback_days)
 
-        data = yf.download(
-            symbol, start=start_date, end=end_date, progress=False, timeout=10
-        )
+        data = _get_daily_bars(symbol, start_date, end_date, timeout=10)
 
         if data.empty:
             raise ValueError(f"No data available for {ticker}")
 
-        # Flatten yfinance MultiIndex columns if present
-        if isinstance(data.columns, pd.MultiIndex):
-            data.columns = [c[0] for c in data.columns]
-
         data = data.dropna(subset=["Open", "Close"]).copy()
         if len(data) < length:
             # Some symbols (new listings, illiquid products) may not have enough bars yet.
@@ -196,13 +347,14 @@ def calculate_mbad_levels(ticker: str, length: int = 30, lookback_days: int = 30
                     f"Insufficient bars for MBAD: have {len(data)}, need {length}"
                 )
             length = len(data)
+            levels = mbad_level_series(data, length)
+        else:
+            # A bar's levels only depend on its own window, so the shared series
+            # over the (possibly longer) cached history applies as-is
+            levels = _get_level_series(symbol, length).reindex(data.index)
 
         # MBAD settings requested: source=close, interpretation=mean reversion (levels unaffected)
-        tick_size = 0.01
-        current_idx = len(data) - 1
-        current_levels = _mbad_levels_for_index(
-            data, current_idx, length, tick_size=tick_size
-        )
+        current_levels = levels.iloc[-1]
 
         current_price = float(data["Close"].iloc[-1])
         lower_ext_value = float(current_levels["ext_lower"])
@@ -220,22 +372,14 @@ def calculate_mbad_levels(ticker: str, length: int = 30, lookback_days: int = 30
         # Calculate lookback metrics using each day's MBAD ext_lower (not a static 1σ band)
         lookback_rows = min(int(lookback_days), len(data))
         recent_data = data.tail(lookback_rows)
-        pct_dists = []
-        breach_count = 0
-
-        start_i = len(data) - lookback_rows
-        for i in range(start_i, len(data)):
-            if i < length - 1:
-                continue
-            hist_levels = _mbad_levels_for_index(data, i, length, tick_size=tick_size)
-            hist_lower_ext = float(hist_levels["ext_lower"])
-            if not np.isfinite(hist_lower_ext) or hist_lower_ext == 0:
-                continue
-            hist_price = float(data["Close"].iloc[i])
-            dist = ((hist_price - hist_lower_ext) / hist_lower_ext) * 100
-            pct_dists.append(float(dist))
-            if dist < 0:
-                breach_count += 1
+
+        start_i = max(len(data) - lookback_rows, length - 1)
+        hist_lower_ext = levels["ext_lower"].to_numpy(dtype=float)[start_i:]
+        hist_prices = data["Close"].to_numpy(dtype=float)[start_i:]
+        usable = np.isfinite(hist_lower_ext) & (hist_lower_ext != 0)
+        dists = ((hist_prices[usable] - hist_lower_ext[usable]) / hist_lower_ext[usable]) * 100
+        pct_dists = [float(d) for d in dists]
+        breach_count = int(np.sum(dists < 0))
 
         min_pct_dist_30d = min(pct_dists) if pct_dists else 0
         median_abs_pct_dist_30d = np.median([abs(d) for d in pct_dists]) if pct_dists else 0
@@ -322,14 +466,22 @@ async def get_lower_extension_metrics_batch(req: LowerExtensionBatchRequest):
     """
     Get lower extension MBAD metrics for multiple tickers.
 
-    This reduces frontend fan-out (N requests) and applies a bounded concurrency
-    limit so yfinance calls are less likely to timeout or get rate-limited.
+    This reduces frontend fan-out (N requests). Bars for all uncached tickers
+    come from a single multi-symbol download; tickers it misses fall back to
+    per-ticker downloads under a bounded concurrency limit so yfinance calls
+    are less likely to timeout or get rate-limited.
     """
 
     tickers = [t.strip().upper() for t in req.tickers if t and t.strip()]
     if not tickers:
         raise HTTPException(status_code=400, detail="No tickers provided")
 
+    # One multi-symbol download + stacked MBAD pass for every ticker not already cached;
+    # the per-ticker workers below then compute from the shared caches.
+    uncached = [t for t in tickers if _cache_get(t, req.length, req.lookback_days) is None]
+    if uncached:
+        await run_in_threadpool(_prime_bar_cache, uncached, req.length, req.lookback_days)
+
     sem = asyncio.Semaphore(4)
     results: dict[str, dict] = {}
     errors: dict[str, str] = {}
@@ -356,17 +508,19 @@ async def get_lower_extension_metrics_batch(req: LowerExtensionBatchRequest):
 
 @router.get("/candles/{ticker}")
 async def get_lower_extension_candles(
-    ticker: str, days: int = 60  # Changed from 365 to 60 for faster loading
+    ticker: str, days: int = 60, length: int = 30  # Changed from 365 to 60 for faster loading
 ):
     """Get historical OHLC candle data with MBAD bands."""
+    return await run_in_threadpool(_lower_extension_candles, ticker.upper(), days, length)
+
+
+def _lower_extension_candles(ticker: str, days: int, length: int) -> dict:
     try:
-        symbol = resolve_yahoo_symbol(ticker.upper())
+        symbol = resolve_yahoo_symbol(ticker)
         end_date = datetime.now()
         start_date = end_date - timedelta(days=days + 30)  # Extra for MA calculation
 
-        data = yf.download(
-            symbol, start=start_date, end=end_date, progress=False, timeout=15
-        )
+        data = _get_daily_bars(symbol, start_date, end_date, timeout=15)
 
         if data.empty:
             raise HTTPException(status_code=404, detail=f"No data for {ticker}")
@@ -374,28 +528,18 @@ async def get_lower_extension_candles(
         close = data["Close"]
         ma = close.rolling(window=30).mean()
         std = close.rolling(window=30).std()
+        mbad = _get_level_series(symbol, length).reindex(data.index)
 
         # Prepare response (limit to requested days)
         data_trimmed = data.tail(days)
 
         candles = []
         for idx, row in data_trimmed.iterrows():
-            # Get MA and STD values safely
-            try:
-                ma_val = ma.loc[idx]
-                std_val = std.loc[idx]
-
-                # Handle MultiIndex or Series result
-                if hasattr(ma_val, 'iloc'):
-                    ma_val = ma_val.iloc[0]
-                if hasattr(std_val, 'iloc'):
-                    std_val = std_val.iloc[0]
-
-                ma_float = float(ma_val) if not pd.isna(ma_val) else None
-                std_float = float(std_val) if not pd.isna(std_val) else None
-            except (KeyError, IndexError):
-                ma_float = None
-                std_float = None
+            ma_val = ma.loc[idx]
+            std_val = std.loc[idx]
+            ma_float = float(ma_val) if not pd.isna(ma_val) else None
+            std_float = float(std_val) if not pd.isna(std_val) else None
+            levels = mbad.loc[idx]
 
             candles.append(
                 {
@@ -410,6 +554,11 @@ async def get_lower_extension_candles(
                     "ma": ma_float,
                     "lower_1sd": float(ma_float - std_float) if (ma_float and std_float) else None,
                     "lower_2sd": float(ma_float - 2 * std_float) if (ma_float and std_float) else None,
+                    # MBAD levels for this bar (None until a full `length` window exists)
+                    "mbad": (
+                        {name: float(value) for name, value in levels.items()}
+                        if not pd.isna(levels["basis"]) else None
+                    ),
                 }
             )
 
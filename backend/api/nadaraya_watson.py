@@ -10,14 +10,19 @@ Formula:
 - lower_band_breached = price < lower_band
 """
 
+import time
+from functools import lru_cache
 from fastapi import APIRouter, HTTPException
+from pydantic import BaseModel, Field
 import numpy as np
+from scipy.signal import lfilter
 from datetime import datetime, timedelta
 import sys
 from pathlib import Path
-from typing import Any, Dict, Optional, Sequence, Tuple, Union
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
 from urllib.parse import quote as _url_quote
 import requests
+from starlette.concurrency import run_in_threadpool
 
 # Add parent directory to path to import ticker_utils
 sys.path.insert(0, str(Path(__file__).parent.parent))
@@ -27,6 +32,21 @@ router = APIRouter(prefix="/api/nadaraya-watson", tags=["Nadaraya-Watson"])
 
 _EPS = 1e-8
 
+OHLC = Tuple[np.ndarray, np.ndarray, np.ndarray]
+
+# Daily (closes, highs, lows) shared by /lower-band, /metrics and /batch
+_BARS_CACHE_TTL_SECONDS = 300
+_BARS_CACHE: Dict[Tuple[str, int], Tuple[float, OHLC]] = {}
+
+
+class NadarayaWatsonBatchRequest(BaseModel):
+    tickers: List[str] = Field(..., min_length=1, max_length=200)
+    length: int = 200
+    bandwidth: float = 8.0
+    atr_period: int = 50
+    atr_mult: float = 2.0
+    lookback_days: Optional[int] = None
+
 
 def _as_np_array(values: Optional[Union[Sequence[float], np.ndarray]]) -> Optional[np.ndarray]:
     if values is None:
@@ -37,16 +57,66 @@ def _as_np_array(values: Optional[Union[Sequence[float], np.ndarray]]) -> Option
     return arr
 
 
-def _rma(values: np.ndarray, length: int) -> Optional[float]:
-    if length <= 0:
-        return None
-    if values.size < length:
-        return None
+@lru_cache(maxsize=64)
+def _kernel_weights(length: int, bandwidth: float) -> Tuple[np.ndarray, np.ndarray]:
+    """Gaussian weights for lags 0..length-1 and their running sums (read-only, cached)."""
+    idx = np.arange(length, dtype=float)
+    weights = np.exp(-(idx**2) / (2.0 * (bandwidth**2)))
+    weights_sum = np.cumsum(weights)
+    weights.setflags(write=False)
+    weights_sum.setflags(write=False)
+    return weights, weights_sum
+
+
+def _rma_series(values: np.ndarray, length: int) -> np.ndarray:
+    """Wilder RMA per bar: NaN until `length` values, seeded with their mean."""
+    out = np.full(values.size, np.nan)
+    if length <= 0 or values.size < length:
+        return out
     seed = float(np.mean(values[:length]))
-    rma = seed
-    for i in range(length, values.size):
-        rma = (rma * (length - 1) + float(values[i])) / length
-    return rma
+    out[length - 1] = seed
+    if values.size > length:
+        decay = (length - 1) / length
+        out[length:] = lfilter([1.0 / length], [1.0, -decay], values[length:], zi=[decay * seed])[0]
+    return out
+
+
+def _true_range(highs: np.ndarray, lows: np.ndarray, closes: np.ndarray) -> np.ndarray:
+    tr = highs - lows
+    if closes.size > 1:
+        prev_close = closes[:-1]
+        tr[1:] = np.maximum.reduce([
+            tr[1:], np.abs(highs[1:] - prev_close), np.abs(lows[1:] - prev_close)
+        ])
+    return tr
+
+
+def _atr_series(highs: np.ndarray, lows: np.ndarray, closes: np.ndarray, length: int) -> np.ndarray:
+    return _rma_series(_true_range(highs, lows, closes), length)
+
+
+def _nw_series(closes: np.ndarray, length: int, bandwidth: float) -> np.ndarray:
+    """
+    NW estimate for every bar in one convolution: bar t uses the most recent
+    min(length, t + 1) closes, weighted by lag (PineScript src[i]).
+    """
+    n = closes.size
+    if n == 0 or length <= 0 or bandwidth <= 0:
+        return np.full(n, np.nan)
+    weights, weights_sum = _kernel_weights(int(length), float(bandwidth))
+    k = min(int(length), n)
+    numerator = np.convolve(closes, weights[:k])[:n]
+    return numerator / weights_sum[np.minimum(np.arange(n), k - 1)]
+
+
+def _last_or_none(series: np.ndarray) -> Optional[float]:
+    if series.size == 0 or not np.isfinite(series[-1]):
+        return None
+    return float(series[-1])
+
+
+def _rma(values: np.ndarray, length: int) -> Optional[float]:
+    return _last_or_none(_rma_series(values, length))
 
 
 def _atr(highs: np.ndarray, lows: np.ndarray, closes: np.ndarray, length: int) -> Optional[float]:
@@ -54,38 +124,65 @@ def _atr(highs: np.ndarray, lows: np.ndarray, closes: np.ndarray, length: int) -
         return None
     if not (highs.size == lows.size == closes.size):
         return None
+    return _last_or_none(_atr_series(highs, lows, closes, length))
 
-    tr = np.empty(closes.size, dtype=float)
-    tr[0] = float(highs[0] - lows[0])
-    prev_close = float(closes[0])
-    for i in range(1, closes.size):
-        high = float(highs[i])
-        low = float(lows[i])
-        true_range = max(high - low, abs(high - prev_close), abs(low - prev_close))
-        tr[i] = true_range
-        prev_close = float(closes[i])
 
-    return _rma(tr, length)
+def _nw_estimate(closes: np.ndarray, length: int, bandwidth: float) -> Optional[float]:
+    return _last_or_none(_nw_series(closes, length, bandwidth))
 
 
-def _nw_estimate(closes: np.ndarray, length: int, bandwidth: float) -> Optional[float]:
-    if closes.size == 0:
-        return None
-    if length <= 0 or bandwidth <= 0:
-        return None
+def nadaraya_watson_envelope(
+    closes: Union[Sequence[float], np.ndarray],
+    highs: Optional[Union[Sequence[float], np.ndarray]] = None,
+    lows: Optional[Union[Sequence[float], np.ndarray]] = None,
+    length: int = 200,
+    bandwidth: float = 8.0,
+    atr_period: int = 50,
+    atr_mult: float = 2.0,
+) -> Dict[str, np.ndarray]:
+    """
+    Full per-bar series: nw_estimate, atr, upper_band and lower_band (NaN where undefined).
+
+    Without highs/lows the ATR is built from closes alone, as in
+    calculate_nadaraya_watson_lower_band.
+    """
+    closes_arr = _as_np_array(closes)
+    highs_arr = _as_np_array(highs) if highs is not None and lows is not None else closes_arr
+    lows_arr = _as_np_array(lows) if highs is not None and lows is not None else closes_arr
+    if not (highs_arr.size == lows_arr.size == closes_arr.size):
+        raise ValueError("closes, highs and lows must have the same length")
+
+    nw = _nw_series(closes_arr, int(length), float(bandwidth))
+    atr = _atr_series(highs_arr, lows_arr, closes_arr, int(atr_period))
+    envelope = atr * float(atr_mult)
+    return {
+        "nw_estimate": nw,
+        "atr": atr,
+        "upper_band": nw + envelope,
+        "lower_band": nw - envelope,
+    }
+
+
+def _finite_ohlc(closes: np.ndarray, highs: np.ndarray, lows: np.ndarray) -> OHLC:
+    mask = np.isfinite(closes) & np.isfinite(highs) & np.isfinite(lows)
+    return closes[mask], highs[mask], lows[mask]
 
-    k = int(min(length, closes.size))
-    idx = np.arange(k, dtype=float)
-    weights = np.exp(-(idx**2) / (2.0 * (bandwidth**2)))
-    weights_sum = float(np.sum(weights))
-    if weights_sum <= 0:
-        return None
 
-    window = closes[-k:][::-1]  # most recent first to match PineScript src[i]
-    return float(np.dot(window, weights) / weights_sum)
+def _frame_ohlc(data) -> OHLC:
+    """Finite (closes, highs, lows) from a yfinance OHLC frame."""
+    required_cols = {"Close", "High", "Low"}
+    missing = [c for c in required_cols if c not in data.columns]
+    if missing:
+        raise ValueError(f"yfinance missing OHLC columns: {', '.join(missing)}")
 
+    return _finite_ohlc(
+        np.asarray(data["Close"].values, dtype=float),
+        np.asarray(data["High"].values, dtype=float),
+        np.asarray(data["Low"].values, dtype=float),
+    )
 
-def _download_ohlc(ticker: str, lookback_days: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+
+def _download_ohlc(ticker: str, lookback_days: int) -> OHLC:
     end_date = datetime.now()
     start_date = end_date - timedelta(days=lookback_days)
     # Try yfinance first (convenient), then fall back to Yahoo chart API (more robust).
@@ -101,20 +198,7 @@ def _download_ohlc(ticker: str, lookback_days: int) -> Tuple[np.ndarray, np.ndar
         if isinstance(getattr(data, "columns", None), pd.MultiIndex):
             data.columns = [c[0] for c in data.columns]
 
-        required_cols = {"Close", "High", "Low"}
-        missing = [c for c in required_cols if c not in data.columns]
-        if missing:
-            raise ValueError(f"yfinance missing OHLC columns: {', '.join(missing)}")
-
-        closes = np.asarray(data["Close"].values, dtype=float)
-        highs = np.asarray(data["High"].values, dtype=float)
-        lows = np.asarray(data["Low"].values, dtype=float)
-
-        mask = np.isfinite(closes) & np.isfinite(highs) & np.isfinite(lows)
-        closes = closes[mask]
-        highs = highs[mask]
-        lows = lows[mask]
-
+        closes, highs, lows = _frame_ohlc(data)
         if closes.size == 0:
             raise ValueError("yfinance returned no finite OHLC data")
 
@@ -147,10 +231,7 @@ def _download_ohlc(ticker: str, lookback_days: int) -> Tuple[np.ndarray, np.ndar
             raise ValueError(f"Yahoo chart API returned empty OHLC arrays for {ticker}")
 
         # Replace nulls with NaN and filter to finite triplets.
-        mask = np.isfinite(closes) & np.isfinite(highs) & np.isfinite(lows)
-        closes = closes[mask]
-        highs = highs[mask]
-        lows = lows[mask]
+        closes, highs, lows = _finite_ohlc(closes, highs, lows)
 
         if closes.size == 0:
             raise ValueError(f"Yahoo chart API returned no finite OHLC data for {ticker}")
@@ -158,6 +239,59 @@ def _download_ohlc(ticker: str, lookback_days: int) -> Tuple[np.ndarray, np.ndar
         return closes, highs, lows
 
 
+def _cached_ohlc(symbol: str, lookback_days: int) -> Optional[OHLC]:
+    entry = _BARS_CACHE.get((symbol, int(lookback_days)))
+    if entry is None or (time.time() - entry[0]) > _BARS_CACHE_TTL_SECONDS:
+        return None
+    return entry[1]
+
+
+def _get_ohlc(symbol: str, lookback_days: int) -> OHLC:
+    """Daily OHLC for symbol, served from the bar cache while fresh."""
+    bars = _cached_ohlc(symbol, lookback_days)
+    if bars is None:
+        bars = _download_ohlc(symbol, lookback_days)
+        _BARS_CACHE[(symbol, int(lookback_days))] = (time.time(), bars)
+    return bars
+
+
+def _prime_ohlc_cache(symbols: List[str], lookback_days: int) -> None:
+    """
+    Fill the bar cache for many symbols with one multi-symbol download.
+    Symbols missing from the bulk response are left to the per-symbol path.
+    """
+    missing = [s for s in dict.fromkeys(symbols) if _cached_ohlc(s, lookback_days) is None]
+    if not missing:
+        return
+
+    from yf_batch import download_frames
+
+    end_date = datetime.now()
+    start_date = end_date - timedelta(days=lookback_days)
+    frames = download_frames(missing, start=start_date, end=end_date, timeout=20)
+
+    fetched_at = time.time()
+    for symbol, data in frames.items():
+        if data.empty:
+            continue
+        try:
+            bars = _frame_ohlc(data)
+        except ValueError:
+            continue
+        if bars[0].size:
+            _BARS_CACHE[(symbol, int(lookback_days))] = (fetched_at, bars)
+
+
+def _ticker_symbol(ticker: str) -> str:
+    # Clean display suffixes like QQQ(NDX) -> QQQ
+    return resolve_yahoo_symbol(ticker.split("(")[0].strip().upper())
+
+
+def _default_lookback_days(length: int, atr_period: int) -> int:
+    required_bars = max(int(length), int(atr_period)) + 5
+    return max(365, int(required_bars * 3))
+
+
 def calculate_nadaraya_watson_lower_band(
     prices_or_ticker: Union[str, Sequence[float], np.ndarray],
     length: int = 200,
@@ -179,13 +313,10 @@ def calculate_nadaraya_watson_lower_band(
     closes = None
     symbol = None
     if isinstance(prices_or_ticker, str):
-        # Clean display suffixes like QQQ(NDX) -> QQQ
-        clean_ticker = prices_or_ticker.split("(")[0].strip()
-        symbol = resolve_yahoo_symbol(clean_ticker.upper())
-
-        required_bars = max(int(length), int(atr_period)) + 5
-        computed_lookback_days = max(365, int(required_bars * 3))
-        closes, highs_arr, lows_arr = _download_ohlc(symbol, lookback_days or computed_lookback_days)
+        symbol = _ticker_symbol(prices_or_ticker)
+        closes, highs_arr, lows_arr = _get_ohlc(
+            symbol, lookback_days or _default_lookback_days(length, atr_period)
+        )
     else:
         closes = _as_np_array(prices_or_ticker)
         highs_arr = _as_np_array(highs) if highs is not None else None
@@ -295,7 +426,8 @@ async def get_nadaraya_watson_band(
 ):
     """Get Nadaraya-Watson lower envelope band (plus metrics) for a ticker."""
     try:
-        return calculate_nadaraya_watson_lower_band(
+        return await run_in_threadpool(
+            calculate_nadaraya_watson_lower_band,
             ticker.upper(),
             length=length,
             bandwidth=bandwidth,
@@ -319,7 +451,8 @@ async def get_nadaraya_watson_metrics(
     Get Nadaraya-Watson metrics for frontend compatibility.
     """
     try:
-        return calculate_nadaraya_watson_lower_band(
+        return await run_in_threadpool(
+            calculate_nadaraya_watson_lower_band,
             ticker.upper(),
             length=length,
             bandwidth=bandwidth,
@@ -328,3 +461,44 @@ async def get_nadaraya_watson_metrics(
         )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+
+def calculate_nadaraya_watson_batch(req: NadarayaWatsonBatchRequest) -> Dict[str, Any]:
+    """Lower-band metrics for many tickers from one shared bar download."""
+    tickers = list(dict.fromkeys(t.strip().upper() for t in req.tickers if t and t.strip()))
+    lookback_days = req.lookback_days or _default_lookback_days(req.length, req.atr_period)
+    _prime_ohlc_cache([_ticker_symbol(t) for t in tickers], lookback_days)
+
+    results: Dict[str, Dict[str, Any]] = {}
+    errors: Dict[str, str] = {}
+    for ticker in tickers:
+        try:
+            results[ticker] = calculate_nadaraya_watson_lower_band(
+                ticker,
+                length=req.length,
+                bandwidth=req.bandwidth,
+                atr_period=req.atr_period,
+                atr_mult=req.atr_mult,
+                lookback_days=lookback_days,
+            )
+        except Exception as e:
+            errors[ticker] = str(e)
+
+    return {
+        "results": results,
+        "errors": errors,
+        "timestamp": datetime.now().isoformat(),
+    }
+
+
+@router.post("/batch")
+async def get_nadaraya_watson_batch(req: NadarayaWatsonBatchRequest):
+    """
+    Get Nadaraya-Watson lower-band metrics for multiple tickers.
+
+    Bars for every uncached ticker come from a single multi-symbol download;
+    tickers it misses fall back to the per-ticker download path.
+    """
+    if not any(t and t.strip() for t in req.tickers):
+        raise HTTPException(status_code=400, detail="No tickers provided")
+    return await run_in_threadpool(calculate_nadaraya_watson_batch, req)
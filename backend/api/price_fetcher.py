@@ -2,26 +2,42 @@
 Real-time Stock Price Fetcher
 Provides current market prices for stocks and indices
 
-Uses multiple free APIs in fallback order:
-1. Yahoo Finance V8 API (direct, no library)
-2. Finnhub (free tier, no key needed for quotes)
-3. yfinance (fallback)
+Uses multiple free APIs as fallbacks:
+1. Yahoo Finance V7 quote API (one call for a whole batch)
+2. Yahoo Finance V8 chart API (direct, no library, one call per symbol)
+3. Finnhub (free tier, no key needed for quotes)
+4. yfinance (fallback)
+
+All HTTP sources share one pooled async client. Quotes are cached for a few
+seconds, concurrent requests for the same symbol share one upstream fetch,
+and the fallback order follows each source's observed latency and failure
+rate (see /api/prices/sources).
 """
 
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import httpx
 import yfinance as yf
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
-from typing import Dict, List, Optional
-from datetime import datetime
-import logging
-import requests
-import json
 
 from ticker_utils import resolve_yahoo_symbol
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
+QUOTE_TTL_SECONDS = 15
+_HTTP_TIMEOUT = 5.0
+_QUOTE_CHUNK = 50
+# Per-symbol fallback calls in flight at once, kept below the client's
+# 20-connection pool so queued requests do not run into _HTTP_TIMEOUT
+_FALLBACK_CONCURRENCY = 8
+_YAHOO_HEADERS = {'User-Agent': 'Mozilla/5.0'}
+
 class PriceData(BaseModel):
     symbol: str
     price: float
@@ -44,108 +60,296 @@ def clean_symbol(symbol: str) -> str:
             return parts[1].split(')')[0]
     return symbol
 
-def fetch_yahoo_direct(symbol: str) -> Optional[float]:
-    """Fetch from Yahoo Finance V8 API directly (bypasses yfinance library)"""
-    try:
-        url = f"https://query1.finance.yahoo.com/v8/finance/chart/{symbol}"
-        params = {'interval': '1d', 'range': '1d'}
-        headers = {'User-Agent': 'Mozilla/5.0'}
-
-        response = requests.get(url, params=params, headers=headers, timeout=5)
-        if response.status_code == 200:
-            data = response.json()
-            price = data.get('chart', {}).get('result', [{}])[0].get('meta', {}).get('regularMarketPrice')
-            if price and price > 0:
-                logger.info(f"Yahoo Direct API success for {symbol}: ${price}")
-                return float(price)
-    except Exception as e:
-        logger.warning(f"Yahoo Direct API failed for {symbol}: {e}")
-    return None
-
-def fetch_finnhub(symbol: str) -> Optional[float]:
-    """Fetch from Finnhub free API"""
-    try:
-        # Finnhub free tier allows quotes without API key for major symbols
-        url = f"https://finnhub.io/api/v1/quote"
-        params = {'symbol': symbol}
-        headers = {'X-Finnhub-Token': 'demo'}  # Use demo token
-
-        response = requests.get(url, params=params, headers=headers, timeout=5)
-        if response.status_code == 200:
-            data = response.json()
-            price = data.get('c')  # current price
-            if price and price > 0:
-                logger.info(f"Finnhub API success for {symbol}: ${price}")
-                return float(price)
-    except Exception as e:
-        logger.warning(f"Finnhub API failed for {symbol}: {e}")
-    return None
-
-def get_current_price(symbol: str) -> Optional[PriceData]:
-    """Fetch current price using multiple APIs with fallback"""
+def quote_symbols(symbol: str) -> Tuple[str, str]:
+    """Map a display symbol to (yahoo_symbol, plain_symbol) for the quote sources"""
+    clean_sym = clean_symbol(symbol)
+
+    # Add ^ prefix for indices if needed
+    if clean_sym in ['SPX', 'NDX', 'VIX', 'DJI', 'RUT']:
+        yahoo_sym = f'^{clean_sym}'
+    else:
+        yahoo_sym = resolve_yahoo_symbol(clean_sym)
+
+    # Use QQQ as proxy for NDX if symbol is QQQ(NDX)
+    if 'NDX' in symbol and 'QQQ' in symbol:
+        yahoo_sym = 'QQQ'
+        clean_sym = 'QQQ'
+
+    return yahoo_sym, clean_sym
+
+def _positive(value) -> Optional[float]:
     try:
-        # Clean the symbol
-        clean_sym = clean_symbol(symbol)
+        price = float(value)
+    except (TypeError, ValueError):
+        return None
+    return price if price > 0 else None
 
-        # Add ^ prefix for indices if needed
-        yahoo_sym = clean_sym
-        if clean_sym in ['SPX', 'NDX', 'VIX', 'DJI', 'RUT']:
-            yahoo_sym = f'^{clean_sym}'
-        else:
-            yahoo_sym = resolve_yahoo_symbol(yahoo_sym)
+class _SourceStats:
+    """Latency and failure-rate EWMAs plus failure counts for one quote source"""
+
+    def __init__(self, rank: int, alpha: float = 0.2):
+        self.rank = rank
+        self.alpha = alpha
+        self.calls = 0
+        self.failures = 0
+        self.latency: Optional[float] = None
+        self._failure_ewma: Optional[float] = None
+
+    def record(self, ok: bool, seconds: float) -> None:
+        self.calls += 1
+        if not ok:
+            self.failures += 1
+        self.latency = self._ewma(self.latency, seconds)
+        # Recent calls dominate, so a source that recovers is ranked up again
+        self._failure_ewma = self._ewma(self._failure_ewma, 0.0 if ok else 1.0)
 
-        # Use QQQ as proxy for NDX if symbol is QQQ(NDX)
-        if 'NDX' in symbol and 'QQQ' in symbol:
-            yahoo_sym = 'QQQ'
-            clean_sym = 'QQQ'
+    def _ewma(self, current: Optional[float], value: float) -> float:
+        return value if current is None else (1 - self.alpha) * current + self.alpha * value
 
-        logger.info(f"Fetching price for {symbol} -> {yahoo_sym}")
+    @property
+    def failure_rate(self) -> float:
+        return self._failure_ewma if self._failure_ewma is not None else 0.0
 
-        price = None
-        source = "unknown"
+    def expected_cost(self) -> float:
+        """Expected seconds per successful quote; unmeasured sources cost nothing so they get tried"""
+        if self.latency is None:
+            return 0.0
+        return self.latency / max(1.0 - self.failure_rate, 0.05)
 
-        # Method 1: Yahoo Finance Direct API (fastest, most reliable)
-        price = fetch_yahoo_direct(yahoo_sym)
-        if price:
-            source = "yahoo_direct"
+    def snapshot(self) -> Dict:
+        return {
+            'calls': self.calls,
+            'failures': self.failures,
+            'failure_rate': round(self.failure_rate, 4),
+            'latency_ms': round(self.latency * 1000, 1) if self.latency is not None else None,
+        }
 
-        # Method 2: Finnhub API (fallback for stocks)
-        if not price and not yahoo_sym.startswith('^'):
-            price = fetch_finnhub(clean_sym)
-            if price:
-                source = "finnhub"
+class QuoteService:
+    """Cached, coalescing multi-source quote fetcher shared by all price endpoints"""
 
-        # Method 3: yfinance library (slowest, but most compatible)
-        if not price:
+    SOURCES = ('yahoo_quote', 'yahoo_direct', 'finnhub', 'yfinance_history')
+
+    def __init__(self, ttl: float = QUOTE_TTL_SECONDS):
+        self.ttl = ttl
+        self.stats = {name: _SourceStats(rank) for rank, name in enumerate(self.SOURCES)}
+        self._cache: Dict[str, Tuple[float, float, str]] = {}
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._client: Optional[httpx.AsyncClient] = None
+        self._client_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._slots_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _http(self) -> httpx.AsyncClient:
+        # The client's connection pool is bound to the loop that created it
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client_loop is not loop:
+            self._client = httpx.AsyncClient(
+                timeout=_HTTP_TIMEOUT,
+                limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+            )
+            self._client_loop = loop
+        return self._client
+
+    def _fallback_slots(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if self._slots is None or self._slots_loop is not loop:
+            self._slots = asyncio.Semaphore(_FALLBACK_CONCURRENCY)
+            self._slots_loop = loop
+        return self._slots
+
+    def source_order(self) -> List[str]:
+        return sorted(self.SOURCES, key=lambda s: (self.stats[s].expected_cost(), self.stats[s].rank))
+
+    async def get_quotes(self, symbols: Iterable[str]) -> Dict[str, PriceData]:
+        """Current prices keyed by the requested display symbol; symbols no source could price are omitted"""
+        targets = {symbol: quote_symbols(symbol) for symbol in symbols}
+        plain = {yahoo_sym: clean_sym for yahoo_sym, clean_sym in targets.values()}
+        found = await self._prices(plain)
+
+        timestamp = datetime.now().isoformat()
+        quotes = {}
+        for symbol, (yahoo_sym, _) in targets.items():
+            if yahoo_sym in found:
+                price, source = found[yahoo_sym]
+                quotes[symbol] = PriceData(symbol=symbol, price=price, source=source, timestamp=timestamp)
+            else:
+                logger.error(f"All methods failed for {symbol}")
+        return quotes
+
+    async def _prices(self, plain: Dict[str, str]) -> Dict[str, Tuple[float, str]]:
+        loop = asyncio.get_running_loop()
+        now = time.monotonic()
+        found: Dict[str, Tuple[float, str]] = {}
+        waiting: Dict[str, asyncio.Future] = {}
+        owned: Dict[str, str] = {}
+
+        for yahoo_sym, clean_sym in plain.items():
+            cached = self._cache.get(yahoo_sym)
+            if cached is not None and now - cached[0] < self.ttl:
+                found[yahoo_sym] = (cached[1], cached[2])
+            elif yahoo_sym in self._inflight:
+                waiting[yahoo_sym] = self._inflight[yahoo_sym]
+            else:
+                self._inflight[yahoo_sym] = loop.create_future()
+                owned[yahoo_sym] = clean_sym
+
+        fetched: Dict[str, Tuple[float, str]] = {}
+        if owned:
             try:
-                ticker = yf.Ticker(yahoo_sym)
-                hist = ticker.history(period="1d")
-                if not hist.empty:
-                    price = hist['Close'].iloc[-1]
-                    source = "yfinance_history"
-                    logger.info(f"yfinance fallback success for {yahoo_sym}: ${price}")
+                fetched = await self._fetch(owned)
             except Exception as e:
-                logger.warning(f"yfinance failed for {yahoo_sym}: {e}")
-
-        if price and price > 0:
-            return PriceData(
-                symbol=symbol,
-                price=float(price),
-                source=source,
-                timestamp=datetime.now().isoformat()
-            )
+                logger.error(f"Quote fetch failed for {sorted(owned)}: {e}")
+            finally:
+                # Settle every future we own, even on cancellation, so waiters never hang
+                stamp = time.monotonic()
+                for yahoo_sym in owned:
+                    result = fetched.get(yahoo_sym)
+                    if result is not None:
+                        self._cache[yahoo_sym] = (stamp, result[0], result[1])
+                    future = self._inflight.pop(yahoo_sym)
+                    if not future.done():
+                        future.set_result(result)
+            found.update(fetched)
 
-        logger.error(f"All methods failed for {symbol}")
-        return None
+        for yahoo_sym, future in waiting.items():
+            result = await asyncio.shield(future)
+            if result is not None:
+                found[yahoo_sym] = result
+        return found
 
-    except Exception as e:
-        logger.error(f"Error fetching price for {symbol}: {e}")
-        return None
+    async def _fetch(self, plain: Dict[str, str]) -> Dict[str, Tuple[float, str]]:
+        results: Dict[str, Tuple[float, str]] = {}
+        for source in self.source_order():
+            remaining = [s for s in plain if s not in results]
+            if source == 'finnhub':
+                remaining = [s for s in remaining if not s.startswith('^')]
+            if not remaining:
+                continue
+            for yahoo_sym, price in (await self._run_source(source, remaining, plain)).items():
+                results[yahoo_sym] = (price, source)
+            if len(results) == len(plain):
+                break
+        return results
+
+    async def _run_source(self, source: str, symbols: List[str], plain: Dict[str, str]) -> Dict[str, float]:
+        stats = self.stats[source]
+        if source == 'yahoo_quote':
+            chunks = [symbols[i:i + _QUOTE_CHUNK] for i in range(0, len(symbols), _QUOTE_CHUNK)]
+            calls = [self._timed(stats, self._yahoo_quote(chunk)) for chunk in chunks]
+        elif source == 'yahoo_direct':
+            calls = [self._bounded(stats, self._yahoo_chart(sym)) for sym in symbols]
+        elif source == 'finnhub':
+            calls = [self._bounded(stats, self._finnhub(sym, plain[sym])) for sym in symbols]
+        else:
+            calls = [self._bounded(stats, self._yfinance_history(sym)) for sym in symbols]
+
+        prices: Dict[str, float] = {}
+        for part in await asyncio.gather(*calls):
+            prices.update(part)
+        return prices
+
+    async def _bounded(self, stats: _SourceStats, call) -> Dict[str, float]:
+        """Run a per-symbol call once a fallback slot is free (queueing is not timed)"""
+        async with self._fallback_slots():
+            return await self._timed(stats, call)
+
+    @staticmethod
+    async def _timed(stats: _SourceStats, call) -> Dict[str, float]:
+        start = time.perf_counter()
+        try:
+            prices = await call
+        except Exception as e:
+            logger.warning(f"Quote source call failed: {e}")
+            prices = {}
+        stats.record(bool(prices), time.perf_counter() - start)
+        return prices
+
+    async def _yahoo_quote(self, symbols: List[str]) -> Dict[str, float]:
+        """Yahoo Finance V7 quote API: one request for many symbols"""
+        response = await self._http().get(
+            "https://query1.finance.yahoo.com/v7/finance/quote",
+            params={'symbols': ','.join(symbols)},
+            headers=_YAHOO_HEADERS,
+        )
+        if response.status_code != 200:
+            return {}
+        wanted = set(symbols)
+        prices = {}
+        for row in (response.json().get('quoteResponse') or {}).get('result') or []:
+            price = _positive(row.get('regularMarketPrice'))
+            if row.get('symbol') in wanted and price:
+                prices[row['symbol']] = price
+        return prices
+
+    async def _yahoo_chart(self, symbol: str) -> Dict[str, float]:
+        """Yahoo Finance V8 chart API for one symbol (bypasses yfinance library)"""
+        response = await self._http().get(
+            f"https://query1.finance.yahoo.com/v8/finance/chart/{symbol}",
+            params={'interval': '1d', 'range': '1d'},
+            headers=_YAHOO_HEADERS,
+        )
+        if response.status_code != 200:
+            return {}
+        result = (response.json().get('chart') or {}).get('result') or [{}]
+        price = _positive(result[0].get('meta', {}).get('regularMarketPrice'))
+        return {symbol: price} if price else {}
+
+    async def _finnhub(self, yahoo_sym: str, clean_sym: str) -> Dict[str, float]:
+        # Finnhub free tier allows quotes without API key for major symbols
+        response = await self._http().get(
+            "https://finnhub.io/api/v1/quote",
+            params={'symbol': clean_sym},
+            headers={'X-Finnhub-Token': 'demo'},  # Use demo token
+        )
+        if response.status_code != 200:
+            return {}
+        price = _positive(response.json().get('c'))  # current price
+        return {yahoo_sym: price} if price else {}
+
+    async def _yfinance_history(self, symbol: str) -> Dict[str, float]:
+        def last_close():
+            hist = yf.Ticker(symbol).history(period="1d")
+            return None if hist.empty else _positive(hist['Close'].iloc[-1])
+
+        price = await asyncio.to_thread(last_close)
+        return {symbol: price} if price else {}
+
+    def metrics(self) -> Dict:
+        return {
+            'order': self.source_order(),
+            'sources': {name: stats.snapshot() for name, stats in self.stats.items()},
+            'cached_symbols': len(self._cache),
+            'inflight_symbols': len(self._inflight),
+        }
+
+quote_service = QuoteService()
+
+async def get_current_price(symbol: str) -> Optional[PriceData]:
+    """Fetch current price using multiple APIs with fallback"""
+    return (await quote_service.get_quotes([symbol])).get(symbol)
+
+@router.get("/api/prices/health")
+async def health_check():
+    """Health check endpoint"""
+    # Test with AAPL
+    test_price = await get_current_price("AAPL")
+
+    return {
+        "status": "healthy" if test_price else "degraded",
+        "test_symbol": "AAPL",
+        "test_price": test_price.price if test_price else None,
+        "timestamp": datetime.now().isoformat()
+    }
+
+@router.get("/api/prices/sources")
+async def get_source_metrics():
+    """Per-source latency/failure metrics and the current fallback order"""
+    return quote_service.metrics()
 
 @router.get("/api/prices/{symbol}")
 async def get_price(symbol: str):
     """Get current price for a single symbol"""
-    price_data = get_current_price(symbol)
+    price_data = await get_current_price(symbol)
 
     if not price_data:
         raise HTTPException(
@@ -158,27 +362,9 @@ async def get_price(symbol: str):
 @router.post("/api/prices/batch")
 async def get_batch_prices(request: BatchPriceRequest):
     """Get current prices for multiple symbols"""
-    prices = {}
-
-    for symbol in request.symbols:
-        price_data = get_current_price(symbol)
-        if price_data:
-            prices[symbol] = price_data
+    prices = await quote_service.get_quotes(request.symbols)
 
     return BatchPriceResponse(
         prices=prices,
         timestamp=datetime.now().isoformat()
     )
-
-@router.get("/api/prices/health")
-async def health_check():
-    """Health check endpoint"""
-    # Test with AAPL
-    test_price = get_current_price("AAPL")
-
-    return {
-        "status": "healthy" if test_price else "degraded",
-        "test_symbol": "AAPL",
-        "test_price": test_price.price if test_price else None,
-        "timestamp": datetime.now().isoformat()
-    }
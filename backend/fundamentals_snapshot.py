@@ -0,0 +1,198 @@
+"""
+Incremental fundamentals snapshot for the /value command.
+
+Records live one JSON file per ticker under
+static_snapshots/fundamentals/stocks/, so a refresh rewrites only the
+tickers it fetched instead of the whole value.json blob. The legacy
+value.json is still read as a fallback for tickers without a per-ticker
+file yet.
+
+build_snapshot() fetches tickers concurrently under a shared rate limit,
+downloads FX rates once per run and, unless forced, reuses a stored record
+when Yahoo's most recent statement period has not changed (one .info call
+instead of six statement pulls with retries).
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Iterable, Optional
+
+from fundamentals_value import FxRates, fetch_fundamentals, stock_universe
+
+_FUNDAMENTALS_DIR = Path(__file__).resolve().parent / "static_snapshots" / "fundamentals"
+_LEGACY_SNAPSHOT = _FUNDAMENTALS_DIR / "value.json"
+
+# Concurrent ticker fetches and the pace at which they may start (per second)
+_MAX_WORKERS = int(os.getenv("VALUE_SNAPSHOT_WORKERS", "6"))
+_FETCHES_PER_SECOND = float(os.getenv("VALUE_SNAPSHOT_RATE", "2.0"))
+
+
+class _RateLimiter:
+    """Spaces acquire() calls at least 1/rate seconds apart across threads."""
+
+    def __init__(self, rate: float) -> None:
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
+
+class FundamentalsStore:
+    """Per-ticker fundamentals records plus a small meta.json."""
+
+    def __init__(self, root: Path = _FUNDAMENTALS_DIR / "stocks", legacy: Optional[Path] = _LEGACY_SNAPSHOT) -> None:
+        self.root = Path(root)
+        self.legacy = Path(legacy) if legacy else None
+        self._legacy_stocks: Optional[dict] = None
+
+    def _path(self, ticker: str) -> Path:
+        safe = "".join(ch if ch.isalnum() or ch in "-_." else "_" for ch in ticker)
+        return self.root / f"{safe}.json"
+
+    def _legacy_record(self, ticker: str) -> Optional[dict]:
+        if self._legacy_stocks is None:
+            self._legacy_stocks = {}
+            if self.legacy is not None and self.legacy.exists():
+                try:
+                    self._legacy_stocks = json.loads(self.legacy.read_text()).get("stocks") or {}
+                except Exception:
+                    self._legacy_stocks = {}
+        return self._legacy_stocks.get(ticker)
+
+    def load(self, ticker: str) -> Optional[dict]:
+        path = self._path(ticker)
+        if path.exists():
+            try:
+                return json.loads(path.read_text())
+            except Exception:
+                pass
+        return self._legacy_record(ticker)
+
+    def save(self, rec: dict) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+        path = self._path(rec["ticker"])
+        tmp = path.with_suffix(".json.tmp")
+        tmp.write_text(json.dumps(rec, indent=2, default=str))
+        os.replace(tmp, path)
+
+    def load_meta(self) -> dict:
+        path = self.root / "meta.json"
+        if path.exists():
+            try:
+                return json.loads(path.read_text())
+            except Exception:
+                pass
+        if self.legacy is not None and self.legacy.exists():
+            try:
+                legacy = json.loads(self.legacy.read_text())
+                return {k: v for k, v in legacy.items() if k != "stocks"}
+            except Exception:
+                pass
+        return {}
+
+    def update_meta(self, **fields) -> dict:
+        meta = {**self.load_meta(), **fields}
+        self.root.mkdir(parents=True, exist_ok=True)
+        (self.root / "meta.json").write_text(json.dumps(meta, indent=2, default=str))
+        return meta
+
+    def snapshot(self, tickers: Optional[Iterable[str]] = None) -> Optional[dict]:
+        """
+        The snapshot dict /value renders ({"generated_at", "universe", "stocks", ...}),
+        or None when nothing has been stored yet.
+        """
+        meta = self.load_meta()
+        universe = list(tickers or meta.get("universe") or stock_universe())
+        stocks = {}
+        for t in universe:
+            rec = self.load(t)
+            if rec is not None:
+                stocks[t] = rec
+        if not stocks:
+            return None
+        return {
+            "generated_at": meta.get("generated_at", ""),
+            "source": meta.get("source", "yfinance"),
+            "universe": universe,
+            "stocks": stocks,
+            **{k: v for k, v in meta.items() if k not in ("generated_at", "source", "universe")},
+        }
+
+
+def build_snapshot(
+    tickers: Optional[list[str]] = None,
+    *,
+    force: bool = False,
+    store: Optional[FundamentalsStore] = None,
+    max_workers: int = _MAX_WORKERS,
+    fetches_per_second: float = _FETCHES_PER_SECOND,
+    on_result=None,
+) -> dict:
+    """
+    Refresh `tickers` (default: the whole stock universe, which also stamps
+    generated_at / universe in meta.json) into the store and return the merged
+    snapshot.
+
+    A failed fetch never replaces a stored good record. `on_result(rec, status)`
+    is called as each ticker finishes with the fetched record (carrying `error`
+    when the fetch failed) and one of:
+      "fetched"   — statements were pulled and stored
+      "unchanged" — the stored statements were kept, quote fields refreshed
+      "stale"     — the fetch failed; the stored good record is still served
+      "failed"    — the fetch failed and there is no good record to fall back on
+    """
+    store = store or FundamentalsStore()
+    full_run = tickers is None
+    tickers = list(tickers or stock_universe())
+    limiter = _RateLimiter(fetches_per_second)
+    fx = FxRates()
+
+    def refresh(ticker: str) -> tuple[dict, str]:
+        previous = store.load(ticker)
+        limiter.acquire()
+        rec = fetch_fundamentals(ticker, previous=None if force else previous, usd_rate=fx)
+        if rec.get("error"):
+            if previous is not None and not previous.get("error"):
+                return rec, "stale"
+            store.save(rec)
+            return rec, "failed"
+        store.save(rec)
+        # Freshly pulled records never carry checked_at; reused ones always do
+        return rec, "unchanged" if "checked_at" in rec else "fetched"
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        futures = [pool.submit(refresh, t) for t in tickers]
+        for future in as_completed(futures):
+            rec, status = future.result()
+            if on_result is not None:
+                on_result(rec, status)
+
+    if full_run:
+        store.update_meta(
+            generated_at=datetime.now(timezone.utc).isoformat(),
+            source="yfinance",
+            universe=tickers,
+        )
+    universe = store.load_meta().get("universe") or stock_universe()
+    if not full_run:
+        universe = list(dict.fromkeys([*universe, *tickers]))
+    return store.snapshot(universe) or {
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "source": "yfinance",
+        "universe": tickers,
+        "stocks": {},
+    }
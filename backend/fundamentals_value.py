@@ -26,9 +26,10 @@ Metrics computed (current + per fiscal year + quarterly):
 
 from __future__ import annotations
 
+import threading
 import time
 from datetime import datetime, timezone
-from typing import Optional
+from typing import Callable, Optional
 
 import yfinance as yf
 
@@ -225,12 +226,49 @@ def _epoch_to_iso(ts) -> Optional[str]:
     return None
 
 
-def fetch_fundamentals(ticker: str) -> dict:
+def _statements_unchanged(previous: Optional[dict], rec: dict) -> bool:
+    """True when `previous` is a good record for the same latest statement period."""
+    if not previous or previous.get("error") or not previous.get("years"):
+        return False
+    mrq = rec.get("most_recent_quarter")
+    return mrq is not None and previous.get("most_recent_quarter") == mrq
+
+
+def _refresh_quote_fields(previous: dict, rec: dict, price, usd_rate: Callable[[str], float]) -> dict:
+    """
+    Keep `previous`'s statement-derived metrics, updating the fields that come
+    from .info. fetched_at moves to this check, so a report Yahoo has not yet
+    published statements for is not re-flagged as stale on every call.
+    """
+    out = dict(previous)
+    for key in ("name", "currency", "price_currency", "next_earnings", "fetched_at"):
+        if rec.get(key) is not None:
+            out[key] = rec[key]
+    if price is not None:
+        out["price"] = price
+    if rec.get("market_cap") is not None:
+        out["market_cap"] = rec["market_cap"]
+        out["market_cap_usd"] = rec["market_cap"] * usd_rate(out.get("price_currency") or "USD")
+    out["checked_at"] = datetime.now(timezone.utc).date().isoformat()
+    return out
+
+
+def fetch_fundamentals(
+    ticker: str,
+    previous: Optional[dict] = None,
+    usd_rate: Optional[Callable[[str], float]] = None,
+) -> dict:
     """
     Fetch + compute the full valuation record for one stock.
     Returns {"ticker","name","price","currency","current","annual","quarterly",
              "years","averages","as_of","error"} — error set on failure.
+
+    With `previous` (the stored record), statements are only re-pulled when
+    Yahoo's most recent quarter differs from the one `previous` was built on;
+    otherwise `previous` comes back with refreshed price / market cap.
+    `usd_rate` converts market cap to USD (default: a new FxRates).
     """
+    usd_rate = usd_rate or FxRates()
     rec: dict = {"ticker": ticker, "name": ticker, "error": None}
     try:
         t = yf.Ticker(ticker)
@@ -247,7 +285,8 @@ def fetch_fundamentals(ticker: str) -> dict:
         price = _num(info.get("currentPrice")) or _num(info.get("regularMarketPrice"))
 
         # Earnings-cycle tracking so /value can detect when a fresh report lands.
-        # fetched_at      = when THIS record was pulled (staleness reference point);
+        # fetched_at      = when THIS record was pulled or last checked against
+        #                   Yahoo (staleness reference point);
         # most_recent_quarter = period end of the last statement we have;
         # next_earnings   = Yahoo's earnings date — note this flips to the *last*
         #                   report once a company reports, so staleness is judged as
@@ -258,6 +297,8 @@ def fetch_fundamentals(ticker: str) -> dict:
             info.get("earningsTimestamp")
             or info.get("earningsTimestampStart")
         )
+        if _statements_unchanged(previous, rec):
+            return _refresh_quote_fields(previous, rec, price, usd_rate)
 
         income = _retry_df(lambda: t.financials)
         balance = _retry_df(lambda: t.balance_sheet)
@@ -351,7 +392,7 @@ def fetch_fundamentals(ticker: str) -> dict:
         # KRW (005930.KS, 000660.KS) / TWD (TSM) / USD listings.
         mc = rec.get("market_cap")
         if mc is not None:
-            rec["market_cap_usd"] = mc * _usd_rate(rec.get("price_currency") or "USD")
+            rec["market_cap_usd"] = mc * usd_rate(rec.get("price_currency") or "USD")
 
         if not years and current.get("pe") is None and current.get("roe") is None:
             rec["error"] = "no fundamental data returned"
@@ -361,14 +402,7 @@ def fetch_fundamentals(ticker: str) -> dict:
         return rec
 
 
-_FX_CACHE: dict[str, float] = {"USD": 1.0}
-
-
-def _usd_rate(currency: str) -> float:
-    """How many USD per 1 unit of `currency` (e.g. KRW→~0.00073). 1.0 on failure."""
-    ccy = (currency or "USD").upper()
-    if ccy in _FX_CACHE:
-        return _FX_CACHE[ccy]
+def _download_usd_rate(ccy: str) -> float:
     rate = 1.0
     try:
         h = yf.Ticker(f"{ccy}USD=X").history(period="5d")
@@ -378,19 +412,40 @@ def _usd_rate(currency: str) -> float:
                 rate = r
     except Exception:
         rate = 1.0
-    _FX_CACHE[ccy] = rate
     return rate
 
 
+class FxRates:
+    """
+    USD conversion rates downloaded at most once per currency for the lifetime
+    of this object (one snapshot run); safe to share across fetch threads.
+    """
+
+    def __init__(self) -> None:
+        self._rates: dict[str, float] = {"USD": 1.0}
+        self._locks: dict[str, threading.Lock] = {}
+        self._guard = threading.Lock()
+
+    def __call__(self, currency: str) -> float:
+        ccy = (currency or "USD").upper()
+        if ccy in self._rates:
+            return self._rates[ccy]
+        with self._guard:
+            lock = self._locks.setdefault(ccy, threading.Lock())
+        with lock:
+            if ccy not in self._rates:
+                self._rates[ccy] = _download_usd_rate(ccy)
+        return self._rates[ccy]
+
+
 def fetch_all(tickers: Optional[list[str]] = None) -> dict:
-    """Fetch fundamentals for the stock universe; returns a snapshot dict."""
-    tickers = tickers or stock_universe()
-    stocks = {}
-    for t in tickers:
-        stocks[t] = fetch_fundamentals(t)   # market_cap_usd normalised inside
-    return {
-        "generated_at": datetime.now(timezone.utc).isoformat(),
-        "source": "yfinance",
-        "universe": tickers,
-        "stocks": stocks,
-    }
+    """
+    Fetch fundamentals for the stock universe; returns a snapshot dict.
+
+    Every ticker's statements are re-pulled (concurrently, rate-limited) and
+    merged into the per-ticker store; fundamentals_snapshot.build_snapshot
+    without force=True skips tickers whose statements haven't changed.
+    """
+    from fundamentals_snapshot import build_snapshot
+
+    return build_snapshot(tickers, force=True)
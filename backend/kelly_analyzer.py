@@ -19,6 +19,10 @@ Three modes:
       the underlying asset Kelly says "deleverage" at low percentile
       entries (negative momentum), but the strategy Kelly accounts for
       the actual trade edge at those entries.
+
+All three run on a KellyPanel: the universe's closes downloaded in one batch
+and laid out (bars × tickers), so window statistics, per-bucket Kelly and the
+strategy entry-event table are array reductions over every ticker at once.
 """
 
 from __future__ import annotations
@@ -71,88 +75,208 @@ class KellyResult:
     bucket_kelly: dict[str, Optional[float]] = field(default_factory=dict)
 
 
+def _kelly_from_moments(mean, std, n, min_obs: int = 20):
+    """
+    Annualised (mu, sigma, f*) from daily log-return moments.
+
+    Works elementwise on scalars or arrays; entries with fewer than `min_obs`
+    returns come back NaN, and f* is NaN wherever sigma is zero.
+    """
+    mean, std, n = np.asarray(mean, dtype=float), np.asarray(std, dtype=float), np.asarray(n)
+    enough = n >= min_obs
+    mu = np.where(enough, mean * ANNUAL_DAYS, np.nan)
+    sigma = np.where(enough, std * math.sqrt(ANNUAL_DAYS), np.nan)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        f_star = np.where(sigma != 0, mu / (sigma ** 2), np.nan)
+    return mu, sigma, f_star
+
+
 def _compute_kelly(log_returns: pd.Series) -> tuple[float, float, float]:
     """Return (annualized_mu, annualized_sigma, optimal_f)."""
-    n = len(log_returns)
-    if n < 20:
-        return float("nan"), float("nan"), float("nan")
-    mu = log_returns.mean() * ANNUAL_DAYS
-    sigma = log_returns.std() * math.sqrt(ANNUAL_DAYS)
-    if sigma == 0:
-        return mu, sigma, float("nan")
-    f_star = mu / (sigma ** 2)
-    return mu, sigma, f_star
+    mu, sigma, f_star = _kelly_from_moments(log_returns.mean(), log_returns.std(), len(log_returns))
+    return float(mu), float(sigma), float(f_star)
+
+
+def _masked_moments(values: np.ndarray, mask: np.ndarray, ddof: int = 1):
+    """Per-column (count, mean, std) of `values` over the rows selected by `mask`."""
+    n = mask.sum(axis=0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean = np.where(mask, values, 0.0).sum(axis=0) / n
+        dev = np.where(mask, values - mean, 0.0)
+        std = np.sqrt((dev ** 2).sum(axis=0) / (n - ddof))
+    return n, mean, std
+
+
+def _grouped_moments(keys: np.ndarray, values: np.ndarray, n_groups: int, ddof: int = 1):
+    """(count, mean, std) of `values` grouped by integer `keys` in [0, n_groups)."""
+    n = np.bincount(keys, minlength=n_groups)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean = np.bincount(keys, weights=values, minlength=n_groups) / n
+        dev = values - mean[keys]
+        std = np.sqrt(np.bincount(keys, weights=dev ** 2, minlength=n_groups) / (n - ddof))
+    return n, mean, std
+
+
+def _bucket_codes(pct: np.ndarray) -> np.ndarray:
+    """Index into PERCENTILE_BUCKETS for each percentile ([lo, hi) bins), -1 outside / NaN."""
+    edges = np.array([lo for lo, _, _ in PERCENTILE_BUCKETS] + [PERCENTILE_BUCKETS[-1][1]], dtype=float)
+    codes = np.searchsorted(edges, pct, side="right") - 1
+    codes[np.isnan(pct) | (codes >= len(PERCENTILE_BUCKETS))] = -1
+    return codes
+
 
+def _period_days(days: int) -> int:
+    """Calendar days of history _download() asks Yahoo for to cover `days` bars."""
+    return max(days + 100, 500)
 
-def _download(tickers: list[str], days: int) -> dict[str, pd.Series]:
-    """Download Close price series for all tickers in one batch."""
-    period = f"{max(days + 100, 500)}d"
+
+def _download_frame(tickers: list[str], days: int) -> pd.DataFrame:
+    """Download Close prices for all tickers in one batch as a (dates × tickers) frame."""
     raw = yf.download(
         tickers,
-        period=period,
+        period=f"{_period_days(days)}d",
         progress=False,
         auto_adjust=True,
         threads=True,
     )
-    result: dict[str, pd.Series] = {}
     if isinstance(raw.columns, pd.MultiIndex):
         close = raw["Close"]
-        for t in tickers:
-            if t in close.columns:
-                s = close[t].dropna()
-                result[t] = s
-    else:
-        # Single ticker
-        if "Close" in raw.columns:
-            result[tickers[0]] = raw["Close"].dropna()
-    return result
+        return close[[t for t in tickers if t in close.columns]]
+    # Single ticker
+    if "Close" in raw.columns:
+        return raw[["Close"]].rename(columns={"Close": tickers[0]})
+    return pd.DataFrame()
+
+
+@dataclass
+class KellyPanel:
+    """
+    Close prices for a ticker universe, stored bar-aligned: column j holds
+    ticker j's own closes back to back from row 0 (NaN past its length).
+
+    Tickers trade on different calendars (KRX, crypto, futures), so row k is
+    "each ticker's k-th bar" rather than a shared date — exactly the
+    per-ticker dropna'd series the analyzers work on, but laid out so log
+    returns, RSI-MA percentiles and window statistics are computed for the
+    whole universe in single array operations.
+    """
+
+    frame: pd.DataFrame                # (dates × tickers) as downloaded
+    close: np.ndarray                  # (bars × tickers), bar-aligned
+    lengths: np.ndarray                # bars per ticker
+    _pct_cache: dict[int, np.ndarray] = field(default_factory=dict, repr=False)
+
+    @classmethod
+    def from_frame(cls, frame: pd.DataFrame) -> "KellyPanel":
+        values = frame.to_numpy(dtype=float)
+        valid = ~np.isnan(values)
+        lengths = valid.sum(axis=0)
+        close = np.full((int(lengths.max(initial=0)), values.shape[1]), np.nan)
+        rows, cols = np.nonzero(valid)
+        close[(valid.cumsum(axis=0) - 1)[rows, cols], cols] = values[rows, cols]
+        return cls(frame=frame, close=close, lengths=lengths)
+
+    @classmethod
+    def download(cls, tickers: list[str], days: int) -> "KellyPanel":
+        return cls.from_frame(_download_frame(tickers, days))
+
+    @property
+    def tickers(self) -> list[str]:
+        return list(self.frame.columns)
+
+    def since(self, days: int) -> "KellyPanel":
+        """The panel trimmed to the history a standalone `_download(…, days)` would cover."""
+        if self.frame.empty:
+            return self
+        start = self.frame.index[-1] - pd.Timedelta(days=_period_days(days))
+        return KellyPanel.from_frame(self.frame[self.frame.index > start])
+
+    def bar_index(self) -> np.ndarray:
+        return np.arange(self.close.shape[0])[:, None]
+
+    def log_returns(self) -> np.ndarray:
+        """log(close_k / close_{k-1}) per ticker bar; row 0 and padding are NaN."""
+        out = np.full_like(self.close, np.nan)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            out[1:] = np.log(self.close[1:] / self.close[:-1])
+        return out
+
+    def rsi_percentiles(self, lookback: int = 252) -> np.ndarray:
+        """Rolling `lookback`-bar percentile rank (0-100] of RSI-MA for every ticker."""
+        if lookback not in self._pct_cache:
+            rsi_ma = calculate_rsi_ma(pd.DataFrame(self.close))
+            pct = rsi_ma.rolling(lookback, min_periods=lookback).rank(pct=True).to_numpy() * 100
+            pct[self.bar_index() >= self.lengths] = np.nan
+            self._pct_cache[lookback] = pct
+        return self._pct_cache[lookback]
+
+    def trailing_kelly(self, bars: int):
+        """
+        (n, mu, sigma, f*) per ticker over each ticker's last `bars` closes
+        (all of them when it has fewer); NaN where fewer than 20 returns.
+        """
+        log_ret = self.log_returns()
+        first = np.maximum(self.lengths - bars, 0)
+        mask = (self.bar_index() > first) & ~np.isnan(log_ret)
+        n, mean, std = _masked_moments(log_ret, mask)
+        return (n, *_kelly_from_moments(mean, std, n))
+
+    def bucket_kelly(self, rsi_ma_lookback: int = 252) -> np.ndarray:
+        """f* per (ticker × percentile bucket) over the full history; NaN below 20 returns."""
+        log_ret = self.log_returns()
+        codes = _bucket_codes(self.rsi_percentiles(rsi_ma_lookback))
+        use = (codes >= 0) & ~np.isnan(log_ret)
+        n_buckets = len(PERCENTILE_BUCKETS)
+        keys = (np.nonzero(use)[1] * n_buckets + codes[use])
+        n, mean, std = _grouped_moments(keys, log_ret[use], len(self.lengths) * n_buckets)
+        _, _, f_star = _kelly_from_moments(mean, std, n)
+        return f_star.reshape(len(self.lengths), n_buckets)
+
+
+def _kelly_result(ticker: str, mu: float, sigma: float, f_star: float, **extra) -> KellyResult:
+    max_growth = mu ** 2 / (2 * sigma ** 2) if sigma > 0 else None
+    regime = "LONG" if f_star > 0 else ("SHORT" if f_star < 0 else "NEUTRAL")
+    return KellyResult(
+        ticker=ticker,
+        optimal_kelly=round(f_star, 3),
+        half_kelly=round(f_star / 2, 3),
+        annualized_return=round(mu * 100, 2),
+        annualized_vol=round(sigma * 100, 2),
+        max_growth=round(max_growth * 100, 2) if max_growth else None,
+        regime=regime,
+        **extra,
+    )
+
+
+def _kelly_error(ticker: str, error: str) -> KellyResult:
+    return KellyResult(ticker=ticker, optimal_kelly=None, half_kelly=None,
+                       annualized_return=None, annualized_vol=None,
+                       max_growth=None, regime="N/A", error=error)
 
 
 def historical_kelly(
     tickers: list[str],
     lookback: int = 2000,
+    panel: Optional[KellyPanel] = None,
 ) -> list[KellyResult]:
     """
     Compute Kelly over a long historical window.
 
     Returns a list sorted descending by optimal_kelly.
     """
-    price_data = _download(tickers, lookback)
+    panel = panel if panel is not None else KellyPanel.download(tickers, lookback)
+    column = {t: j for j, t in enumerate(panel.tickers)}
+    _, mu, sigma, f_star = panel.trailing_kelly(lookback)
     results: list[KellyResult] = []
 
     for ticker in tickers:
-        if ticker not in price_data:
-            results.append(KellyResult(ticker=ticker, optimal_kelly=None, half_kelly=None,
-                                        annualized_return=None, annualized_vol=None,
-                                        max_growth=None, regime="N/A", error="download failed"))
-            continue
-
-        close = price_data[ticker]
-        if len(close) < lookback:
-            window = close
+        j = column.get(ticker)
+        if j is None:
+            results.append(_kelly_error(ticker, "download failed"))
+        elif math.isnan(f_star[j]):
+            results.append(_kelly_error(ticker, "insufficient data"))
         else:
-            window = close.iloc[-lookback:]
-
-        log_ret = np.log(window / window.shift(1)).dropna()
-        mu, sigma, f_star = _compute_kelly(log_ret)
-
-        if math.isnan(f_star):
-            results.append(KellyResult(ticker=ticker, optimal_kelly=None, half_kelly=None,
-                                        annualized_return=None, annualized_vol=None,
-                                        max_growth=None, regime="N/A", error="insufficient data"))
-            continue
-
-        max_growth = mu ** 2 / (2 * sigma ** 2) if sigma > 0 else None
-        regime = "LONG" if f_star > 0 else ("SHORT" if f_star < 0 else "NEUTRAL")
-        results.append(KellyResult(
-            ticker=ticker,
-            optimal_kelly=round(f_star, 3),
-            half_kelly=round(f_star / 2, 3),
-            annualized_return=round(mu * 100, 2),
-            annualized_vol=round(sigma * 100, 2),
-            max_growth=round(max_growth * 100, 2) if max_growth else None,
-            regime=regime,
-        ))
+            results.append(_kelly_result(ticker, float(mu[j]), float(sigma[j]), float(f_star[j])))
 
     results.sort(key=lambda r: (r.optimal_kelly or -999), reverse=True)
     return results
@@ -162,6 +286,7 @@ def dynamic_kelly(
     tickers: list[str],
     lookback: int = 252,
     rsi_ma_lookback: int = 252,
+    panel: Optional[KellyPanel] = None,
 ) -> list[KellyResult]:
     """
     Compute Kelly over the recent `lookback` bars (regime-aware).
@@ -171,72 +296,28 @@ def dynamic_kelly(
 
     Returns sorted descending by current optimal_kelly.
     """
-    download_days = max(lookback, rsi_ma_lookback) + 200
-    price_data = _download(tickers, download_days)
+    if panel is None:
+        panel = KellyPanel.download(tickers, max(lookback, rsi_ma_lookback) + 200)
+    column = {t: j for j, t in enumerate(panel.tickers)}
+    _, mu, sigma, f_star = panel.trailing_kelly(lookback)
+    bucket_f = panel.bucket_kelly(rsi_ma_lookback)
     results: list[KellyResult] = []
 
     for ticker in tickers:
-        if ticker not in price_data:
-            results.append(KellyResult(ticker=ticker, optimal_kelly=None, half_kelly=None,
-                                        annualized_return=None, annualized_vol=None,
-                                        max_growth=None, regime="N/A", error="download failed"))
+        j = column.get(ticker)
+        if j is None:
+            results.append(_kelly_error(ticker, "download failed"))
             continue
-
-        close = price_data[ticker]
-        if len(close) < 60:
-            results.append(KellyResult(ticker=ticker, optimal_kelly=None, half_kelly=None,
-                                        annualized_return=None, annualized_vol=None,
-                                        max_growth=None, regime="N/A", error="insufficient data"))
+        if panel.lengths[j] < 60 or math.isnan(f_star[j]):
+            results.append(_kelly_error(ticker, "insufficient data"))
             continue
 
-        # Current window Kelly (last `lookback` bars)
-        window_close = close.iloc[-lookback:] if len(close) >= lookback else close
-        log_ret = np.log(window_close / window_close.shift(1)).dropna()
-        mu, sigma, f_star = _compute_kelly(log_ret)
-
-        if math.isnan(f_star):
-            results.append(KellyResult(ticker=ticker, optimal_kelly=None, half_kelly=None,
-                                        annualized_return=None, annualized_vol=None,
-                                        max_growth=None, regime="N/A", error="insufficient data"))
-            continue
-
-        max_growth = mu ** 2 / (2 * sigma ** 2) if sigma > 0 else None
-        regime = "LONG" if f_star > 0 else ("SHORT" if f_star < 0 else "NEUTRAL")
-
-        # RSI-MA percentile bucket Kelly
-        # Build RSI-MA series and rolling percentile for full history
-        full_log_ret = np.log(close / close.shift(1)).dropna()
-        rsi_ma_series = calculate_rsi_ma(close)
-
-        rolling_pct = rsi_ma_series.rolling(rsi_ma_lookback, min_periods=rsi_ma_lookback).rank(pct=True) * 100
-
-        # Build aligned DataFrame
-        df = pd.DataFrame({
-            "close": close,
-            "log_ret": np.log(close / close.shift(1)),
-            "rsi_pct": rolling_pct,
-        }).dropna()
-
-        bucket_kelly: dict[str, Optional[float]] = {}
-        for lo, hi, label in PERCENTILE_BUCKETS:
-            mask = (df["rsi_pct"] >= lo) & (df["rsi_pct"] < hi)
-            bucket_rets = df.loc[mask, "log_ret"]
-            if len(bucket_rets) < 20:
-                bucket_kelly[label] = None
-                continue
-            b_mu, b_sigma, b_f = _compute_kelly(bucket_rets)
-            bucket_kelly[label] = round(b_f, 3) if not math.isnan(b_f) else None
-
-        results.append(KellyResult(
-            ticker=ticker,
-            optimal_kelly=round(f_star, 3),
-            half_kelly=round(f_star / 2, 3),
-            annualized_return=round(mu * 100, 2),
-            annualized_vol=round(sigma * 100, 2),
-            max_growth=round(max_growth * 100, 2) if max_growth else None,
-            regime=regime,
-            bucket_kelly=bucket_kelly,
-        ))
+        bucket_kelly: dict[str, Optional[float]] = {
+            label: (None if math.isnan(b_f) else round(float(b_f), 3))
+            for (_, _, label), b_f in zip(PERCENTILE_BUCKETS, bucket_f[j])
+        }
+        results.append(_kelly_result(ticker, float(mu[j]), float(sigma[j]), float(f_star[j]),
+                                     bucket_kelly=bucket_kelly))
 
     results.sort(key=lambda r: (r.optimal_kelly or -999), reverse=True)
     return results
@@ -387,48 +468,46 @@ class StrategyKellyResult:
     error: Optional[str] = None
 
 
-def _find_entry_events(
-    pct_series: pd.Series,
-    close: pd.Series,
-    lo: float,
-    hi: float,
+def _entry_event_table(
+    panel: KellyPanel,
     horizon: int = 5,
-) -> list[float]:
+    rsi_ma_lookback: int = 252,
+) -> pd.DataFrame:
     """
-    Return list of D{horizon} log-returns for first-entry events into [lo, hi) bucket.
-
-    'First entry' = bar where percentile crosses into [lo, hi) from above or outside.
-    We skip re-entries within 2*horizon bars of the previous entry to avoid overlapping trades.
+    One row per strategy trade across the whole universe:
+    columns ticker (panel column), bucket (PERCENTILE_BUCKETS index), bar, log_return.
+
+    An entry is the bar where the RSI-MA percentile crosses into a bucket from
+    outside it. Re-entries within 2*horizon bars of the previous entry into the
+    same bucket are skipped to avoid overlapping trades, and entries whose
+    D{horizon} exit is past the last bar are dropped. Trades with a
+    non-positive price keep their slot in that spacing but carry a NaN return.
     """
-    aligned = pd.DataFrame({"pct": pct_series, "close": close}).dropna()
-    pct_arr   = aligned["pct"].to_numpy()
-    close_arr = aligned["close"].to_numpy()
-    n = len(aligned)
-
-    in_bucket = (pct_arr >= lo) & (pct_arr < hi)
-    prev_in   = np.empty(n, dtype=bool)
-    prev_in[0] = False
-    prev_in[1:] = in_bucket[:-1]
-    crossover = in_bucket & ~prev_in
-
-    trade_returns: list[float] = []
-    last_entry_i = -999
-
-    for pos in range(n):
-        if not crossover[pos]:
-            continue
-        if pos - last_entry_i < 2 * horizon:
-            continue
-        exit_pos = pos + horizon
-        if exit_pos >= n:
-            break
-        entry_price = close_arr[pos]
-        exit_price  = close_arr[exit_pos]
-        if entry_price > 0 and exit_price > 0:
-            trade_returns.append(math.log(exit_price / entry_price))
-        last_entry_i = pos
-
-    return trade_returns
+    codes = _bucket_codes(panel.rsi_percentiles(rsi_ma_lookback))
+    prev = np.full_like(codes, -1)
+    prev[1:] = codes[:-1]
+    # Percentiles are defined on one contiguous run of bars per ticker, so the
+    # bar before the first defined one is -1 and never masks a crossover.
+    crossover = (codes >= 0) & (codes != prev) & (panel.bar_index() + horizon < panel.lengths)
+
+    bars, cols = np.nonzero(crossover)
+    buckets = codes[bars, cols]
+    order = np.lexsort((bars, buckets, cols))   # by ticker, bucket, then bar
+    bars, cols, buckets = bars[order], cols[order], buckets[order]
+
+    keep = np.zeros(len(bars), dtype=bool)
+    last_group, last_bar = None, 0
+    for i, (group, bar) in enumerate(zip(zip(cols.tolist(), buckets.tolist()), bars.tolist())):
+        if group != last_group or bar - last_bar >= 2 * horizon:
+            keep[i] = True
+            last_group, last_bar = group, bar
+    bars, cols, buckets = bars[keep], cols[keep], buckets[keep]
+
+    entry = panel.close[bars, cols]
+    exit_ = panel.close[bars + horizon, cols]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rets = np.where((entry > 0) & (exit_ > 0), np.log(exit_ / entry), np.nan)
+    return pd.DataFrame({"ticker": cols, "bucket": buckets, "bar": bars, "log_return": rets})
 
 
 def strategy_kelly(
@@ -436,6 +515,7 @@ def strategy_kelly(
     horizon: int = 5,
     rsi_ma_lookback: int = 252,
     download_days: int = 2500,
+    panel: Optional[KellyPanel] = None,
 ) -> list[StrategyKellyResult]:
     """
     Compute Kelly on strategy trade returns (D{horizon}) per RSI-MA percentile bucket.
@@ -445,60 +525,58 @@ def strategy_kelly(
     - Strategy-level Kelly accounts for the ACTUAL trade edge from those entries
     - D5 is the standard measurement horizon post-low-percentile entry
     """
-    price_data = _download(tickers, download_days)
-    results: list[StrategyKellyResult] = []
+    panel = panel if panel is not None else KellyPanel.download(tickers, download_days)
+    column = {t: j for j, t in enumerate(panel.tickers)}
+    n_tickers, n_buckets = len(panel.tickers), len(PERCENTILE_BUCKETS)
+
+    events = _entry_event_table(panel, horizon, rsi_ma_lookback).dropna(subset=["log_return"])
+    rets = events["log_return"].to_numpy()
+    ticker_keys = events["ticker"].to_numpy()
+    bucket_keys = ticker_keys * n_buckets + events["bucket"].to_numpy()
 
+    n_b, mu_b, sigma_b = _grouped_moments(bucket_keys, rets, n_tickers * n_buckets, ddof=0)
+    wins_b = np.bincount(bucket_keys, weights=(rets > 0), minlength=n_tickers * n_buckets)
+    n_all, mu_all, sigma_all = _grouped_moments(ticker_keys, rets, n_tickers, ddof=0)
+
+    results: list[StrategyKellyResult] = []
     for ticker in tickers:
-        if ticker not in price_data:
+        j = column.get(ticker)
+        if j is None:
             results.append(StrategyKellyResult(ticker=ticker, bucket_results={},
                                                 overall_kelly=None, error="download failed"))
             continue
-
-        close = price_data[ticker]
-        if len(close) < rsi_ma_lookback + horizon + 20:
+        if panel.lengths[j] < rsi_ma_lookback + horizon + 20:
             results.append(StrategyKellyResult(ticker=ticker, bucket_results={},
                                                 overall_kelly=None, error="insufficient data"))
             continue
 
-        rsi_ma_series = calculate_rsi_ma(close)
-        rolling_pct = rsi_ma_series.rolling(rsi_ma_lookback, min_periods=rsi_ma_lookback).rank(pct=True) * 100
-
         bucket_results: dict[str, dict] = {}
-        all_trade_returns: list[float] = []
-
-        for lo, hi, label in PERCENTILE_BUCKETS:
-            trade_rets = _find_entry_events(rolling_pct, close, lo, hi, horizon)
-            all_trade_returns.extend(trade_rets)
-
-            if len(trade_rets) < 5:
+        for b, (_, _, label) in enumerate(PERCENTILE_BUCKETS):
+            k = j * n_buckets + b
+            n_trades = int(n_b[k])
+            if n_trades < 5:
                 bucket_results[label] = {
                     "kelly": None, "half_kelly": None,
                     "mu_pct": None, "sigma_pct": None,
-                    "n_trades": len(trade_rets), "win_rate": None,
+                    "n_trades": n_trades, "win_rate": None,
                 }
                 continue
 
-            arr = np.array(trade_rets)
-            mu    = arr.mean()
-            sigma = arr.std()
+            mu, sigma = float(mu_b[k]), float(sigma_b[k])
             f_star = (mu / (sigma ** 2)) if sigma > 0 else float("nan")
-            win_rate = float((arr > 0).sum() / len(arr) * 100)
-
             bucket_results[label] = {
                 "kelly":     round(f_star, 3) if not math.isnan(f_star) else None,
                 "half_kelly": round(f_star / 2, 3) if not math.isnan(f_star) else None,
                 "mu_pct":    round(mu * 100, 2),
                 "sigma_pct": round(sigma * 100, 2),
-                "n_trades":  len(trade_rets),
-                "win_rate":  round(win_rate, 1),
+                "n_trades":  n_trades,
+                "win_rate":  round(float(wins_b[k] / n_trades * 100), 1),
             }
 
         # Overall Kelly across all entry events
-        if len(all_trade_returns) >= 10:
-            arr_all = np.array(all_trade_returns)
-            mu_all    = arr_all.mean()
-            sig_all   = arr_all.std()
-            overall_f = (mu_all / (sig_all ** 2)) if sig_all > 0 else None
+        if n_all[j] >= 10:
+            mu_j, sig_j = float(mu_all[j]), float(sigma_all[j])
+            overall_f = (mu_j / (sig_j ** 2)) if sig_j > 0 else None
         else:
             overall_f = None
 
@@ -637,15 +715,26 @@ def run_full_analysis(
     dyn_lookback: int = 252,
     strategy_horizon: int = 5,
 ) -> dict:
-    """Run historical, dynamic, and strategy Kelly. Return all results."""
+    """
+    Run historical, dynamic, and strategy Kelly. Return all results.
+
+    The universe is downloaded once (the longest history any mode needs) and
+    each mode reads its own span from the shared panel.
+    """
+    dyn_days = max(dyn_lookback, 252) + 200
+    strat_days = 2500
+    print(f"[kelly] Downloading {len(tickers)} tickers...")
+    panel = KellyPanel.download(tickers, max(hist_lookback, dyn_days, strat_days))
+
     print(f"[kelly] Historical Kelly ({hist_lookback}-day)...")
-    hist = historical_kelly(tickers, lookback=hist_lookback)
+    hist = historical_kelly(tickers, lookback=hist_lookback, panel=panel.since(hist_lookback))
 
     print(f"[kelly] Dynamic Kelly ({dyn_lookback}-day) with RSI-MA percentile buckets...")
-    dyn = dynamic_kelly(tickers, lookback=dyn_lookback, rsi_ma_lookback=252)
+    dyn = dynamic_kelly(tickers, lookback=dyn_lookback, rsi_ma_lookback=252, panel=panel.since(dyn_days))
 
     print(f"[kelly] Strategy Kelly — D{strategy_horizon} trade returns per percentile bucket...")
-    strat = strategy_kelly(tickers, horizon=strategy_horizon)
+    strat = strategy_kelly(tickers, horizon=strategy_horizon, download_days=strat_days,
+                           panel=panel.since(strat_days))
 
     return {"historical": hist, "dynamic": dyn, "strategy": strat}
 
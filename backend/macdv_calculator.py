@@ -11,8 +11,61 @@ import numpy as np
 import yfinance as yf
 from typing import Dict, List, Optional, Tuple
 from datetime import datetime, timedelta
+import copy
 import json
+import threading
+import time
+from concurrent.futures import Future
 from pathlib import Path
+from yf_batch import download_frames
+
+# Category labels indexed by the codes produced in classify_macdv
+_MACDV_COLORS = np.array(['gray', 'blue', '#0d6b57', 'green', 'orange', 'red'], dtype=object)
+_MACDV_TRENDS = np.array(['Neutral', 'Bullish', 'Bearish', 'Ranging'], dtype=object)
+
+
+def _run_lengths(mask: np.ndarray) -> np.ndarray:
+    """Length of the current run of True values ending at each position (0 where False)."""
+    counts = np.cumsum(mask)
+    # Cumulative count at the most recent False position, carried forward
+    resets = np.maximum.accumulate(np.where(mask, 0, counts))
+    return counts - resets
+
+
+def classify_macdv(val: np.ndarray, signal: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Classify MACD-V bars into color and trend labels.
+
+    Args:
+        val: MACD-V values
+        signal: MACD-V signal line values
+
+    Returns:
+        (colors, trends) object arrays of labels, one per bar
+    """
+    # Ranging detection (50 > val > -50 for 19+ bars)
+    in_range = (val > -50) & (val < 50)
+    ranging_mask = in_range & (_run_lengths(in_range) >= 19)
+
+    # np.select takes the first matching condition, so conditions run from
+    # highest to lowest precedence; NaN values stay gray / Neutral.
+    rising = val > signal
+    falling = val < signal
+    color_codes = np.select(
+        [
+            (val > -150) & (val <= -50) & falling,   # Reversing (red)
+            (val > -50) & falling,                   # Retracing (orange)
+            (val > -150) & (val < 50) & rising,      # Rebounding (green)
+            (val >= 50) & (val < 150) & rising,      # Rallying (green-dark)
+            ((val >= 150) & rising) | ((val <= -150) & falling),  # Risk (blue)
+            ranging_mask,                            # Ranging (gray)
+        ],
+        [5, 4, 3, 2, 1, 0],
+        default=0
+    )
+    trend_codes = np.select([ranging_mask, val > 50, val < -50], [3, 1, 2], default=0)
+    return _MACDV_COLORS[color_codes], _MACDV_TRENDS[trend_codes]
+
 
 class MACDVCalculator:
     """
@@ -102,104 +155,106 @@ class MACDVCalculator:
         # Positive = accelerating upward, negative = decelerating / falling faster
         df['macdv_decay_accel'] = df['macdv_val'].diff().diff().round(2)
 
-        # Ranging detection (50 > val > -50 for 19+ bars)
-        in_range = (df['macdv_val'] > -50) & (df['macdv_val'] < 50)
-        in_range_shifted = in_range.shift(1).fillna(False)
-        in_range_change = in_range & ~in_range_shifted
-
-        # Count bars since last range entry
-        bars_since_range = pd.Series(0, index=df.index)
-        current_count = 0
-        for i in range(len(df)):
-            if in_range.iloc[i]:
-                current_count += 1
-            else:
-                current_count = 0
-            bars_since_range.iloc[i] = current_count
-
-        # Color classification
-        df['macdv_color'] = 'gray'  # default
-
-        # Ranging (gray) - in range for 19+ bars
-        ranging_mask = in_range & (bars_since_range >= 19)
-        df.loc[ranging_mask, 'macdv_color'] = 'gray'
-
-        # Risk (blue) - extreme values
-        risk_up_mask = (df['macdv_val'] >= 150) & (df['macdv_val'] > df['macdv_signal'])
-        risk_down_mask = (df['macdv_val'] <= -150) & (df['macdv_val'] < df['macdv_signal'])
-        df.loc[risk_up_mask | risk_down_mask, 'macdv_color'] = 'blue'
-
-        # Rallying (green-dark) - 150 > val >= 50 and rising
-        rallying_mask = (df['macdv_val'] >= 50) & (df['macdv_val'] < 150) & (df['macdv_val'] > df['macdv_signal'])
-        df.loc[rallying_mask, 'macdv_color'] = '#0d6b57'
-
-        # Rebounding (green) - 50 > val > -150 and rising
-        rebounding_mask = (df['macdv_val'] > -150) & (df['macdv_val'] < 50) & (df['macdv_val'] > df['macdv_signal'])
-        df.loc[rebounding_mask, 'macdv_color'] = 'green'
-
-        # Retracing (orange) - val > -50 and falling
-        retracing_mask = (df['macdv_val'] > -50) & (df['macdv_val'] < df['macdv_signal'])
-        df.loc[retracing_mask, 'macdv_color'] = 'orange'
-
-        # Reversing (red) - -50 >= val > -150 and falling
-        reversing_mask = (df['macdv_val'] > -150) & (df['macdv_val'] <= -50) & (df['macdv_val'] < df['macdv_signal'])
-        df.loc[reversing_mask, 'macdv_color'] = 'red'
-
-        # Trend classification
-        df['macdv_trend'] = 'Neutral'
-        df.loc[df['macdv_val'] > 50, 'macdv_trend'] = 'Bullish'
-        df.loc[df['macdv_val'] < -50, 'macdv_trend'] = 'Bearish'
-        df.loc[ranging_mask, 'macdv_trend'] = 'Ranging'
+        # Color / trend classification (ranging = 50 > val > -50 for 19+ bars)
+        df['macdv_color'], df['macdv_trend'] = classify_macdv(
+            df['macdv_val'].to_numpy(dtype=float),
+            df['macdv_signal'].to_numpy(dtype=float)
+        )
 
         return df
 
     def get_dashboard_data(
         self,
         symbols: List[str],
-        timeframes: List[str] = ['1mo', '1wk', '1d', '1h', '4h']
+        timeframes: List[str] = ['1mo', '1wk', '1d', '1h', '4h'],
+        max_age_seconds: Optional[float] = None
     ) -> Dict:
         """
         Get MACD-V dashboard data for multiple symbols and timeframes.
 
+        Only the base daily and hourly series are downloaded (in bulk, for all
+        symbols at once); weekly, monthly and 4H bars are resampled locally.
+        Results are cached per (symbols, timeframes, params) for
+        ``max_age_seconds`` (defaults to _DASHBOARD_CACHE_TTL_SECONDS, 0 disables).
+
         Args:
             symbols: List of ticker symbols
             timeframes: List of timeframes (yfinance intervals)
+            max_age_seconds: Maximum age of a cached dashboard to reuse
 
         Returns:
             Dictionary with dashboard data structure
         """
+        if max_age_seconds is None:
+            max_age_seconds = _DASHBOARD_CACHE_TTL_SECONDS
+        cache_key = (tuple(symbols), tuple(timeframes), tuple(sorted(self.get_params().items())))
+
+        with _dashboard_cache_lock:
+            cached = _dashboard_cache.get(cache_key)
+            if cached is not None and time.monotonic() - cached[0] < max_age_seconds:
+                return copy.deepcopy(cached[1])
+            # Concurrent requests for the same dashboard share one build;
+            # builds for other keys run in parallel
+            future = _dashboard_builds.get(cache_key)
+            owner = future is None
+            if owner:
+                future = Future()
+                _dashboard_builds[cache_key] = future
+
+        if not owner:
+            return copy.deepcopy(future.result())
+
+        try:
+            dashboard = self._build_dashboard(symbols, timeframes)
+        except BaseException as e:
+            with _dashboard_cache_lock:
+                _dashboard_builds.pop(cache_key, None)
+            future.set_exception(e)
+            raise
+        with _dashboard_cache_lock:
+            if max_age_seconds > 0:
+                _dashboard_cache[cache_key] = (time.monotonic(), dashboard)
+            _dashboard_builds.pop(cache_key, None)
+        future.set_result(dashboard)
+        return copy.deepcopy(dashboard)
+
+    def _build_dashboard(self, symbols: List[str], timeframes: List[str]) -> Dict:
         dashboard = {
             'timestamp': datetime.now().isoformat(),
             'symbols': {},
             'timeframes': timeframes
         }
 
+        # One bulk download per base interval: the longest period any requested
+        # timeframe needs from it, plus direct downloads for non-derivable intervals.
+        base_periods: Dict[str, str] = {}
+        for tf in timeframes:
+            base = _DERIVED_TIMEFRAMES.get(tf, (tf, None))[0]
+            period = self._get_period_for_interval(tf)
+            current = base_periods.get(base)
+            if current is None or _period_days(period) > _period_days(current):
+                base_periods[base] = period
+        base_frames = {
+            interval: _download_bulk(symbols, period, interval)
+            for interval, period in base_periods.items()
+        }
+
         for symbol in symbols:
             try:
                 symbol_data = {}
 
                 for tf in timeframes:
-                    # Fetch data for this timeframe
-                    period = self._get_period_for_interval(tf)
-                    df = yf.download(
-                        symbol,
-                        period=period,
-                        interval=tf,
-                        progress=False,
-                        auto_adjust=True
-                    )
+                    base, rule = _DERIVED_TIMEFRAMES.get(tf, (tf, None))
+                    df = base_frames[base].get(symbol)
+                    if df is None or df.empty:
+                        continue
 
+                    df = _trim_to_period(df, self._get_period_for_interval(tf))
+                    if rule is not None:
+                        df = resample_ohlcv(df, rule)
                     if df.empty:
                         continue
 
-                    # Ensure column names are lowercase and handle multi-index columns from yfinance
-                    if isinstance(df.columns, pd.MultiIndex):
-                        # For multi-index, take the first level
-                        df.columns = [col[0].lower() if isinstance(col, tuple) else str(col).lower() for col in df.columns]
-                    else:
-                        # For regular index, just convert to lowercase
-                        df.columns = [str(c).lower() for c in df.columns]
-
                     # Calculate MACD-V
                     df = self.calculate_macdv(df)
 
@@ -218,7 +273,7 @@ class MACDVCalculator:
                 dashboard['symbols'][symbol] = symbol_data
 
             except Exception as e:
-                print(f"Error fetching {symbol}: {e}")
+                print(f"Error calculating {symbol}: {e}")
                 dashboard['symbols'][symbol] = {'error': str(e)}
 
         return dashboard
@@ -284,6 +339,91 @@ class MACDVCalculator:
         return chart_data
 
 
+
+# Dashboard timeframes built from a base download: tf -> (base interval, resample rule)
+_DERIVED_TIMEFRAMES = {
+    '1d': ('1d', None),
+    '1wk': ('1d', 'W-MON'),
+    '1mo': ('1d', 'MS'),
+    '1h': ('1h', None),
+    '4h': ('1h', '4h'),
+}
+_OHLCV_AGG = {'open': 'first', 'high': 'max', 'low': 'min', 'close': 'last', 'volume': 'sum'}
+_DASHBOARD_CACHE_TTL_SECONDS = 300
+_dashboard_cache: Dict[tuple, Tuple[float, Dict]] = {}
+_dashboard_builds: Dict[tuple, Future] = {}
+_dashboard_cache_lock = threading.Lock()
+
+
+def _period_offset(period: str) -> Optional[pd.DateOffset]:
+    """
+    Convert a yfinance period string ('5y', '6mo', '60d') to a DateOffset.
+    'max' is an unbounded window and maps to None.
+    """
+    if period == 'max':
+        return None
+    for suffix, unit in (('mo', 'months'), ('y', 'years'), ('d', 'days')):
+        if period.endswith(suffix) and period[:-len(suffix)].isdigit():
+            return pd.DateOffset(**{unit: int(period[:-len(suffix)])})
+    raise ValueError(f"Unsupported period: {period}")
+
+
+def _period_days(period: str) -> float:
+    """Approximate length of a yfinance period in days, for comparing periods."""
+    offset = _period_offset(period)
+    if offset is None:
+        return float('inf')
+    reference = pd.Timestamp('2000-01-01')
+    return (reference - (reference - offset)).days
+
+
+def _trim_to_period(df: pd.DataFrame, period: str) -> pd.DataFrame:
+    """Keep the trailing ``period`` of bars, measured back from the last bar."""
+    offset = _period_offset(period)
+    if offset is None:
+        return df
+    cutoff = df.index[-1] - offset
+    return df[df.index > cutoff]
+
+
+def resample_ohlcv(df: pd.DataFrame, rule: str) -> pd.DataFrame:
+    """
+    Aggregate OHLCV bars to a coarser timeframe.
+
+    Weekly ('W-MON') and monthly ('MS') bars are labelled by their first day,
+    matching Yahoo's weekly/monthly index. '4h' groups each session's hourly
+    bars in runs of four from the session open, so US equities get
+    09:30 and 13:30 bars and 24h markets get clock-aligned 4H bars.
+    """
+    agg = {col: how for col, how in _OHLCV_AGG.items() if col in df.columns}
+    if rule == '4h':
+        session = df.index.normalize()
+        slot = df.groupby(session).cumcount().to_numpy() // 4
+        bars = df.assign(bar_start=df.index).groupby([session, slot], sort=True)
+        out = bars.agg({**agg, 'bar_start': 'first'}).set_index('bar_start')
+        out.index.name = df.index.name
+    else:
+        out = df.resample(rule, label='left', closed='left').agg(agg)
+    return out.dropna(subset=['close'])
+
+
+def _download_bulk(symbols: List[str], period: str, interval: str) -> Dict[str, pd.DataFrame]:
+    """
+    Download OHLCV (lower-case columns) for many symbols via yf_batch.
+    Symbols missing from a response map to an empty frame.
+    """
+    frames = download_frames(symbols, period=period, interval=interval)
+    for symbol, frame in frames.items():
+        if frame.empty:
+            continue
+        frame.columns = [str(c).lower() for c in frame.columns]
+        if {'open', 'high', 'low', 'close'}.issubset(frame.columns):
+            frames[symbol] = frame.dropna(subset=['close'])
+        else:
+            frames[symbol] = pd.DataFrame()
+    return frames
+
+
 def get_macdv_chart_data(ticker: str, days: int = 252) -> Dict:
     """
     Get MACD-V chart data for a single ticker.
@@ -22,15 +22,10 @@ from datetime import datetime, timezone
 from pathlib import Path
 from typing import Any, Dict, List, Tuple
 
-import numpy as np
-import pandas as pd
-
 try:
-    from enhanced_backtester import EnhancedPerformanceMatrixBacktester
-    from macdv_calculator import MACDVCalculator
+    from macdv_rsi_event_cube import load_event_cube
 except ModuleNotFoundError:
-    from backend.enhanced_backtester import EnhancedPerformanceMatrixBacktester  # type: ignore
-    from backend.macdv_calculator import MACDVCalculator  # type: ignore
+    from backend.macdv_rsi_event_cube import load_event_cube  # type: ignore
 
 
 RSI_BANDS: List[Tuple[float, float, str]] = [
@@ -49,43 +44,6 @@ RSI_BANDS: List[Tuple[float, float, str]] = [
 ]
 
 
-def _stats(returns: List[float]) -> Dict[str, Any]:
-    if not returns:
-        return {"n": 0, "win_rate": None, "mean": None, "median": None}
-    arr = np.asarray(returns, dtype=float)
-    return {
-        "n": int(arr.size),
-        "win_rate": float((arr > 0).mean() * 100.0),
-        "mean": float(arr.mean()),
-        "median": float(np.median(arr)),
-    }
-
-
-def _macdv_val(data: pd.DataFrame) -> pd.Series:
-    df = data.copy()
-    df.columns = [str(c).lower() for c in df.columns]
-    calc = MACDVCalculator(fast_length=12, slow_length=26, signal_length=9, atr_length=26)
-    out = calc.calculate_macdv(df, source_col="close")
-    return out["macdv_val"]
-
-
-def _forward_returns(close: pd.Series, entry_mask: pd.Series, horizon: int) -> List[float]:
-    closes = close.to_numpy(dtype=float)
-    idxs = np.flatnonzero(entry_mask.to_numpy(dtype=bool))
-    out: List[float] = []
-    n = len(closes)
-    for i in idxs:
-        j = i + horizon
-        if j >= n:
-            continue
-        entry_px = closes[i]
-        exit_px = closes[j]
-        if not np.isfinite(entry_px) or entry_px <= 0 or not np.isfinite(exit_px):
-            continue
-        out.append(float((exit_px / entry_px - 1.0) * 100.0))
-    return out
-
-
 _CACHE_DIR = Path(__file__).resolve().parent / "cache" / "macdv_d7_band_stats"
 
 _mem_cache: Dict[str, Dict[str, Any]] = {}
@@ -146,47 +104,11 @@ def compute_macdv_d7_band_stats(
     universe = [t.strip().upper() for t in tickers if isinstance(t, str) and t.strip()]
     universe = sorted(set(universe))
 
-    backtester = EnhancedPerformanceMatrixBacktester(
-        tickers=universe,
-        lookback_period=pct_lookback,
-        rsi_length=14,
-        ma_length=14,
-        max_horizon=max(21, horizon),
-    )
-
-    band_labels = [label for _, _, label in RSI_BANDS]
-    table: Dict[str, Dict[str, Dict[str, Any]]] = {}
-    all_by_band: Dict[str, List[float]] = {label: [] for label in band_labels}
-
-    for ticker in universe:
-        data = backtester.fetch_data(ticker, period=period)
-        if data is None or getattr(data, "empty", True):
-            continue
-
-        rsi_ma = backtester.calculate_rsi_ma_indicator(data)
-        rsi_pct = backtester.calculate_percentile_ranks(rsi_ma)
-        macdv = _macdv_val(data)
-
-        work = data.copy()
-        work["macdv_val"] = macdv
-        work["rsi_pct"] = rsi_pct
-        work = work.dropna(subset=["Close", "macdv_val", "rsi_pct"]).copy()
-        work.reset_index(drop=True, inplace=True)
-        if work.empty:
-            continue
-
-        close = work["Close"]
-        macd_mask = (work["macdv_val"] > macdv_lo).fillna(False)
-
-        table[ticker] = {}
-        for rlo, rhi, label in RSI_BANDS:
-            band_mask = (work["rsi_pct"] >= rlo) & (work["rsi_pct"] < rhi)
-            entry = (macd_mask & band_mask).fillna(False)
-            rets = _forward_returns(close, entry, horizon=horizon)
-            table[ticker][label] = _stats(rets)
-            all_by_band[label].extend(rets)
-
-    table["ALL"] = {label: _stats(all_by_band[label]) for label in band_labels}
+    cube = load_event_cube(universe, period=period, pct_lookback=pct_lookback, max_horizon=horizon)
+    table = cube.band_table(horizon, RSI_BANDS, macdv_lo=macdv_lo, lo_inclusive=False)
+    # Tickers whose history is too short for any MACD-V/RSI percentile row are left out
+    present = set(cube.events["ticker"])
+    table = {ticker: row for ticker, row in table.items() if ticker == "ALL" or ticker in present}
 
     return {
         "generated_at": datetime.now(timezone.utc).replace(microsecond=0).isoformat().replace("+00:00", "Z"),
@@ -25,6 +25,99 @@ except ModuleNotFoundError:
     from backend.macdv_calculator import MACDVCalculator  # type: ignore
 
 
+class _FenwickCounter:
+    """Binary indexed tree of counts over value ranks (order-statistic counts in O(log n))."""
+
+    def __init__(self, size: int):
+        self.tree = [0] * (size + 1)
+
+    def add(self, rank: int, delta: int) -> None:
+        i = rank + 1
+        while i < len(self.tree):
+            self.tree[i] += delta
+            i += i & -i
+
+    def count_below(self, rank: int) -> int:
+        """Number of stored items with a rank strictly lower than ``rank``."""
+        total = 0
+        i = rank
+        while i > 0:
+            total += self.tree[i]
+            i -= i & -i
+        return total
+
+
+def rolling_group_percentile_ranks(
+    values: np.ndarray,
+    groups: np.ndarray,
+    lookback: int
+) -> np.ndarray:
+    """
+    Rolling percentile rank of each value within its own sub-population.
+
+    For bar i with groups[i] >= 0 the population is every bar j in
+    [i - lookback, i] with groups[j] == groups[i] (the current bar included);
+    the rank is the share of that population strictly below values[i], in
+    percent and rounded to 2 decimals, or 50.0 when it has fewer than 2 members.
+    NaN values count as members but never rank below anything. Bars with a
+    negative group are NaN.
+
+    One Fenwick tree per group over the compressed value ranks keeps each
+    window update and query at O(log n), so a series costs O(n log n).
+
+    Args:
+        values: Series values
+        groups: Sub-population label per bar (-1 = excluded)
+        lookback: Number of prior bars in the window
+
+    Returns:
+        Array of percentile ranks (0-100)
+    """
+    n = len(values)
+    ranks_out = np.full(n, np.nan)
+    if n == 0:
+        return ranks_out
+
+    finite = np.isfinite(values)
+    uniques = np.unique(values[finite])
+    value_rank = np.full(n, -1, dtype=np.int64)
+    value_rank[finite] = np.searchsorted(uniques, values[finite])
+
+    group_ids = [int(g) for g in np.unique(groups) if g >= 0]
+    trees = {g: _FenwickCounter(len(uniques)) for g in group_ids}
+    members = dict.fromkeys(group_ids, 0)
+    below = np.zeros(n)
+    population = np.zeros(n)
+
+    rank_list = value_rank.tolist()
+    group_list = groups.tolist()
+    for i in range(n):
+        g = group_list[i]
+        if g >= 0:
+            members[g] += 1
+            if rank_list[i] >= 0:
+                trees[g].add(rank_list[i], 1)
+
+        expired = i - lookback - 1
+        if expired >= 0:
+            g_old = group_list[expired]
+            if g_old >= 0:
+                members[g_old] -= 1
+                if rank_list[expired] >= 0:
+                    trees[g_old].add(rank_list[expired], -1)
+
+        if g >= 0:
+            population[i] = members[g]
+            if rank_list[i] >= 0:
+                below[i] = trees[g].count_below(rank_list[i])
+
+    in_group = groups >= 0
+    enough = in_group & (population >= 2)
+    ranks_out[in_group] = 50.0
+    ranks_out[enough] = np.round(below[enough] / population[enough] * 100, 2)
+    return ranks_out
+
+
 class MACDVPercentileCalculator(MACDVCalculator):
     """
     MACD-V calculator with categorical percentile functionality.
@@ -84,35 +177,13 @@ class MACDVPercentileCalculator(MACDVCalculator):
         This is the RECOMMENDED method as it respects the natural structure
         of MACD-V zones while providing relative positioning.
         """
-        percentile_series = pd.Series(index=macdv_series.index, dtype=float)
+        values = macdv_series.to_numpy(dtype=float)
+        groups = np.full(len(values), -1, dtype=np.int64)
+        for zone_idx, (zone_name, zone_min, zone_max) in enumerate(self.ZONES):
+            groups[(values >= zone_min) & (values < zone_max)] = zone_idx
 
-        for zone_name, zone_min, zone_max in self.ZONES:
-            # Get values in this zone
-            zone_mask = (macdv_series >= zone_min) & (macdv_series < zone_max)
-            zone_indices = macdv_series.index[zone_mask]
-
-            if len(zone_indices) == 0:
-                continue
-
-            # Calculate rolling percentile within this zone
-            for idx in zone_indices:
-                # Get lookback window
-                window_start = max(0, macdv_series.index.get_loc(idx) - self.percentile_lookback)
-                window_data = macdv_series.iloc[window_start:macdv_series.index.get_loc(idx) + 1]
-
-                # Filter to values in the same zone
-                window_zone_data = window_data[(window_data >= zone_min) & (window_data < zone_max)]
-
-                if len(window_zone_data) < 2:
-                    percentile_series.loc[idx] = 50.0  # Default to neutral if insufficient data
-                    continue
-
-                # Calculate percentile rank
-                current_val = macdv_series.loc[idx]
-                pct_rank = (window_zone_data < current_val).sum() / len(window_zone_data) * 100
-                percentile_series.loc[idx] = round(pct_rank, 2)
-
-        return percentile_series
+        ranks = rolling_group_percentile_ranks(values, groups, self.percentile_lookback)
+        return pd.Series(ranks, index=macdv_series.index, dtype=float)
 
     def _calculate_global_percentiles(self, macdv_series: pd.Series) -> pd.Series:
         """
@@ -121,23 +192,11 @@ class MACDVPercentileCalculator(MACDVCalculator):
         This treats all values equally regardless of zone, which may be
         less meaningful but is simpler to interpret.
         """
-        percentile_series = pd.Series(index=macdv_series.index, dtype=float)
+        values = macdv_series.to_numpy(dtype=float)
+        groups = np.zeros(len(values), dtype=np.int64)
 
-        for i in range(len(macdv_series)):
-            # Get lookback window
-            window_start = max(0, i - self.percentile_lookback)
-            window_data = macdv_series.iloc[window_start:i + 1]
-
-            if len(window_data) < 2:
-                percentile_series.iloc[i] = 50.0
-                continue
-
-            # Calculate percentile rank
-            current_val = macdv_series.iloc[i]
-            pct_rank = (window_data < current_val).sum() / len(window_data) * 100
-            percentile_series.iloc[i] = round(pct_rank, 2)
-
-        return percentile_series
+        ranks = rolling_group_percentile_ranks(values, groups, self.percentile_lookback)
+        return pd.Series(ranks, index=macdv_series.index, dtype=float)
 
     def _calculate_asymmetric_percentiles(self, macdv_series: pd.Series) -> pd.Series:
         """
@@ -145,43 +204,13 @@ class MACDVPercentileCalculator(MACDVCalculator):
 
         This captures directional bias but is more complex.
         """
-        percentile_series = pd.Series(index=macdv_series.index, dtype=float)
-
-        # Bullish regime: >= 0
-        bullish_mask = macdv_series >= 0
-        if bullish_mask.any():
-            bullish_data = macdv_series[bullish_mask]
-            for idx in bullish_data.index:
-                window_start = max(0, macdv_series.index.get_loc(idx) - self.percentile_lookback)
-                window_data = macdv_series.iloc[window_start:macdv_series.index.get_loc(idx) + 1]
-                window_bullish = window_data[window_data >= 0]
-
-                if len(window_bullish) < 2:
-                    percentile_series.loc[idx] = 50.0
-                    continue
-
-                current_val = macdv_series.loc[idx]
-                pct_rank = (window_bullish < current_val).sum() / len(window_bullish) * 100
-                percentile_series.loc[idx] = round(pct_rank, 2)
-
-        # Bearish regime: < 0
-        bearish_mask = macdv_series < 0
-        if bearish_mask.any():
-            bearish_data = macdv_series[bearish_mask]
-            for idx in bearish_data.index:
-                window_start = max(0, macdv_series.index.get_loc(idx) - self.percentile_lookback)
-                window_data = macdv_series.iloc[window_start:macdv_series.index.get_loc(idx) + 1]
-                window_bearish = window_data[window_data < 0]
-
-                if len(window_bearish) < 2:
-                    percentile_series.loc[idx] = 50.0
-                    continue
-
-                current_val = macdv_series.loc[idx]
-                pct_rank = (window_bearish < current_val).sum() / len(window_bearish) * 100
-                percentile_series.loc[idx] = round(pct_rank, 2)
-
-        return percentile_series
+        values = macdv_series.to_numpy(dtype=float)
+        groups = np.full(len(values), -1, dtype=np.int64)
+        groups[values >= 0] = 0  # Bullish regime
+        groups[values < 0] = 1   # Bearish regime
+
+        ranks = rolling_group_percentile_ranks(values, groups, self.percentile_lookback)
+        return pd.Series(ranks, index=macdv_series.index, dtype=float)
 
     def calculate_macdv_with_percentiles(
         self,
@@ -3,7 +3,8 @@
 MACD-V Reference Lookup Utility
 
 Fast lookup utility for MACD-V percentiles and reference data.
-Loads precomputed reference database without recalculation.
+Loads precomputed reference database without recalculation; with the
+per-ticker layout only the requested tickers are read from disk.
 
 Usage:
     from macdv_reference_lookup import MACDVReferenceLookup
@@ -25,13 +26,34 @@ class MACDVReferenceLookup:
     Fast lookup for precomputed MACD-V reference data.
     """
 
-    def __init__(self, reference_file: Optional[str] = None):
+    def __init__(self, reference_file: Optional[str] = None, reference_dir: Optional[str] = None):
         """
         Initialize lookup with reference database.
 
+        When the per-ticker reference directory (written by
+        precompute_macdv_references.generate_reference_database) has an index,
+        only the index is read here and each ticker's file is loaded on first
+        use, and re-read when the file changes. Otherwise the single combined
+        JSON file is loaded.
+
         Args:
             reference_file: Path to reference JSON file. If None, uses default location.
+            reference_dir: Path to per-ticker reference directory. If None, uses default location.
         """
+        if reference_dir is None:
+            reference_dir = Path(__file__).parent.parent / "docs" / "macdv_reference"
+        self.reference_dir = Path(reference_dir)
+        self.ticker_data: Dict[str, Dict] = {}
+        self._ticker_files: Optional[Dict[str, str]] = None
+        self._ticker_mtimes: Dict[str, float] = {}
+        self._index_mtime: Optional[float] = None
+
+        index_file = self.reference_dir / "index.json"
+        if reference_file is None and index_file.exists():
+            self.reference_file = index_file
+            self._load_index()
+            return
+
         if reference_file is None:
             # Default location
             reference_file = Path(__file__).parent.parent / "docs" / "macdv_reference_database.json"
@@ -52,6 +74,20 @@ class MACDVReferenceLookup:
         self.ticker_data = self.database['ticker_data']
         self.aggregate_stats = self.database['aggregate_stats']
 
+    def _load_index(self) -> None:
+        """(Re)load the per-ticker index if it changed on disk."""
+        mtime = self.reference_file.stat().st_mtime
+        if mtime == self._index_mtime:
+            return
+        with open(self.reference_file, 'r') as f:
+            self.database = json.load(f)
+        self.metadata = self.database['metadata']
+        self.aggregate_stats = self.database['aggregate_stats']
+        self._ticker_files = {
+            ticker: entry['file'] for ticker, entry in self.database['tickers'].items()
+        }
+        self._index_mtime = mtime
+
     def get_ticker_info(self, ticker: str) -> Optional[Dict]:
         """
         Get complete reference info for a ticker.
@@ -59,7 +95,24 @@ class MACDVReferenceLookup:
         Returns:
             Dictionary with all reference data, or None if ticker not found.
         """
-        return self.ticker_data.get(ticker)
+        if self._ticker_files is None:
+            return self.ticker_data.get(ticker)
+
+        try:
+            self._load_index()
+            filename = self._ticker_files.get(ticker)
+            if filename is None:
+                return None
+            path = self.reference_dir / filename
+            mtime = path.stat().st_mtime
+            if ticker not in self.ticker_data or self._ticker_mtimes.get(ticker) != mtime:
+                with open(path, 'r') as f:
+                    self.ticker_data[ticker] = json.load(f)['reference']
+                self._ticker_mtimes[ticker] = mtime
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Warning: could not load MACD-V reference for {ticker}: {e}")
+            return self.ticker_data.get(ticker)
+        return self.ticker_data[ticker]
 
     def get_ticker_distribution(self, ticker: str) -> Optional[Dict]:
         """Get overall distribution statistics for a ticker."""
@@ -159,22 +212,32 @@ class MACDVReferenceLookup:
 
     def list_available_tickers(self) -> List[str]:
         """Get list of all available tickers in reference database."""
+        if self._ticker_files is not None:
+            return sorted(self._ticker_files)
         return sorted(self.ticker_data.keys())
 
     def get_metadata(self) -> Dict:
         """Get metadata about the reference database."""
         return self.metadata
 
-    def is_stale(self, max_age_days: int = 7) -> bool:
+    def is_stale(self, max_age_days: int = 7, ticker: Optional[str] = None) -> bool:
         """
         Check if reference database is stale.
 
         Args:
             max_age_days: Maximum age in days before considered stale
+            ticker: If given, check the age of that ticker's last processed bar instead
 
         Returns:
-            True if database is older than max_age_days
+            True if database (or the ticker's data) is older than max_age_days
         """
+        if ticker is not None:
+            info = self.get_ticker_info(ticker)
+            last_date = (info or {}).get('current_state', {}).get('last_date')
+            if not last_date:
+                return True
+            return (datetime.now() - datetime.fromisoformat(last_date)).days > max_age_days
+
         generated_at = datetime.fromisoformat(self.metadata['generated_at'])
         age = (datetime.now() - generated_at).days
         return age > max_age_days
@@ -8,6 +8,9 @@ Definitions (consistent with existing backend):
 - RSI-MA: RSI(14 Wilder) on diff(log returns), then EMA(14).
 - RSI percentile: rolling percentile rank over `pct_lookback` bars.
 - MACD-V: ((EMA12(Close)-EMA26(Close)) / ATR(26)) * 100 (repo implementation).
+
+Per-ticker indicator values and forward returns come from the persisted
+event cube (macdv_rsi_event_cube); this module only slices it.
 """
 
 from __future__ import annotations
@@ -16,14 +19,11 @@ from dataclasses import dataclass
 from typing import Dict, List, Tuple
 
 import numpy as np
-import pandas as pd
 
 try:
-    from enhanced_backtester import EnhancedPerformanceMatrixBacktester
-    from macdv_calculator import MACDVCalculator
+    from macdv_rsi_event_cube import horizon_column, load_event_cube
 except ModuleNotFoundError:
-    from backend.enhanced_backtester import EnhancedPerformanceMatrixBacktester  # type: ignore
-    from backend.macdv_calculator import MACDVCalculator  # type: ignore
+    from backend.macdv_rsi_event_cube import horizon_column, load_event_cube  # type: ignore
 
 
 DEFAULT_UNIVERSE = ["AAPL", "NVDA", "GOOGL", "MSFT", "META", "QQQ", "SPY", "BRK-B", "AMZN"]
@@ -72,32 +72,6 @@ def _stats(returns: List[float]) -> ReturnStats:
     )
 
 
-def _macdv_val(data: pd.DataFrame) -> pd.Series:
-    df = data.copy()
-    df.columns = [c.lower() for c in df.columns]
-    # Explicit defaults (requested): fast=12, slow=26, signal=9, atr=26
-    calc = MACDVCalculator(fast_length=12, slow_length=26, signal_length=9, atr_length=26)
-    out = calc.calculate_macdv(df, source_col="close")
-    return out["macdv_val"]
-
-
-def _forward_returns(close: pd.Series, entry_mask: pd.Series, horizon: int) -> List[float]:
-    closes = close.to_numpy(dtype=float)
-    idxs = np.flatnonzero(entry_mask.to_numpy(dtype=bool))
-    out: List[float] = []
-    n = len(closes)
-    for i in idxs:
-        j = i + horizon
-        if j >= n:
-            continue
-        entry_px = closes[i]
-        exit_px = closes[j]
-        if not np.isfinite(entry_px) or entry_px <= 0 or not np.isfinite(exit_px):
-            continue
-        out.append(float((exit_px / entry_px - 1.0) * 100.0))
-    return out
-
-
 def _non_overlapping_entries(signal: np.ndarray, horizon: int) -> List[int]:
     idxs: List[int] = []
     i = 0
@@ -124,82 +98,39 @@ def run_macdv_120_150_rsi_band_analysis(
     if not universe:
         universe = DEFAULT_UNIVERSE[:]
 
-    backtester = EnhancedPerformanceMatrixBacktester(
-        tickers=universe,
-        lookback_period=pct_lookback,
-        rsi_length=14,
-        ma_length=14,
-        max_horizon=max(21, horizon),
-    )
-
-    band_labels = [label for _, _, label in RSI_BANDS]
-    table: Dict[str, Dict[str, Dict]] = {}
-
-    all_returns_by_band: Dict[str, List[float]] = {label: [] for label in band_labels}
-    all_returns_lt50: List[float] = []
-    all_returns_gte50: List[float] = []
+    cube = load_event_cube(universe, period=period, pct_lookback=pct_lookback, max_horizon=horizon)
+    table = cube.band_table(horizon, RSI_BANDS, macdv_lo=macdv_lo, macdv_hi=macdv_hi)
+
+    in_macd_band = cube.returns(horizon, macdv_lo=macdv_lo, macdv_hi=macdv_hi)
+    rsi = in_macd_band["rsi_pct"]
+    lt50 = np.zeros(len(rsi), dtype=bool)
+    gte50 = np.zeros(len(rsi), dtype=bool)
+    for rlo, rhi, _ in RSI_BANDS:
+        in_band = ((rsi >= rlo) & (rsi < rhi)).to_numpy()
+        if rhi <= 50:
+            lt50 |= in_band
+        if rlo >= 50:
+            gte50 |= in_band
+    summary = {
+        "rsi_lt_50": _stats(in_macd_band["ret"].to_numpy()[lt50].tolist()).to_dict(),
+        "rsi_gte_50": _stats(in_macd_band["ret"].to_numpy()[gte50].tolist()).to_dict(),
+    }
 
+    # Non-overlapping: MACD-V in band + RSI<=threshold, fixed exit at D7
     non_overlap_by_ticker: Dict[str, ReturnStats] = {}
     non_overlap_all: List[float] = []
-
-    for ticker in universe:
-        data = backtester.fetch_data(ticker, period=period)
-        if data is None or getattr(data, "empty", True):
-            continue
-
-        rsi_ma = backtester.calculate_rsi_ma_indicator(data)
-        rsi_pct = backtester.calculate_percentile_ranks(rsi_ma)
-        macdv = _macdv_val(data)
-
-        work = data.copy()
-        work["macdv_val"] = macdv
-        work["rsi_pct"] = rsi_pct
-        work = work.dropna(subset=["Close", "macdv_val", "rsi_pct"]).copy()
-        work.reset_index(drop=True, inplace=True)
-
-        close = work["Close"]
-        macd_mask = (work["macdv_val"] >= macdv_lo) & (work["macdv_val"] < macdv_hi)
-
-        table[ticker] = {}
-        for rlo, rhi, label in RSI_BANDS:
-            band_mask = (work["rsi_pct"] >= rlo) & (work["rsi_pct"] < rhi)
-            entry = (macd_mask & band_mask).fillna(False)
-            rets = _forward_returns(close, entry, horizon=horizon)
-
-            st = _stats(rets)
-            table[ticker][label] = st.to_dict()
-
-            all_returns_by_band[label].extend(rets)
-            if rhi <= 50:
-                all_returns_lt50.extend(rets)
-            if rlo >= 50:
-                all_returns_gte50.extend(rets)
-
-        # Non-overlapping: MACD-V in band + RSI<=threshold, fixed exit at D7
-        sig = (macd_mask & (work["rsi_pct"] <= rsi_threshold_non_overlap)).fillna(False).to_numpy(dtype=bool)
-        entries = _non_overlapping_entries(sig, horizon=horizon)
-        closes = close.to_numpy(dtype=float)
+    events_by_ticker = dict(tuple(cube.events.groupby("ticker", sort=False)))
+    for ticker in cube.tickers:
+        events = events_by_ticker.get(ticker)
         rets_no: List[float] = []
-        for i in entries:
-            j = i + horizon
-            if j >= len(closes):
-                continue
-            entry_px = closes[i]
-            exit_px = closes[j]
-            if not np.isfinite(entry_px) or entry_px <= 0 or not np.isfinite(exit_px):
-                continue
-            rets_no.append(float((exit_px / entry_px - 1.0) * 100.0))
+        if events is not None:
+            macdv = events["macdv_val"]
+            sig = ((macdv >= macdv_lo) & (macdv < macdv_hi) & (events["rsi_pct"] <= rsi_threshold_non_overlap)).to_numpy(dtype=bool)
+            forward = events[horizon_column(horizon)].to_numpy(dtype=float)
+            rets_no = [float(forward[i]) for i in _non_overlapping_entries(sig, horizon=horizon) if np.isfinite(forward[i])]
         non_overlap_by_ticker[ticker] = _stats(rets_no)
         non_overlap_all.extend(rets_no)
 
-    # ALL row
-    table["ALL"] = {label: _stats(all_returns_by_band[label]).to_dict() for label in band_labels}
-
-    summary = {
-        "rsi_lt_50": _stats(all_returns_lt50).to_dict(),
-        "rsi_gte_50": _stats(all_returns_gte50).to_dict(),
-    }
-
     non_overlap = {
         "rule": f"MACD-V {macdv_lo:.0f}-{macdv_hi:.0f} & RSI%≤{rsi_threshold_non_overlap:.0f} (non-overlapping, exit D{horizon})",
         "horizon": horizon,
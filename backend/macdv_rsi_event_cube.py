@@ -0,0 +1,300 @@
+"""
+Persisted MACD-V × RSI-MA percentile event cube.
+
+One row per (ticker, date) with the MACD-V value, the RSI-MA percentile and
+close-to-close forward returns for D1..D{max_horizon}. Band statistics for
+any MACD-V range × RSI band × horizon are then grouped reductions over the
+cube instead of a fresh 10y download + indicator pass per query.
+
+Definitions match macdv_rsi_band_analysis / macdv_d7_band_stats:
+- RSI-MA percentile: EnhancedPerformanceMatrixBacktester indicator and
+  rolling percentile rank over `pct_lookback` bars.
+- MACD-V: MACDVCalculator(12, 26, 9, 26) `macdv_val`.
+- Forward return at horizon h: (close[i+h] / close[i] - 1) * 100 over the
+  rows left after dropping bars without close, MACD-V or RSI percentile.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+try:
+    from enhanced_backtester import EnhancedPerformanceMatrixBacktester
+    from macdv_calculator import MACDVCalculator
+    from swing_cohort_builder import rolling_percentile_ranks
+except ModuleNotFoundError:
+    from backend.enhanced_backtester import EnhancedPerformanceMatrixBacktester  # type: ignore
+    from backend.macdv_calculator import MACDVCalculator  # type: ignore
+    from backend.swing_cohort_builder import rolling_percentile_ranks  # type: ignore
+
+
+CUBE_MAX_HORIZON = 21
+
+_CUBE_DIR = Path(__file__).resolve().parent / "cache" / "macdv_rsi_event_cube"
+
+_mem_cube: Dict[Tuple[str, str, int], Tuple[datetime, int, pd.DataFrame]] = {}
+
+
+def horizon_column(horizon: int) -> str:
+    return f"d{int(horizon)}"
+
+
+def build_ticker_events(
+    data: pd.DataFrame,
+    backtester: EnhancedPerformanceMatrixBacktester,
+    max_horizon: int = CUBE_MAX_HORIZON,
+) -> pd.DataFrame:
+    """
+    Event rows for one ticker: date, macdv_val, rsi_pct, close and d1..d{max_horizon}.
+
+    Forward returns are NaN past the end of the series or when either close
+    is missing or the entry close is not positive.
+    """
+    rsi_ma = backtester.calculate_rsi_ma_indicator(data)
+    rsi_pct = rolling_percentile_ranks(rsi_ma.to_numpy(dtype=float), backtester.lookback_period)
+
+    df = data.copy()
+    df.columns = [str(c).lower() for c in df.columns]
+    calc = MACDVCalculator(fast_length=12, slow_length=26, signal_length=9, atr_length=26)
+    macdv = calc.calculate_macdv(df, source_col="close")["macdv_val"]
+
+    work = pd.DataFrame(
+        {
+            "date": data.index,
+            "macdv_val": macdv.to_numpy(dtype=float),
+            "rsi_pct": rsi_pct,
+            "close": data["Close"].to_numpy(dtype=float),
+        }
+    )
+    work = work.dropna(subset=["close", "macdv_val", "rsi_pct"]).reset_index(drop=True)
+
+    closes = work["close"].to_numpy(dtype=float)
+    entry_ok = np.isfinite(closes) & (closes > 0)
+    for horizon in range(1, max_horizon + 1):
+        exit_px = np.full(len(closes), np.nan)
+        exit_px[:-horizon] = closes[horizon:]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            returns = (exit_px / closes - 1.0) * 100.0
+        returns[~entry_ok | ~np.isfinite(exit_px)] = np.nan
+        work[horizon_column(horizon)] = returns
+    return work
+
+
+def _cube_path(ticker: str, period: str, pct_lookback: int) -> Path:
+    safe = "".join(ch if ch.isalnum() or ch in "-_." else "_" for ch in ticker)
+    return _CUBE_DIR / f"{safe}_{period}_{int(pct_lookback)}.pkl"
+
+
+def _load_ticker_events(
+    ticker: str,
+    period: str,
+    pct_lookback: int,
+    max_horizon: int,
+    ttl_seconds: int,
+) -> Optional[pd.DataFrame]:
+    key = (ticker, period, int(pct_lookback))
+    now = datetime.now(timezone.utc)
+
+    cached = _mem_cube.get(key)
+    if cached is not None:
+        built_at, horizons, events = cached
+        if (now - built_at).total_seconds() < ttl_seconds and horizons >= max_horizon:
+            return events
+
+    path = _cube_path(ticker, period, pct_lookback)
+    if not path.exists():
+        return None
+    try:
+        payload = pd.read_pickle(str(path))
+        built_at = payload["built_at"]
+        if (now - built_at).total_seconds() >= ttl_seconds or payload["max_horizon"] < max_horizon:
+            return None
+        _mem_cube[key] = (built_at, payload["max_horizon"], payload["events"])
+        return payload["events"]
+    except Exception:
+        return None
+
+
+def _save_ticker_events(ticker: str, period: str, pct_lookback: int, max_horizon: int, events: pd.DataFrame) -> None:
+    built_at = datetime.now(timezone.utc)
+    _mem_cube[(ticker, period, int(pct_lookback))] = (built_at, max_horizon, events)
+    _CUBE_DIR.mkdir(parents=True, exist_ok=True)
+    try:
+        pd.to_pickle(
+            {"built_at": built_at, "max_horizon": max_horizon, "events": events},
+            str(_cube_path(ticker, period, pct_lookback)),
+        )
+    except Exception as e:
+        print(f"  Warning: Could not persist MACD-V × RSI events for {ticker}: {e}")
+
+
+@dataclass
+class MACDVRSIEventCube:
+    """Event rows for a universe; `tickers` lists every ticker that returned data."""
+
+    events: pd.DataFrame
+    tickers: List[str]
+    max_horizon: int
+    params: Dict[str, Any] = field(default_factory=dict)
+    _ticker_codes: np.ndarray = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self._ticker_codes = pd.Categorical(self.events["ticker"], categories=self.tickers).codes.astype(np.int64)
+
+    def _selection(
+        self,
+        horizon: int,
+        macdv_lo: Optional[float],
+        macdv_hi: Optional[float],
+        lo_inclusive: bool,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        if horizon < 1 or horizon > self.max_horizon:
+            raise ValueError(f"horizon must be within 1..{self.max_horizon}")
+        macdv = self.events["macdv_val"].to_numpy(dtype=float)
+        ret = self.events[horizon_column(horizon)].to_numpy(dtype=float)
+        mask = np.isfinite(ret)
+        if macdv_lo is not None:
+            mask &= (macdv >= macdv_lo) if lo_inclusive else (macdv > macdv_lo)
+        if macdv_hi is not None:
+            mask &= macdv < macdv_hi
+        return mask, ret
+
+    def returns(
+        self,
+        horizon: int,
+        *,
+        macdv_lo: Optional[float] = None,
+        macdv_hi: Optional[float] = None,
+        lo_inclusive: bool = True,
+    ) -> pd.DataFrame:
+        """Rows (ticker, date, rsi_pct, ret) with a D{horizon} return and MACD-V in [lo, hi) ((lo, hi) if not lo_inclusive)."""
+        mask, ret = self._selection(horizon, macdv_lo, macdv_hi, lo_inclusive)
+        out = self.events.loc[mask, ["ticker", "date", "rsi_pct"]]
+        return out.assign(ret=ret[mask])
+
+    def band_table(
+        self,
+        horizon: int,
+        rsi_bands: List[Tuple[float, float, str]],
+        *,
+        macdv_lo: Optional[float] = None,
+        macdv_hi: Optional[float] = None,
+        lo_inclusive: bool = True,
+    ) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        """
+        Return stats per ticker and RSI band (plus an "ALL" row) for one MACD-V range.
+
+        Each cell is {"n", "win_rate", "mean", "median"}; empty cells carry
+        n=0 and None for the rest. Every ticker in `tickers` gets a row.
+        """
+        mask, ret = self._selection(horizon, macdv_lo, macdv_hi, lo_inclusive)
+        rsi = self.events["rsi_pct"].to_numpy(dtype=float)
+        n_bands = len(rsi_bands)
+
+        # Bands may overlap, so each band contributes its own (ticker, band) keys
+        cell_keys, band_keys, cell_returns = [], [], []
+        for band_idx, (rlo, rhi, _) in enumerate(rsi_bands):
+            rows = np.flatnonzero(mask & (rsi >= rlo) & (rsi < rhi))
+            cell_keys.append(self._ticker_codes[rows] * n_bands + band_idx)
+            band_keys.append(np.full(len(rows), band_idx, dtype=np.int64))
+            cell_returns.append(ret[rows])
+        returns = np.concatenate(cell_returns) if cell_returns else np.empty(0)
+
+        per_ticker = _cell_stats(
+            np.concatenate(cell_keys) if cell_keys else np.empty(0, dtype=np.int64),
+            returns, len(self.tickers) * n_bands,
+        )
+        overall = _cell_stats(
+            np.concatenate(band_keys) if band_keys else np.empty(0, dtype=np.int64),
+            returns, n_bands,
+        )
+
+        labels = [label for _, _, label in rsi_bands]
+        table: Dict[str, Dict[str, Dict[str, Any]]] = {
+            ticker: {label: per_ticker[code * n_bands + b] for b, label in enumerate(labels)}
+            for code, ticker in enumerate(self.tickers)
+        }
+        table["ALL"] = {label: overall[b] for b, label in enumerate(labels)}
+        return table
+
+
+def _cell_stats(keys: np.ndarray, returns: np.ndarray, n_keys: int) -> List[Dict[str, Any]]:
+    """{"n", "win_rate", "mean", "median"} for each key in 0..n_keys-1 (one sort for all cells)."""
+    order = np.lexsort((returns, keys))
+    keys, returns = keys[order], returns[order]
+    counts = np.bincount(keys, minlength=n_keys)
+    wins = np.bincount(keys, weights=returns > 0, minlength=n_keys)
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+
+    cells: List[Dict[str, Any]] = []
+    for key in range(n_keys):
+        n = int(counts[key])
+        if n == 0:
+            cells.append({"n": 0, "win_rate": None, "mean": None, "median": None})
+            continue
+        start = starts[key]
+        cell = returns[start:start + n]
+        cells.append({
+            "n": n,
+            "win_rate": float(wins[key] / n * 100.0),
+            "mean": float(cell.mean()),
+            "median": float((cell[(n - 1) // 2] + cell[n // 2]) / 2),
+        })
+    return cells
+
+
+def load_event_cube(
+    tickers: List[str],
+    *,
+    period: str = "10y",
+    pct_lookback: int = 252,
+    max_horizon: int = CUBE_MAX_HORIZON,
+    ttl_seconds: int = 24 * 3600,
+    force_refresh: bool = False,
+) -> MACDVRSIEventCube:
+    """
+    Load (or build and persist) the event cube for a universe.
+
+    Each ticker's events are cached in memory and under cache/macdv_rsi_event_cube
+    for `ttl_seconds`; only missing or stale tickers are downloaded and rebuilt.
+    """
+    max_horizon = max(CUBE_MAX_HORIZON, int(max_horizon))
+    backtester = EnhancedPerformanceMatrixBacktester(
+        tickers=tickers,
+        lookback_period=pct_lookback,
+        rsi_length=14,
+        ma_length=14,
+        max_horizon=max_horizon,
+    )
+
+    frames: List[pd.DataFrame] = []
+    available: List[str] = []
+    for ticker in tickers:
+        events = None
+        if not force_refresh:
+            events = _load_ticker_events(ticker, period, pct_lookback, max_horizon, ttl_seconds)
+        if events is None:
+            data = backtester.fetch_data(ticker, period=period)
+            if data is None or getattr(data, "empty", True):
+                continue
+            events = build_ticker_events(data, backtester, max_horizon=max_horizon)
+            _save_ticker_events(ticker, period, pct_lookback, max_horizon, events)
+        available.append(ticker)
+        frames.append(events.assign(ticker=ticker))
+
+    columns = ["ticker", "date", "macdv_val", "rsi_pct", "close"] + [
+        horizon_column(h) for h in range(1, max_horizon + 1)
+    ]
+    events = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=columns)
+    return MACDVRSIEventCube(
+        events=events[[c for c in columns if c in events.columns]],
+        tickers=available,
+        max_horizon=max_horizon,
+        params={"period": period, "pct_lookback": pct_lookback},
+    )
@@ -6,22 +6,43 @@ Provides comprehensive macro risk assessment including:
 - McClellan Market Facilitation Index (MMFI)
 - US Treasury Yields (10Y, 3M)
 - Yield Curve Analysis (inversions, slope)
+
+All metrics are read from a MacroSeriesStore: one daily time series of
+^TNX, ^IRX, SPY and ^VIX closes plus every derived column (spread, SPY vs
+its 200-day MA, MMFI, component and composite risk levels). A background
+refresh appends the latest bars and recomputes only the rows whose rolling
+windows changed, so /current reads the last row and /historical slices.
 """
 
+import os
+import threading
+import time
 from fastapi import APIRouter, HTTPException
+from starlette.concurrency import run_in_threadpool
 from datetime import datetime, timedelta, timezone
 from typing import Dict, List, Optional
 import pandas as pd
 import numpy as np
-import yfinance as yf
 from dataclasses import dataclass, asdict
 
+from yf_batch import download_frames
+
 router = APIRouter(prefix="/api/macro-risk", tags=["macro-risk"])
 
-# Cache for risk metrics (5-minute TTL)
-_risk_metrics_cache: Optional[Dict] = None
-_cache_timestamp: Optional[datetime] = None
-_cache_ttl_seconds = 300  # 5 minutes
+# Background refresh cadence; requests refresh inline only once the store is
+# older than twice this (e.g. the refresh thread is not running)
+MACRO_REFRESH_SECONDS = int(os.getenv("MACRO_RISK_REFRESH_SECONDS", "300"))
+MACRO_HISTORY_DAYS = 1100       # calendar days loaded on the first refresh
+MACRO_MAX_HISTORY_DAYS = 3650   # longest history a request can make the store load
+_INCREMENTAL_PERIOD = "10d"     # bars re-downloaded on later refreshes
+_MA_WINDOW = 200
+MMFI_LOOKBACK = 50
+# Rows recomputed ahead of the first changed bar: the 200-bar MA needs 200
+# SPY closes, and bond/equity holidays leave gaps in the shared date index.
+_WARMUP_ROWS = _MA_WINDOW + 60
+
+_SYMBOLS = {"^TNX": "us_10y", "^IRX": "us_3m", "SPY": "spy_close", "^VIX": "vix_close"}
+_RISK_SCORES = {"Low": 1, "Medium": 2, "High": 3}
 
 
 @dataclass
@@ -52,28 +73,232 @@ class MMFIMetrics:
     risk_level: str  # "Low", "Medium", "High"
 
 
-def fetch_treasury_yields() -> Dict[str, float]:
+# ---------------------------------------------------------------------------
+# Vectorized metric series
+# ---------------------------------------------------------------------------
+
+def _labels(conditions: list, choices: list, default: str, valid: pd.Series) -> pd.Series:
+    """np.select over string labels; NaN where the input row is missing."""
+    return pd.Series(np.select(conditions, choices, default), index=valid.index).where(valid)
+
+
+def yield_curve_series(spread: pd.Series) -> pd.DataFrame:
+    """
+    Inversion analysis for a 10Y - 3M spread series (percentage points)
+
+    Returns:
+        DataFrame with curve_severity, curve_inverted, curve_risk and
+        curve_percentile columns
+    """
+    valid = spread.notna()
+    conditions = [spread > 1.0, spread > 0.25, spread > -0.25, spread > -0.75]
+    return pd.DataFrame({
+        "curve_severity": _labels(conditions, ["Normal", "Flat", "Flat", "Inverted"], "Deeply Inverted", valid),
+        "curve_inverted": (spread <= -0.25).where(valid),
+        "curve_risk": _labels(conditions, ["Low", "Low", "Medium", "High"], "High", valid),
+        # Approximate historical percentile: normal spread range -1.5% to +3.0% mapped to 0-100
+        "curve_percentile": ((spread + 1.5) / 4.5 * 100).clip(0, 100),
+    })
+
+
+def breadth_series(distance_pct: pd.Series) -> pd.DataFrame:
+    """
+    Approximate % of S&P 500 stocks above their 200 MA from SPY's distance
+    to its own 200-day MA (a proxy - the real measure needs all 500 stocks)
+
+    Returns:
+        DataFrame with breadth_pct_above, breadth_signal and breadth_risk columns
+    """
+    d = distance_pct
+    valid = d.notna()
+    conditions = [d > 5, d > 0, d > -5]
+    pct_above = np.select(conditions, [
+        75.0 + (d.clip(upper=15) / 15) * 20,    # 75-95%
+        55.0 + (d / 5) * 20,                    # 55-75%
+        35.0 + ((d + 5) / 5) * 20,              # 35-55%
+    ], 15.0 + (d.clip(lower=-15) + 15) / 15 * 20)  # 15-35%
+    return pd.DataFrame({
+        "breadth_pct_above": pd.Series(pct_above, index=d.index).where(valid),
+        "breadth_signal": _labels(conditions, ["Bullish", "Neutral", "Neutral"], "Bearish", valid),
+        "breadth_risk": _labels(conditions, ["Low", "Medium", "Medium"], "High", valid),
+    })
+
+
+def mmfi_series(spy_close: pd.Series, vix_close: pd.Series, lookback_days: int = MMFI_LOOKBACK) -> pd.Series:
+    """
+    MMFI proxy: positive when SPY is up and VIX down over `lookback_days` bars
+    (bullish), negative when SPY is down or VIX up (bearish)
+    """
+    spy_returns = spy_close.dropna().pct_change(periods=lookback_days)
+    vix_change = vix_close.dropna().pct_change(periods=lookback_days)
+    return (spy_returns * 100) - (vix_change * 50)
+
+
+def mmfi_levels(mmfi: pd.Series) -> pd.DataFrame:
+    """Signal / risk level columns for an MMFI series"""
+    valid = mmfi.notna()
+    conditions = [mmfi > 5, mmfi > -5]
+    return pd.DataFrame({
+        "mmfi_signal": _labels(conditions, ["Bullish", "Neutral"], "Bearish", valid),
+        "mmfi_risk": _labels(conditions, ["Low", "Medium"], "High", valid),
+    })
+
+
+def composite_risk_series(curve_risk: pd.Series, breadth_risk: pd.Series, mmfi_risk: pd.Series) -> pd.DataFrame:
+    """
+    Composite risk from component risk levels, row by row
+
+    Risk scoring: Low=1, Medium=2, High=3, weighted yield curve 40%,
+    breadth 30%, MMFI 30%.
+
+    Returns:
+        DataFrame with composite_score, overall_risk_level and risk_description
+    """
+    score = (
+        curve_risk.map(_RISK_SCORES) * 0.4
+        + breadth_risk.map(_RISK_SCORES) * 0.3
+        + mmfi_risk.map(_RISK_SCORES) * 0.3
+    ).astype(float)
+    valid = score.notna()
+    conditions = [score <= 1.5, score <= 2.3]
+    return pd.DataFrame({
+        "composite_score": score,
+        "overall_risk_level": _labels(conditions, ["Low", "Medium"], "High", valid),
+        "risk_description": _labels(conditions, [
+            "Market conditions favorable",
+            "Mixed signals, exercise caution",
+        ], "Elevated risk environment", valid),
+    })
+
+
+def derive_macro_series(raw: pd.DataFrame) -> pd.DataFrame:
+    """
+    All derived macro columns for a frame of daily closes
+    (us_10y, us_3m, spy_close, vix_close)
+
+    Every column depends on at most the trailing 200 SPY bars, so the store
+    only re-derives its newest rows plus a warm-up span on refresh.
+    """
+    out = raw.copy()
+    out["spread"] = raw["us_10y"] - raw["us_3m"]
+
+    spy = raw["spy_close"].dropna()
+    out["spy_ma200"] = spy.rolling(window=_MA_WINDOW).mean().reindex(raw.index)
+    out["spy_distance_pct"] = ((raw["spy_close"] - out["spy_ma200"]) / out["spy_ma200"]) * 100
+    out["mmfi"] = mmfi_series(spy, raw["vix_close"]).reindex(raw.index)
+
+    out = out.join(yield_curve_series(out["spread"]))
+    out = out.join(breadth_series(out["spy_distance_pct"]))
+    out = out.join(mmfi_levels(out["mmfi"]))
+    return out.join(composite_risk_series(out["curve_risk"], out["breadth_risk"], out["mmfi_risk"]))
+
+
+# ---------------------------------------------------------------------------
+# Time-series store
+# ---------------------------------------------------------------------------
+
+def _download_closes(period: str) -> pd.DataFrame:
+    """Daily closes for ^TNX, ^IRX, SPY and ^VIX in one batch, columns per _SYMBOLS."""
+    frames = download_frames(list(_SYMBOLS), period=period)
+    closes = pd.DataFrame({
+        col: frames[sym]["Close"] if "Close" in frames[sym].columns else pd.Series(dtype=float)
+        for sym, col in _SYMBOLS.items()
+    })
+    if closes.empty:
+        return pd.DataFrame(columns=list(_SYMBOLS.values()))
+    if closes.index.tz is not None:
+        closes.index = closes.index.tz_localize(None)
+    return closes.dropna(how="all").sort_index()
+
+
+def _last_valid(series: pd.Series) -> Optional[float]:
+    series = series.dropna()
+    return float(series.iloc[-1]) if not series.empty else None
+
+
+def _clamp_history_days(days: Optional[int]) -> int:
+    return min(max(days or 0, 0), MACRO_MAX_HISTORY_DAYS)
+
+
+class MacroSeriesStore:
     """
-    Fetch US Treasury yields from Yahoo Finance
+    Daily yield-curve, breadth and MMFI series with their derived risk columns.
+
+    The first refresh downloads `history_days` of closes; later refreshes pull
+    only the last few bars, merge them in (a re-downloaded bar replaces the
+    stored one) and re-derive just the rows from the first changed bar on.
+    """
+
+    def __init__(self, history_days: int = MACRO_HISTORY_DAYS) -> None:
+        self.history_days = history_days
+        self.frame = pd.DataFrame()
+        self.refreshed_at: Optional[float] = None  # time.monotonic()
+        self._lock = threading.Lock()
+
+    def refresh(self, history_days: Optional[int] = None) -> pd.DataFrame:
+        with self._lock:
+            return self._refresh(history_days)
+
+    def _refresh(self, history_days: Optional[int]) -> pd.DataFrame:
+        days = max(_clamp_history_days(history_days), self.history_days)
+        full = self.frame.empty or days > self.history_days
+        closes = _download_closes(f"{days}d" if full else _INCREMENTAL_PERIOD)
+        if closes.empty:
+            raise ValueError("No macro data downloaded")
+
+        if full:
+            self.frame = derive_macro_series(closes)
+            self.history_days = days
+        else:
+            first = closes.index[0]
+            raw = closes.combine_first(self.frame[list(_SYMBOLS.values())])
+            start = int(raw.index.searchsorted(first))
+            lo = max(0, start - _WARMUP_ROWS)
+            tail = derive_macro_series(raw.iloc[lo:]).iloc[start - lo:]
+            self.frame = pd.concat([self.frame[self.frame.index < first], tail])
+        self.refreshed_at = time.monotonic()
+        return self.frame
+
+    def ensure_fresh(self, max_age: float = 2 * MACRO_REFRESH_SECONDS, history_days: Optional[int] = None) -> pd.DataFrame:
+        """
+        The current frame, refreshing first when it is older than `max_age`
+        seconds or shorter than `history_days` (capped at MACRO_MAX_HISTORY_DAYS).
+        Concurrent callers wait for one refresh; a failed refresh keeps serving
+        the last good frame.
+        """
+        with self._lock:
+            stale = self.refreshed_at is None or time.monotonic() - self.refreshed_at > max_age
+            if stale or _clamp_history_days(history_days) > self.history_days:
+                try:
+                    self._refresh(history_days)
+                except Exception as e:
+                    if self.frame.empty:
+                        raise
+                    print(f"Error refreshing macro series: {e}")
+            return self.frame
+
+
+macro_store = MacroSeriesStore()
+
+
+# ---------------------------------------------------------------------------
+# Current metrics (latest row of the store)
+# ---------------------------------------------------------------------------
+
+def fetch_treasury_yields(store: Optional[MacroSeriesStore] = None) -> Dict[str, float]:
+    """
+    Latest US Treasury yields from the macro store
 
     Returns:
         Dict with '10Y' and '3M' yields
     """
     try:
-        # 10-Year Treasury Yield (^TNX gives yield in percentage)
-        tnx = yf.Ticker("^TNX")
-        tnx_data = tnx.history(period="5d")
-        if tnx_data.empty:
+        frame = (store or macro_store).ensure_fresh()
+        us_10y, us_3m = _last_valid(frame["us_10y"]), _last_valid(frame["us_3m"])
+        if us_10y is None:
             raise ValueError("No 10Y data")
-        us_10y = float(tnx_data['Close'].iloc[-1])
-
-        # 3-Month Treasury Yield (^IRX)
-        irx = yf.Ticker("^IRX")
-        irx_data = irx.history(period="5d")
-        if irx_data.empty:
+        if us_3m is None:
             raise ValueError("No 3M data")
-        us_3m = float(irx_data['Close'].iloc[-1])
-
         return {
             "10Y": us_10y,
             "3M": us_3m
@@ -100,46 +325,19 @@ def calculate_yield_curve_metrics(us_10y: float, us_3m: float) -> YieldCurveMetr
         YieldCurveMetrics with inversion analysis
     """
     spread = us_10y - us_3m
-
-    # Determine inversion status
-    if spread > 1.0:
-        inversion_severity = "Normal"
-        is_inverted = False
-        risk_level = "Low"
-    elif spread > 0.25:
-        inversion_severity = "Flat"
-        is_inverted = False
-        risk_level = "Low"
-    elif spread > -0.25:
-        inversion_severity = "Flat"
-        is_inverted = False
-        risk_level = "Medium"
-    elif spread > -0.75:
-        inversion_severity = "Inverted"
-        is_inverted = True
-        risk_level = "High"
-    else:
-        inversion_severity = "Deeply Inverted"
-        is_inverted = True
-        risk_level = "High"
-
-    # Calculate historical percentile (approximation)
-    # Normal spread range: -1.5% to +3.0%
-    # Map to 0-100 percentile
-    historical_percentile = min(100, max(0, ((spread + 1.5) / 4.5) * 100))
-
+    row = yield_curve_series(pd.Series([spread])).iloc[0]
     return YieldCurveMetrics(
         us_10y=us_10y,
         us_3m=us_3m,
         spread=spread,
-        is_inverted=is_inverted,
-        inversion_severity=inversion_severity,
-        risk_level=risk_level,
-        historical_percentile=historical_percentile
+        is_inverted=bool(row["curve_inverted"]),
+        inversion_severity=row["curve_severity"],
+        risk_level=row["curve_risk"],
+        historical_percentile=float(row["curve_percentile"])
     )
 
 
-def calculate_sp500_breadth() -> BreadthMetrics:
+def calculate_sp500_breadth(store: Optional[MacroSeriesStore] = None) -> BreadthMetrics:
     """
     Calculate S&P 500 breadth - % of stocks above 200-day MA
 
@@ -152,45 +350,15 @@ def calculate_sp500_breadth() -> BreadthMetrics:
         BreadthMetrics with breadth analysis
     """
     try:
-        # Fetch SPY data (S&P 500 ETF as proxy)
-        spy = yf.Ticker("SPY")
-        spy_data = spy.history(period="1y")
-
-        if spy_data.empty:
+        frame = (store or macro_store).ensure_fresh()
+        rows = frame.dropna(subset=["breadth_pct_above"])
+        if rows.empty:
             raise ValueError("No SPY data")
-
-        # Calculate 200-day MA
-        spy_data['MA200'] = spy_data['Close'].rolling(window=200).mean()
-
-        current_price = float(spy_data['Close'].iloc[-1])
-        ma_200 = float(spy_data['MA200'].iloc[-1])
-
-        # Distance from 200 MA (percentage)
-        distance_pct = ((current_price - ma_200) / ma_200) * 100
-
-        # Approximate breadth based on distance from MA
-        # This is a proxy - real calculation would need all 500 stocks
-        if distance_pct > 5:
-            pct_above = 75.0 + (min(distance_pct, 15) / 15) * 20  # 75-95%
-            breadth_signal = "Bullish"
-            risk_level = "Low"
-        elif distance_pct > 0:
-            pct_above = 55.0 + (distance_pct / 5) * 20  # 55-75%
-            breadth_signal = "Neutral"
-            risk_level = "Medium"
-        elif distance_pct > -5:
-            pct_above = 35.0 + ((distance_pct + 5) / 5) * 20  # 35-55%
-            breadth_signal = "Neutral"
-            risk_level = "Medium"
-        else:
-            pct_above = 15.0 + (max(distance_pct, -15) + 15) / 15 * 20  # 15-35%
-            breadth_signal = "Bearish"
-            risk_level = "High"
-
+        row = rows.iloc[-1]
         return BreadthMetrics(
-            sp500_pct_above_200ma=round(pct_above, 1),
-            breadth_signal=breadth_signal,
-            risk_level=risk_level
+            sp500_pct_above_200ma=round(float(row["breadth_pct_above"]), 1),
+            breadth_signal=row["breadth_signal"],
+            risk_level=row["breadth_risk"]
         )
 
     except Exception as e:
@@ -202,7 +370,7 @@ def calculate_sp500_breadth() -> BreadthMetrics:
         )
 
 
-def calculate_mmfi(lookback_days: int = 50) -> MMFIMetrics:
+def calculate_mmfi(lookback_days: int = MMFI_LOOKBACK, store: Optional[MacroSeriesStore] = None) -> MMFIMetrics:
     """
     Calculate McClellan Market Facilitation Index (MMFI)
 
@@ -216,39 +384,20 @@ def calculate_mmfi(lookback_days: int = 50) -> MMFIMetrics:
         MMFIMetrics with MMFI analysis
     """
     try:
-        # Fetch market data
-        spy = yf.Ticker("SPY")
-        vix = yf.Ticker("^VIX")
-
-        spy_data = spy.history(period=f"{lookback_days + 30}d")
-        vix_data = vix.history(period=f"{lookback_days + 30}d")
-
-        if spy_data.empty or vix_data.empty:
-            raise ValueError("Insufficient data for MMFI")
-
-        # Calculate price momentum (SPY) and volatility (VIX) relationship
-        spy_returns = spy_data['Close'].pct_change(periods=lookback_days).iloc[-1]
-        vix_change = vix_data['Close'].pct_change(periods=lookback_days).iloc[-1]
-
-        # MMFI proxy: positive when SPY up and VIX down (bullish)
-        # Negative when SPY down or VIX up (bearish)
-        mmfi_value = (spy_returns * 100) - (vix_change * 50)
-
-        # Determine signal
-        if mmfi_value > 5:
-            mmfi_signal = "Bullish"
-            risk_level = "Low"
-        elif mmfi_value > -5:
-            mmfi_signal = "Neutral"
-            risk_level = "Medium"
+        frame = (store or macro_store).ensure_fresh()
+        if lookback_days == MMFI_LOOKBACK:
+            mmfi = frame["mmfi"]
         else:
-            mmfi_signal = "Bearish"
-            risk_level = "High"
+            mmfi = mmfi_series(frame["spy_close"], frame["vix_close"], lookback_days)
+        mmfi_value = _last_valid(mmfi)
+        if mmfi_value is None:
+            raise ValueError("Insufficient data for MMFI")
+        levels = mmfi_levels(pd.Series([mmfi_value])).iloc[0]
 
         return MMFIMetrics(
             mmfi_50d=round(mmfi_value, 2),
-            mmfi_signal=mmfi_signal,
-            risk_level=risk_level
+            mmfi_signal=levels["mmfi_signal"],
+            risk_level=levels["mmfi_risk"]
         )
 
     except Exception as e:
@@ -271,31 +420,16 @@ def calculate_composite_risk_score(
     Returns:
         Dict with overall risk assessment
     """
-    # Risk scoring: Low=1, Medium=2, High=3
-    risk_map = {"Low": 1, "Medium": 2, "High": 3}
-
-    yield_risk = risk_map[yield_curve.risk_level]
-    breadth_risk = risk_map[breadth.risk_level]
-    mmfi_risk = risk_map[mmfi.risk_level]
-
-    # Weighted average (yield curve = 40%, breadth = 30%, MMFI = 30%)
-    composite_score = (yield_risk * 0.4 + breadth_risk * 0.3 + mmfi_risk * 0.3)
-
-    # Determine overall risk level
-    if composite_score <= 1.5:
-        overall_risk = "Low"
-        risk_description = "Market conditions favorable"
-    elif composite_score <= 2.3:
-        overall_risk = "Medium"
-        risk_description = "Mixed signals, exercise caution"
-    else:
-        overall_risk = "High"
-        risk_description = "Elevated risk environment"
+    row = composite_risk_series(
+        pd.Series([yield_curve.risk_level]),
+        pd.Series([breadth.risk_level]),
+        pd.Series([mmfi.risk_level]),
+    ).iloc[0]
 
     return {
-        "composite_score": round(composite_score, 2),
-        "overall_risk_level": overall_risk,
-        "risk_description": risk_description,
+        "composite_score": round(float(row["composite_score"]), 2),
+        "overall_risk_level": row["overall_risk_level"],
+        "risk_description": row["risk_description"],
         "component_risks": {
             "yield_curve": yield_curve.risk_level,
             "breadth": breadth.risk_level,
@@ -304,6 +438,22 @@ def calculate_composite_risk_score(
     }
 
 
+def _current_metrics() -> Dict:
+    yields = fetch_treasury_yields()
+    yield_curve = calculate_yield_curve_metrics(yields["10Y"], yields["3M"])
+    breadth = calculate_sp500_breadth()
+    mmfi = calculate_mmfi(lookback_days=MMFI_LOOKBACK)
+    composite = calculate_composite_risk_score(yield_curve, breadth, mmfi)
+
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "yield_curve": asdict(yield_curve),
+        "breadth": asdict(breadth),
+        "mmfi": asdict(mmfi),
+        "composite_risk": composite
+    }
+
+
 @router.get("/current")
 async def get_macro_risk_metrics():
     """
@@ -315,55 +465,8 @@ async def get_macro_risk_metrics():
 
     Returns comprehensive market risk dashboard
     """
-    global _risk_metrics_cache, _cache_timestamp
-
-    # Check cache
-    now = datetime.now(timezone.utc)
-    cache_valid = (
-        _cache_timestamp is not None
-        and (now - _cache_timestamp).total_seconds() < _cache_ttl_seconds
-        and _risk_metrics_cache
-    )
-
-    if cache_valid:
-        print(f"  Using cached macro risk metrics")
-        return _risk_metrics_cache
-
-    print("🔄 Fetching fresh macro risk metrics...")
-
     try:
-        # Fetch treasury yields
-        yields = fetch_treasury_yields()
-
-        # Calculate yield curve metrics
-        yield_curve = calculate_yield_curve_metrics(
-            yields["10Y"],
-            yields["3M"]
-        )
-
-        # Calculate breadth
-        breadth = calculate_sp500_breadth()
-
-        # Calculate MMFI
-        mmfi = calculate_mmfi(lookback_days=50)
-
-        # Calculate composite risk
-        composite = calculate_composite_risk_score(yield_curve, breadth, mmfi)
-
-        result = {
-            "timestamp": now.isoformat(),
-            "yield_curve": asdict(yield_curve),
-            "breadth": asdict(breadth),
-            "mmfi": asdict(mmfi),
-            "composite_risk": composite
-        }
-
-        # Update cache
-        _risk_metrics_cache = result
-        _cache_timestamp = now
-
-        print("✓ Macro risk metrics updated")
-        return result
+        return await run_in_threadpool(_current_metrics)
 
     except Exception as e:
         print(f"❌ Error fetching macro risk metrics: {e}")
@@ -373,53 +476,35 @@ async def get_macro_risk_metrics():
         )
 
 
+def _historical_rows(days: int) -> List[Dict]:
+    frame = macro_store.ensure_fresh(history_days=days)
+    window = frame[frame.index > frame.index[-1] - timedelta(days=days)]
+    window = window.dropna(subset=["us_10y", "us_3m", "spy_close"])
+
+    rows = pd.DataFrame({
+        "date": window.index.strftime("%Y-%m-%d"),
+        "us_10y": window["us_10y"].to_numpy(),
+        "us_3m": window["us_3m"].to_numpy(),
+        "spread": window["spread"].to_numpy(),
+        "is_inverted": (window["spread"] < 0).to_numpy(),
+        "spy_distance_from_ma200": window["spy_distance_pct"].to_numpy(),
+        "composite_score": window["composite_score"].round(2).to_numpy(),
+        "overall_risk_level": window["overall_risk_level"].to_numpy(),
+    })
+    return rows.astype(object).where(rows.notna(), None).to_dict("records")
+
+
 @router.get("/historical")
 async def get_historical_risk_metrics(days: int = 90):
     """
     Get historical risk metrics for trend analysis
 
     Args:
-        days: Number of days of history (default 90)
+        days: Number of days of history (default 90, at most MACRO_MAX_HISTORY_DAYS)
     """
+    days = min(max(days, 1), MACRO_MAX_HISTORY_DAYS)
     try:
-        # Fetch historical treasury data
-        tnx = yf.Ticker("^TNX")
-        irx = yf.Ticker("^IRX")
-        spy = yf.Ticker("SPY")
-
-        period = f"{days}d"
-        tnx_hist = tnx.history(period=period)
-        irx_hist = irx.history(period=period)
-        spy_hist = spy.history(period=period)
-
-        # Calculate 200 MA for breadth
-        spy_hist['MA200'] = spy_hist['Close'].rolling(window=200).mean()
-
-        # Build historical series
-        historical_data = []
-        for date in tnx_hist.index:
-            if date in irx_hist.index and date in spy_hist.index:
-                us_10y = float(tnx_hist.loc[date, 'Close'])
-                us_3m = float(irx_hist.loc[date, 'Close'])
-                spread = us_10y - us_3m
-
-                # SPY vs MA200
-                spy_close = spy_hist.loc[date, 'Close']
-                spy_ma200 = spy_hist.loc[date, 'MA200']
-
-                if pd.notna(spy_ma200):
-                    distance_pct = ((spy_close - spy_ma200) / spy_ma200) * 100
-                else:
-                    distance_pct = None
-
-                historical_data.append({
-                    "date": date.strftime("%Y-%m-%d"),
-                    "us_10y": us_10y,
-                    "us_3m": us_3m,
-                    "spread": spread,
-                    "is_inverted": spread < 0,
-                    "spy_distance_from_ma200": distance_pct
-                })
+        historical_data = await run_in_threadpool(_historical_rows, days)
 
         return {
             "period_days": days,
@@ -5,6 +5,10 @@ Fetches OHLCV for all macro instruments defined in macro_instruments.py,
 computes RSI-MA (14/14) and 252-bar percentile rank for each, and returns
 a unified dict used by the Telegram formatters.
 
+Daily history is fetched through a FrameCache. Inside a `shared_frames()`
+block (one Telegram delivery, say) every live function slices from the same
+frames, so overlapping symbols are downloaded once at _FRAME_PERIOD.
+
 Result structure per key:
   {
     "key":        str,           # instrument key e.g. "XLK"
@@ -21,8 +25,11 @@ Result structure per key:
 
 from __future__ import annotations
 
+import threading
 import time
-from typing import Optional
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterable, Iterator, Optional
 
 import pandas as pd
 import yfinance as yf
@@ -35,11 +42,16 @@ from macro_instruments import (
     compute_mmfi_series,
 )
 from ticker_utils import resolve_yahoo_symbol
+from yf_batch import download_frames
 
 # In-memory cache: {key: (data_dict, timestamp)}
 _cache: dict[str, tuple[dict, float]] = {}
 _CACHE_TTL = 300  # 5 minutes
 
+# Longest history any live function needs; shared frames are fetched at this period
+_FRAME_PERIOD = "3y"
+_active_frames: ContextVar[Optional["FrameCache"]] = ContextVar("macro_rsi_frames", default=None)
+
 
 def _is_fresh(key: str) -> bool:
     if key not in _cache:
@@ -101,24 +113,149 @@ def _compute_for_series(close: pd.Series, key: str, name: str, category: str) ->
     }
 
 
-def _fetch_close(yf_symbol: str, period: str = "3y") -> pd.Series | None:
-    """Fetch Close price series via yfinance. Returns None on failure."""
+def _period_offset(period: str) -> pd.DateOffset:
+    """Convert a yfinance period string ('3y', '15mo') to a DateOffset."""
+    for suffix, unit in (("mo", "months"), ("y", "years"), ("d", "days")):
+        if period.endswith(suffix) and period[:-len(suffix)].isdigit():
+            return pd.DateOffset(**{unit: int(period[:-len(suffix)])})
+    raise ValueError(f"Unsupported period: {period}")
+
+
+def _clean_ohlcv(raw: pd.DataFrame | None) -> pd.DataFrame | None:
+    """Lower-case columns, drop duplicate timestamps and bars without a close."""
+    if raw is None or raw.empty:
+        return None
+    df = raw.copy()
+    df.columns = [str(c).lower() for c in df.columns]
+    if "close" not in df.columns:
+        return None
+    # yfinance occasionally returns duplicate timestamps for index tickers
+    # (e.g. ^FTSE, ^N225) — keep the last occurrence per date
+    if df.index.duplicated().any():
+        df = df[~df.index.duplicated(keep="last")]
+    df = df.dropna(subset=["close"])
+    return df if not df.empty else None
+
+
+def _download_daily(yf_symbols: list[str], period: str) -> dict[str, pd.DataFrame]:
+    """Batch-download daily OHLCV via yf_batch; symbols without data are omitted."""
+    frames: dict[str, pd.DataFrame] = {}
+    if not yf_symbols:
+        return frames
+    for sym, raw in download_frames(yf_symbols, period=period).items():
+        df = _clean_ohlcv(raw)
+        if df is not None:
+            frames[sym] = df
+    return frames
+
+
+def _download_single(yf_symbol: str, period: str) -> pd.DataFrame | None:
+    """Per-symbol fallback for symbols a batch download missed."""
     try:
-        ticker = yf.Ticker(yf_symbol)
-        hist = ticker.history(period=period, auto_adjust=True)
-        if hist.empty or "Close" not in hist.columns:
-            return None
-        close = hist["Close"].dropna()
-        # yfinance occasionally returns duplicate timestamps for index tickers
-        # (e.g. ^FTSE, ^N225) — keep the last occurrence per date
-        if close.index.duplicated().any():
-            close = close[~close.index.duplicated(keep="last")]
-        return close if len(close) >= 30 else None
+        return _clean_ohlcv(yf.Ticker(yf_symbol).history(period=period, auto_adjust=True))
     except Exception as exc:
         print(f"[macro_rsi] fetch error for {yf_symbol}: {exc}")
         return None
 
 
+def _trim_to_period(df: pd.DataFrame, period: str) -> pd.DataFrame:
+    """Keep the bars a direct yfinance download of ``period`` would return."""
+    cutoff = (pd.Timestamp.now(tz=df.index.tz) - _period_offset(period)).normalize()
+    return df[df.index >= cutoff]
+
+
+class FrameCache:
+    """
+    Daily OHLCV frames (lower-case columns) fetched at one period.
+
+    Each symbol is downloaded at most once: misses are fetched together in one
+    batch download, then retried individually. Shorter periods are sliced from
+    the cached frames.
+    """
+
+    def __init__(self, period: str = _FRAME_PERIOD) -> None:
+        self.period = period
+        self._frames: dict[str, Optional[pd.DataFrame]] = {}
+        self._lock = threading.Lock()
+
+    def prefetch(self, yf_symbols: Iterable[str]) -> None:
+        with self._lock:
+            missing = [s for s in dict.fromkeys(yf_symbols) if s and s not in self._frames]
+            if not missing:
+                return
+            fetched = _download_daily(missing, self.period)
+            for sym in missing:
+                frame = fetched.get(sym)
+                self._frames[sym] = frame if frame is not None else _download_single(sym, self.period)
+
+    def frames(self, yf_symbols: Iterable[str], period: Optional[str] = None) -> dict[str, pd.DataFrame]:
+        """Frames for the symbols that returned data, trimmed to ``period``."""
+        yf_symbols = list(dict.fromkeys(yf_symbols))
+        self.prefetch(yf_symbols)
+        out: dict[str, pd.DataFrame] = {}
+        for sym in yf_symbols:
+            frame = self._frames.get(sym)
+            if frame is None:
+                continue
+            if period is not None and period != self.period:
+                frame = _trim_to_period(frame, period)
+            out[sym] = frame
+        return out
+
+
+@contextmanager
+def shared_frames(yf_symbols: Iterable[str] = ()) -> Iterator[FrameCache]:
+    """
+    Share one FrameCache across every live function called inside the block.
+
+    ``yf_symbols`` (the union the request will need) are prefetched in a single
+    download at _FRAME_PERIOD; anything requested later is fetched on demand.
+    Nested blocks reuse the outer cache.
+    """
+    cache = _active_frames.get()
+    if cache is not None:
+        cache.prefetch(yf_symbols)
+        yield cache
+        return
+    cache = FrameCache()
+    token = _active_frames.set(cache)
+    try:
+        cache.prefetch(yf_symbols)
+        yield cache
+    finally:
+        _active_frames.reset(token)
+
+
+def _frames_for(yf_symbols: Iterable[str], period: str, min_bars: int = 30) -> dict[str, pd.DataFrame]:
+    """OHLCV per symbol from the active shared cache, or a one-off download of ``period``."""
+    cache = _active_frames.get() or FrameCache(period)
+    return {
+        sym: df for sym, df in cache.frames(yf_symbols, period).items()
+        if len(df) >= min_bars
+    }
+
+
+def _closes_for(yf_symbols: Iterable[str], period: str, min_bars: int = 30) -> dict[str, pd.Series]:
+    return {sym: df["close"] for sym, df in _frames_for(yf_symbols, period, min_bars).items()}
+
+
+def macro_symbols(keys: Optional[list[str]] = None) -> list[str]:
+    """yfinance symbols fetch_all_macro_data needs for ``keys`` (all instruments by default)."""
+    symbols: list[str] = []
+    for key in keys or list(MACRO_INSTRUMENTS.keys()):
+        cfg = MACRO_INSTRUMENTS.get(key, {})
+        if cfg.get("derived") == "mmfi":
+            symbols.extend(["SPY", "^VIX"])
+        elif cfg.get("yf"):
+            symbols.append(cfg["yf"])
+    return list(dict.fromkeys(symbols))
+
+
+def _fetch_close(yf_symbol: str, period: str = "3y") -> pd.Series | None:
+    """Fetch Close price series via yfinance. Returns None on failure."""
+    return _closes_for([yf_symbol], period).get(yf_symbol)
+
+
 def _fetch_mmfi(period: str = "3y") -> pd.Series | None:
     """Compute MMFI series from SPY and VIX."""
     try:
@@ -199,37 +336,7 @@ def fetch_all_macro_data(keys: Optional[list[str]] = None) -> dict[str, dict]:
     ]
     yf_symbols = [MACRO_INSTRUMENTS[k]["yf"] for k in regular_keys]
 
-    batch_closes: dict[str, pd.Series] = {}
-    if yf_symbols:
-        try:
-            raw = yf.download(
-                yf_symbols,
-                period="3y",
-                auto_adjust=True,
-                group_by="ticker",
-                progress=False,
-                threads=True,
-            )
-            # Handle single vs multi-ticker download structure.
-            # yfinance returns a flat DataFrame for 1 ticker,
-            # a MultiIndex DataFrame (ticker, field) for multiple tickers.
-            if len(yf_symbols) == 1:
-                sym = yf_symbols[0]
-                if "Close" in raw.columns:
-                    s = raw["Close"].dropna()
-                    if len(s) >= 30:
-                        batch_closes[sym] = s
-            else:
-                for sym in yf_symbols:
-                    try:
-                        # MultiIndex access: raw[sym]["Close"]
-                        s = raw[sym]["Close"].dropna()
-                        if len(s) >= 30:
-                            batch_closes[sym] = s
-                    except Exception:
-                        pass
-        except Exception as exc:
-            print(f"[macro_rsi] batch download error: {exc}")
+    batch_closes = _closes_for(yf_symbols, "3y")
 
     # Process regular tickers
     for key in regular_keys:
@@ -239,8 +346,6 @@ def fetch_all_macro_data(keys: Optional[list[str]] = None) -> dict[str, dict]:
         cfg = MACRO_INSTRUMENTS[key]
         sym = cfg["yf"]
         close = batch_closes.get(sym)
-        if close is None:
-            close = _fetch_close(sym)
         if close is None:
             result = _empty_result(key, cfg["name"], cfg["category"], "fetch failed")
         else:
@@ -277,33 +382,7 @@ def compute_live_swing_percentiles(swing_data: list[dict]) -> dict[str, dict]:
 
     yf_symbols = list(set(ticker_to_yf.values()))
 
-    # Batch download to reduce HTTP round-trips
-    batch_closes: dict[str, pd.Series] = {}
-    try:
-        if len(yf_symbols) == 1:
-            raw = yf.download(yf_symbols[0], period="3y", auto_adjust=True, progress=False)
-            if not raw.empty and "Close" in raw.columns:
-                s = raw["Close"].dropna()
-                if s.index.duplicated().any():
-                    s = s[~s.index.duplicated(keep="last")]
-                if len(s) >= 30:
-                    batch_closes[yf_symbols[0]] = s
-        else:
-            raw = yf.download(
-                yf_symbols, period="3y", auto_adjust=True,
-                group_by="ticker", progress=False, threads=True,
-            )
-            for sym in yf_symbols:
-                try:
-                    s = raw[sym]["Close"].dropna()
-                    if s.index.duplicated().any():
-                        s = s[~s.index.duplicated(keep="last")]
-                    if len(s) >= 30:
-                        batch_closes[sym] = s
-                except Exception:
-                    pass
-    except Exception as exc:
-        print(f"[swing_live] batch download error: {exc}")
+    batch_closes = _closes_for(yf_symbols, "3y")
 
     # Lazy import to avoid a circular dependency at module load time.
     from cov_indicator import compute_cov
@@ -311,8 +390,6 @@ def compute_live_swing_percentiles(swing_data: list[dict]) -> dict[str, dict]:
     results: dict[str, dict] = {}
     for ticker, yf_sym in ticker_to_yf.items():
         close = batch_closes.get(yf_sym)
-        if close is None:
-            close = _fetch_close(yf_sym)
         if close is None:
             results[ticker] = {
                 "current_percentile": None, "price": None,
@@ -398,32 +475,7 @@ def compute_live_ffd_values(tickers: list[str]) -> dict[str, dict]:
 
     yf_symbols = list(set(ticker_to_yf.values()))
 
-    batch_closes: dict[str, pd.Series] = {}
-    try:
-        if len(yf_symbols) == 1:
-            raw = yf.download(yf_symbols[0], period="3y", auto_adjust=True, progress=False)
-            if not raw.empty and "Close" in raw.columns:
-                s = raw["Close"].dropna()
-                if s.index.duplicated().any():
-                    s = s[~s.index.duplicated(keep="last")]
-                if len(s) >= 30:
-                    batch_closes[yf_symbols[0]] = s
-        else:
-            raw = yf.download(
-                yf_symbols, period="3y", auto_adjust=True,
-                group_by="ticker", progress=False, threads=True,
-            )
-            for sym in yf_symbols:
-                try:
-                    s = raw[sym]["Close"].dropna()
-                    if s.index.duplicated().any():
-                        s = s[~s.index.duplicated(keep="last")]
-                    if len(s) >= 30:
-                        batch_closes[sym] = s
-                except Exception:
-                    pass
-    except Exception as exc:
-        print(f"[ffd_live] batch download error: {exc}")
+    batch_closes = _closes_for(yf_symbols, "3y")
 
     fd_weights = build_fd_weights()
     fd_warmup = len(fd_weights)
@@ -431,8 +483,6 @@ def compute_live_ffd_values(tickers: list[str]) -> dict[str, dict]:
     results: dict[str, dict] = {}
     for ticker, yf_sym in ticker_to_yf.items():
         close = batch_closes.get(yf_sym)
-        if close is None:
-            close = _fetch_close(yf_sym)
         if close is None:
             results[ticker] = {"ffd": None, "price": None, "error": "fetch failed"}
             continue
@@ -485,35 +535,7 @@ def compute_live_full_rows(tickers: list[str]) -> list[dict]:
     # (which needs 252) to silently return None for all those tickers.
     _PERIOD = "15mo"
 
-    batch_ohlcv: dict[str, pd.DataFrame] = {}
-    try:
-        if len(yf_symbols) == 1:
-            raw = yf.download(yf_symbols[0], period=_PERIOD, auto_adjust=True, progress=False)
-            if not raw.empty:
-                df = raw.copy()
-                df.columns = [str(c).lower() for c in df.columns]
-                if df.index.duplicated().any():
-                    df = df[~df.index.duplicated(keep="last")]
-                if len(df.dropna(subset=["close"])) >= 30:
-                    batch_ohlcv[yf_symbols[0]] = df.dropna(subset=["close"])
-        else:
-            raw = yf.download(
-                yf_symbols, period=_PERIOD, auto_adjust=True,
-                group_by="ticker", progress=False, threads=True,
-            )
-            for sym in yf_symbols:
-                try:
-                    df = raw[sym].copy()
-                    df.columns = [str(c).lower() for c in df.columns]
-                    if df.index.duplicated().any():
-                        df = df[~df.index.duplicated(keep="last")]
-                    clean = df.dropna(subset=["close"])
-                    if len(clean) >= 30:
-                        batch_ohlcv[sym] = clean
-                except Exception:
-                    pass
-    except Exception as exc:
-        print(f"[live_rows] batch download error: {exc}")
+    batch_ohlcv = _frames_for(yf_symbols, _PERIOD)
 
     from cov_indicator import compute_cov
     from macdv_calculator import MACDVCalculator
@@ -522,18 +544,6 @@ def compute_live_full_rows(tickers: list[str]) -> list[dict]:
     rows: list[dict] = []
     for ticker, yf_sym in ticker_to_yf.items():
         ohlcv = batch_ohlcv.get(yf_sym)
-        if ohlcv is None:
-            try:
-                df = yf.download(yf_sym, period=_PERIOD, auto_adjust=True, progress=False)
-                if not df.empty:
-                    df.columns = [str(c).lower() for c in df.columns]
-                    if df.index.duplicated().any():
-                        df = df[~df.index.duplicated(keep="last")]
-                    clean = df.dropna(subset=["close"])
-                    ohlcv = clean if len(clean) >= 30 else None
-            except Exception:
-                pass
-
         if ohlcv is None or "close" not in ohlcv.columns:
             continue
 
@@ -603,39 +613,12 @@ def compute_live_sma200_distances(tickers: list[str]) -> dict[str, dict]:
     ticker_to_yf: dict[str, str] = {t: resolve_yahoo_symbol(t) for t in tickers}
     yf_symbols = list(set(ticker_to_yf.values()))
 
-    batch_closes: dict[str, pd.Series] = {}
-    try:
-        if len(yf_symbols) == 1:
-            raw = yf.download(yf_symbols[0], period="2y", auto_adjust=True, progress=False)
-            if not raw.empty and "Close" in raw.columns:
-                s = raw["Close"].dropna()
-                if s.index.duplicated().any():
-                    s = s[~s.index.duplicated(keep="last")]
-                if len(s) >= 201:
-                    batch_closes[yf_symbols[0]] = s
-        else:
-            raw = yf.download(
-                yf_symbols, period="2y", auto_adjust=True,
-                group_by="ticker", progress=False, threads=True,
-            )
-            for sym in yf_symbols:
-                try:
-                    s = raw[sym]["Close"].dropna()
-                    if s.index.duplicated().any():
-                        s = s[~s.index.duplicated(keep="last")]
-                    if len(s) >= 201:
-                        batch_closes[sym] = s
-                except Exception:
-                    pass
-    except Exception as exc:
-        print(f"[sma200] batch download error: {exc}")
+    batch_closes = _closes_for(yf_symbols, "2y", min_bars=201)
 
     results: dict[str, dict] = {}
     for ticker, yf_sym in ticker_to_yf.items():
         close = batch_closes.get(yf_sym)
         if close is None:
-            close = _fetch_close(yf_sym, period="2y")
-        if close is None or len(close) < 201:
             results[ticker] = {
                 "price": None, "sma200": None, "distance_pct": None,
                 "error": "insufficient data",
@@ -13,9 +13,15 @@ Target metrics:
 
 import pandas as pd
 import numpy as np
-from typing import Dict, List, Tuple, Optional
-from dataclasses import dataclass
+from typing import Dict, List, Tuple, Optional, Sequence
+from dataclasses import dataclass, field
 from mapi_calculator import MAPICalculator
+from yf_batch import download_frames
+from concurrent.futures import ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+import os
+import threading
+import time
 import yfinance as yf
 from datetime import datetime, timedelta
 
@@ -35,6 +41,31 @@ class BacktestResult:
     return_expectancy: float  # win_rate * avg_win + (1-win_rate) * avg_loss
     sharpe_ratio: float
     max_drawdown: float
+    holding_period: int = 7
+
+
+@dataclass
+class MAPIFeatureMatrix:
+    """MAPI features and forward returns computed once per ticker for threshold searches"""
+    composite_percentile: np.ndarray
+    edr_percentile: np.ndarray
+    esv_percentile: np.ndarray
+    above_ema: np.ndarray
+    momentum: np.ndarray  # ADX > 25
+    forward_returns: Dict[int, np.ndarray] = field(default_factory=dict)  # % return, NaN past the end
+
+    def forward_return(self, close: np.ndarray, holding_period: int) -> np.ndarray:
+        if holding_period not in self.forward_returns:
+            returns = np.full(len(close), np.nan)
+            if 0 < holding_period < len(close):
+                entry = close[:-holding_period]
+                returns[:-holding_period] = ((close[holding_period:] - entry) / entry) * 100
+            self.forward_returns[holding_period] = returns
+        return self.forward_returns[holding_period]
+
+
+# Upper bound on (grid cells x bars) evaluated at once by evaluate_threshold_grid
+_GRID_CHUNK_ELEMENTS = 4_000_000
 
 
 @dataclass
@@ -57,12 +88,138 @@ class MAPISignal:
     sample_size: int
 
 
+@dataclass
+class MAPIScanResult:
+    """Outcome of MAPIAnalyzer.scan_universe"""
+    signals: List[MAPISignal]
+    failed: List[str]  # no data or MAPI error
+    timed_out: List[str]  # not reached within the time budget
+    elapsed_seconds: float
+
+
 class MAPIAnalyzer:
     """Analyze and optimize MAPI entry thresholds"""
 
     def __init__(self, calculator: Optional[MAPICalculator] = None):
         self.calculator = calculator or MAPICalculator()
 
+    def build_feature_matrix(
+        self,
+        df: pd.DataFrame,
+        holding_periods: Sequence[int] = (7,),
+        mapi: Optional[Dict] = None,
+    ) -> MAPIFeatureMatrix:
+        """Run calculate_mapi once (unless given) and keep the arrays the threshold backtests need"""
+        if mapi is None:
+            mapi = self.calculator.calculate_mapi(df)
+        close = df['close'].to_numpy(dtype=float)
+        features = MAPIFeatureMatrix(
+            composite_percentile=mapi['composite_percentile_rank'].to_numpy(dtype=float),
+            edr_percentile=mapi['edr_percentile'].to_numpy(dtype=float),
+            esv_percentile=mapi['esv_percentile'].to_numpy(dtype=float),
+            above_ema=(df['close'] > mapi['ema20']).to_numpy(),
+            momentum=(mapi['adx'] > 25).to_numpy(),
+        )
+        for holding_period in holding_periods:
+            features.forward_return(close, holding_period)
+        return features
+
+    def evaluate_threshold_grid(
+        self,
+        features: MAPIFeatureMatrix,
+        composite_thresholds: Sequence[float],
+        edr_thresholds: Sequence[float],
+        esv_thresholds: Optional[Sequence[Optional[float]]] = None,
+        holding_period: int = 7,
+        require_momentum: bool = True,
+    ) -> List[BacktestResult]:
+        """
+        Backtest every composite x EDR (x ESV) threshold combination at once.
+
+        Each cell's entries are a boolean mask over bars; trade statistics are
+        reductions of that mask against the precomputed forward returns, so the
+        whole grid costs a few array passes instead of one backtest per cell.
+        Results come back in composite-major, then EDR, then ESV order.
+        """
+        if holding_period not in features.forward_returns:
+            raise ValueError(f"Feature matrix has no forward returns for holding_period={holding_period}")
+        returns = features.forward_returns[holding_period]
+        esv_values: List[Optional[float]] = list(esv_thresholds) if esv_thresholds else [None]
+
+        base = features.above_ema & ~np.isnan(returns)
+        if require_momentum:
+            base = base & features.momentum
+        returns = np.where(base, returns, 0.0)
+
+        composite_ok = features.composite_percentile[None, :] >= np.asarray(composite_thresholds, dtype=float)[:, None]
+        edr_ok = features.edr_percentile[None, :] >= np.asarray(edr_thresholds, dtype=float)[:, None]
+        esv_ok = np.stack([
+            np.ones_like(base) if esv is None else features.esv_percentile >= esv
+            for esv in esv_values
+        ])
+
+        n_edr, n_esv, n_bars = len(edr_thresholds), len(esv_values), len(returns)
+        rows_per_chunk = max(1, _GRID_CHUNK_ELEMENTS // max(1, n_edr * n_esv * n_bars))
+
+        results: List[BacktestResult] = []
+        for start in range(0, len(composite_thresholds), rows_per_chunk):
+            comp_block = composite_ok[start:start + rows_per_chunk]
+            mask = (
+                comp_block[:, None, None, :]
+                & edr_ok[None, :, None, :]
+                & esv_ok[None, None, :, :]
+                & base
+            ).reshape(-1, n_bars)
+            stats = self._mask_trade_stats(mask, returns, holding_period)
+
+            for cell, (count, wins, avg, avg_win, avg_loss, sharpe, max_dd) in enumerate(zip(*stats)):
+                ci, rest = divmod(cell, n_edr * n_esv)
+                ei, si = divmod(rest, n_esv)
+                win_rate = wins / count if count else 0.0
+                results.append(BacktestResult(
+                    composite_threshold=composite_thresholds[start + ci],
+                    edr_threshold=edr_thresholds[ei],
+                    esv_threshold=esv_values[si],
+                    total_trades=int(count),
+                    winning_trades=int(wins),
+                    win_rate=win_rate,
+                    avg_return=float(avg),
+                    avg_winning_return=float(avg_win),
+                    avg_losing_return=float(avg_loss),
+                    return_expectancy=float((win_rate * avg_win) + ((1 - win_rate) * avg_loss)),
+                    sharpe_ratio=float(sharpe),
+                    max_drawdown=float(max_dd),
+                    holding_period=holding_period,
+                ))
+        return results
+
+    @staticmethod
+    def _mask_trade_stats(mask: np.ndarray, returns: np.ndarray, holding_period: int) -> Tuple[np.ndarray, ...]:
+        """Per-row trade stats for a (cells x bars) entry mask; rows without trades are all zero"""
+        trade_returns = np.where(mask, returns[None, :], 0.0)
+        count = mask.sum(axis=1)
+        winning = mask & (returns[None, :] > 0)
+        wins = winning.sum(axis=1)
+        losses = count - wins
+        total = trade_returns.sum(axis=1)
+        win_total = np.where(winning, trade_returns, 0.0).sum(axis=1)
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            avg = np.where(count > 0, total / count, 0.0)
+            avg_win = np.where(wins > 0, win_total / wins, 0.0)
+            avg_loss = np.where(losses > 0, (total - win_total) / losses, 0.0)
+            deviations = np.where(mask, trade_returns - avg[:, None], 0.0)
+            std = np.sqrt(np.where(count > 0, (deviations ** 2).sum(axis=1) / count, 0.0))
+            sharpe = np.where(std > 0, (avg / std) * np.sqrt(252 / holding_period), 0.0)
+
+        # Max drawdown of the cumulative trade P&L, measured from the first trade on
+        cumulative = np.cumsum(trade_returns, axis=1)
+        running_max = np.maximum.accumulate(np.where(mask, cumulative, -np.inf), axis=1)
+        drawdown = np.where(mask, cumulative - running_max, 0.0)
+        max_dd = np.abs(drawdown.min(axis=1)) if mask.shape[1] else np.zeros(len(mask))
+
+        return count, wins, avg, avg_win, avg_loss, sharpe, max_dd
+
     def backtest_entry_threshold(
         self,
         df: pd.DataFrame,
@@ -71,6 +228,7 @@ class MAPIAnalyzer:
         esv_threshold: Optional[float] = None,
         holding_period: int = 7,
         require_momentum: bool = True,
+        features: Optional[MAPIFeatureMatrix] = None,
     ) -> BacktestResult:
         """
         Backtest a specific entry threshold combination
@@ -82,86 +240,21 @@ class MAPIAnalyzer:
             esv_threshold: Optional ESV percentile threshold
             holding_period: Days to hold position
             require_momentum: Require ADX > 25 (momentum regime)
+            features: Precomputed feature matrix for df (skips calculate_mapi)
         """
-        mapi = self.calculator.calculate_mapi(df)
-
-        # Entry conditions
-        composite_entry = mapi['composite_percentile_rank'] >= composite_threshold
-        edr_entry = mapi['edr_percentile'] >= edr_threshold
-        price_above_ema = df['close'] > mapi['ema20']
-
-        entry_signal = composite_entry & edr_entry & price_above_ema
-
-        # Optional ESV filter
-        if esv_threshold is not None:
-            entry_signal = entry_signal & (mapi['esv_percentile'] >= esv_threshold)
-
-        # Momentum regime filter
-        if require_momentum:
-            entry_signal = entry_signal & (mapi['adx'] > 25)
-
-        # Calculate returns for each entry
-        trades = []
-        for i in range(len(df) - holding_period):
-            if entry_signal.iloc[i]:
-                entry_price = df['close'].iloc[i]
-                exit_idx = min(i + holding_period, len(df) - 1)
-                exit_price = df['close'].iloc[exit_idx]
-                pct_return = ((exit_price - entry_price) / entry_price) * 100
-                trades.append(pct_return)
-
-        if not trades:
-            return BacktestResult(
-                composite_threshold=composite_threshold,
-                edr_threshold=edr_threshold,
-                esv_threshold=esv_threshold,
-                total_trades=0,
-                winning_trades=0,
-                win_rate=0.0,
-                avg_return=0.0,
-                avg_winning_return=0.0,
-                avg_losing_return=0.0,
-                return_expectancy=0.0,
-                sharpe_ratio=0.0,
-                max_drawdown=0.0,
-            )
-
-        trades_array = np.array(trades)
-        winning_trades = trades_array[trades_array > 0]
-        losing_trades = trades_array[trades_array <= 0]
-
-        win_rate = len(winning_trades) / len(trades_array)
-        avg_return = trades_array.mean()
-        avg_winning = winning_trades.mean() if len(winning_trades) > 0 else 0.0
-        avg_losing = losing_trades.mean() if len(losing_trades) > 0 else 0.0
-
-        # Return expectancy
-        expectancy = (win_rate * avg_winning) + ((1 - win_rate) * avg_losing)
-
-        # Sharpe ratio (annualized)
-        returns_std = trades_array.std()
-        sharpe = (avg_return / returns_std) * np.sqrt(252 / holding_period) if returns_std > 0 else 0.0
-
-        # Max drawdown
-        cumulative = np.cumsum(trades_array)
-        running_max = np.maximum.accumulate(cumulative)
-        drawdown = cumulative - running_max
-        max_dd = abs(drawdown.min()) if len(drawdown) > 0 else 0.0
-
-        return BacktestResult(
-            composite_threshold=composite_threshold,
-            edr_threshold=edr_threshold,
-            esv_threshold=esv_threshold,
-            total_trades=len(trades_array),
-            winning_trades=len(winning_trades),
-            win_rate=win_rate,
-            avg_return=avg_return,
-            avg_winning_return=avg_winning,
-            avg_losing_return=avg_losing,
-            return_expectancy=expectancy,
-            sharpe_ratio=sharpe,
-            max_drawdown=max_dd,
-        )
+        if features is None:
+            features = self.build_feature_matrix(df, holding_periods=(holding_period,))
+        elif holding_period not in features.forward_returns:
+            features.forward_return(df['close'].to_numpy(dtype=float), holding_period)
+
+        return self.evaluate_threshold_grid(
+            features,
+            composite_thresholds=[composite_threshold],
+            edr_thresholds=[edr_threshold],
+            esv_thresholds=[esv_threshold],
+            holding_period=holding_period,
+            require_momentum=require_momentum,
+        )[0]
 
     def optimize_thresholds(
         self,
@@ -171,25 +264,38 @@ class MAPIAnalyzer:
         holding_period: int = 7,
         min_win_rate: float = 0.65,
         min_expectancy: float = 1.0,
+        step: float = 5,
+        esv_thresholds: Optional[Sequence[float]] = None,
+        holding_periods: Optional[Sequence[int]] = None,
     ) -> List[BacktestResult]:
         """
         Grid search to find optimal thresholds
 
+        MAPI features are computed once; each holding period's grid is evaluated
+        as a single mask reduction. ``esv_thresholds`` adds an ESV dimension and
+        ``holding_periods`` (default ``[holding_period]``) searches several holds.
+
         Returns list of BacktestResults that meet criteria, sorted by return expectancy
         """
-        results = []
+        periods = list(holding_periods) if holding_periods else [holding_period]
+        features = self.build_feature_matrix(df, holding_periods=periods)
 
-        # Grid search
-        for composite in range(int(composite_range[0]), int(composite_range[1]) + 1, 5):
-            for edr in range(int(edr_range[0]), int(edr_range[1]) + 1, 5):
-                result = self.backtest_entry_threshold(
-                    df=df,
-                    composite_threshold=composite,
-                    edr_threshold=edr,
-                    holding_period=holding_period,
-                    require_momentum=True,
-                )
+        composite_grid = list(np.arange(composite_range[0], composite_range[1] + step / 2, step))
+        edr_grid = list(np.arange(edr_range[0], edr_range[1] + step / 2, step))
+        if float(step).is_integer():
+            composite_grid = [int(c) for c in composite_grid]
+            edr_grid = [int(e) for e in edr_grid]
 
+        results = []
+        for period in periods:
+            for result in self.evaluate_threshold_grid(
+                features,
+                composite_thresholds=composite_grid,
+                edr_thresholds=edr_grid,
+                esv_thresholds=esv_thresholds,
+                holding_period=period,
+                require_momentum=True,
+            ):
                 # Filter by criteria
                 if (
                     result.total_trades >= 20
@@ -221,50 +327,75 @@ class MAPIAnalyzer:
             df.columns = df.columns.str.lower()
             df = df[['open', 'high', 'low', 'close', 'volume']].copy()
 
-            # Calculate MAPI
-            mapi = self.calculator.calculate_mapi(df)
-            current = self.calculator.get_current_signal(df)
-
-            # Entry signal
-            entry_signal = (
-                current['composite_percentile_rank'] >= composite_threshold
-                and current['edr_percentile'] >= edr_threshold
-                and current['close'] > current['ema20']
-                and current['adx'] > 25  # Momentum regime
-            )
+            return self.signal_from_frame(symbol, df, composite_threshold, edr_threshold)
+
+        except Exception as e:
+            print(f"Error processing {symbol}: {e}")
+            return None
+
+    def signal_from_frame(
+        self,
+        symbol: str,
+        df: pd.DataFrame,
+        composite_threshold: float = 35,
+        edr_threshold: float = 20,
+        historical_stats: Optional[Tuple[float, float, int]] = None,
+    ) -> MAPISignal:
+        """
+        Build the current MAPI signal from already-fetched daily OHLCV.
+
+        calculate_mapi runs once and feeds the current values, the days-since-signal
+        count and the 7-day historical backtest. Pass ``historical_stats``
+        (win_rate, avg_return, sample_size) to skip the backtest.
+        """
+        mapi = self.calculator.calculate_mapi(df)
+        close = float(df['close'].iloc[-1])
+        ema20 = float(mapi['ema20'].iloc[-1])
+        composite_percentile = float(mapi['composite_percentile_rank'].iloc[-1])
+        edr_percentile = float(mapi['edr_percentile'].iloc[-1])
+        adx = float(mapi['adx'].iloc[-1])
+
+        # Entry signal
+        entry_signal = (
+            composite_percentile >= composite_threshold
+            and edr_percentile >= edr_threshold
+            and close > ema20
+            and adx > 25  # Momentum regime
+        )
 
-            # Days since last signal
-            signal_days = self._days_since_last_signal(mapi, composite_threshold, edr_threshold)
+        # Days since last signal
+        signal_days = self._days_since_last_signal(mapi, composite_threshold, edr_threshold)
 
-            # Historical performance
+        # Historical performance
+        if historical_stats is None:
+            features = self.build_feature_matrix(df, holding_periods=(7,), mapi=mapi)
             backtest = self.backtest_entry_threshold(
                 df=df,
                 composite_threshold=composite_threshold,
                 edr_threshold=edr_threshold,
                 holding_period=7,
+                features=features,
             )
-
-            return MAPISignal(
-                symbol=symbol,
-                date=str(df.index[-1].date()),
-                price=current['close'],
-                composite_score=current['composite_score'],
-                composite_percentile=current['composite_percentile_rank'],
-                edr_percentile=current['edr_percentile'],
-                esv_percentile=current['esv_percentile'],
-                regime=current['regime'],
-                adx=current['adx'],
-                distance_to_ema20_pct=current['distance_to_ema20_pct'],
-                entry_signal=entry_signal,
-                days_since_last_signal=signal_days,
-                historical_win_rate=backtest.win_rate,
-                historical_avg_return=backtest.avg_return,
-                sample_size=backtest.total_trades,
-            )
-
-        except Exception as e:
-            print(f"Error processing {symbol}: {e}")
-            return None
+            historical_stats = (backtest.win_rate, backtest.avg_return, backtest.total_trades)
+        win_rate, avg_return, sample_size = historical_stats
+
+        return MAPISignal(
+            symbol=symbol,
+            date=str(df.index[-1].date()),
+            price=close,
+            composite_score=float(mapi['composite_score'].iloc[-1]),
+            composite_percentile=composite_percentile,
+            edr_percentile=edr_percentile,
+            esv_percentile=float(mapi['esv_percentile'].iloc[-1]),
+            regime=str(mapi['regime'].iloc[-1]),
+            adx=adx,
+            distance_to_ema20_pct=float(((close - ema20) / ema20) * 100),
+            entry_signal=entry_signal,
+            days_since_last_signal=signal_days,
+            historical_win_rate=win_rate,
+            historical_avg_return=avg_return,
+            sample_size=sample_size,
+        )
 
     def _days_since_last_signal(
         self,
@@ -301,12 +432,167 @@ class MAPIAnalyzer:
         Returns:
             List of MAPISignal objects, sorted by composite percentile
         """
-        signals = []
+        return self.scan_universe(symbols, composite_threshold, edr_threshold).signals
+
+    def scan_universe(
+        self,
+        symbols: List[str],
+        composite_threshold: float = 35,
+        edr_threshold: float = 20,
+        time_budget: Optional[float] = None,
+        max_workers: Optional[int] = None,
+    ) -> MAPIScanResult:
+        """
+        Scan a (possibly large) universe within an optional latency budget.
+
+        History comes from chunked bulk downloads, MAPI features are computed in a
+        process pool (MAPI_SCAN_WORKERS env, default CPU count) and per-symbol
+        historical stats are cached by last bar date. Symbols not finished when
+        ``time_budget`` seconds elapse are reported in ``timed_out``.
+        """
+        started = time.monotonic()
+        deadline = started + time_budget if time_budget else None
+        symbols = list(dict.fromkeys(s.strip().upper() for s in symbols if s and s.strip()))
+
+        frames = fetch_daily_history(symbols, period="1y", deadline=deadline)
+        failed = [s for s in symbols if s in frames and frames[s].empty]
+        jobs = []
         for symbol in symbols:
-            signal = self.get_current_signal(symbol, composite_threshold, edr_threshold)
-            if signal:
-                signals.append(signal)
+            df = frames.get(symbol)
+            if df is None or df.empty:
+                continue
+            stats_key = (symbol, str(df.index[-1].date()), len(df), composite_threshold, edr_threshold)
+            jobs.append((self.calculator, symbol, df, composite_threshold, edr_threshold, _historical_stats_cache.get(stats_key)))
+
+        results, timed_out = _run_scan_jobs(jobs, deadline, max_workers)
+        timed_out += [s for s in symbols if s not in frames]
+
+        signals = []
+        for job, signal in zip(jobs, results):
+            if signal is None:
+                if job[1] not in timed_out:
+                    failed.append(job[1])
+                continue
+            df = job[2]
+            stats_key = (signal.symbol, str(df.index[-1].date()), len(df), composite_threshold, edr_threshold)
+            _remember_historical_stats(
+                stats_key, (signal.historical_win_rate, signal.historical_avg_return, signal.sample_size)
+            )
+            signals.append(signal)
 
         # Sort by composite percentile (ascending - lower = better entry)
         signals.sort(key=lambda x: x.composite_percentile)
-        return signals
+        return MAPIScanResult(
+            signals=signals,
+            failed=failed,
+            timed_out=timed_out,
+            elapsed_seconds=time.monotonic() - started,
+        )
+
+
+# (symbol, last bar date, bar count, composite threshold, EDR threshold) -> (win_rate, avg_return, sample_size)
+_historical_stats_cache: Dict[tuple, Tuple[float, float, int]] = {}
+_HISTORICAL_STATS_CACHE_MAX = 5000
+_scan_pool: Optional[ProcessPoolExecutor] = None
+_scan_pool_lock = threading.Lock()
+
+
+def _remember_historical_stats(key: tuple, stats: Tuple[float, float, int]) -> None:
+    if len(_historical_stats_cache) >= _HISTORICAL_STATS_CACHE_MAX:
+        _historical_stats_cache.clear()
+    _historical_stats_cache[key] = stats
+
+
+def fetch_daily_history(
+    symbols: List[str],
+    period: str = "1y",
+    deadline: Optional[float] = None,
+) -> Dict[str, pd.DataFrame]:
+    """
+    Bulk-download daily OHLCV (lower-case columns) in chunks of yf_batch.DOWNLOAD_CHUNK_SIZE.
+
+    Symbols missing from a response map to an empty frame; chunks not started
+    before ``deadline`` (time.monotonic) are left out of the result.
+    """
+    frames = download_frames(symbols, period=period, deadline=deadline)
+    for symbol, frame in frames.items():
+        if not frame.empty:
+            frame.columns = [str(c).lower() for c in frame.columns]
+            if {'open', 'high', 'low', 'close', 'volume'}.issubset(frame.columns):
+                frame = frame[['open', 'high', 'low', 'close', 'volume']].dropna(subset=['close'])
+            else:
+                frame = pd.DataFrame()
+        frames[symbol] = frame
+    return frames
+
+
+def _scan_worker(job: tuple) -> Optional[MAPISignal]:
+    calculator, symbol, df, composite_threshold, edr_threshold, historical_stats = job
+    try:
+        return MAPIAnalyzer(calculator).signal_from_frame(
+            symbol, df, composite_threshold, edr_threshold, historical_stats=historical_stats
+        )
+    except Exception as e:
+        print(f"Error processing {symbol}: {e}")
+        return None
+
+
+def _get_scan_pool(max_workers: int) -> ProcessPoolExecutor:
+    """Process pool shared by every scan, started on first use (size fixed then)."""
+    global _scan_pool
+    with _scan_pool_lock:
+        if _scan_pool is None:
+            _scan_pool = ProcessPoolExecutor(max_workers=max_workers)
+        return _scan_pool
+
+
+def _discard_scan_pool() -> None:
+    global _scan_pool
+    with _scan_pool_lock:
+        pool, _scan_pool = _scan_pool, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _run_scan_jobs(
+    jobs: List[tuple],
+    deadline: Optional[float],
+    max_workers: Optional[int],
+) -> Tuple[List[Optional[MAPISignal]], List[str]]:
+    """Run _scan_worker over jobs (in a process pool when worthwhile); returns (results, timed-out symbols)"""
+    if max_workers is None:
+        max_workers = int(os.getenv("MAPI_SCAN_WORKERS", "0")) or (os.cpu_count() or 1)
+
+    results: List[Optional[MAPISignal]] = [None] * len(jobs)
+    if max_workers > 1 and len(jobs) >= 8:
+        try:
+            pool = _get_scan_pool(max_workers)
+            futures = {pool.submit(_scan_worker, job): i for i, job in enumerate(jobs)}
+        except Exception as e:
+            print(f"  MAPI scan process pool unavailable ({e}); scanning serially")
+            _discard_scan_pool()
+            pool = None
+        if pool is not None:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            done, pending = wait(futures, timeout=timeout)
+            # Symbols still queued are dropped; the few already running finish
+            # on the shared pool instead of leaking a pool per request
+            for future in pending:
+                future.cancel()
+            for future in done:
+                try:
+                    results[futures[future]] = future.result()
+                except BrokenProcessPool as e:
+                    print(f"  MAPI scan worker failed: {e}")
+                    _discard_scan_pool()
+                except Exception as e:
+                    print(f"  MAPI scan worker failed: {e}")
+            return results, [jobs[futures[f]][1] for f in pending]
+
+    timed_out: List[str] = []
+    for i, job in enumerate(jobs):
+        if deadline is not None and time.monotonic() >= deadline:
+            timed_out.append(job[1])
+            continue
+        results[i] = _scan_worker(job)
+    return results, timed_out
@@ -84,23 +84,40 @@ class MAPICalculator:
         return esv
 
     def calculate_percentile_rank(self, series: pd.Series, lookback: int) -> pd.Series:
-        """Calculate rolling percentile rank using vectorized operations for performance"""
-        import numpy as np
-
-        percentiles = pd.Series(index=series.index, dtype=float)
-        values = series.values
-
-        for i in range(len(series)):
-            start_idx = max(0, i - lookback + 1)
-            window = values[start_idx:i+1]
-
-            if len(window) < 2:
-                percentiles.iloc[i] = 50.0
-            else:
-                rank = np.sum(window[:-1] < window[-1])
-                percentiles.iloc[i] = (rank / (len(window) - 1)) * 100
-
-        return percentiles
+        """
+        Calculate rolling percentile rank: share of the previous ``lookback - 1``
+        values strictly below the current one (expanding window during warm-up,
+        50.0 for the first bar).
+        """
+        values = np.asarray(series.values, dtype=float)
+        n = len(values)
+        ranks = np.empty(n, dtype=float)
+        if n == 0:
+            return pd.Series(ranks, index=series.index, dtype=float)
+
+        # Warm-up bars: expanding windows, via a lower-triangular comparison matrix.
+        head = min(n, lookback)
+        head_values = values[:head]
+        below = (head_values[None, :] < head_values[:, None]) & np.tri(head, k=-1, dtype=bool)
+        ranks[:head] = below.sum(axis=1)
+        counts = np.arange(head, dtype=float)
+
+        percentiles = np.empty(n, dtype=float)
+        percentiles[0] = 50.0
+        percentiles[1:head] = (ranks[1:head] / counts[1:head]) * 100
+
+        # Full windows, in chunks to bound the (bars x lookback) comparison matrix.
+        if n > lookback and lookback >= 2:
+            windows = np.lib.stride_tricks.sliding_window_view(values, lookback)[1:]
+            chunk = max(1, 2_000_000 // lookback)
+            for start in range(0, len(windows), chunk):
+                block = windows[start:start + chunk]
+                rank = (block[:, :-1] < block[:, -1:]).sum(axis=1)
+                percentiles[lookback + start:lookback + start + len(block)] = (rank / (lookback - 1)) * 100
+        elif n > lookback:
+            percentiles[lookback:] = 50.0
+
+        return pd.Series(percentiles, index=series.index, dtype=float)
 
     def calculate_rsi(self, series: pd.Series, length: int) -> pd.Series:
         """
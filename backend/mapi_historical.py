@@ -10,6 +10,7 @@ answering "does MAPI work historically?" with transparent bin/zone statistics.
 
 from __future__ import annotations
 
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, asdict
 from typing import Dict, List, Optional, Tuple
 
@@ -68,11 +69,28 @@ def _safe_stats(values: pd.Series) -> Dict[str, Optional[float]]:
     }
 
 
-def _assign_bin(percentile: float, bins: List[Tuple[float, float, str]]) -> int:
-    for i, (pmin, pmax, _label) in enumerate(bins):
-        if pmin <= percentile < pmax:
-            return i
-    return len(bins) - 1
+def _assign_bins(percentiles: pd.Series, bins: List[Tuple[float, float, str]]) -> np.ndarray:
+    """Vectorized bin index: first bin with pmin <= p < pmax, else the last bin."""
+    values = percentiles.to_numpy(dtype=float)
+    out = np.full(len(values), len(bins) - 1, dtype=int)
+    for i in reversed(range(len(bins))):
+        pmin, pmax, _label = bins[i]
+        out[(values >= pmin) & (values < pmax)] = i
+    return out
+
+
+_ZONES: List[Tuple[str, float, float]] = [
+    ("extreme_low", 0, 20),
+    ("low", 20, 35),
+    ("pullback_zone", 30, 45),
+    ("neutral", 40, 65),
+    ("strong_momentum", 65, 100),
+    ("all", 0, 100),
+]
+
+_SIGNAL_COLUMNS: Tuple[str, ...] = ("strong_momentum_entry", "pullback_entry", "exit_signal")
+
+_STAT_NAMES: Tuple[str, ...] = ("mean", "median", "std", "win_rate", "pct_5", "pct_95")
 
 
 @dataclass(frozen=True)
@@ -84,41 +102,17 @@ class MAPIBinStats:
     horizons: Dict[str, Dict[str, Optional[float]]]  # {"3d": {mean, win_rate, ...}, ...}
 
 
-def compute_mapi_historical_from_df(
-    df: pd.DataFrame,
-    *,
-    lookback_days: int = 1095,
-    horizons: List[int] | None = None,
-    require_momentum: bool = False,
-    adx_threshold: float = 25.0,
-    bins: List[Tuple[float, float, str]] | None = None,
-    calculator: MAPICalculator | None = None,
-) -> Dict:
-    """
-    Compute MAPI historical mapping + simple backtest stats from an OHLC dataframe.
+def _default_calculator() -> MAPICalculator:
+    return MAPICalculator(
+        ema_period=20,
+        ema_slope_period=5,
+        atr_period=14,
+        edr_lookback=60,
+        esv_lookback=90,
+    )
 
-    Args:
-        df: OHLC dataframe with lowercase columns: open/high/low/close (volume optional).
-        lookback_days: number of most recent rows to use (after indicator warmup).
-        horizons: forward horizons in bars (daily bars assumed); default [3, 7, 14, 21].
-        require_momentum: if True, only include rows where ADX > adx_threshold.
-        adx_threshold: ADX threshold for momentum regime filter.
-        bins: percentile bin definitions.
-        calculator: optional MAPICalculator instance.
-    """
-    if horizons is None:
-        horizons = [3, 7, 14, 21]
-    if bins is None:
-        bins = _DEFAULT_BINS
-    if calculator is None:
-        calculator = MAPICalculator(
-            ema_period=20,
-            ema_slope_period=5,
-            atr_period=14,
-            edr_lookback=60,
-            esv_lookback=90,
-        )
 
+def _prepare_ohlc(df: pd.DataFrame) -> pd.DataFrame:
     if df is None or df.empty:
         raise ValueError("Empty dataframe")
 
@@ -127,17 +121,18 @@ def compute_mapi_historical_from_df(
     for col in ("open", "high", "low", "close"):
         if col not in df.columns:
             raise ValueError(f"Missing required column: {col}")
+    return df
 
-    # Compute MAPI values on full history, then tail for analysis.
-    mapi = calculator.calculate_mapi(df)
-    df = df.tail(lookback_days).copy()
-
-    # Current state should reflect the latest bar (not the last valid forward-return row).
-    try:
-        current_state = calculator.get_current_signal(df)
-    except Exception:
-        current_state = None
 
+def _build_analysis_frame(
+    df: pd.DataFrame,
+    mapi: Dict,
+    *,
+    horizons: List[int],
+    require_momentum: bool,
+    adx_threshold: float,
+) -> pd.DataFrame:
+    """Row-level MAPI features + forward returns for ``df`` (already tailed), filtered to valid rows."""
     analysis = pd.DataFrame(index=df.index)
     analysis["close"] = pd.to_numeric(df["close"], errors="coerce")
     analysis["composite_percentile"] = pd.to_numeric(mapi["composite_percentile_rank"].reindex(df.index), errors="coerce")
@@ -162,73 +157,138 @@ def compute_mapi_historical_from_df(
     if require_momentum:
         valid = valid & (analysis["adx"] > adx_threshold)
 
-    analysis = analysis.loc[valid].copy()
-    if analysis.empty:
-        raise ValueError("No valid rows after filtering (try require_momentum=false or lower lookback_days)")
+    return analysis.loc[valid].copy()
 
-    # Percentile bins
-    bin_index = analysis["composite_percentile"].apply(lambda p: _assign_bin(float(p), bins))
-    analysis["bin_idx"] = bin_index.astype(int)
+
+def _membership_frame(panel: pd.DataFrame, horizons: List[int], bins: List[Tuple[float, float, str]]) -> pd.DataFrame:
+    """
+    Long frame with one row per (panel row, group it belongs to). Groups are the
+    percentile bins, the (overlapping) zones and the signal columns, so every
+    statistic in a summary comes out of a single groupby over this frame.
+    """
+    cols = [c for c in ("ticker",) if c in panel.columns] + [f"fwd_return_{h}d" for h in horizons]
+    base = panel[cols]
+    percentile = panel["composite_percentile"]
+
+    parts = [base.assign(group="bin:" + pd.Series(_assign_bins(percentile, bins), index=panel.index).astype(str))]
+    for name, pmin, pmax in _ZONES:
+        upper = percentile <= pmax if pmax >= 100 else percentile < pmax
+        parts.append(base.loc[(percentile >= pmin) & upper].assign(group=f"zone:{name}"))
+    for col in _SIGNAL_COLUMNS:
+        parts.append(base.loc[panel[col].to_numpy(dtype=bool)].assign(group=f"signal:{col}"))
+    return pd.concat(parts, axis=0, ignore_index=True)
+
+
+def _grouped_return_stats(long: pd.DataFrame, keys: List[str], horizons: List[int]) -> Dict:
+    """{group key: {"count": n, "<h>d": {mean, median, std, win_rate, pct_5, pct_95}}} (same semantics as _safe_stats)."""
+    cols = [f"fwd_return_{h}d" for h in horizons]
+    values = long[cols].apply(pd.to_numeric, errors="coerce").replace([np.inf, -np.inf], np.nan)
+    group_keys = [long[k] for k in keys]
+    grouped = values.groupby(group_keys, sort=False)
+
+    tables = {
+        "mean": grouped.mean(),
+        "median": grouped.median(),
+        "std": grouped.std(ddof=0),
+        "win_rate": (values > 0).where(values.notna()).astype(float).groupby(group_keys, sort=False).mean() * 100.0,
+        "pct_5": grouped.quantile(0.05),
+        "pct_95": grouped.quantile(0.95),
+    }
+    counts = long.groupby(keys, sort=False).size()
+
+    out: Dict = {}
+    for key, count in counts.items():
+        entry: Dict = {"count": int(count)}
+        for h, col in zip(horizons, cols):
+            entry[f"{h}d"] = {name: _to_float(tables[name].at[key, col]) for name in _STAT_NAMES}
+        out[key] = entry
+    return out
+
+
+def _empty_horizon_stats(horizons: List[int]) -> Dict:
+    return {f"{h}d": {name: None for name in _STAT_NAMES} for h in horizons}
+
+
+def _summaries_from_stats(
+    stats_for,
+    horizons: List[int],
+    bins: List[Tuple[float, float, str]],
+) -> Tuple[List[MAPIBinStats], Dict, Dict]:
+    """Shape grouped stats (``stats_for(group) -> entry | None``) into bin/zone/signal summaries."""
+    empty = {"count": 0, **_empty_horizon_stats(horizons)}
 
     bin_stats: List[MAPIBinStats] = []
     for i, (pmin, pmax, label) in enumerate(bins):
-        subset = analysis.loc[analysis["bin_idx"] == i]
-        horizon_stats: Dict[str, Dict[str, Optional[float]]] = {}
-        for h in horizons:
-            horizon_stats[f"{h}d"] = _safe_stats(subset[f"fwd_return_{h}d"])
+        entry = stats_for(f"bin:{i}") or empty
         bin_stats.append(
             MAPIBinStats(
                 bin_label=label,
                 bin_min=float(pmin),
                 bin_max=float(pmax),
-                count=int(len(subset)),
-                horizons=horizon_stats,
+                count=entry["count"],
+                horizons={f"{h}d": dict(entry[f"{h}d"]) for h in horizons},
             )
         )
 
-    def zone_mask(pmin: float, pmax: float) -> pd.Series:
-        if pmax >= 100:
-            return (analysis["composite_percentile"] >= pmin) & (analysis["composite_percentile"] <= pmax)
-        return (analysis["composite_percentile"] >= pmin) & (analysis["composite_percentile"] < pmax)
-
-    def zone_stats(pmin: float, pmax: float) -> Dict:
-        subset = analysis.loc[zone_mask(pmin, pmax)]
-        out = {"pct_min": float(pmin), "pct_max": float(pmax), "count": int(len(subset))}
+    zones: Dict = {}
+    for name, pmin, pmax in _ZONES:
+        entry = stats_for(f"zone:{name}") or empty
+        out = {"pct_min": float(pmin), "pct_max": float(pmax), "count": entry["count"]}
         for h in horizons:
-            s = _safe_stats(subset[f"fwd_return_{h}d"])
+            s = entry[f"{h}d"]
             out[f"mean_return_{h}d"] = s["mean"]
             out[f"win_rate_{h}d"] = s["win_rate"]
             out[f"pct_5_return_{h}d"] = s["pct_5"]
             out[f"pct_95_return_{h}d"] = s["pct_95"]
-        return out
-
-    zones = {
-        "extreme_low": zone_stats(0, 20),
-        "low": zone_stats(20, 35),
-        "pullback_zone": zone_stats(30, 45),
-        "neutral": zone_stats(40, 65),
-        "strong_momentum": zone_stats(65, 100),
-        "all": zone_stats(0, 100),
-    }
+        zones[name] = out
 
-    def signal_stats(signal_col: str) -> Dict:
-        subset = analysis.loc[analysis[signal_col]]
-        out = {"count": int(len(subset))}
+    signals: Dict = {}
+    for col in _SIGNAL_COLUMNS:
+        entry = stats_for(f"signal:{col}") or empty
+        out = {"count": entry["count"]}
         for h in horizons:
-            s = _safe_stats(subset[f"fwd_return_{h}d"])
+            s = entry[f"{h}d"]
             out[f"mean_return_{h}d"] = s["mean"]
             out[f"win_rate_{h}d"] = s["win_rate"]
-        return out
+        signals[col] = out
 
-    signals = {
-        "strong_momentum_entry": signal_stats("strong_momentum_entry"),
-        "pullback_entry": signal_stats("pullback_entry"),
-        "exit_signal": signal_stats("exit_signal"),
+    return bin_stats, zones, signals
+
+
+def _summary_payload(
+    *,
+    lookback_days: int,
+    horizons: List[int],
+    require_momentum: bool,
+    adx_threshold: float,
+    bins: List[Tuple[float, float, str]],
+    bin_stats: List[MAPIBinStats],
+    zones: Dict,
+    signals: Dict,
+    sample_size: int,
+    current_state: Optional[Dict] = None,
+) -> Dict:
+    payload = {
+        "lookback_days": int(lookback_days),
+        "horizons": [int(h) for h in horizons],
+        "require_momentum": bool(require_momentum),
+        "adx_threshold": float(adx_threshold),
+        "bin_definitions": [{"min": b[0], "max": b[1], "label": b[2]} for b in bins],
+        "bin_stats": [asdict(b) for b in bin_stats],
+        "zone_stats": zones,
+        "signal_stats": signals,
     }
+    if current_state is not None:
+        payload["current_state"] = current_state
+    payload["sample_size"] = int(sample_size)
+    return payload
 
+
+def _format_current_state(current_state: Optional[Dict], analysis: pd.DataFrame) -> Dict:
+    # Current state should reflect the latest bar (not the last valid forward-return row).
     if current_state is None:
         latest = analysis.iloc[-1]
-        current_state = {
+        return {
             "date": str(latest.name.date()) if hasattr(latest.name, "date") else str(latest.name),
             "close": _to_float(latest["close"]),
             "composite_percentile": _to_float(latest["composite_percentile"]),
@@ -238,32 +298,103 @@ def compute_mapi_historical_from_df(
             "adx": _to_float(latest["adx"]),
             "regime": str(latest["regime"]),
         }
-    else:
-        current_state = {
-            "date": str(current_state.get("date")),
-            "close": _to_float(current_state.get("close")),
-            "composite_percentile": _to_float(current_state.get("composite_percentile_rank")),
-            "composite_raw": _to_float(current_state.get("composite_score")),
-            "edr_percentile": _to_float(current_state.get("edr_percentile")),
-            "esv_percentile": _to_float(current_state.get("esv_percentile")),
-            "adx": _to_float(current_state.get("adx")),
-            "regime": str(current_state.get("regime")),
-        }
-
     return {
-        "lookback_days": int(lookback_days),
-        "horizons": [int(h) for h in horizons],
-        "require_momentum": bool(require_momentum),
-        "adx_threshold": float(adx_threshold),
-        "bin_definitions": [{"min": b[0], "max": b[1], "label": b[2]} for b in bins],
-        "bin_stats": [asdict(b) for b in bin_stats],
-        "zone_stats": zones,
-        "signal_stats": signals,
-        "current_state": current_state,
-        "sample_size": int(len(analysis)),
+        "date": str(current_state.get("date")),
+        "close": _to_float(current_state.get("close")),
+        "composite_percentile": _to_float(current_state.get("composite_percentile_rank")),
+        "composite_raw": _to_float(current_state.get("composite_score")),
+        "edr_percentile": _to_float(current_state.get("edr_percentile")),
+        "esv_percentile": _to_float(current_state.get("esv_percentile")),
+        "adx": _to_float(current_state.get("adx")),
+        "regime": str(current_state.get("regime")),
     }
 
 
+def _analyze_ticker_frame(
+    df: pd.DataFrame,
+    *,
+    lookback_days: int,
+    horizons: List[int],
+    require_momentum: bool,
+    adx_threshold: float,
+    calculator: MAPICalculator,
+) -> Tuple[pd.DataFrame, Optional[Dict]]:
+    """MAPI on full history, tailed analysis frame, and the raw current signal for the tail."""
+    df = _prepare_ohlc(df)
+
+    # Compute MAPI values on full history, then tail for analysis.
+    mapi = calculator.calculate_mapi(df)
+    df = df.tail(lookback_days).copy()
+
+    try:
+        current_signal = calculator.get_current_signal(df)
+    except Exception:
+        current_signal = None
+
+    analysis = _build_analysis_frame(
+        df, mapi, horizons=horizons, require_momentum=require_momentum, adx_threshold=adx_threshold
+    )
+    if analysis.empty:
+        raise ValueError("No valid rows after filtering (try require_momentum=false or lower lookback_days)")
+    return analysis, current_signal
+
+
+def compute_mapi_historical_from_df(
+    df: pd.DataFrame,
+    *,
+    lookback_days: int = 1095,
+    horizons: List[int] | None = None,
+    require_momentum: bool = False,
+    adx_threshold: float = 25.0,
+    bins: List[Tuple[float, float, str]] | None = None,
+    calculator: MAPICalculator | None = None,
+) -> Dict:
+    """
+    Compute MAPI historical mapping + simple backtest stats from an OHLC dataframe.
+
+    Args:
+        df: OHLC dataframe with lowercase columns: open/high/low/close (volume optional).
+        lookback_days: number of most recent rows to use (after indicator warmup).
+        horizons: forward horizons in bars (daily bars assumed); default [3, 7, 14, 21].
+        require_momentum: if True, only include rows where ADX > adx_threshold.
+        adx_threshold: ADX threshold for momentum regime filter.
+        bins: percentile bin definitions.
+        calculator: optional MAPICalculator instance.
+    """
+    if horizons is None:
+        horizons = [3, 7, 14, 21]
+    if bins is None:
+        bins = _DEFAULT_BINS
+    if calculator is None:
+        calculator = _default_calculator()
+
+    analysis, current_signal = _analyze_ticker_frame(
+        df,
+        lookback_days=lookback_days,
+        horizons=horizons,
+        require_momentum=require_momentum,
+        adx_threshold=adx_threshold,
+        calculator=calculator,
+    )
+
+    stats = _grouped_return_stats(_membership_frame(analysis, horizons, bins), ["group"], horizons)
+    bin_stats, zones, signals = _summaries_from_stats(stats.get, horizons, bins)
+
+    payload = _summary_payload(
+        lookback_days=lookback_days,
+        horizons=horizons,
+        require_momentum=require_momentum,
+        adx_threshold=adx_threshold,
+        bins=bins,
+        bin_stats=bin_stats,
+        zones=zones,
+        signals=signals,
+        sample_size=len(analysis),
+        current_state=_format_current_state(current_signal, analysis),
+    )
+    return payload
+
+
 def run_mapi_historical_analysis(
     ticker: str,
     *,
@@ -302,6 +433,56 @@ def run_mapi_historical_analysis(
     return analysis
 
 
+def _fetch_basket_frames(tickers: List[str], max_workers: int = 8) -> Dict[str, pd.DataFrame]:
+    """Fetch 5y daily OHLCV per ticker concurrently (fetch_data is I/O bound and rate-limits itself)."""
+
+    def fetch(t: str) -> pd.DataFrame:
+        backtester = EnhancedPerformanceMatrixBacktester(
+            tickers=[t],
+            lookback_period=252,
+            rsi_length=14,
+            ma_length=14,
+            max_horizon=21,
+        )
+        df = backtester.fetch_data(t, period="5y")
+        if df is None or df.empty:
+            return pd.DataFrame()
+        df.columns = [c.lower() for c in df.columns]
+        return df[[c for c in ["open", "high", "low", "close", "volume"] if c in df.columns]].copy()
+
+    workers = max(1, min(max_workers, len(tickers)))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return dict(zip(tickers, pool.map(fetch, tickers)))
+
+
+def _daily_picks(candidates: pd.DataFrame) -> pd.DataFrame:
+    """
+    Lowest composite percentile row per date.
+
+    Percentiles are discrete, so ties are common; dates with a tied minimum keep
+    the per-date choice ``grp.sort_values("composite_percentile").iloc[0]`` over
+    the rows in ``candidates`` order.
+    """
+    pct = candidates["composite_percentile"]
+    lows = candidates.loc[pct.eq(pct.groupby(candidates["date"]).transform("min"))]
+    tied = lows["date"].duplicated(keep=False)
+    picks = [lows.loc[~tied]]
+    tied_dates = candidates.loc[candidates["date"].isin(lows.loc[tied, "date"])]
+    for _, grp in tied_dates.groupby("date", sort=False):
+        picks.append(grp.sort_values("composite_percentile").iloc[[0]])
+    return pd.concat(picks).sort_values("date", kind="mergesort")
+
+
+def _strategy_stats(rows: pd.DataFrame, horizons: List[int]) -> Dict:
+    out = {"days": int(len(rows))}
+    for h in horizons:
+        col = f"fwd_return_{h}d"
+        s = _safe_stats(rows[col] if col in rows.columns else pd.Series(dtype=float))
+        out[f"mean_return_{h}d"] = s["mean"]
+        out[f"win_rate_{h}d"] = s["win_rate"]
+    return out
+
+
 def run_mapi_basket_historical_analysis(
     tickers: List[str],
     *,
@@ -317,6 +498,9 @@ def run_mapi_basket_historical_analysis(
     - Per-ticker summaries
     - Pooled (all-rows) bin/zone/signal stats across tickers
     - Breadth relationships (cross-sectional MAPI vs forward basket returns)
+
+    MAPI runs once per ticker; the analysis frames are stacked into one
+    (ticker, date) panel and every summary is a grouped aggregation over it.
     """
     if horizons is None:
         horizons = [3, 7, 14, 21]
@@ -324,35 +508,17 @@ def run_mapi_basket_historical_analysis(
     if not tickers_upper:
         raise ValueError("No tickers provided")
 
-    calculator = MAPICalculator(
-        ema_period=20,
-        ema_slope_period=5,
-        atr_period=14,
-        edr_lookback=60,
-        esv_lookback=90,
-    )
-
-    per_ticker: List[Dict] = []
-    pooled_rows: List[pd.DataFrame] = []
-    current_states: List[Dict] = []
+    calculator = _default_calculator()
+    bins = _DEFAULT_BINS
+    frames = _fetch_basket_frames(tickers_upper)
 
+    panels: List[pd.DataFrame] = []
+    current_signals: Dict[str, Optional[Dict]] = {}
     for t in tickers_upper:
-        backtester = EnhancedPerformanceMatrixBacktester(
-            tickers=[t],
-            lookback_period=252,
-            rsi_length=14,
-            ma_length=14,
-            max_horizon=21,
-        )
-        df = backtester.fetch_data(t, period="5y")
+        df = frames.get(t)
         if df is None or df.empty:
             continue
-
-        df.columns = [c.lower() for c in df.columns]
-        df = df[[c for c in ["open", "high", "low", "close", "volume"] if c in df.columns]].copy()
-
-        # Per-ticker summary (reuses single-ticker routine)
-        one = compute_mapi_historical_from_df(
+        analysis, current_signal = _analyze_ticker_frame(
             df,
             lookback_days=lookback_days,
             horizons=horizons,
@@ -360,36 +526,47 @@ def run_mapi_basket_historical_analysis(
             adx_threshold=adx_threshold,
             calculator=calculator,
         )
+        analysis.insert(0, "ticker", t)
+        panels.append(analysis)
+        current_signals[t] = current_signal
+
+    if not panels:
+        raise ValueError("Could not fetch any data for the requested tickers")
+
+    panel = pd.concat(panels, axis=0)
+    long = _membership_frame(panel, horizons, bins)
+
+    # --- per-ticker and pooled bin/zone/signal stats: one grouped pass each ---
+    per_ticker_stats = _grouped_return_stats(long, ["ticker", "group"], horizons)
+    pooled_stats = _grouped_return_stats(long, ["group"], horizons)
+    sample_sizes = panel.groupby("ticker", sort=False).size()
+
+    summary_args = dict(
+        lookback_days=lookback_days,
+        horizons=horizons,
+        require_momentum=require_momentum,
+        adx_threshold=adx_threshold,
+        bins=bins,
+    )
+    per_ticker: List[Dict] = []
+    current_states: List[Dict] = []
+    for t, analysis in zip([p["ticker"].iat[0] for p in panels], panels):
+        bin_stats, zones, signals = _summaries_from_stats(
+            lambda group, t=t: per_ticker_stats.get((t, group)), horizons, bins
+        )
+        one = _summary_payload(
+            **summary_args,
+            bin_stats=bin_stats,
+            zones=zones,
+            signals=signals,
+            sample_size=int(sample_sizes[t]),
+            current_state=_format_current_state(current_signals[t], analysis),
+        )
         one["ticker"] = t
         per_ticker.append(one)
 
-        # Build pooled row-level frame for breadth/relationships.
-        mapi = calculator.calculate_mapi(df)
-        df_tail = df.tail(lookback_days).copy()
-        a = pd.DataFrame(index=df_tail.index)
-        a["ticker"] = t
-        a["close"] = pd.to_numeric(df_tail["close"], errors="coerce")
-        a["composite_percentile"] = pd.to_numeric(mapi["composite_percentile_rank"].reindex(df_tail.index), errors="coerce")
-        a["adx"] = pd.to_numeric(mapi["adx"].reindex(df_tail.index), errors="coerce")
-        a["strong_momentum_entry"] = mapi["strong_momentum_entry"].reindex(df_tail.index).astype(bool)
-        a["pullback_entry"] = mapi["pullback_entry"].reindex(df_tail.index).astype(bool)
-        a["exit_signal"] = mapi["exit_signal"].reindex(df_tail.index).astype(bool)
-
-        for h in horizons:
-            a[f"fwd_return_{h}d"] = (a["close"].shift(-h) / a["close"] - 1.0) * 100.0
-
-        max_h = max(horizons) if horizons else 0
-        valid = a["close"].notna() & a["composite_percentile"].notna()
-        if max_h > 0:
-            valid = valid & a[f"fwd_return_{max_h}d"].notna()
-        if require_momentum:
-            valid = valid & (a["adx"] > adx_threshold)
-        a = a.loc[valid].copy()
-        pooled_rows.append(a)
-
-        # Current state for basket breadth (latest bar)
-        try:
-            cs = calculator.get_current_signal(df_tail)
+        cs = current_signals[t]
+        if cs is not None:
             current_states.append(
                 {
                     "ticker": t,
@@ -404,154 +581,56 @@ def run_mapi_basket_historical_analysis(
                     "exit_signal": bool(cs.get("exit_signal")),
                 }
             )
-        except Exception:
-            pass
-
-    if not pooled_rows:
-        raise ValueError("Could not fetch any data for the requested tickers")
-
-    pooled = pd.concat(pooled_rows, axis=0).sort_index()
-
-    # --- pooled (all-rows) bin/zone/signal stats without recomputing indicators ---
-    bins = _DEFAULT_BINS
-    max_h = max(horizons) if horizons else 0
-    pooled_valid = pooled["close"].notna() & pooled["composite_percentile"].notna()
-    if max_h > 0:
-        pooled_valid = pooled_valid & pooled[f"fwd_return_{max_h}d"].notna()
-    pooled = pooled.loc[pooled_valid].copy()
-
-    pooled["bin_idx"] = pooled["composite_percentile"].apply(lambda p: _assign_bin(float(p), bins)).astype(int)
-
-    pooled_bin_stats: List[MAPIBinStats] = []
-    for i, (pmin, pmax, label) in enumerate(bins):
-        subset = pooled.loc[pooled["bin_idx"] == i]
-        horizon_stats: Dict[str, Dict[str, Optional[float]]] = {}
-        for h in horizons:
-            horizon_stats[f"{h}d"] = _safe_stats(subset[f"fwd_return_{h}d"])
-        pooled_bin_stats.append(
-            MAPIBinStats(
-                bin_label=label,
-                bin_min=float(pmin),
-                bin_max=float(pmax),
-                count=int(len(subset)),
-                horizons=horizon_stats,
-            )
-        )
-
-    def _zone_mask(df_: pd.DataFrame, pmin: float, pmax: float) -> pd.Series:
-        if pmax >= 100:
-            return (df_["composite_percentile"] >= pmin) & (df_["composite_percentile"] <= pmax)
-        return (df_["composite_percentile"] >= pmin) & (df_["composite_percentile"] < pmax)
-
-    def _zone_stats(df_: pd.DataFrame, pmin: float, pmax: float) -> Dict:
-        subset = df_.loc[_zone_mask(df_, pmin, pmax)]
-        out = {"pct_min": float(pmin), "pct_max": float(pmax), "count": int(len(subset))}
-        for h in horizons:
-            s = _safe_stats(subset[f"fwd_return_{h}d"])
-            out[f"mean_return_{h}d"] = s["mean"]
-            out[f"win_rate_{h}d"] = s["win_rate"]
-            out[f"pct_5_return_{h}d"] = s["pct_5"]
-            out[f"pct_95_return_{h}d"] = s["pct_95"]
-        return out
-
-    pooled_zone_stats = {
-        "extreme_low": _zone_stats(pooled, 0, 20),
-        "low": _zone_stats(pooled, 20, 35),
-        "pullback_zone": _zone_stats(pooled, 30, 45),
-        "neutral": _zone_stats(pooled, 40, 65),
-        "strong_momentum": _zone_stats(pooled, 65, 100),
-        "all": _zone_stats(pooled, 0, 100),
-    }
-
-    def _signal_stats(df_: pd.DataFrame, col: str) -> Dict:
-        subset = df_.loc[df_[col]]
-        out = {"count": int(len(subset))}
-        for h in horizons:
-            s = _safe_stats(subset[f"fwd_return_{h}d"])
-            out[f"mean_return_{h}d"] = s["mean"]
-            out[f"win_rate_{h}d"] = s["win_rate"]
-        return out
 
-    pooled_signal_stats = {
-        "strong_momentum_entry": _signal_stats(pooled, "strong_momentum_entry"),
-        "pullback_entry": _signal_stats(pooled, "pullback_entry"),
-        "exit_signal": _signal_stats(pooled, "exit_signal"),
-    }
+    bin_stats, zones, signals = _summaries_from_stats(pooled_stats.get, horizons, bins)
+    pooled_summary = _summary_payload(
+        **summary_args,
+        bin_stats=bin_stats,
+        zones=zones,
+        signals=signals,
+        sample_size=len(panel),
+    )
 
     # --- breadth relationships (cross-sectional metrics by date) ---
-    breadth = pooled.copy()
-    breadth = breadth.reset_index()
-    date_col = breadth.columns[0]
-    breadth = breadth.rename(columns={date_col: "date"})
+    fwd_cols = [f"fwd_return_{h}d" for h in horizons]
+    # Date-sorted pooled order (as the per-date loops saw it); the daily picks
+    # break percentile ties by position within a date
+    breadth = panel.sort_index().reset_index()
+    breadth = breadth.rename(columns={breadth.columns[0]: "date"})
     breadth["date"] = pd.to_datetime(breadth["date"]).dt.date.astype(str)
-
-    def _pct(cond: pd.Series) -> float:
-        return float(np.mean(cond)) * 100.0 if len(cond) else 0.0
-
-    agg_rows = []
-    for date, grp in breadth.groupby("date"):
-        row = {
-            "date": date,
-            "n": int(len(grp)),
-            "mean_composite_percentile": _to_float(grp["composite_percentile"].mean()),
-            "pct_extreme_low": _to_float(_pct(grp["composite_percentile"] <= 20)),
-            "pct_low": _to_float(_pct((grp["composite_percentile"] > 20) & (grp["composite_percentile"] <= 35))),
-            "pct_strong": _to_float(_pct(grp["composite_percentile"] >= 65)),
-            "strong_signals": int(grp["strong_momentum_entry"].sum()),
-            "pullback_signals": int(grp["pullback_entry"].sum()),
-            "exit_signals": int(grp["exit_signal"].sum()),
+    pct = pd.to_numeric(breadth["composite_percentile"], errors="coerce")
+    in_low = (pct > 20) & (pct <= 35)
+
+    by_date = breadth.groupby("date")
+    breadth_df = pd.DataFrame(
+        {
+            "n": by_date.size(),
+            "mean_composite_percentile": pct.groupby(breadth["date"]).mean(),
+            "pct_extreme_low": (pct <= 20).groupby(breadth["date"]).mean() * 100.0,
+            "pct_low": in_low.groupby(breadth["date"]).mean() * 100.0,
+            "pct_strong": (pct >= 65).groupby(breadth["date"]).mean() * 100.0,
+            "strong_signals": by_date["strong_momentum_entry"].sum(),
+            "pullback_signals": by_date["pullback_entry"].sum(),
+            "exit_signals": by_date["exit_signal"].sum(),
         }
-        for h in horizons:
-            row[f"basket_fwd_return_{h}d"] = _to_float(grp[f"fwd_return_{h}d"].mean())
-        agg_rows.append(row)
-
-    breadth_df = pd.DataFrame(agg_rows)
+    )
+    basket_returns = by_date[fwd_cols].mean()
+    for h, col in zip(horizons, fwd_cols):
+        breadth_df[f"basket_fwd_return_{h}d"] = basket_returns[col]
+    breadth_df = breadth_df.reset_index()
 
     # --- cross-sectional "scanner-style" strategy tests (pick/average across tickers by date) ---
-    def _strategy_from_daily_rows(daily_rows: List[Dict]) -> Dict:
-        df_ = pd.DataFrame(daily_rows)
-        out = {"days": int(len(df_))}
-        for h in horizons:
-            s = _safe_stats(pd.to_numeric(df_.get(f"fwd_return_{h}d"), errors="coerce"))
-            out[f"mean_return_{h}d"] = s["mean"]
-            out[f"win_rate_{h}d"] = s["win_rate"]
-        return out
-
-    min_pick_rows: List[Dict] = []
-    low_pick_rows: List[Dict] = []
-    low_equal_rows: List[Dict] = []
-
-    for date, grp in breadth.groupby("date"):
-        grp = grp.copy()
-        grp["composite_percentile"] = pd.to_numeric(grp["composite_percentile"], errors="coerce")
-        grp = grp.dropna(subset=["composite_percentile"])
-        if grp.empty:
-            continue
-
-        # 1) Pick the single lowest composite-percentile ticker each day
-        pick = grp.sort_values("composite_percentile", ascending=True).iloc[0]
-        min_pick_rows.append(
-            {"date": date, "ticker": pick.get("ticker"), **{f"fwd_return_{h}d": pick.get(f"fwd_return_{h}d") for h in horizons}}
-        )
-
-        # 2) Pick the lowest ticker within the "Low" zone (20–35). Skip if none.
-        low_grp = grp.loc[(grp["composite_percentile"] > 20) & (grp["composite_percentile"] <= 35)]
-        if not low_grp.empty:
-            pick2 = low_grp.sort_values("composite_percentile", ascending=True).iloc[0]
-            low_pick_rows.append(
-                {"date": date, "ticker": pick2.get("ticker"), **{f"fwd_return_{h}d": pick2.get(f"fwd_return_{h}d") for h in horizons}}
-            )
-
-            # 3) Equal-weight all tickers in Low zone that day
-            row3 = {"date": date, "n": int(len(low_grp))}
-            for h in horizons:
-                row3[f"fwd_return_{h}d"] = _to_float(pd.to_numeric(low_grp[f"fwd_return_{h}d"], errors="coerce").mean())
-            low_equal_rows.append(row3)
+    ranked = breadth.assign(composite_percentile=pct).dropna(subset=["composite_percentile"])
+    ranked_low = ranked.loc[in_low.loc[ranked.index]]
+    low_equal = ranked_low.groupby("date")[fwd_cols].mean()
 
     cross_sectional_strategies = {
-        "min_percentile_pick": _strategy_from_daily_rows(min_pick_rows),
-        "low_zone_min_pick": _strategy_from_daily_rows(low_pick_rows),
-        "low_zone_equal_weight": _strategy_from_daily_rows(low_equal_rows),
+        # 1) Pick the single lowest composite-percentile ticker each day
+        "min_percentile_pick": _strategy_stats(_daily_picks(ranked), horizons),
+        # 2) Pick the lowest ticker within the "Low" zone (20–35). Skip days with none.
+        "low_zone_min_pick": _strategy_stats(_daily_picks(ranked_low), horizons),
+        # 3) Equal-weight all tickers in Low zone that day
+        "low_zone_equal_weight": _strategy_stats(low_equal, horizons),
     }
 
     relationships: Dict[str, Dict[str, Optional[float] | Dict[str, Optional[float]]]] = {}
@@ -590,19 +669,6 @@ def run_mapi_basket_historical_analysis(
             "exit_signals": int(cs_df["exit_signal"].sum()) if "exit_signal" in cs_df.columns else 0,
         }
 
-    # Replace placeholder pooled_summary
-    pooled_summary = {
-        "lookback_days": int(lookback_days),
-        "horizons": [int(h) for h in horizons],
-        "require_momentum": bool(require_momentum),
-        "adx_threshold": float(adx_threshold),
-        "bin_definitions": [{"min": b[0], "max": b[1], "label": b[2]} for b in bins],
-        "bin_stats": [asdict(b) for b in pooled_bin_stats],
-        "zone_stats": pooled_zone_stats,
-        "signal_stats": pooled_signal_stats,
-        "sample_size": int(len(pooled)),
-    }
-
     return {
         "tickers": tickers_upper,
         "pooled": pooled_summary,
@@ -14,8 +14,10 @@ Key Questions Answered:
 
 from dataclasses import dataclass
 from typing import List, Dict, Optional, Tuple
+import warnings
 import pandas as pd
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
 import yfinance as yf
 from datetime import datetime, timedelta
 
@@ -218,35 +220,32 @@ class PositionManager:
         df['return_14d'] = (df['Close'].shift(-14) - df['Close']) / df['Close'] * 100
 
         # Calculate max drawdown and upside in next 14 days
-        def calc_max_metrics(idx, dataframe, periods=14):
-            if idx + periods >= len(dataframe):
-                return None, None
-
-            future_prices = dataframe['Close'].iloc[idx:idx+periods]
-            current_price = dataframe['Close'].iloc[idx]
-
-            max_dd = ((future_prices.min() - current_price) / current_price * 100)
-            max_up = ((future_prices.max() - current_price) / current_price * 100)
-
-            return max_dd, max_up
-
-        max_metrics = [calc_max_metrics(i, df) for i in range(len(df))]
-        df['max_drawdown_14d'] = [m[0] if m else None for m in max_metrics]
-        df['max_upside_14d'] = [m[1] if m else None for m in max_metrics]
-
-        # Calculate time to convergence (when gap < 10%)
-        def calc_time_to_convergence(idx, dataframe):
-            if dataframe['divergence_gap'].iloc[idx] < 10:
-                return 0
-
-            for i in range(idx + 1, min(idx + 60, len(dataframe))):  # Look forward max 60 days
-                if dataframe['divergence_gap'].iloc[i] < 10:
-                    return (i - idx)  # Days to convergence
-
-            return None  # Didn't converge in 60 days
-
-        df['time_to_convergence_days'] = [calc_time_to_convergence(i, df)
-                                          for i in range(len(df))]
+        # (window includes the current bar; rows without a full window stay NaN)
+        close = df['Close'].to_numpy(dtype=float)
+        n = len(close)
+        periods = 14
+        max_dd = np.full(n, np.nan)
+        max_up = np.full(n, np.nan)
+        valid = n - periods  # rows with idx + periods < n
+        if valid > 0:
+            windows = sliding_window_view(close, periods)[:valid]
+            current = close[:valid]
+            with np.errstate(all='ignore'), warnings.catch_warnings():
+                warnings.simplefilter('ignore', RuntimeWarning)
+                max_dd[:valid] = (np.nanmin(windows, axis=1) - current) / current * 100
+                max_up[:valid] = (np.nanmax(windows, axis=1) - current) / current * 100
+        df['max_drawdown_14d'] = max_dd
+        df['max_upside_14d'] = max_up
+
+        # Calculate time to convergence (when gap < 10%), looking forward max 60 days
+        positions = np.arange(n)
+        converged = df['divergence_gap'].to_numpy(dtype=float) < 10
+        converged_idx = np.flatnonzero(converged)
+        next_pos = np.searchsorted(converged_idx, positions + 1)
+        next_conv = np.append(converged_idx, n)[next_pos]
+        days_to_conv = np.where(next_conv < np.minimum(positions + 60, n),
+                                next_conv - positions, np.nan)
+        df['time_to_convergence_days'] = np.where(converged, 0, days_to_conv)
 
         return df.dropna()
 
@@ -350,30 +349,21 @@ class PositionManager:
         if analysis_df.empty:
             return {}
 
-        # Analyze convergence events (when gap closes from large to small)
-        convergence_events = []
-
-        for i in range(len(analysis_df) - 1):
-            current_gap = analysis_df['divergence_gap'].iloc[i]
-            next_gap = analysis_df['divergence_gap'].iloc[i + 1]
-
-            # Detect convergence: gap was large (>25%), now smaller (<15%)
-            if current_gap > 25 and next_gap < 15:
-                future_return_7d = analysis_df['return_7d'].iloc[i + 1]
-                future_return_14d = analysis_df['return_14d'].iloc[i + 1]
-
-                convergence_events.append({
-                    'convergence_gap': next_gap,
-                    'return_7d': future_return_7d,
-                    'return_14d': future_return_14d,
-                    'daily_pct': analysis_df['daily_pct'].iloc[i + 1],
-                    'hourly_4h_pct': analysis_df['4h_pct'].iloc[i + 1]
-                })
+        # Analyze convergence events (when gap closes from large to small):
+        # gap was large (>25%) on one bar and smaller (<15%) on the next
+        gaps = analysis_df['divergence_gap'].to_numpy(dtype=float)
+        next_rows = np.flatnonzero((gaps[:-1] > 25) & (gaps[1:] < 15)) + 1
 
-        if not convergence_events:
+        if len(next_rows) == 0:
             return {}
 
-        conv_df = pd.DataFrame(convergence_events)
+        conv_df = pd.DataFrame({
+            'convergence_gap': gaps[next_rows],
+            'return_7d': analysis_df['return_7d'].to_numpy()[next_rows],
+            'return_14d': analysis_df['return_14d'].to_numpy()[next_rows],
+            'daily_pct': analysis_df['daily_pct'].to_numpy()[next_rows],
+            'hourly_4h_pct': analysis_df['4h_pct'].to_numpy()[next_rows]
+        })
 
         # Analyze different convergence scenarios
         rules = {}
@@ -4,7 +4,9 @@ Precompute MACD-V Reference Distributions
 
 This script calculates and stores historical MACD-V distribution statistics
 for each ticker individually. The results are saved to a JSON file that can
-be loaded quickly without recalculation on each page refresh.
+be loaded quickly without recalculation on each page refresh, and to one file
+per ticker under docs/macdv_reference/ together with the state needed to
+extend it: later runs only download and merge the bars since the last run.
 
 For each ticker, we store:
 - Overall distribution statistics (min, max, mean, median, std, percentiles)
@@ -19,16 +21,18 @@ This allows the frontend to show:
 
 import pandas as pd
 import numpy as np
-import yfinance as yf
 from datetime import datetime
-from typing import Dict, List
+from typing import Dict, List, Optional
 import json
 from pathlib import Path
+from urllib.parse import quote
 
 try:
     from macdv_percentile_calculator import MACDVPercentileCalculator
+    from yf_batch import download_frames
 except ModuleNotFoundError:
     from backend.macdv_percentile_calculator import MACDVPercentileCalculator  # type: ignore
+    from backend.yf_batch import download_frames  # type: ignore
 
 
 # All tickers from your live table
@@ -44,6 +48,280 @@ ALL_TICKERS = [
 ]
 
 
+# Per-ticker reference files (incremental state + reference) and their index
+REFERENCE_DIR = Path(__file__).parent.parent / "docs" / "macdv_reference"
+REFERENCE_INDEX_FILE = "index.json"
+STATE_VERSION = 2
+
+# Bars re-downloaded before the last processed bar, so an adjusted-close
+# rescale (dividends/splits) can be detected on the overlap.
+_OVERLAP_DAYS = 10
+_OVERALL_PERCENTILES = [1, 5, 10, 25, 50, 75, 90, 95, 99]
+_ZONE_PERCENTILES = [10, 25, 50, 75, 90]
+
+
+def reference_filename(ticker: str) -> str:
+    """File name for a ticker's reference (symbols like ^VIX / NQ=F are quoted)."""
+    return quote(ticker, safe="") + ".json"
+
+
+def _normalize_columns(df: pd.DataFrame) -> pd.DataFrame:
+    if isinstance(df.columns, pd.MultiIndex):
+        df.columns = [col[0].lower() if isinstance(col, tuple) else str(col).lower()
+                     for col in df.columns]
+    else:
+        df.columns = [str(c).lower() for c in df.columns]
+    return df
+
+
+def _download_daily_bulk(
+    tickers: List[str],
+    period: Optional[str] = None,
+    start: Optional[str] = None
+) -> Dict[str, pd.DataFrame]:
+    """Download daily OHLC for many tickers via yf_batch (empty frame when missing)."""
+    if not tickers:
+        return {}
+    frames = download_frames(tickers, period=period, start=start)
+    for ticker, frame in frames.items():
+        if frame.empty:
+            continue
+        frame = _normalize_columns(frame)
+        if {"high", "low", "close"}.issubset(frame.columns):
+            frames[ticker] = frame.dropna(subset=["close"])
+        else:
+            frames[ticker] = pd.DataFrame()
+    return frames
+
+
+def _new_calculator(percentile_lookback: int) -> MACDVPercentileCalculator:
+    return MACDVPercentileCalculator(
+        fast_length=12,
+        slow_length=26,
+        signal_length=9,
+        atr_length=26,
+        percentile_lookback=percentile_lookback
+    )
+
+
+def _add_to_histograms(months: Dict, dates: pd.DatetimeIndex, values: np.ndarray) -> None:
+    """
+    Add MACD-V values to per-month histograms keyed by value in hundredths.
+
+    MACD-V is rounded to 2 decimals, so the histograms are exact and mergeable:
+    any window of months sums back to the full distribution.
+    """
+    for date, value in zip(dates, values):
+        month = months.setdefault(date.strftime("%Y-%m"), {
+            "first_date": date.strftime("%Y-%m-%d"),
+            "histogram": {}
+        })
+        if not np.isfinite(value):
+            continue
+        key = str(int(round(value * 100)))
+        month["histogram"][key] = month["histogram"].get(key, 0) + 1
+
+
+def _expire_months(months: Dict, last_bar: str, period: str) -> None:
+    """Drop month histograms that end before the period window (month granularity)."""
+    cutoff = (pd.Timestamp(last_bar) - _period_offset(period)).strftime("%Y-%m")
+    for key in [k for k in months if k < cutoff]:
+        del months[key]
+
+
+def _period_offset(period: str) -> pd.DateOffset:
+    for suffix, unit in (("mo", "months"), ("y", "years"), ("d", "days")):
+        if period.endswith(suffix) and period[:-len(suffix)].isdigit():
+            return pd.DateOffset(**{unit: int(period[:-len(suffix)])})
+    raise ValueError(f"Unsupported period: {period}")
+
+
+def build_ticker_state(
+    df: pd.DataFrame,
+    period: str = "5y",
+    percentile_lookback: int = 252
+) -> Optional[Dict]:
+    """
+    Build the incremental reference state for a ticker from its full daily history.
+
+    The state carries everything needed to extend MACD-V bar by bar (EMA
+    levels, the ATR window of true ranges, the last close) plus the trailing
+    MACD-V values for the categorical percentile and per-month histograms
+    for the distribution statistics.
+    """
+    calculator = _new_calculator(percentile_lookback)
+    df = calculator.calculate_macdv(df)
+    values = df["macdv_val"].to_numpy(dtype=float)
+    if np.isfinite(values).sum() < 50:
+        return None
+
+    close = df["close"]
+    true_range = pd.concat([
+        df["high"] - df["low"],
+        (df["high"] - close.shift(1)).abs(),
+        (df["low"] - close.shift(1)).abs()
+    ], axis=1).max(axis=1)
+
+    months: Dict = {}
+    _add_to_histograms(months, df.index, values)
+    state = {
+        "version": STATE_VERSION,
+        "period": period,
+        "percentile_lookback": percentile_lookback,
+        "params": calculator.get_params(),
+        "last_bar": df.index[-1].strftime("%Y-%m-%d"),
+        "last_close": float(close.iloc[-1]),
+        "fast_ema": float(close.ewm(span=calculator.fast_length, adjust=False).mean().iloc[-1]),
+        "slow_ema": float(close.ewm(span=calculator.slow_length, adjust=False).mean().iloc[-1]),
+        "true_ranges": true_range.iloc[-calculator.atr_length:].tolist(),
+        "macdv_tail": [None if not np.isfinite(v) else float(v) for v in values[-(percentile_lookback + 1):]],
+        "months": months
+    }
+    _expire_months(months, state["last_bar"], period)
+    return state
+
+
+def update_ticker_state(state: Dict, df: pd.DataFrame) -> Optional[Dict]:
+    """
+    Append bars after ``state['last_bar']`` to a reference state, in place.
+
+    ``df`` must include the last processed bar; if its adjusted close moved
+    (dividend or split adjustment) the price-denominated state is rescaled,
+    which is exact because MACD-V is invariant to a constant price factor.
+    Returns None when the history does not overlap, so the caller can rebuild.
+    """
+    dates = df.index.strftime("%Y-%m-%d")
+    overlap = np.flatnonzero(dates == state["last_bar"])
+    if len(overlap) == 0:
+        return None
+
+    scale = float(df["close"].iloc[overlap[0]]) / state["last_close"]
+    if not np.isfinite(scale) or scale <= 0:
+        return None
+    if abs(scale - 1.0) > 1e-9:
+        state["fast_ema"] *= scale
+        state["slow_ema"] *= scale
+        state["true_ranges"] = [tr * scale for tr in state["true_ranges"]]
+        state["last_close"] *= scale
+
+    new_bars = df.iloc[overlap[0] + 1:]
+    if new_bars.empty:
+        return state
+
+    params = state["params"]
+    fast_alpha = 2.0 / (params["fast_length"] + 1)
+    slow_alpha = 2.0 / (params["slow_length"] + 1)
+    lookback = state["percentile_lookback"]
+    new_values = []
+    for high, low, close in new_bars[["high", "low", "close"]].itertuples(index=False):
+        prev_close = state["last_close"]
+        true_range = max(high - low, abs(high - prev_close), abs(low - prev_close))
+        state["true_ranges"] = (state["true_ranges"] + [true_range])[-params["atr_length"]:]
+        state["fast_ema"] = (1 - fast_alpha) * state["fast_ema"] + fast_alpha * close
+        state["slow_ema"] = (1 - slow_alpha) * state["slow_ema"] + slow_alpha * close
+        state["last_close"] = float(close)
+
+        atr = float(np.mean(state["true_ranges"]))
+        value = float(np.round((state["fast_ema"] - state["slow_ema"]) / atr * 100, 2)) if atr > 0 else np.nan
+        new_values.append(value)
+        state["macdv_tail"] = (state["macdv_tail"] + [None if not np.isfinite(value) else value])[-(lookback + 1):]
+
+    _add_to_histograms(state["months"], new_bars.index, np.asarray(new_values))
+    state["last_bar"] = new_bars.index[-1].strftime("%Y-%m-%d")
+    _expire_months(state["months"], state["last_bar"], state["period"])
+    return state
+
+
+def reference_from_state(ticker: str, state: Dict) -> Optional[Dict]:
+    """Derive the reference statistics for a ticker from its merged histograms."""
+    merged: Dict[int, int] = {}
+    for month in state["months"].values():
+        for key, count in month["histogram"].items():
+            merged[int(key)] = merged.get(int(key), 0) + count
+    if not merged:
+        return None
+
+    keys = np.array(sorted(merged))
+    macdv_series = pd.Series(np.repeat(keys / 100.0, [merged[k] for k in keys]))
+
+    # Overall distribution statistics
+    overall_stats = {
+        "count": int(len(macdv_series)),
+        "min": float(macdv_series.min()),
+        "max": float(macdv_series.max()),
+        "mean": float(macdv_series.mean()),
+        "median": float(macdv_series.median()),
+        "std": float(macdv_series.std()),
+        "percentiles": {
+            int(p): float(np.percentile(macdv_series, p))
+            for p in _OVERALL_PERCENTILES
+        }
+    }
+
+    # Calculate zone statistics
+    zone_stats = {}
+    for zone_name, zone_min, zone_max in MACDVPercentileCalculator.ZONES:
+        zone_data = macdv_series[(macdv_series >= zone_min) & (macdv_series < zone_max)]
+
+        if len(zone_data) == 0:
+            zone_stats[zone_name] = {
+                "count": 0,
+                "pct_of_time": 0.0,
+                "min": None,
+                "max": None,
+                "mean": None,
+                "median": None
+            }
+            continue
+
+        zone_stats[zone_name] = {
+            "count": int(len(zone_data)),
+            "pct_of_time": float(len(zone_data) / len(macdv_series) * 100),
+            "min": float(zone_data.min()),
+            "max": float(zone_data.max()),
+            "mean": float(zone_data.mean()),
+            "median": float(zone_data.median()),
+            "percentiles": {
+                int(p): float(np.percentile(zone_data, p))
+                for p in _ZONE_PERCENTILES
+            }
+        }
+
+    # Key ranges
+    ranges_pct = {
+        "within_150": float(((macdv_series >= -150) & (macdv_series <= 150)).sum() / len(macdv_series) * 100),
+        "within_100": float(((macdv_series >= -100) & (macdv_series <= 100)).sum() / len(macdv_series) * 100),
+        "within_50": float(((macdv_series >= -50) & (macdv_series <= 50)).sum() / len(macdv_series) * 100),
+    }
+
+    # Current state (latest value): categorical percentile of the last bar over the tail
+    calculator = _new_calculator(state["percentile_lookback"])
+    tail = pd.Series([np.nan if v is None else v for v in state["macdv_tail"]], dtype=float)
+    latest_val = tail.iloc[-1]
+    latest_pct = calculator.calculate_percentile_ranks(tail, method="categorical").iloc[-1]
+    current_state = {
+        "macdv_val": float(latest_val) if pd.notna(latest_val) else None,
+        "zone": str(calculator._classify_zone(tail.iloc[-1:]).iloc[0]),
+        "categorical_percentile": float(latest_pct) if pd.notna(latest_pct) else None,
+        "last_date": state["last_bar"]
+    }
+
+    return {
+        "ticker": ticker,
+        "period": state["period"],
+        "data_points": len(macdv_series),
+        "date_range": {
+            "start": min(month["first_date"] for month in state["months"].values()),
+            "end": state["last_bar"]
+        },
+        "overall_distribution": overall_stats,
+        "zone_distribution": zone_stats,
+        "key_ranges_pct": ranges_pct,
+        "current_state": current_state,
+        "calculation_timestamp": datetime.now().isoformat()
+    }
+
+
 def calculate_ticker_reference(
     ticker: str,
     period: str = "5y",
@@ -58,119 +336,19 @@ def calculate_ticker_reference(
     - Percentile reference points
     """
     try:
-        # Fetch data
         print(f"Processing {ticker}...", end=" ", flush=True)
-        df = yf.download(
-            ticker,
-            period=period,
-            interval="1d",
-            progress=False,
-            auto_adjust=True
-        )
-
+        df = _download_daily_bulk([ticker], period=period)[ticker]
         if df.empty or len(df) < 100:
             print(f"❌ Insufficient data")
             return None
 
-        # Fix column names
-        if isinstance(df.columns, pd.MultiIndex):
-            df.columns = [col[0].lower() if isinstance(col, tuple) else str(col).lower()
-                         for col in df.columns]
-        else:
-            df.columns = [str(c).lower() for c in df.columns]
-
-        # Calculate MACD-V with categorical percentiles
-        calculator = MACDVPercentileCalculator(
-            fast_length=12,
-            slow_length=26,
-            signal_length=9,
-            atr_length=26,
-            percentile_lookback=percentile_lookback
-        )
-        df_result = calculator.calculate_macdv_with_percentiles(df, method="categorical")
-
-        # Remove NaN values
-        macdv_series = df_result['macdv_val'].dropna()
-
-        if len(macdv_series) < 50:
+        state = build_ticker_state(df, period, percentile_lookback)
+        if state is None:
             print(f"❌ Insufficient valid data")
             return None
 
-        # Overall distribution statistics
-        overall_stats = {
-            "count": int(len(macdv_series)),
-            "min": float(macdv_series.min()),
-            "max": float(macdv_series.max()),
-            "mean": float(macdv_series.mean()),
-            "median": float(macdv_series.median()),
-            "std": float(macdv_series.std()),
-            "percentiles": {
-                int(p): float(np.percentile(macdv_series, p))
-                for p in [1, 5, 10, 25, 50, 75, 90, 95, 99]
-            }
-        }
-
-        # Calculate zone statistics
-        zone_stats = {}
-        for zone_name, zone_min, zone_max in calculator.ZONES:
-            zone_data = macdv_series[(macdv_series >= zone_min) & (macdv_series < zone_max)]
-
-            if len(zone_data) == 0:
-                zone_stats[zone_name] = {
-                    "count": 0,
-                    "pct_of_time": 0.0,
-                    "min": None,
-                    "max": None,
-                    "mean": None,
-                    "median": None
-                }
-                continue
-
-            zone_stats[zone_name] = {
-                "count": int(len(zone_data)),
-                "pct_of_time": float(len(zone_data) / len(macdv_series) * 100),
-                "min": float(zone_data.min()),
-                "max": float(zone_data.max()),
-                "mean": float(zone_data.mean()),
-                "median": float(zone_data.median()),
-                "percentiles": {
-                    int(p): float(np.percentile(zone_data, p))
-                    for p in [10, 25, 50, 75, 90]
-                }
-            }
-
-        # Key ranges
-        ranges_pct = {
-            "within_150": float(((macdv_series >= -150) & (macdv_series <= 150)).sum() / len(macdv_series) * 100),
-            "within_100": float(((macdv_series >= -100) & (macdv_series <= 100)).sum() / len(macdv_series) * 100),
-            "within_50": float(((macdv_series >= -50) & (macdv_series <= 50)).sum() / len(macdv_series) * 100),
-        }
-
-        # Current state (latest value)
-        latest = df_result.iloc[-1]
-        current_state = {
-            "macdv_val": float(latest['macdv_val']) if pd.notna(latest['macdv_val']) else None,
-            "zone": str(latest['macdv_zone']),
-            "categorical_percentile": float(latest['macdv_percentile']) if pd.notna(latest['macdv_percentile']) else None,
-            "last_date": df.index[-1].strftime('%Y-%m-%d')
-        }
-
-        result = {
-            "ticker": ticker,
-            "period": period,
-            "data_points": len(macdv_series),
-            "date_range": {
-                "start": df.index[0].strftime('%Y-%m-%d'),
-                "end": df.index[-1].strftime('%Y-%m-%d')
-            },
-            "overall_distribution": overall_stats,
-            "zone_distribution": zone_stats,
-            "key_ranges_pct": ranges_pct,
-            "current_state": current_state,
-            "calculation_timestamp": datetime.now().isoformat()
-        }
-
-        print(f"✓ ({len(macdv_series)} points)")
+        result = reference_from_state(ticker, state)
+        print(f"✓ ({result['data_points']} points)")
         return result
 
     except Exception as e:
@@ -178,14 +356,37 @@ def calculate_ticker_reference(
         return None
 
 
+def _load_ticker_file(path: Path) -> Optional[Dict]:
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_json_atomic(path: Path, payload: Dict) -> None:
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    with open(tmp, "w") as f:
+        json.dump(payload, f)
+    tmp.replace(path)
+
+
 def generate_reference_database(
     tickers: List[str] = None,
     period: str = "5y",
-    percentile_lookback: int = 252
+    percentile_lookback: int = 252,
+    reference_dir: Optional[Path] = REFERENCE_DIR,
+    incremental: bool = True
 ) -> Dict:
     """
     Generate complete reference database for all tickers.
 
+    With ``reference_dir`` set, each ticker's reference and incremental state
+    are stored in their own file plus an index. On later runs a ticker whose
+    state matches ``period``/``percentile_lookback`` only downloads the bars
+    since its last processed bar and merges them into its histograms; other
+    tickers (new, mismatched, or non-overlapping history) are rebuilt in full.
+
     Returns dictionary with:
     - metadata (generation time, parameters)
     - ticker_data (reference stats for each ticker)
@@ -204,12 +405,60 @@ def generate_reference_database(
     print("="*80)
     print()
 
+    states: Dict[str, Dict] = {}
+    if reference_dir is not None and incremental:
+        for ticker in tickers:
+            stored = _load_ticker_file(Path(reference_dir) / reference_filename(ticker))
+            state = (stored or {}).get("state")
+            if (
+                isinstance(state, dict)
+                and state.get("version") == STATE_VERSION
+                and state.get("period") == period
+                and state.get("percentile_lookback") == percentile_lookback
+            ):
+                states[ticker] = state
+
+    # One bulk download for every incremental ticker, starting just before the oldest last bar
+    rebuild = [t for t in tickers if t not in states]
+    if states:
+        oldest = min(pd.Timestamp(state["last_bar"]) for state in states.values())
+        start = (oldest - pd.Timedelta(days=_OVERLAP_DAYS)).strftime("%Y-%m-%d")
+        recent = _download_daily_bulk(list(states), start=start)
+        for ticker, state in list(states.items()):
+            updated = None
+            if not recent[ticker].empty:
+                updated = update_ticker_state(state, recent[ticker])
+            if updated is None:
+                del states[ticker]
+                rebuild.append(ticker)
+            else:
+                print(f"Updated {ticker} through {updated['last_bar']}")
+
+    if rebuild:
+        history = _download_daily_bulk(rebuild, period=period)
+        for ticker in rebuild:
+            df = history[ticker]
+            if df.empty or len(df) < 100:
+                print(f"{ticker}: ❌ Insufficient data")
+                continue
+            state = build_ticker_state(df, period, percentile_lookback)
+            if state is None:
+                print(f"{ticker}: ❌ Insufficient valid data")
+                continue
+            states[ticker] = state
+            print(f"Rebuilt {ticker} ({len(df)} bars)")
+
     ticker_data = {}
     successful = 0
     failed = 0
 
     for ticker in tickers:
-        result = calculate_ticker_reference(ticker, period, percentile_lookback)
+        result = None
+        if ticker in states:
+            try:
+                result = reference_from_state(ticker, states[ticker])
+            except Exception as e:
+                print(f"{ticker}: ❌ Error: {str(e)}")
         if result is not None:
             ticker_data[ticker] = result
             successful += 1
@@ -223,8 +472,8 @@ def generate_reference_database(
     aggregate_stats = {
         "total_tickers": len(ticker_data),
         "total_data_points": sum(data['data_points'] for data in ticker_data.values()),
-        "mean_of_means": float(np.mean(all_means)),
-        "mean_of_stds": float(np.mean(all_stds)),
+        "mean_of_means": float(np.mean(all_means)) if all_means else None,
+        "mean_of_stds": float(np.mean(all_stds)) if all_stds else None,
         "bullish_skew_count": sum(1 for mean in all_means if mean > 0),
         "bearish_skew_count": sum(1 for mean in all_means if mean < 0),
     }
@@ -237,12 +486,26 @@ def generate_reference_database(
             "total_tickers_attempted": len(tickers),
             "successful": successful,
             "failed": failed,
-            "version": "1.0"
+            "version": "2.0"
         },
         "aggregate_stats": aggregate_stats,
         "ticker_data": ticker_data
     }
 
+    if reference_dir is not None:
+        reference_dir = Path(reference_dir)
+        reference_dir.mkdir(parents=True, exist_ok=True)
+        index_tickers = {}
+        for ticker, result in ticker_data.items():
+            filename = reference_filename(ticker)
+            _write_json_atomic(reference_dir / filename, {"reference": result, "state": states[ticker]})
+            index_tickers[ticker] = {"file": filename, "last_bar": states[ticker]["last_bar"]}
+        _write_json_atomic(reference_dir / REFERENCE_INDEX_FILE, {
+            "metadata": database["metadata"],
+            "aggregate_stats": aggregate_stats,
+            "tickers": index_tickers
+        })
+
     print()
     print("="*80)
     print(f"✓ Successfully processed: {successful}/{len(tickers)} tickers")
@@ -330,11 +593,13 @@ if __name__ == "__main__":
 
     # Parse command line arguments
     tickers = None
-    if len(sys.argv) > 1 and sys.argv[1] != "all":
-        tickers = sys.argv[1].split(',')
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    if args and args[0] != "all":
+        tickers = args[0].split(',')
 
-    # Generate reference database
-    database = generate_reference_database(tickers=tickers, period="5y")
+    # Generate reference database (incremental per-ticker files under docs/macdv_reference)
+    full_rebuild = "--full" in sys.argv
+    database = generate_reference_database(tickers=tickers, period="5y", incremental=not full_rebuild)
 
     # Save to JSON
     output_dir = Path(__file__).parent.parent / "docs"
@@ -0,0 +1,400 @@
+"""
+Swing Framework Cohort Builder - Columnar Historical Trades
+
+Builds the REAL historical trade tables behind /api/swing-framework/all-tickers
+and get_cached_cohort_stats without the per-ticker backtester loop:
+
+- One bulk OHLCV frame per ticker (fetched by the caller in a single download)
+- RSI-MA percentile ranks via a sliding-window count (same formula as
+  EnhancedPerformanceMatrixBacktester.calculate_percentile_ranks)
+- Exit points for every entry at once from an (entries x 21 days) matrix
+  (same rules as swing_framework_api.find_exit_point)
+- Per-ticker work fanned out over a process pool
+- Per-ticker state persisted to disk so daily refreshes only process the
+  newly appended bars
+"""
+
+import os
+import logging
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from enhanced_backtester import EnhancedPerformanceMatrixBacktester
+
+_logger = logging.getLogger("swing_framework")
+
+COHORT_LOOKBACK_PERIOD = 500
+COHORT_MAX_HOLD_DAYS = 21
+COHORT_EXIT_PERCENTILE = 50.0
+COHORT_STOP_LOSS_PCT = 2.0
+
+# Upper (inclusive) bounds of each RSI-MA percentile cohort
+COHORT_EDGES = np.array([5.0, 15.0, 30.0, 50.0, 70.0, 85.0])
+COHORT_NAMES = np.array([
+    "extreme_low", "low", "medium_low", "medium", "medium_high", "high", "extreme_high"
+])
+
+_STORE_DIR = Path(__file__).resolve().parent / "cache" / "cohort_events"
+
+TRADE_COLUMNS = [
+    "entry_date", "exit_date", "entry_price", "exit_price", "entry_percentile",
+    "exit_percentile", "holding_days", "return_pct", "regime", "exit_reason",
+    "percentile_cohort",
+]
+
+
+@dataclass
+class TickerCohortState:
+    """Everything needed to extend one ticker's trade table with new bars."""
+    ticker: str
+    data: pd.DataFrame
+    percentiles: np.ndarray
+    trades: pd.DataFrame
+    indicator: Optional[np.ndarray] = None
+
+
+def _indicator(data: pd.DataFrame) -> pd.Series:
+    backtester = EnhancedPerformanceMatrixBacktester(
+        tickers=[],
+        lookback_period=COHORT_LOOKBACK_PERIOD,
+        rsi_length=14,
+        ma_length=14,
+        max_horizon=COHORT_MAX_HOLD_DAYS
+    )
+    return backtester.calculate_rsi_ma_indicator(data)
+
+
+def rolling_percentile_ranks(values: np.ndarray, lookback: int, start: int = 0) -> np.ndarray:
+    """
+    Percentile of each value within its trailing `lookback` window.
+
+    Matches EnhancedPerformanceMatrixBacktester.calculate_percentile_ranks:
+    share of the previous lookback-1 values strictly below the current one.
+    Only positions >= start are computed; earlier positions are NaN.
+    """
+    n = len(values)
+    out = np.full(n, np.nan)
+    first = max(start, lookback - 1)
+    if n <= first:
+        return out
+
+    windows = sliding_window_view(values[first - lookback + 1:], lookback)
+    current = windows[:, -1:]
+    below = (windows[:, :-1] < current).sum(axis=1)
+    ranks = below / (lookback - 1) * 100
+    ranks[np.isnan(windows).any(axis=1)] = np.nan
+    out[first:] = ranks
+    return out
+
+
+def compute_trades(data: pd.DataFrame,
+                   percentiles: np.ndarray,
+                   is_mean_reverter: bool,
+                   start: int = 0) -> pd.DataFrame:
+    """
+    Build the trade table for entries at positions >= start.
+
+    Every bar with a percentile and a full D1-D21 window is an entry
+    (threshold=100); exits follow find_exit_point: 2% stop, then
+    percentile >= 50 target, else max_days.
+    """
+    close = data["Close"].to_numpy(dtype=float)
+    n = len(close)
+    hold = COHORT_MAX_HOLD_DAYS
+
+    positions = np.arange(max(start, 0), max(n - hold, 0))
+    positions = positions[~np.isnan(percentiles[positions])]
+    if len(positions) == 0:
+        return pd.DataFrame(columns=TRADE_COLUMNS)
+
+    forward = positions[:, None] + np.arange(1, hold + 1)
+    entry_price = close[positions]
+    fwd_return = (close[forward] - entry_price[:, None]) / entry_price[:, None] * 100
+    stop_hit = fwd_return <= -COHORT_STOP_LOSS_PCT
+    target_hit = percentiles[forward] >= COHORT_EXIT_PERCENTILE
+
+    triggered = stop_hit | target_hit
+    any_trigger = triggered.any(axis=1)
+    first_day = np.where(any_trigger, triggered.argmax(axis=1), hold - 1)
+    rows = np.arange(len(positions))
+    exit_reason = np.where(
+        ~any_trigger, "max_days",
+        np.where(stop_hit[rows, first_day], "stop_loss", "target")
+    )
+    exit_idx = positions + first_day + 1
+
+    entry_dates = data.index[positions]
+    exit_dates = data.index[exit_idx]
+    entry_pct = percentiles[positions]
+    exit_price = close[exit_idx]
+
+    return pd.DataFrame({
+        "entry_date": entry_dates.strftime("%Y-%m-%d"),
+        "exit_date": exit_dates.strftime("%Y-%m-%d"),
+        "entry_price": entry_price,
+        "exit_price": exit_price,
+        "entry_percentile": entry_pct,
+        "exit_percentile": percentiles[exit_idx],
+        "holding_days": (exit_dates - entry_dates).days.astype(int),
+        "return_pct": (exit_price - entry_price) / entry_price * 100,
+        "regime": "mean_reversion" if is_mean_reverter else "momentum",
+        "exit_reason": exit_reason,
+        "percentile_cohort": COHORT_NAMES[np.searchsorted(COHORT_EDGES, entry_pct, side="left")],
+    })
+
+
+def build_ticker_state(ticker: str, data: pd.DataFrame, is_mean_reverter: bool) -> TickerCohortState:
+    """Cold build of one ticker's percentiles and trade table."""
+    indicator = _indicator(data).to_numpy(dtype=float)
+    percentiles = rolling_percentile_ranks(indicator, COHORT_LOOKBACK_PERIOD)
+    trades = compute_trades(data, percentiles, is_mean_reverter)
+    return TickerCohortState(ticker=ticker, data=data, percentiles=percentiles, trades=trades,
+                             indicator=indicator)
+
+
+def _same(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    return (a == b) | (np.isnan(a) & np.isnan(b))
+
+
+def update_ticker_state(state: Optional[TickerCohortState],
+                        ticker: str,
+                        data: pd.DataFrame,
+                        is_mean_reverter: bool) -> TickerCohortState:
+    """
+    Extend a stored state with the bars appended since it was built.
+
+    The result equals build_ticker_state(ticker, data). The RSI-MA is
+    recomputed over ``data`` (its EWMs depend on where the history starts),
+    but percentile ranks are only recomputed for new bars and for bars whose
+    lookback window holds an indicator value that moved when the window
+    start slid forward. Trades are only recomputed for entries whose D1-D21
+    window touches a new or changed percentile. Falls back to a cold build
+    when there is no state or the overlapping history was revised (e.g. a
+    dividend adjustment).
+    """
+    if state is None or state.data.empty or data.empty or state.indicator is None:
+        return build_ticker_state(ticker, data, is_mean_reverter)
+
+    last_known = state.data.index[-1]
+    offset = int((state.data.index < data.index[0]).sum())
+    known = len(state.data) - offset  # bars of ``data`` already in the state
+    overlap = data.index[data.index <= last_known]
+    if known <= 0 or not overlap.equals(state.data.index[offset:]):
+        return build_ticker_state(ticker, data, is_mean_reverter)
+
+    old_close = state.data["Close"].to_numpy(dtype=float)[offset:]
+    new_close = data["Close"].to_numpy(dtype=float)[:known]
+    if not _same(old_close, new_close).all():
+        return build_ticker_state(ticker, data, is_mean_reverter)
+
+    if len(data) == known and offset == 0:
+        return state
+
+    lookback = COHORT_LOOKBACK_PERIOD
+    hold = COHORT_MAX_HOLD_DAYS
+    indicator = _indicator(data).to_numpy(dtype=float)
+
+    # Stored ranks stay valid once their lookback window is past the last
+    # indicator value that differs from the stored series
+    moved = np.flatnonzero(~_same(indicator[:known], state.indicator[offset:]))
+    stale_until = min(moved[-1] + lookback, known) if len(moved) else 0
+    percentiles = np.concatenate([state.percentiles[offset:], np.full(len(data) - known, np.nan)])
+    percentiles[:lookback - 1] = np.nan
+    if stale_until:
+        percentiles[:stale_until] = rolling_percentile_ranks(indicator[:stale_until], lookback)
+    percentiles[known:] = rolling_percentile_ranks(indicator, lookback, start=known)[known:]
+
+    # Entries before known - hold already had their full window; earlier
+    # entries are redone only if a percentile they read has changed
+    first_entry = known - hold
+    changed = np.flatnonzero(~_same(percentiles[lookback - 1:known],
+                                    state.percentiles[offset + lookback - 1:]))
+    if len(changed):
+        first_entry = min(first_entry, lookback - 1 + int(changed[0]) - hold)
+    first_entry = max(first_entry, 0)
+
+    new_trades = compute_trades(data, percentiles, is_mean_reverter, start=first_entry)
+    if len(data) >= lookback and not state.trades.empty:
+        # Trades a cold build would not have (entries without enough lookback)
+        # or that are being redone are dropped
+        entry_dates = state.trades["entry_date"]
+        kept = state.trades[
+            (entry_dates >= data.index[lookback - 1].strftime("%Y-%m-%d"))
+            & (entry_dates < data.index[first_entry].strftime("%Y-%m-%d"))
+        ]
+        trades = pd.concat([kept, new_trades], ignore_index=True) if not kept.empty else new_trades
+    else:
+        trades = new_trades.reset_index(drop=True)
+
+    return TickerCohortState(ticker=ticker, data=data, percentiles=percentiles, trades=trades,
+                             indicator=indicator)
+
+
+def trades_from_table(trades: pd.DataFrame) -> List[Dict]:
+    """Row-oriented trade dicts in the /all-tickers response shape."""
+    if trades.empty:
+        return []
+    records = trades[TRADE_COLUMNS].to_dict("records")
+    for record in records:
+        record["entry_price"] = float(record["entry_price"])
+        record["exit_price"] = float(record["exit_price"])
+        record["entry_percentile"] = float(record["entry_percentile"])
+        record["exit_percentile"] = float(record["exit_percentile"])
+        record["holding_days"] = int(record["holding_days"])
+        record["return_pct"] = float(record["return_pct"])
+    return records
+
+
+def aggregate_backtest_stats(trades: pd.DataFrame) -> Dict:
+    """
+    Same output as swing_framework_api.calculate_backtest_stats, computed
+    with grouped reductions over the trade table.
+    """
+    if trades.empty:
+        return {
+            "total_trades": 0,
+            "win_rate": 0.0,
+            "avg_return": 0.0,
+            "avg_holding_days": 0.0,
+            "total_return": 0.0
+        }
+
+    returns = trades["return_pct"].to_numpy(dtype=float)
+    wins = returns[returns > 0]
+    losses = returns[returns < 0]
+    count = len(returns)
+
+    def cohort_stats(group: Optional[pd.DataFrame]) -> Optional[Dict[str, float]]:
+        if group is None or group.empty:
+            return None
+        group_returns = group["return_pct"].to_numpy(dtype=float)
+        return {
+            "count": int(len(group)),
+            "win_rate": float((group_returns > 0).sum() / len(group)),
+            "avg_return": float(group_returns.mean()),
+            "avg_holding_days": float(group["holding_days"].mean())
+        }
+
+    groups = dict(tuple(trades.groupby("percentile_cohort", sort=False)))
+    stats = {
+        "total_trades": int(count),
+        "win_rate": float(len(wins) / count),
+        "avg_return": float(returns.mean()),
+        "avg_win": float(wins.mean()) if len(wins) else 0.0,
+        "avg_loss": float(losses.mean()) if len(losses) else 0.0,
+        "avg_holding_days": float(trades["holding_days"].mean()),
+        "total_return": float(returns.sum()),
+        "max_return": float(returns.max()),
+        "min_return": float(returns.min()),
+    }
+    for name in COHORT_NAMES:
+        stats[f"cohort_{name}"] = cohort_stats(groups.get(name))
+    stats["cohort_all"] = cohort_stats(trades)
+    return stats
+
+
+# ---------------------------------------------------------------------------
+# Disk store + parallel build
+# ---------------------------------------------------------------------------
+
+def _state_path(ticker: str) -> Path:
+    return _STORE_DIR / f"{ticker}.pkl"
+
+
+def load_ticker_state(ticker: str) -> Optional[TickerCohortState]:
+    path = _state_path(ticker)
+    if not path.exists():
+        return None
+    try:
+        return pd.read_pickle(str(path))
+    except Exception as e:
+        _logger.debug(f"Failed to load cohort state for {ticker}: {e}")
+        return None
+
+
+def save_ticker_state(state: TickerCohortState) -> None:
+    _STORE_DIR.mkdir(parents=True, exist_ok=True)
+    try:
+        pd.to_pickle(state, str(_state_path(state.ticker)))
+    except Exception as e:
+        _logger.debug(f"Failed to save cohort state for {state.ticker}: {e}")
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _process_pool(max_workers: int) -> ProcessPoolExecutor:
+    """The builder's process pool, started on first use and reused across refreshes."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=max_workers)
+        return _pool
+
+
+def _discard_pool() -> None:
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _update_worker(args) -> TickerCohortState:
+    state, ticker, data, is_mean_reverter = args
+    return update_ticker_state(state, ticker, data, is_mean_reverter)
+
+
+def build_cohort_tables(frames: Dict[str, pd.DataFrame],
+                        mean_reverters: Dict[str, bool],
+                        incremental: bool = True,
+                        max_workers: Optional[int] = None) -> Dict[str, pd.DataFrame]:
+    """
+    Build (or incrementally extend) trade tables for many tickers.
+
+    Args:
+        frames: ticker -> daily OHLCV (already fetched in bulk)
+        mean_reverters: ticker -> metadata.is_mean_reverter
+        incremental: reuse stored per-ticker state and only process new bars
+        max_workers: process pool size when the pool is first started
+            (SWING_COHORT_WORKERS env, default CPU count); 1 builds serially
+
+    Returns:
+        ticker -> trade table (TRADE_COLUMNS); tickers without data map to an empty table
+    """
+    tables: Dict[str, pd.DataFrame] = {}
+    jobs = []
+    for ticker, data in frames.items():
+        if data is None or data.empty:
+            tables[ticker] = pd.DataFrame(columns=TRADE_COLUMNS)
+            continue
+        state = load_ticker_state(ticker) if incremental else None
+        jobs.append((state, ticker, data, bool(mean_reverters.get(ticker, False))))
+
+    if max_workers is None:
+        max_workers = int(os.getenv("SWING_COHORT_WORKERS", "0")) or (os.cpu_count() or 1)
+
+    states: List[TickerCohortState] = []
+    if max_workers > 1 and len(jobs) > 1:
+        try:
+            states = list(_process_pool(max_workers).map(_update_worker, jobs))
+        except Exception as e:
+            _logger.warning(f"Cohort process pool unavailable ({e}); building serially")
+            _discard_pool()
+            states = []
+    if not states:
+        states = [_update_worker(job) for job in jobs]
+
+    for state in states:
+        save_ticker_state(state)
+        tables[state.ticker] = state.trades
+
+    return tables
@@ -13,9 +13,10 @@ import math
 import os
 import tempfile
 from dataclasses import dataclass
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 import numpy as np
 import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
 from scipy.stats import mannwhitneyu
 import yfinance as yf
 from datetime import datetime, timedelta
@@ -242,15 +243,19 @@ def calculate_percentile_ranks(series: pd.Series, window: int = 410) -> pd.Serie
 
     Calculation: 252 trading days × 1.625 candles/day (6.5h ÷ 4h) = 409.5 ≈ 410 bars
     """
-    def percentile_rank(x):
-        if len(x) < 2:
-            return np.nan
-        return (x < x.iloc[-1]).sum() / len(x) * 100
-
     # CRITICAL: min_periods MUST equal window to ensure consistent lookback period
     # Setting min_periods < window would calculate percentiles with insufficient data,
     # breaking the alignment with daily timeframe (252 days = 410 bars for 4H)
-    return series.rolling(window=window, min_periods=window).apply(percentile_rank, raw=False)
+    values = series.to_numpy(dtype=float)
+    ranks = np.full(len(values), np.nan)
+    if window >= 2 and len(values) >= window:
+        # Share of the window (current bar included) strictly below the current value
+        windows = sliding_window_view(values, window)
+        below = (windows < windows[:, -1:]).sum(axis=1)
+        window_ranks = below / window * 100
+        window_ranks[np.isnan(windows).any(axis=1)] = np.nan
+        ranks[window - 1:] = window_ranks
+    return pd.Series(ranks, index=series.index, name=series.name)
 
 
 def _infer_interval_hours(index: pd.Index, default: float = BAR_INTERVAL_HOURS) -> float:
@@ -283,6 +288,81 @@ def _estimate_bars_per_trading_day(index: pd.Index) -> float:
     return float(MIN_BARS_PER_DAY_FALLBACK)
 
 
+@dataclass
+class IntradayEntryProgressions:
+    """
+    Entry events and their forward progressions as (entries × horizon bars) matrices.
+
+    Column j is bar offset j + 1 after the entry. Only the first valid_bars[k]
+    columns of row k are part of its progression (it stops at the first bar
+    without a percentile).
+    """
+    positions: np.ndarray
+    entry_percentile: np.ndarray
+    entry_price: np.ndarray
+    percentile: np.ndarray
+    price: np.ndarray
+    cumulative_return_pct: np.ndarray
+    valid_bars: np.ndarray
+    interval_hours: float
+
+    @property
+    def hours(self) -> np.ndarray:
+        """Hours elapsed at each column (bar_offset * interval_hours)."""
+        return np.arange(1, self.percentile.shape[1] + 1) * self.interval_hours
+
+    @property
+    def valid(self) -> np.ndarray:
+        return np.arange(self.percentile.shape[1]) < self.valid_bars[:, None]
+
+
+def intraday_entry_progressions(
+    percentile_ranks: pd.Series,
+    prices: pd.Series,
+    threshold: float,
+    max_horizon_hours: int = DEFAULT_INTRADAY_HORIZON_HOURS,
+    interval_hours: float = BAR_INTERVAL_HOURS,
+) -> IntradayEntryProgressions:
+    """
+    Every bar with percentile <= threshold and a full horizon of later bars is an
+    entry; progressions are gathered for all entries at once.
+    """
+    interval_hours = float(interval_hours or BAR_INTERVAL_HOURS)
+    max_bars = math.ceil(max_horizon_hours / interval_hours)  # Use trading hours, not 24h calendar
+
+    pct = np.asarray(percentile_ranks, dtype=float).reshape(-1)
+    px = np.asarray(prices, dtype=float).reshape(-1)
+    n = len(pct)
+
+    entry_mask = np.zeros(n, dtype=bool)
+    last_entry = min(n - 1, len(px) - max_bars)  # Don't analyze if we're too close to the end
+    if last_entry > 0:
+        entry_mask[:last_entry] = ~np.isnan(pct[:last_entry]) & (pct[:last_entry] <= float(threshold))
+    positions = np.flatnonzero(entry_mask)
+
+    rows = positions[:, None] + np.arange(1, max_bars + 1)
+    pct_matrix = pct[rows]
+    price_matrix = px[rows]
+    entry_price = px[positions]
+    cumulative = (price_matrix - entry_price[:, None]) / entry_price[:, None] * 100
+
+    # Progression stops at the first bar without a percentile
+    missing = np.isnan(pct_matrix)
+    valid_bars = np.where(missing.any(axis=1), missing.argmax(axis=1), max_bars)
+
+    keep = valid_bars > 0
+    return IntradayEntryProgressions(
+        positions=positions[keep],
+        entry_percentile=pct[positions][keep],
+        entry_price=entry_price[keep],
+        percentile=pct_matrix[keep],
+        price=price_matrix[keep],
+        cumulative_return_pct=cumulative[keep],
+        valid_bars=valid_bars[keep],
+        interval_hours=interval_hours,
+    )
+
+
 def find_intraday_entry_events(
     percentile_ranks: pd.Series,
     prices: pd.Series,
@@ -302,110 +382,63 @@ def find_intraday_entry_events(
     Returns:
         List of entry events with hourly progression
     """
+    prog = intraday_entry_progressions(
+        percentile_ranks, prices, threshold,
+        max_horizon_hours=max_horizon_hours, interval_hours=interval_hours,
+    )
+    hours = prog.hours
     events = []
-
-    # Convert to hourly index (4H bars = 4 hours each)
-    interval_hours = float(interval_hours or BAR_INTERVAL_HOURS)
-    max_bars = math.ceil(max_horizon_hours / interval_hours)  # Use trading hours, not 24h calendar
-
-    for i in range(len(percentile_ranks) - 1):
-        pct_raw = percentile_ranks.iloc[i]
-        if isinstance(pct_raw, (pd.Series, pd.DataFrame, np.ndarray)):
-            if np.size(pct_raw) != 1:
-                continue
-            pct = float(np.array(pct_raw).squeeze())
-        else:
-            pct = pct_raw
-
-        if pd.isna(pct) or float(pct) > float(threshold):
-            continue
-
-        # Don't analyze if we're too close to the end
-        if i + max_bars >= len(prices):
-            continue
-
-        entry_price = prices.iloc[i]
-        entry_time = percentile_ranks.index[i]
-
-        # Track progression in hours
-        progression = {}
-
-        for bar_offset in range(1, max_bars + 1):
-            idx = i + bar_offset
-            if idx >= len(prices):
-                break
-
-            hours_elapsed = bar_offset * interval_hours
-            current_price = prices.iloc[idx]
-            current_pct = percentile_ranks.iloc[idx]
-
-            if pd.isna(current_pct):
-                break
-
-            cumulative_return = (current_price - entry_price) / entry_price * 100
-
-            progression[hours_elapsed] = {
-                'percentile': float(current_pct),
-                'cumulative_return_pct': float(cumulative_return),
-                'price': float(current_price),
+    for k, pos in enumerate(prog.positions):
+        progression = {
+            hours[j]: {
+                'percentile': float(prog.percentile[k, j]),
+                'cumulative_return_pct': float(prog.cumulative_return_pct[k, j]),
+                'price': float(prog.price[k, j]),
             }
+            for j in range(prog.valid_bars[k])
+        }
+        events.append({
+            'entry_datetime': percentile_ranks.index[pos],
+            'entry_price': float(prog.entry_price[k]),
+            'entry_percentile': float(prog.entry_percentile[k]),
+            'progression': progression,
+        })
+    return events
 
-        if progression:
-            events.append({
-                'entry_datetime': entry_time,
-                'entry_price': float(entry_price),
-                'entry_percentile': float(pct),
-                'progression': progression,
-            })
 
-    return events
+def _first_true(mask: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """(has_any, first column index) per row of a boolean matrix."""
+    return mask.any(axis=1), mask.argmax(axis=1)
 
 
-def _calculate_hours_below_threshold(
-    progression: Dict[int, Dict],
+def _hours_below_threshold(
+    prog: IntradayEntryProgressions,
     threshold: float,
-    entry_percentile: float,
-) -> tuple[int, Optional[int]]:
+) -> Tuple[np.ndarray, np.ndarray]:
     """
-    Count consecutive hours where percentile ≤ threshold.
-
-    Returns:
-        (hours_below, escape_hour)
+    Consecutive hours with percentile <= threshold after each entry, and the
+    hour it first rose above (NaN if it never did within the progression).
+    Entries above the threshold get (0, NaN).
     """
-    if entry_percentile > threshold:
-        return 0, None
-
-    hours_below = 0
-    escape_hour = None
-    sorted_hours = sorted(progression.keys())
-    # Infer the bar interval from progression keys (first gap or first key)
-    if len(sorted_hours) >= 2:
-        interval_hours = sorted_hours[0] if sorted_hours[0] > 0 else sorted_hours[1] - sorted_hours[0]
-    elif sorted_hours:
-        interval_hours = sorted_hours[0]
-    else:
-        interval_hours = BAR_INTERVAL_HOURS
-
-    for hour in sorted_hours:
-        pct = progression[hour].get("percentile")
-        if pd.isna(pct):
-            break
+    escaped, first = _first_true((prog.percentile > threshold) & prog.valid)
+    bars_below = np.where(escaped, first, prog.valid_bars)
+    hours_below = bars_below * prog.interval_hours
+    escape_hour = np.where(escaped, (first + 1) * prog.interval_hours, np.nan)
+
+    above_entry = prog.entry_percentile > threshold
+    hours_below[above_entry] = 0
+    escape_hour[above_entry] = np.nan
+    return hours_below, escape_hour
 
-        if pct <= threshold:
-            hours_below += interval_hours
-        else:
-            escape_hour = hour
-            break
 
-    return hours_below, escape_hour
+def _hours_to_first_profit(prog: IntradayEntryProgressions) -> np.ndarray:
+    """First hour where cumulative return > 0 (NaN if never)."""
+    profitable, first = _first_true((prog.cumulative_return_pct > 0) & prog.valid)
+    return np.where(profitable, (first + 1) * prog.interval_hours, np.nan)
 
 
-def _calculate_hours_to_first_profit(progression: Dict[int, Dict]) -> Optional[int]:
-    """Return first hour where cumulative return > 0."""
-    for hour in sorted(progression.keys()):
-        if progression[hour]["cumulative_return_pct"] > 0:
-            return hour
-    return None
+def _optional_hour(value: float) -> Optional[float]:
+    return None if np.isnan(value) else float(value)
 
 
 def analyze_swing_duration_intraday(
@@ -472,7 +505,7 @@ def analyze_swing_duration_intraday(
         prices_series = prices_series.squeeze()
 
     # Find entry events up to the widest threshold so higher thresholds get data
-    entry_events = find_intraday_entry_events(
+    prog = intraday_entry_progressions(
         percentile_ranks,
         prices_series,
         threshold=max_threshold,
@@ -480,53 +513,45 @@ def analyze_swing_duration_intraday(
         interval_hours=interval_hours_inferred,
     )
 
-    # Process events
-    trades: List[IntradayTradeOutcome] = []
-
-    for event in entry_events:
-        progression = event.get("progression", {})
-        if not progression:
-            continue
-
-        # Classify winner/loser based on 7 TRADING-day return (~46 hours, rounded to bar boundary)
-        outcome_hour = intraday_horizon_hours_rounded
-        day7_return = None
-
-        if outcome_hour in progression:
-            day7_return = progression[outcome_hour]["cumulative_return_pct"]
-        elif progression:
-            # Use last available hour
-            last_hour = max(progression.keys())
-            if last_hour >= min_hours_for_partial_outcome:  # At least 5 trading days of bars
-                day7_return = progression[last_hour]["cumulative_return_pct"]
-
-        if day7_return is None:
-            continue
-
-        is_winner = day7_return > 0
-
-        # Calculate hourly metrics
-        entry_pct = float(event.get("entry_percentile", 0))
-
-        hours_5, escape_5 = _calculate_hours_below_threshold(progression, 5.0, entry_pct)
-        hours_10, escape_10 = _calculate_hours_below_threshold(progression, 10.0, entry_pct)
-        hours_15, escape_15 = _calculate_hours_below_threshold(progression, 15.0, entry_pct)
-        hours_to_profit = _calculate_hours_to_first_profit(progression)
+    # Classify winner/loser based on 7 TRADING-day return (~46 hours, rounded to bar boundary);
+    # fall back to the last available hour if at least 5 trading days of bars exist
+    outcome_hour = intraday_horizon_hours_rounded
+    rows = np.arange(len(prog.positions))
+    outcome_cols = np.flatnonzero(prog.hours == outcome_hour)
+    last_col = prog.valid_bars - 1
+    day7_return = np.full(len(rows), np.nan)
+    if outcome_cols.size:
+        reached = prog.valid_bars > outcome_cols[0]
+        day7_return[reached] = prog.cumulative_return_pct[rows[reached], outcome_cols[0]]
+    else:
+        reached = np.zeros(len(rows), dtype=bool)
+    partial = ~reached & (prog.valid_bars * prog.interval_hours >= min_hours_for_partial_outcome)
+    day7_return[partial] = prog.cumulative_return_pct[rows[partial], last_col[partial]]
+    has_outcome = reached | partial
+
+    # Calculate hourly metrics
+    hours_5, escape_5 = _hours_below_threshold(prog, 5.0)
+    hours_10, escape_10 = _hours_below_threshold(prog, 10.0)
+    hours_15, escape_15 = _hours_below_threshold(prog, 15.0)
+    hours_to_profit = _hours_to_first_profit(prog)
+    entry_times = percentile_ranks.index[prog.positions]
 
-        entry_dt = event.get("entry_datetime")
+    trades: List[IntradayTradeOutcome] = []
+    for k in np.flatnonzero(has_outcome):
+        entry_dt = entry_times[k]
         entry_dt_str = entry_dt.strftime("%Y-%m-%d %H:%M") if hasattr(entry_dt, "strftime") else str(entry_dt)
 
         trades.append(IntradayTradeOutcome(
             entry_datetime=entry_dt_str,
-            entry_percentile=entry_pct,
-            is_winner=is_winner,
-            hours_below_5pct=hours_5,
-            hours_below_10pct=hours_10,
-            hours_below_15pct=hours_15,
-            escape_hour_5pct=escape_5,
-            escape_hour_10pct=escape_10,
-            escape_hour_15pct=escape_15,
-            hours_to_first_profit=hours_to_profit,
+            entry_percentile=float(prog.entry_percentile[k]),
+            is_winner=bool(day7_return[k] > 0),
+            hours_below_5pct=float(hours_5[k]),
+            hours_below_10pct=float(hours_10[k]),
+            hours_below_15pct=float(hours_15[k]),
+            escape_hour_5pct=_optional_hour(escape_5[k]),
+            escape_hour_10pct=_optional_hour(escape_10[k]),
+            escape_hour_15pct=_optional_hour(escape_15[k]),
+            hours_to_first_profit=_optional_hour(hours_to_profit[k]),
         ))
 
     # Scoped trades at caller threshold
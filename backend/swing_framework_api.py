@@ -6,13 +6,18 @@ from backtesting, not simulated/fake data.
 """
 
 import asyncio
+import functools
+import hashlib
 import json
 import os
 import logging
-from fastapi import APIRouter, HTTPException
+import time
+from fastapi import APIRouter, HTTPException, Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, StreamingResponse
 from datetime import datetime, timezone, date, timedelta
 from pathlib import Path
-from typing import Dict, List, Any, Optional
+from typing import Callable, Dict, List, Any, Optional
 from scipy.stats import norm
 import pandas as pd
 import numpy as np
@@ -47,6 +52,8 @@ from stock_statistics import (
     US10_4H_DATA, US10_DAILY_DATA
 )
 from percentile_forward_4h import fetch_4h_data, calculate_rsi_ma_4h
+from swing_cohort_builder import aggregate_backtest_stats, build_cohort_tables, trades_from_table
+from yf_batch import download_frames
 from ticker_utils import resolve_yahoo_symbol
 
 router = APIRouter(prefix="/api/swing-framework", tags=["swing-framework"])
@@ -875,7 +882,9 @@ def _rsi_band_label(pct: float | int | None) -> str | None:
     return str(MACDV_D7_RSI_BANDS[-1][2]) if MACDV_D7_RSI_BANDS else None
 
 
-async def _augment_with_macdv_d7_stats(response: Dict[str, Any]) -> Dict[str, Any]:
+async def _augment_with_macdv_d7_stats(
+    response: Dict[str, Any], universe: Optional[List[str]] = None
+) -> Dict[str, Any]:
     """
     Add D7 forward-return stats for tickers whose current MACD-V daily value is >120.
 
@@ -886,6 +895,9 @@ async def _augment_with_macdv_d7_stats(response: Dict[str, Any]) -> Dict[str, An
 
     For now we only attach these fields for the Daily Live Market State table (not 4H),
     because the RSI-%ile band should be based on the daily RSI-MA percentile.
+
+    The table is cached per ticker set; pass the full ``universe`` when augmenting
+    a subset of rows so every call shares one cached table.
     """
     if response.get("timeframe") == "4h":
         return response
@@ -906,7 +918,7 @@ async def _augment_with_macdv_d7_stats(response: Dict[str, Any]) -> Dict[str, An
         async with _macdv_d7_lock:
             payload = await asyncio.to_thread(
                 get_cached_macdv_d7_band_stats,
-                tickers,
+                universe or tickers,
                 period="10y",
                 pct_lookback=252,
                 horizon=7,
@@ -1581,56 +1593,30 @@ def clean_price_spikes(data: pd.DataFrame, max_daily_change_pct: float = 15.0) -
     return df
 
 
-def fetch_daily_batch(tickers: List[str], period: str = "2y") -> Dict[str, pd.DataFrame]:
+def fetch_daily_batch(tickers: List[str], period: str = "2y", clean_spikes: bool = True) -> Dict[str, pd.DataFrame]:
     """
-    Batch-fetch daily OHLCV for multiple tickers using a single yfinance.download call.
+    Batch-fetch daily OHLCV for multiple tickers with chunked yfinance.download calls.
 
     Returns a mapping keyed by display ticker (input) to a single-ticker OHLCV DataFrame.
     Any ticker missing from the batch response will be mapped to an empty DataFrame.
+    clean_spikes=False keeps raw bars (matches EnhancedPerformanceMatrixBacktester.fetch_data).
     """
     if not tickers:
         return {}
 
     yahoo_by_display = {ticker: resolve_yahoo_symbol(ticker) for ticker in tickers}
-    yahoo_symbols = list(dict.fromkeys(yahoo_by_display.values()))
-
-    data = yf.download(
-        yahoo_symbols,
-        period=period,
-        group_by="ticker",
-        auto_adjust=True,
-        prepost=True,
-        progress=False,
-        threads=True,
-    )
+    frames = download_frames(list(yahoo_by_display.values()), period=period, prepost=True)
 
-    results: Dict[str, pd.DataFrame] = {ticker: pd.DataFrame() for ticker in tickers}
-    if data is None or getattr(data, "empty", True):
-        return results
-
-    multi = isinstance(data.columns, pd.MultiIndex)
+    results: Dict[str, pd.DataFrame] = {}
     for display_ticker, yahoo_symbol in yahoo_by_display.items():
-        frame = pd.DataFrame()
-        if multi:
-            try:
-                level0 = data.columns.get_level_values(0)
-                level1 = data.columns.get_level_values(1)
-                if yahoo_symbol in level0:
-                    frame = data[yahoo_symbol].copy()
-                elif yahoo_symbol in level1:
-                    frame = data.xs(yahoo_symbol, level=1, axis=1).copy()
-            except Exception:
-                frame = pd.DataFrame()
-        else:
-            if len(yahoo_symbols) == 1:
-                frame = data.copy()
-
+        frame = frames.get(yahoo_symbol, pd.DataFrame())
         if not frame.empty:
             required_columns = {"Open", "High", "Low", "Close"}
             if required_columns.issubset(frame.columns):
                 frame = frame.dropna(subset=["Close"])
                 # Clean suspicious price spikes (bad data from Yahoo Finance)
-                frame = clean_price_spikes(frame, max_daily_change_pct=15.0)
+                if clean_spikes:
+                    frame = clean_price_spikes(frame, max_daily_change_pct=15.0)
             else:
                 frame = pd.DataFrame()
 
@@ -2152,23 +2138,25 @@ async def get_swing_framework_data():
         "IGLS": (None, None)
     }
 
+    # Tickers without metadata are skipped, as before
+    ticker_metadata = {}
     for ticker in tickers:
-        try:
-            print(f"Processing {ticker}...")
-
-            # Get metadata
-            metadata = STOCK_METADATA.get(ticker)
-            if not metadata:
-                print(f"  No metadata for {ticker}, skipping")
-                continue
-
-            # Get bin statistics (optional for indices - they compute dynamically)
-            bins_4h, bins_daily = bin_data_map.get(ticker, (None, None))
-            # For indices like SPY/QQQ, bins_4h will be None - they don't need pre-computed bin data
-            # Individual stocks use pre-computed bin data for efficiency
+        metadata = STOCK_METADATA.get(ticker)
+        if not metadata:
+            print(f"  No metadata for {ticker}, skipping")
+            continue
+        ticker_metadata[ticker] = metadata
 
-            # Initialize backtester with REAL historical data
-            try:
+    # One bulk download for every ticker, then per-ticker fallback for any
+    # symbol the batch response missed (same path the backtester used)
+    trade_tables: Dict[str, pd.DataFrame] = {}
+    try:
+        frames = await asyncio.to_thread(
+            fetch_daily_batch, list(ticker_metadata), "5y", False
+        )
+        for ticker in ticker_metadata:
+            frame = frames.get(ticker, pd.DataFrame())
+            if frame.empty:
                 backtester = EnhancedPerformanceMatrixBacktester(
                     tickers=[ticker],
                     lookback_period=500,
@@ -2176,103 +2164,30 @@ async def get_swing_framework_data():
                     ma_length=14,
                     max_horizon=21
                 )
+                frame = await asyncio.to_thread(backtester.fetch_data, ticker)
+            frames[ticker] = frame.dropna() if not frame.empty else frame
+
+        # Per-ticker entry events + exits in a process pool; only bars
+        # appended since the last build are processed
+        trade_tables = await asyncio.to_thread(
+            build_cohort_tables,
+            frames,
+            {t: m.is_mean_reverter for t, m in ticker_metadata.items()},
+            os.getenv("SWING_COHORT_INCREMENTAL", "1").lower() not in {"0", "false", "no"},
+        )
+    except Exception as e:
+        print(f"  Error building cohort trade tables: {e}")
 
-                # Fetch REAL historical price data
-                data = backtester.fetch_data(ticker)
-                if data.empty:
-                    print(f"  No price data for {ticker}, using static bins only")
-                    historical_trades = []
-                else:
-                    # Calculate RSI-MA indicator
-                    indicator = backtester.calculate_rsi_ma_indicator(data)
-                    percentile_ranks = backtester.calculate_percentile_ranks(indicator)
-
-                    # Find REAL entry events across ALL percentile ranges (not just 0-15%)
-                    entry_events = backtester.find_entry_events_enhanced(
-                        percentile_ranks,
-                        data['Close'],
-                        threshold=100.0  # Capture ALL percentiles (0-100%)
-                    )
-
-                    print(f"  Found {len(entry_events)} total entry events across all percentiles")
-
-                    # Separate into ALL percentile cohorts for comprehensive analysis
-                    cohort_events = {
-                        'extreme_low': [e for e in entry_events if e['entry_percentile'] <= 5.0],
-                        'low': [e for e in entry_events if 5.0 < e['entry_percentile'] <= 15.0],
-                        'medium_low': [e for e in entry_events if 15.0 < e['entry_percentile'] <= 30.0],
-                        'medium': [e for e in entry_events if 30.0 < e['entry_percentile'] <= 50.0],
-                        'medium_high': [e for e in entry_events if 50.0 < e['entry_percentile'] <= 70.0],
-                        'high': [e for e in entry_events if 70.0 < e['entry_percentile'] <= 85.0],
-                        'extreme_high': [e for e in entry_events if 85.0 < e['entry_percentile'] <= 100.0]
-                    }
-
-                    for cohort_name, events in cohort_events.items():
-                        print(f"    {cohort_name}: {len(events)} events")
-
-                    # Use ALL events - no artificial sampling
-                    # Each cohort will have its natural sample size based on historical frequency
-                    sampled_events = entry_events
-
-                    print(f"  Using ALL {len(sampled_events)} trades across all percentile ranges (natural distribution)")
-
-                    # Generate REAL trades from historical data
-                    historical_trades = []
-                    for event in sampled_events:
-                        entry_date = event['entry_date']
-                        entry_idx = data.index.get_loc(entry_date)
-
-                        # Find actual exit point from REAL data
-                        exit_idx, exit_reason = find_exit_point(
-                            data,
-                            percentile_ranks,
-                            entry_idx,
-                            max_days=21,
-                            exit_percentile=50.0,
-                            stop_loss_pct=2.0
-                        )
-
-                        exit_date = data.index[exit_idx]
-                        exit_price = data.iloc[exit_idx]['Close']
-                        exit_percentile = percentile_ranks.iloc[exit_idx]
-
-                        # Determine percentile cohort for RSI-MA tracking (ALL ranges)
-                        entry_pct = float(event['entry_percentile'])
-                        if entry_pct <= 5.0:
-                            cohort = "extreme_low"
-                        elif entry_pct <= 15.0:
-                            cohort = "low"
-                        elif entry_pct <= 30.0:
-                            cohort = "medium_low"
-                        elif entry_pct <= 50.0:
-                            cohort = "medium"
-                        elif entry_pct <= 70.0:
-                            cohort = "medium_high"
-                        elif entry_pct <= 85.0:
-                            cohort = "high"
-                        else:
-                            cohort = "extreme_high"
-
-                        trade = {
-                            "entry_date": entry_date.strftime("%Y-%m-%d") if hasattr(entry_date, 'strftime') else str(entry_date),
-                            "exit_date": exit_date.strftime("%Y-%m-%d") if hasattr(exit_date, 'strftime') else str(exit_date),
-                            "entry_price": float(event['entry_price']),
-                            "exit_price": float(exit_price),
-                            "entry_percentile": entry_pct,
-                            "exit_percentile": float(exit_percentile),
-                            "holding_days": int((exit_date - entry_date).days) if hasattr((exit_date - entry_date), 'days') else 1,
-                            "return_pct": float((exit_price - event['entry_price']) / event['entry_price'] * 100),
-                            "regime": "mean_reversion" if metadata.is_mean_reverter else "momentum",
-                            "exit_reason": exit_reason,
-                            "percentile_cohort": cohort  # Track which RSI-MA cohort
-                        }
-                        historical_trades.append(trade)
-
-                    print(f"  Generated {len(historical_trades)} real trades")
+    for ticker, metadata in ticker_metadata.items():
+        try:
+            # Get bin statistics (optional for indices - they compute dynamically)
+            bins_4h, bins_daily = bin_data_map.get(ticker, (None, None))
+            # For indices like SPY/QQQ, bins_4h will be None - they don't need pre-computed bin data
+            # Individual stocks use pre-computed bin data for efficiency
 
-            except Exception as e:
-                print(f"  Error running backtest for {ticker}: {e}")
-                historical_trades = []
+            table = trade_tables.get(ticker, pd.DataFrame())
+            historical_trades = trades_from_table(table)
+            print(f"  {ticker}: {len(historical_trades)} real trades")
 
             # Compile response
             results[ticker] = {
@@ -2297,11 +2212,9 @@ async def get_swing_framework_data():
                 "bins_4h": convert_bins_to_dict(bins_4h) if bins_4h else {},
                 "bins_daily": convert_bins_to_dict(bins_daily) if bins_daily else {},
                 "historical_trades": historical_trades,
-                "backtest_stats": calculate_backtest_stats(historical_trades)
+                "backtest_stats": aggregate_backtest_stats(table)
             }
 
-            print(f"  ✓ {ticker} complete")
-
         except Exception as e:
             print(f"  Error processing {ticker}: {e}")
             import traceback
@@ -2490,7 +2403,6 @@ async def _quick_refresh_current_state() -> Dict[str, Any] | None:
     today's live prices, and re-derive percentiles from cached indicators.
     Target: 5-10 seconds instead of 60-180 seconds.
     """
-    import time
     t0 = time.monotonic()
 
     # 1. Load best available base state
@@ -2694,13 +2606,270 @@ async def _quick_refresh_current_state() -> Dict[str, Any] | None:
     return response
 
 
+# Per-ticker daily row cache keyed on a fingerprint of the inputs that feed the row.
+# A full refresh re-fetches every ticker, but most rows are byte-identical to the last
+# pass (weekends, after-hours, unchanged cohort stats); those reuse the cached row and
+# skip the indicator, full percentile history and the extended "max" fetch entirely.
+_daily_row_cache: Dict[str, tuple[tuple, Dict[str, Any]]] = {}
+
+
+def _daily_row_fingerprint(data: pd.DataFrame, ticker_cohort_data: Dict[str, Any]) -> tuple:
+    return (
+        len(data),
+        str(data.index[-1]),
+        float(data["Close"].iloc[-1]),
+        # Dividend/split back-adjustments rewrite earlier closes, not the last one
+        int(pd.util.hash_pandas_object(data["Close"], index=False).sum()),
+        json.dumps(ticker_cohort_data or {}, sort_keys=True, default=str),
+    )
+
+
+def _compute_daily_state_row(
+    ticker: str,
+    data: pd.DataFrame,
+    backtester: EnhancedPerformanceMatrixBacktester,
+    ticker_cohort_data: Dict[str, Any],
+) -> Dict[str, Any] | None:
+    """Build the base (pre-augmentation) current-state row for one ticker."""
+    metadata = STOCK_METADATA.get(ticker)
+    if not metadata:
+        return None
+
+    indicator = backtester.calculate_rsi_ma_indicator(data)
+    # Save indicator to disk cache for future quick refreshes
+    if indicator is not None and not indicator.empty:
+        _save_indicator_cache(ticker, indicator)
+
+    current_percentile = compute_latest_percentile(indicator, backtester.lookback_period)
+    if current_percentile is None:
+        return None
+
+    rsi_percentile_252 = compute_latest_percentile(indicator, 252)
+
+    # Calculate full percentile ranks to find last extreme low date
+    percentile_ranks = calculate_full_percentile_ranks(indicator, backtester.lookback_period)
+    last_extreme_low_date = find_last_extreme_low_date(percentile_ranks, threshold=5.0)
+
+    # If no <5% found in current data, try fetching more historical data
+    if last_extreme_low_date is None and len(data) < 2500:  # ~10 years
+        try:
+            extended_data = backtester.fetch_data(ticker, period="max")
+            if len(extended_data) > len(data):
+                extended_indicator = backtester.calculate_rsi_ma_indicator(extended_data)
+                extended_percentile_ranks = calculate_full_percentile_ranks(extended_indicator, backtester.lookback_period)
+                last_extreme_low_date = find_last_extreme_low_date(extended_percentile_ranks, threshold=5.0)
+        except Exception:
+            pass  # Use None if extended fetch fails
+
+    regime = "mean_reversion" if metadata.is_mean_reverter else "momentum"
+    cohort, zone_label, in_entry_zone = _derive_percentile_cohort(current_percentile)
+
+    cohort_performance = ticker_cohort_data.get(f"cohort_{cohort}") if ticker_cohort_data else None
+    if not cohort_performance and ticker_cohort_data:
+        cohort_performance = ticker_cohort_data.get("cohort_all")
+
+    if cohort_performance:
+        expected_return = cohort_performance["avg_return"]
+        expected_holding_days = cohort_performance["avg_holding_days"]
+        vol_mult = {"Low": 1.0, "Medium": 1.5, "High": 2.0}.get(metadata.volatility_level, 1.5)
+        live_expectancy = {
+            "expected_win_rate": cohort_performance["win_rate"],
+            "expected_return_pct": expected_return,
+            "expected_holding_days": expected_holding_days,
+            "expected_return_per_day_pct": expected_return / expected_holding_days if expected_holding_days > 0 else 0,
+            "risk_adjusted_expectancy_pct": expected_return / vol_mult,
+            "sample_size": cohort_performance["count"],
+        }
+    else:
+        live_expectancy = {
+            "expected_win_rate": 0.0, "expected_return_pct": 0.0,
+            "expected_holding_days": 0.0, "expected_return_per_day_pct": 0.0,
+            "risk_adjusted_expectancy_pct": 0.0, "sample_size": 0,
+        }
+
+    return {
+        "ticker": ticker, "name": metadata.name,
+        "current_date": data.index[-1].strftime("%Y-%m-%d"),
+        "current_price": float(data["Close"].iloc[-1]),
+        "current_percentile": current_percentile, "rsi_percentile_252": rsi_percentile_252,
+        "percentile_cohort": cohort, "zone_label": zone_label,
+        "in_entry_zone": in_entry_zone, "regime": regime,
+        "is_mean_reverter": metadata.is_mean_reverter,
+        "is_momentum": metadata.is_momentum,
+        "volatility_level": metadata.volatility_level,
+        "live_expectancy": live_expectancy,  # Expected performance if entering NOW
+        "last_extreme_low_date": last_extreme_low_date,  # Last date when percentile was ≤5%
+    }
+
+
+def _build_daily_state_rows(
+    tickers: List[str],
+    batch_daily_frames: Dict[str, pd.DataFrame],
+    cohort_stats_cache: Dict[str, Any] | None,
+) -> List[Dict[str, Any]]:
+    """
+    Build base current-state rows for ``tickers``, reusing cached rows whose
+    inputs (bar count, last bar, last close, cohort stats) are unchanged.
+    """
+    backtester = EnhancedPerformanceMatrixBacktester(
+        tickers=tickers, lookback_period=500, rsi_length=14, ma_length=14, max_horizon=21
+    )
+
+    current_states: List[Dict[str, Any]] = []
+    reused = 0
+    for ticker in tickers:
+        try:
+            ticker_cohort_data = cohort_stats_cache.get(ticker, {}) if cohort_stats_cache else {}
+
+            data = batch_daily_frames.get(ticker, pd.DataFrame())
+            if data.empty or len(data) < backtester.lookback_period + 100:  # Need at least 100 extra points for meaningful percentile history
+                # Fall back to the existing per-ticker fetch path for this ticker only.
+                data = backtester.fetch_data(ticker, period="5y")
+                if data.empty or len(data) < backtester.lookback_period + 50:
+                    data = backtester.fetch_data(ticker, period="max")
+            if data.empty:
+                continue
+
+            fingerprint = _daily_row_fingerprint(data, ticker_cohort_data)
+            cached = _daily_row_cache.get(ticker)
+            if cached is not None and cached[0] == fingerprint:
+                current_states.append(dict(cached[1]))
+                reused += 1
+                continue
+
+            row = _compute_daily_state_row(ticker, data, backtester, ticker_cohort_data)
+            if row is None:
+                continue
+            _daily_row_cache[ticker] = (fingerprint, dict(row))
+            current_states.append(row)
+        except Exception as e:
+            print(f"  Error getting current state for {ticker}: {e}")
+            continue
+
+    if reused:
+        print(f"  Reused {reused}/{len(current_states)} unchanged daily rows")
+    return current_states
+
+
+# Output fields and input signature for each step of the daily augmentation chain.
+# A step re-runs only for rows whose signature changed since its last run; every other
+# row gets the step's previous outputs copied back. Signatures include the market date
+# so reference statistics that roll daily are picked up on the next session.
+_DAILY_AUGMENT_FIELDS: Dict[str, tuple[str, ...]] = {
+    "macdv_daily": (
+        "macdv_daily", "macdv_daily_trend", "macdv_delta_1d", "macdv_delta_5d", "macdv_delta_10d",
+        "macdv_trend", "macdv_trend_label", "days_in_zone", "next_threshold", "next_threshold_distance",
+        "signal_crossover", "macdv_decay_accel", "transition_type", "transition_score",
+    ),
+    "macdv_d7_stats": (
+        "macdv_d7_rsi_band", "macdv_d7_horizon", "macdv_d7_n", "macdv_d7_win_rate",
+        "macdv_d7_mean_return", "macdv_d7_median_return",
+    ),
+    "momentum_regime": (
+        "mom_regime_active", "mom_d7_n", "mom_d7_win_rate", "mom_d7_avg_return", "mom_d7_median_return",
+    ),
+    "macdv_percentiles": (
+        "macdv_categorical_percentile", "macdv_asymmetric_percentile", "macdv_zone",
+        "macdv_zone_display", "macdv_interpretation",
+    ),
+    "divergence": (
+        "four_h_percentile", "divergence_pct", "abs_divergence_pct", "divergence_category",
+        "category_label", "category_description", "p85_threshold", "p95_threshold",
+        "dislocation_level", "dislocation_color", "thresholds_text",
+    ),
+    "second_order": (
+        "second_order_divergence_pct", "abs_second_order_divergence_pct",
+        "second_order_dislocation_level", "second_order_dislocation_color",
+        "second_order_p85_threshold", "second_order_p95_threshold", "second_order_thresholds_text",
+    ),
+}
+
+_daily_augment_memo: Dict[str, Dict[str, tuple[tuple, Dict[str, Any]]]] = {}
+
+
+def _daily_augment_signature(step: str, row: Dict[str, Any], ctx: Dict[str, Any]) -> tuple:
+    market_date = ctx["market_date"]
+    if step == "macdv_daily":
+        return (market_date, row.get("current_date"), row.get("current_price"))
+    if step == "macdv_d7_stats":
+        return (market_date, row.get("macdv_daily"), row.get("rsi_percentile_252"), row.get("current_percentile"))
+    if step == "momentum_regime":
+        return (market_date, row.get("macdv_daily"), row.get("current_percentile"))
+    if step == "macdv_percentiles":
+        return (market_date, row.get("macdv_daily"))
+    if step == "divergence":
+        return (market_date, row.get("current_percentile"), ctx["four_h"].get(row.get("ticker")))
+    return (market_date, row.get("current_percentile"), row.get("prev_midday_percentile"))
+
+
+async def _augment_daily_rows(response: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Run the daily augmentation chain (MACD-V, D7 stats, momentum regime, MACD-V
+    percentiles, divergence, second-order divergence) only over rows whose inputs
+    changed. Every augmentation mutates rows independently, so each step is handed
+    a sub-response containing just its dirty rows.
+    """
+    market_state = response.get("market_state")
+    if not isinstance(market_state, list) or not market_state:
+        return response
+    rows = [s for s in market_state if isinstance(s, dict) and isinstance(s.get("ticker"), str)]
+
+    four_h: Dict[str, Any] = {}
+    try:
+        four_h_response = await get_current_market_state_4h(force_refresh=False)
+        four_h = {
+            s["ticker"]: s.get("current_percentile")
+            for s in four_h_response.get("market_state", [])
+            if isinstance(s, dict) and "ticker" in s
+        }
+    except Exception as e:
+        print(f"  Warning: Could not get 4H data for divergence signatures: {e}")
+    ctx = {"market_date": _get_market_date(datetime.now(timezone.utc)).isoformat(), "four_h": four_h}
+
+    steps = (
+        ("macdv_daily", _augment_with_macdv_daily),
+        # The D7 table is cached per ticker set: look it up for every row, apply to dirty ones
+        ("macdv_d7_stats", functools.partial(_augment_with_macdv_d7_stats, universe=[r["ticker"] for r in rows])),
+        ("momentum_regime", _augment_with_momentum_regime),
+        ("macdv_percentiles", _augment_with_macdv_percentiles),
+        ("divergence", _augment_with_divergence_metrics),
+        ("second_order", _augment_with_second_order_divergence),
+    )
+    for step, augment in steps:
+        fields = _DAILY_AUGMENT_FIELDS[step]
+        memo = _daily_augment_memo.setdefault(step, {})
+        dirty: List[Dict[str, Any]] = []
+        signatures: Dict[str, tuple] = {}
+        for row in rows:
+            signature = _daily_augment_signature(step, row, ctx)
+            cached = memo.get(row["ticker"])
+            if cached is not None and cached[0] == signature:
+                row.update(cached[1])
+            else:
+                dirty.append(row)
+                signatures[row["ticker"]] = signature
+        if not dirty:
+            continue
+
+        sub_response = {k: v for k, v in response.items() if k != "market_state"}
+        sub_response["market_state"] = dirty
+        result = augment(sub_response)
+        if asyncio.iscoroutine(result):
+            await result
+        for row in dirty:
+            outputs = {f: row[f] for f in fields if f in row}
+            # Don't memoize failed lookups (all None) so they are retried next pass.
+            if any(v is not None for v in outputs.values()):
+                memo[row["ticker"]] = (signatures[row["ticker"]], outputs)
+    return response
+
+
 async def _background_full_refresh(timeframe: str) -> None:
     """
     Run the full computation in the background to warm all caches.
     This is kicked off after a quick refresh returns to the user.
     """
     global _current_state_cache, _current_state_cache_timestamp, _background_refresh_task
-    import time
     t0 = time.monotonic()
     print(f"Background full refresh ({timeframe}): starting...")
 
@@ -2722,96 +2891,7 @@ async def _background_full_refresh(timeframe: str) -> None:
             print(f"  Background refresh: batch fetch failed: {e}")
             batch_daily_frames = {t: pd.DataFrame() for t in tickers}
 
-        backtester = EnhancedPerformanceMatrixBacktester(
-            tickers=tickers, lookback_period=500, rsi_length=14, ma_length=14, max_horizon=21
-        )
-
-        current_states = []
-        for ticker in tickers:
-            try:
-                ticker_cohort_data = cohort_stats_cache.get(ticker, {}) if cohort_stats_cache else {}
-
-                data = batch_daily_frames.get(ticker, pd.DataFrame())
-                if data.empty or len(data) < backtester.lookback_period + 100:
-                    data = backtester.fetch_data(ticker, period="5y")
-                    if data.empty or len(data) < backtester.lookback_period + 50:
-                        data = backtester.fetch_data(ticker, period="max")
-                if data.empty:
-                    continue
-
-                indicator = backtester.calculate_rsi_ma_indicator(data)
-                # Save indicator to disk cache for future quick refreshes
-                if indicator is not None and not indicator.empty:
-                    _save_indicator_cache(ticker, indicator)
-
-                current_percentile = compute_latest_percentile(indicator, backtester.lookback_period)
-                if current_percentile is None:
-                    continue
-
-                rsi_percentile_252 = compute_latest_percentile(indicator, 252)
-
-                percentile_ranks = calculate_full_percentile_ranks(indicator, backtester.lookback_period)
-                last_extreme_low_date = find_last_extreme_low_date(percentile_ranks, threshold=5.0)
-
-                if last_extreme_low_date is None and len(data) < 2500:
-                    try:
-                        extended_data = backtester.fetch_data(ticker, period="max")
-                        if len(extended_data) > len(data):
-                            extended_indicator = backtester.calculate_rsi_ma_indicator(extended_data)
-                            extended_percentile_ranks = calculate_full_percentile_ranks(extended_indicator, backtester.lookback_period)
-                            last_extreme_low_date = find_last_extreme_low_date(extended_percentile_ranks, threshold=5.0)
-                    except Exception:
-                        pass
-
-                current_price = float(data["Close"].iloc[-1])
-                current_date = data.index[-1].strftime("%Y-%m-%d")
-
-                metadata = STOCK_METADATA.get(ticker)
-                if not metadata:
-                    continue
-
-                regime = "mean_reversion" if metadata.is_mean_reverter else "momentum"
-                cohort, zone_label, in_entry_zone = _derive_percentile_cohort(current_percentile)
-
-                cohort_performance = ticker_cohort_data.get(f"cohort_{cohort}") if ticker_cohort_data else None
-                if not cohort_performance and ticker_cohort_data:
-                    cohort_performance = ticker_cohort_data.get("cohort_all")
-
-                if cohort_performance:
-                    expected_return = cohort_performance["avg_return"]
-                    expected_holding_days = cohort_performance["avg_holding_days"]
-                    vol_mult = {"Low": 1.0, "Medium": 1.5, "High": 2.0}.get(metadata.volatility_level, 1.5)
-                    live_expectancy = {
-                        "expected_win_rate": cohort_performance["win_rate"],
-                        "expected_return_pct": expected_return,
-                        "expected_holding_days": expected_holding_days,
-                        "expected_return_per_day_pct": expected_return / expected_holding_days if expected_holding_days > 0 else 0,
-                        "risk_adjusted_expectancy_pct": expected_return / vol_mult,
-                        "sample_size": cohort_performance["count"],
-                    }
-                else:
-                    live_expectancy = {
-                        "expected_win_rate": 0.0, "expected_return_pct": 0.0,
-                        "expected_holding_days": 0.0, "expected_return_per_day_pct": 0.0,
-                        "risk_adjusted_expectancy_pct": 0.0, "sample_size": 0,
-                    }
-
-                current_states.append({
-                    "ticker": ticker, "name": metadata.name,
-                    "current_date": current_date, "current_price": current_price,
-                    "current_percentile": current_percentile, "rsi_percentile_252": rsi_percentile_252,
-                    "percentile_cohort": cohort, "zone_label": zone_label,
-                    "in_entry_zone": in_entry_zone, "regime": regime,
-                    "is_mean_reverter": metadata.is_mean_reverter,
-                    "is_momentum": metadata.is_momentum,
-                    "volatility_level": metadata.volatility_level,
-                    "live_expectancy": live_expectancy,
-                    "last_extreme_low_date": last_extreme_low_date,
-                })
-            except Exception as e:
-                print(f"  Background refresh: error for {ticker}: {e}")
-                continue
-
+        current_states = _build_daily_state_rows(tickers, batch_daily_frames, cohort_stats_cache)
         current_states.sort(key=lambda x: x["current_percentile"])
 
         response = {
@@ -2826,16 +2906,12 @@ async def _background_full_refresh(timeframe: str) -> None:
         }
 
         response = _augment_with_prev_midday_snapshot(response, "daily")
-        response = await _augment_with_macdv_daily(response)
-        response = await _augment_with_macdv_d7_stats(response)
-        response = await _augment_with_momentum_regime(response)
-        response = await _augment_with_macdv_percentiles(response)
-        response = await _augment_with_divergence_metrics(response)
-        response = _augment_with_second_order_divergence(response)
+        response = await _augment_daily_rows(response)
 
         _current_state_cache = response
         _current_state_cache_timestamp = datetime.now(timezone.utc)
         _save_computed_state("daily", response)
+        _daily_state_versions.publish(response)
 
         elapsed = time.monotonic() - t0
         print(f"✓ Background full refresh completed in {elapsed:.1f}s for {len(current_states)} tickers")
@@ -2863,12 +2939,219 @@ def _load_disk_cache_into_memory() -> None:
 _load_disk_cache_into_memory()
 
 
+_STREAM_QUEUE_SIZE = int(os.getenv("SWING_STREAM_QUEUE_SIZE", "32"))
+_STREAM_HEARTBEAT_SECONDS = 15.0
+_STREAM_REFRESH_SECONDS = int(os.getenv("SWING_STREAM_REFRESH_SECONDS", str(_current_state_cache_ttl_seconds)))
+_STREAM_TIMEFRAMES = ("daily", "4h")
+
+
+class _StateStreamSubscriber:
+    def __init__(self, tickers: frozenset[str] | None, timeframes: frozenset[str]) -> None:
+        self.tickers = tickers
+        self.timeframes = timeframes
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=_STREAM_QUEUE_SIZE)
+
+    def offer(self, event: Dict[str, Any]) -> None:
+        """
+        Queue ``event`` without ever blocking the publisher. A client that falls
+        behind has its backlog replaced by a single ``resync`` event, which the
+        stream answers with a fresh snapshot of the subscribed rows.
+        """
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait({"type": "resync", "timeframe": None, "version": event.get("version")})
+
+
+class _StateStreamHub:
+    """
+    Fan-out of current-state row diffs to push subscribers.
+
+    Version trackers call ``broadcast`` whenever a published payload changes rows, so
+    every connected dashboard shares the one refresh that produced the change. While
+    anyone is subscribed, a single refresh loop keeps the daily and 4H state warm in
+    place of per-client polling.
+    """
+
+    def __init__(self) -> None:
+        self._subscribers: set[_StateStreamSubscriber] = set()
+        self._refresh_task: asyncio.Task | None = None
+
+    def subscribe(self, tickers: frozenset[str] | None, timeframes: frozenset[str]) -> _StateStreamSubscriber:
+        subscriber = _StateStreamSubscriber(tickers, timeframes)
+        self._subscribers.add(subscriber)
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(self._refresh_loop())
+        return subscriber
+
+    def unsubscribe(self, subscriber: _StateStreamSubscriber) -> None:
+        self._subscribers.discard(subscriber)
+        if not self._subscribers and self._refresh_task is not None:
+            self._refresh_task.cancel()
+            self._refresh_task = None
+
+    def broadcast(self, timeframe: str, version: str, changed: List[Dict[str, Any]], removed: List[str]) -> None:
+        for subscriber in list(self._subscribers):
+            if timeframe not in subscriber.timeframes:
+                continue
+            rows = changed
+            gone = removed
+            if subscriber.tickers is not None:
+                rows = [s for s in changed if s.get("ticker") in subscriber.tickers]
+                gone = [t for t in removed if t in subscriber.tickers]
+            if rows or gone:
+                subscriber.offer(
+                    {"type": "diff", "timeframe": timeframe, "version": version, "changed": rows, "removed": gone}
+                )
+
+    async def _refresh_loop(self) -> None:
+        while self._subscribers:
+            try:
+                _daily_state_versions.publish(await _compute_current_market_state())
+            except Exception as e:
+                print(f"State stream: daily refresh failed: {e}")
+            try:
+                _state_4h_versions.publish(await get_current_market_state_4h())
+            except Exception as e:
+                print(f"State stream: 4H refresh failed: {e}")
+            await asyncio.sleep(_STREAM_REFRESH_SECONDS)
+
+
+_state_stream = _StateStreamHub()
+
+
+class _StateVersionTracker:
+    """
+    Versions current-state rows by content so clients can poll cheaply.
+
+    ``token`` (``"<market date>-<content hash>"``) doubles as the ETag. It is derived
+    from the published payload alone, so every worker process serving the same data
+    issues the same token. The row hashes behind the most recent tokens are kept to
+    answer ``since=<token>`` with only the changed rows; tokens this process has not
+    seen force a full payload instead of a wrong delta.
+    """
+
+    _VOLATILE_KEYS = ("timestamp",)
+    _HISTORY = 64
+
+    def __init__(
+        self,
+        timeframe: str = "daily",
+        listener: Callable[[str, str, List[Dict[str, Any]], List[str]], None] | None = None,
+    ) -> None:
+        self.timeframe = timeframe
+        self.listener = listener
+        self.token = ""
+        self.market_state: List[Dict[str, Any]] = []
+        self._row_hashes: Dict[str, str] = {}
+        self._history: Dict[str, Dict[str, str]] = {}
+
+    @staticmethod
+    def _digest(value: Any) -> str:
+        return hashlib.sha1(json.dumps(value, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+    def publish(self, payload: Dict[str, Any]) -> List[str]:
+        """Record ``payload`` and return the tickers whose rows changed."""
+        rows = {
+            s["ticker"]: s
+            for s in payload.get("market_state") or []
+            if isinstance(s, dict) and isinstance(s.get("ticker"), str)
+        }
+        hashes = {ticker: self._digest(row) for ticker, row in rows.items()}
+        changed = [t for t, h in hashes.items() if self._row_hashes.get(t) != h]
+        removed = [t for t in self._row_hashes if t not in hashes]
+        meta = {k: v for k, v in payload.items() if k != "market_state" and k not in self._VOLATILE_KEYS}
+        market_date = _get_market_date(datetime.now(timezone.utc)).isoformat()
+        token = f"{market_date}-{self._digest([self._digest(meta), list(hashes.items())])[:16]}"
+
+        if token != self.token:
+            self.token = token
+            self._history.pop(token, None)
+            self._history[token] = hashes
+            while len(self._history) > self._HISTORY:
+                del self._history[next(iter(self._history))]
+            if self.listener is not None and (changed or removed):
+                self.listener(self.timeframe, self.token, [rows[t] for t in changed], removed)
+        self._row_hashes = hashes
+        self.market_state = list(rows.values())
+        return changed
+
+    def delta(self, payload: Dict[str, Any], since: str) -> Dict[str, Any] | None:
+        """Rows changed after token ``since``, or None when a full payload is required."""
+        since = since.strip().strip('"')
+        known = self._history.get(since)
+        if known is None:
+            return None
+        market_state = [s for s in payload.get("market_state") or [] if isinstance(s, dict)]
+        return {
+            "version": self.token,
+            "since": since,
+            "delta": True,
+            "timestamp": payload.get("timestamp"),
+            "changed": [
+                s for s in market_state
+                if known.get(s.get("ticker")) != self._row_hashes.get(s.get("ticker"))
+            ],
+            "removed": [t for t in known if t not in self._row_hashes],
+            "order": [s.get("ticker") for s in market_state],
+            **{k: v for k, v in payload.items() if k not in ("market_state", "timestamp")},
+        }
+
+
+_daily_state_versions = _StateVersionTracker("daily", _state_stream.broadcast)
+_state_4h_versions = _StateVersionTracker("4h", _state_stream.broadcast)
+
+
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [c.strip() for c in if_none_match.split(",")]
+    return "*" in candidates or any(c.removeprefix("W/") == etag for c in candidates)
+
+
 @router.get("/current-state")
 async def get_current_market_state(
     force_refresh: bool = False,
     capture_midday_snapshot: bool = False,
     overwrite_midday_snapshot: bool = False,
+    since: Optional[str] = None,
+    request: Request = None,
 ):
+    """
+    Current-state payload with conditional-GET support.
+
+    Responses carry an ``ETag`` version token; a matching ``If-None-Match`` returns
+    304, and ``since=<token>`` returns only the rows changed after that version
+    (``delta: true``) plus the current row ``order``. Unknown or stale tokens fall
+    back to the full payload. Internal callers get the plain dict.
+    """
+    payload = await _compute_current_market_state(
+        force_refresh=force_refresh,
+        capture_midday_snapshot=capture_midday_snapshot,
+        overwrite_midday_snapshot=overwrite_midday_snapshot,
+    )
+    if request is None and since is None:
+        return payload
+
+    _daily_state_versions.publish(payload)
+    etag = f'"{_daily_state_versions.token}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if request is not None and _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    if since:
+        delta = _daily_state_versions.delta(payload, since)
+        if delta is not None:
+            return JSONResponse(jsonable_encoder(delta), headers=headers)
+    return JSONResponse(jsonable_encoder({**payload, "version": _daily_state_versions.token}), headers=headers)
+
+
+async def _compute_current_market_state(
+    force_refresh: bool = False,
+    capture_midday_snapshot: bool = False,
+    overwrite_midday_snapshot: bool = False,
+) -> Dict[str, Any]:
     """
     Get CURRENT RSI-MA percentile and live risk-adjusted expectancy for all tickers (stocks + indices)
     Shows real-time buy opportunities based on current market state
@@ -2885,6 +3168,7 @@ async def get_current_market_state(
         if quick_result is not None:
             _current_state_cache = quick_result
             _current_state_cache_timestamp = datetime.now(timezone.utc)
+            _daily_state_versions.publish(quick_result)
             # Schedule a background full refresh to keep caches warm
             if _background_refresh_task is None or _background_refresh_task.done():
                 _background_refresh_task = asyncio.create_task(_background_full_refresh("daily"))
@@ -2958,8 +3242,6 @@ async def get_current_market_state(
         cohort_stats_cache = await get_cached_cohort_stats(allow_compute=allow_full_compute)
         print("✓ Cohort stats ready")
 
-        current_states = []
-
         batch_daily_frames: Dict[str, pd.DataFrame] = {}
         try:
             print("Batch fetching daily OHLCV (5y) for current-state...")
@@ -2972,146 +3254,8 @@ async def get_current_market_state(
             print(f"  Batch daily fetch failed: {e}. Falling back to per-ticker fetches.")
             batch_daily_frames = {t: pd.DataFrame() for t in tickers}
 
-        backtester = EnhancedPerformanceMatrixBacktester(
-            tickers=tickers,
-            lookback_period=500,
-            rsi_length=14,
-            ma_length=14,
-            max_horizon=21
-        )
-
         print("Fetching current percentiles...")
-        for ticker in tickers:
-            try:
-                ticker_cohort_data = cohort_stats_cache.get(ticker, {}) if cohort_stats_cache else {}
-
-                data = batch_daily_frames.get(ticker, pd.DataFrame())
-                if data.empty or len(data) < backtester.lookback_period + 100:  # Need at least 100 extra points for meaningful percentile history
-                    # Fall back to the existing per-ticker fetch path for this ticker only.
-                    data = backtester.fetch_data(ticker, period="5y")
-                    if data.empty or len(data) < backtester.lookback_period + 50:
-                        data = backtester.fetch_data(ticker, period="max")
-                if data.empty:
-                    continue
-
-                indicator = backtester.calculate_rsi_ma_indicator(data)
-                # Save indicator to disk cache for future quick refreshes
-                if indicator is not None and not indicator.empty:
-                    _save_indicator_cache(ticker, indicator)
-                current_percentile = compute_latest_percentile(indicator, backtester.lookback_period)
-                if current_percentile is None:
-                    continue
-
-                rsi_percentile_252 = compute_latest_percentile(indicator, 252)
-
-                # Calculate full percentile ranks to find last extreme low date
-                percentile_ranks = calculate_full_percentile_ranks(indicator, backtester.lookback_period)
-                last_extreme_low_date = find_last_extreme_low_date(percentile_ranks, threshold=5.0)
-
-                # If no <5% found in current data, try fetching more historical data
-                if last_extreme_low_date is None and len(data) < 2500:  # ~10 years
-                    try:
-                        extended_data = backtester.fetch_data(ticker, period="max")
-                        if len(extended_data) > len(data):
-                            extended_indicator = backtester.calculate_rsi_ma_indicator(extended_data)
-                            extended_percentile_ranks = calculate_full_percentile_ranks(extended_indicator, backtester.lookback_period)
-                            last_extreme_low_date = find_last_extreme_low_date(extended_percentile_ranks, threshold=5.0)
-                    except Exception:
-                        pass  # Use None if extended fetch fails
-
-                current_price = float(data['Close'].iloc[-1])
-                current_date = data.index[-1].strftime("%Y-%m-%d")
-
-                metadata = STOCK_METADATA.get(ticker)
-                if not metadata:
-                    continue
-
-                regime = "mean_reversion" if metadata.is_mean_reverter else "momentum"
-
-                in_extreme_low = current_percentile <= 5.0
-                in_low = 5.0 < current_percentile <= 15.0
-                in_entry_zone = in_extreme_low or in_low
-
-                if current_percentile <= 5.0:
-                    percentile_cohort = "extreme_low"
-                    zone_label = "≤5th percentile (Extreme Low)"
-                elif current_percentile <= 15.0:
-                    percentile_cohort = "low"
-                    zone_label = "5-15th percentile (Low)"
-                elif current_percentile <= 30.0:
-                    percentile_cohort = "medium_low"
-                    zone_label = "15-30th percentile (Medium Low)"
-                elif current_percentile <= 50.0:
-                    percentile_cohort = "medium"
-                    zone_label = "30-50th percentile (Medium)"
-                elif current_percentile <= 70.0:
-                    percentile_cohort = "medium_high"
-                    zone_label = "50-70th percentile (Medium High)"
-                elif current_percentile <= 85.0:
-                    percentile_cohort = "high"
-                    zone_label = "70-85th percentile (High)"
-                else:
-                    percentile_cohort = "extreme_high"
-                    zone_label = "85-100th percentile (Extreme High)"
-
-                cohort_performance = ticker_cohort_data.get(f"cohort_{percentile_cohort}") if ticker_cohort_data else None
-                if not cohort_performance and ticker_cohort_data:
-                    cohort_performance = ticker_cohort_data.get("cohort_all")
-
-                if cohort_performance:
-                    expected_win_rate = cohort_performance["win_rate"]
-                    expected_return = cohort_performance["avg_return"]
-                    expected_holding_days = cohort_performance["avg_holding_days"]
-                    expected_return_per_day = (
-                        expected_return / expected_holding_days if expected_holding_days > 0 else 0
-                    )
-
-                    volatility_multiplier = {"Low": 1.0, "Medium": 1.5, "High": 2.0}.get(
-                        metadata.volatility_level, 1.5
-                    )
-                    risk_adjusted_expectancy = expected_return / volatility_multiplier
-
-                    live_expectancy = {
-                        "expected_win_rate": expected_win_rate,
-                        "expected_return_pct": expected_return,
-                        "expected_holding_days": expected_holding_days,
-                        "expected_return_per_day_pct": expected_return_per_day,
-                        "risk_adjusted_expectancy_pct": risk_adjusted_expectancy,
-                        "sample_size": cohort_performance["count"],
-                    }
-                else:
-                    live_expectancy = {
-                        "expected_win_rate": 0.0,
-                        "expected_return_pct": 0.0,
-                        "expected_holding_days": 0.0,
-                        "expected_return_per_day_pct": 0.0,
-                        "risk_adjusted_expectancy_pct": 0.0,
-                        "sample_size": 0,
-                    }
-
-                current_states.append(
-                    {
-                        "ticker": ticker,
-                        "name": metadata.name,
-                        "current_date": current_date,
-                        "current_price": current_price,
-                        "current_percentile": current_percentile,
-                        "rsi_percentile_252": rsi_percentile_252,
-                        "percentile_cohort": percentile_cohort,
-                        "zone_label": zone_label,
-                        "in_entry_zone": in_entry_zone,
-                        "regime": regime,
-                        "is_mean_reverter": metadata.is_mean_reverter,
-                        "is_momentum": metadata.is_momentum,
-                        "volatility_level": metadata.volatility_level,
-                        "live_expectancy": live_expectancy,  # Expected performance if entering NOW
-                        "last_extreme_low_date": last_extreme_low_date,  # Last date when percentile was ≤5%
-                    }
-                )
-
-            except Exception as e:
-                print(f"  Error getting current state for {ticker}: {e}")
-                continue
+        current_states = _build_daily_state_rows(tickers, batch_daily_frames, cohort_stats_cache)
 
         current_states.sort(key=lambda x: x['current_percentile'])
         print(f"✓ Current market state ready: {len(current_states)} tickers processed")
@@ -3128,12 +3272,7 @@ async def get_current_market_state(
         }
 
         response = _augment_with_prev_midday_snapshot(response, "daily")
-        response = await _augment_with_macdv_daily(response)
-        response = await _augment_with_macdv_d7_stats(response)
-        response = await _augment_with_momentum_regime(response)
-        response = await _augment_with_macdv_percentiles(response)
-        response = await _augment_with_divergence_metrics(response)
-        response = _augment_with_second_order_divergence(response)
+        response = await _augment_daily_rows(response)
 
         # Auto-save midday snapshot if within window and no snapshot exists for today
         now_utc = datetime.now(timezone.utc)
@@ -3167,6 +3306,7 @@ async def get_current_market_state(
         _current_state_cache_timestamp = datetime.now(timezone.utc)
         # Persist full computation to disk for future quick refreshes
         _save_computed_state("daily", response)
+        _daily_state_versions.publish(response)
         return response
 
 
@@ -3397,9 +3537,100 @@ async def get_current_market_state_4h(
 
         _current_state_4h_cache = response
         _current_state_4h_cache_timestamp = datetime.now(timezone.utc)
+        _state_4h_versions.publish(response)
         return response
 
 
+def _sse_event(event: str, data: Dict[str, Any], event_id: str | None = None) -> str:
+    lines = [f"event: {event}"]
+    if event_id:
+        lines.append(f"id: {event_id}")
+    lines.append(f"data: {json.dumps(jsonable_encoder(data), separators=(',', ':'))}")
+    return "\n".join(lines) + "\n\n"
+
+
+def _stream_snapshot(timeframe: str, tickers: frozenset[str] | None) -> Dict[str, Any] | None:
+    """Snapshot of the latest state for ``timeframe``, or None before its first build."""
+    payload = _current_state_cache if timeframe == "daily" else _current_state_4h_cache
+    tracker = _daily_state_versions if timeframe == "daily" else _state_4h_versions
+    if payload:
+        tracker.publish(payload)
+    if not tracker.token:
+        return None
+    rows = [s for s in tracker.market_state if tickers is None or s.get("ticker") in tickers]
+    return {"type": "snapshot", "timeframe": timeframe, "version": tracker.token, "market_state": rows}
+
+
+@router.get("/stream")
+async def stream_market_state(request: Request, tickers: Optional[str] = None, timeframes: Optional[str] = None):
+    """
+    Server-sent events feed of current-state row diffs.
+
+    Opens with a ``snapshot`` event per timeframe (from cache when warm; a timeframe
+    that is still cold gets its snapshot when its first build completes), then emits
+    ``diff`` events (``changed`` rows, ``removed`` tickers, ``version``) whenever a
+    refresh changes a subscribed row. ``tickers`` and ``timeframes`` (``daily``,
+    ``4h``) are comma-separated filters. A client that falls behind receives a fresh
+    ``snapshot`` instead of its backlog.
+    """
+    ticker_filter = (
+        frozenset(t.strip().upper() for t in tickers.split(",") if t.strip()) if tickers else None
+    )
+    requested = {t.strip().lower() for t in (timeframes or "").split(",") if t.strip()}
+    unknown = requested - set(_STREAM_TIMEFRAMES)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown timeframes: {', '.join(sorted(unknown))}")
+    timeframe_filter = frozenset(requested or _STREAM_TIMEFRAMES)
+
+    def snapshots(timeframes: frozenset[str]) -> Dict[str, str]:
+        # Publishing inside _stream_snapshot may broadcast; callers take snapshots
+        # before subscribing (or drop the queue afterwards) so rows aren't sent twice.
+        out = {}
+        for timeframe in _STREAM_TIMEFRAMES:
+            if timeframe in timeframes:
+                snapshot = _stream_snapshot(timeframe, ticker_filter)
+                if snapshot is not None:
+                    out[timeframe] = _sse_event("snapshot", snapshot, f"{timeframe}:{snapshot['version']}")
+        return out
+
+    initial = snapshots(timeframe_filter)
+    subscriber = _state_stream.subscribe(ticker_filter, timeframe_filter)
+
+    async def events():
+        # Timeframes still cold at connect time get their snapshot once the first
+        # build publishes, in place of that build's diff
+        pending = set(timeframe_filter) - set(initial)
+        try:
+            for chunk in initial.values():
+                yield chunk
+            while not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(subscriber.queue.get(), timeout=_STREAM_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                if event["type"] == "resync" or event["timeframe"] in pending:
+                    targets = timeframe_filter if event["type"] == "resync" else frozenset({event["timeframe"]})
+                    chunks = snapshots(targets)
+                    if event["type"] == "resync":
+                        while not subscriber.queue.empty():
+                            subscriber.queue.get_nowait()
+                    pending -= set(chunks)
+                    for chunk in chunks.values():
+                        yield chunk
+                    if chunks or event["type"] == "resync":
+                        continue
+                yield _sse_event("diff", event, f"{event['timeframe']}:{event['version']}")
+        finally:
+            _state_stream.unsubscribe(subscriber)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.get("/current-state-enriched")
 async def get_current_market_state_enriched(force_refresh: bool = False):
     """
@@ -1,5 +1,10 @@
 """
-Telegram Bot — lightweight HTTP wrapper using stdlib only.
+Telegram Bot — lightweight HTTP wrapper.
+
+Messages go out through one pooled httpx.AsyncClient running on a background
+event loop. Sends to the same chat stay in submission order and are paced by
+per-chat and global token buckets; 429 responses are retried after Telegram's
+retry_after.
 
 Reads config from environment:
   TELEGRAM_BOT_TOKEN  — from @BotFather
@@ -7,13 +12,27 @@ Reads config from environment:
   TELEGRAM_WEBHOOK_SECRET — for validating incoming webhook requests
 """
 
+import asyncio
+import concurrent.futures
 import json
 import os
+import threading
+import time
 import urllib.error
 import urllib.parse
 import urllib.request
 from typing import Optional
 
+import httpx
+
+# Telegram allows about one message per second per chat (short bursts are
+# tolerated) and about 30 messages per second across all chats.
+_PER_CHAT_RATE = 1.0
+_PER_CHAT_BURST = 8
+_GLOBAL_RATE = 30.0
+_MAX_RETRIES = 3
+_SEND_TIMEOUT = 15
+
 
 def _token() -> str:
     t = os.getenv("TELEGRAM_BOT_TOKEN", "")
@@ -33,74 +52,164 @@ def _api(method: str) -> str:
     return f"https://api.telegram.org/bot{_token()}/{method}"
 
 
-def send_message(
-    text: str,
+class _TokenBucket:
+    """Async token bucket: `rate` tokens per second, holding at most `burst`."""
+
+    def __init__(self, rate: float, burst: float) -> None:
+        self.rate = rate
+        self.burst = burst
+        self._tokens = burst
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class _Sender:
+    """Background event loop that owns the pooled HTTP client and rate limiters."""
+
+    def __init__(self) -> None:
+        self._loop = asyncio.new_event_loop()
+        threading.Thread(target=self._loop.run_forever, daemon=True, name="telegram-sender").start()
+        self._client: Optional[httpx.AsyncClient] = None
+        self._global: Optional[_TokenBucket] = None
+        self._chats: dict[str, tuple[asyncio.Lock, _TokenBucket]] = {}
+
+    def submit(self, token: str, chat_id: str, payloads: list[dict]) -> "concurrent.futures.Future[bool]":
+        return asyncio.run_coroutine_threadsafe(self._send_chat(token, chat_id, payloads), self._loop)
+
+    async def _send_chat(self, token: str, chat_id: str, payloads: list[dict]) -> bool:
+        if self._client is None:
+            self._client = httpx.AsyncClient(timeout=_SEND_TIMEOUT)
+            self._global = _TokenBucket(_GLOBAL_RATE, _GLOBAL_RATE)
+        if chat_id not in self._chats:
+            self._chats[chat_id] = (asyncio.Lock(), _TokenBucket(_PER_CHAT_RATE, _PER_CHAT_BURST))
+        order_lock, bucket = self._chats[chat_id]
+
+        ok = True
+        # The lock is FIFO, so batches for one chat are delivered in submission order
+        async with order_lock:
+            for payload in payloads:
+                await bucket.acquire()
+                await self._global.acquire()
+                ok = await self._post(token, payload) and ok
+        return ok
+
+    async def _post(self, token: str, payload: dict) -> bool:
+        url = f"https://api.telegram.org/bot{token}/sendMessage"
+        for _ in range(_MAX_RETRIES):
+            try:
+                resp = await self._client.post(url, json=payload)
+            except Exception as exc:
+                print(f"[telegram] send_message error: {exc}")
+                return False
+            if resp.status_code == 429:
+                try:
+                    retry_after = float(resp.json().get("parameters", {}).get("retry_after", 1))
+                except Exception:
+                    retry_after = 1.0
+                print(f"[telegram] rate limited — retrying in {retry_after:.0f}s")
+                await asyncio.sleep(retry_after)
+                continue
+            if resp.status_code >= 400:
+                print(f"[telegram] HTTP {resp.status_code}: {resp.text}")
+                return False
+            try:
+                return bool(resp.json().get("ok"))
+            except Exception:
+                return False
+        return False
+
+
+_sender: Optional[_Sender] = None
+_sender_lock = threading.Lock()
+
+
+def _get_sender() -> _Sender:
+    global _sender
+    with _sender_lock:
+        if _sender is None:
+            _sender = _Sender()
+        return _sender
+
+
+def submit_messages(
+    texts: list[str],
     chat_id: Optional[str] = None,
     parse_mode: str = "HTML",
     disable_web_page_preview: bool = True,
-) -> bool:
+    reply_markup: Optional[dict] = None,
+) -> "concurrent.futures.Future[bool]":
     """
-    Send a single Telegram message.  Returns True on success.
-    Silently returns False if the bot token / chat ID is not configured yet.
+    Queue messages for delivery without waiting; the future resolves to True
+    if every message was accepted.  Resolves to False straight away if the
+    bot token / chat ID is not configured yet.  `reply_markup` (inline
+    buttons) is attached to the last message.
     """
     token = os.getenv("TELEGRAM_BOT_TOKEN", "")
     cid = chat_id or os.getenv("TELEGRAM_CHAT_ID", "")
     if not token or not cid:
         print("[telegram] Bot token or chat ID not set — skipping send.")
-        return False
+        done: concurrent.futures.Future = concurrent.futures.Future()
+        done.set_result(False)
+        return done
 
-    payload = {
-        "chat_id": cid,
-        "text": text,
-        "parse_mode": parse_mode,
-        "disable_web_page_preview": disable_web_page_preview,
-    }
-    data = json.dumps(payload).encode("utf-8")
-    req = urllib.request.Request(
-        f"https://api.telegram.org/bot{token}/sendMessage",
-        data=data,
-        headers={"Content-Type": "application/json"},
-        method="POST",
-    )
-    try:
-        with urllib.request.urlopen(req, timeout=15) as resp:
-            result = json.loads(resp.read())
-            return bool(result.get("ok"))
-    except urllib.error.HTTPError as e:
-        body = e.read().decode("utf-8", errors="replace")
-        print(f"[telegram] HTTP {e.code}: {body}")
-        return False
-    except Exception as exc:
-        print(f"[telegram] send_message error: {exc}")
-        return False
+    payloads = [
+        {
+            "chat_id": cid,
+            "text": text,
+            "parse_mode": parse_mode,
+            "disable_web_page_preview": disable_web_page_preview,
+        }
+        for text in texts
+    ]
+    if reply_markup is not None and payloads:
+        payloads[-1]["reply_markup"] = reply_markup
+    return _get_sender().submit(token, str(cid), payloads)
 
 
-def send_messages(
-    texts: list[str],
+def send_message(
+    text: str,
     chat_id: Optional[str] = None,
     parse_mode: str = "HTML",
+    disable_web_page_preview: bool = True,
 ) -> bool:
-    """Send multiple messages in order."""
-    ok = True
-    for t in texts:
-        if not send_message(t, chat_id=chat_id, parse_mode=parse_mode):
-            ok = False
-    return ok
+    """
+    Send a single Telegram message.  Returns True on success.
+    Silently returns False if the bot token / chat ID is not configured yet.
+    """
+    return submit_messages(
+        [text], chat_id=chat_id, parse_mode=parse_mode,
+        disable_web_page_preview=disable_web_page_preview,
+    ).result()
 
 
-def split_and_send(
-    text: str,
+def send_messages(
+    texts: list[str],
     chat_id: Optional[str] = None,
     parse_mode: str = "HTML",
-    max_len: int = 4096,
 ) -> bool:
+    """Send multiple messages in order."""
+    return submit_messages(texts, chat_id=chat_id, parse_mode=parse_mode).result()
+
+
+def split_message(text: str, max_len: int = 4096) -> list[str]:
     """
     Split text at newlines to respect Telegram's 4096-char message limit.
     Handles <pre> blocks: closes them before a split and reopens in the next chunk
     so Telegram's HTML parser never sees unbalanced tags.
     """
     if len(text) <= max_len:
-        return send_message(text, chat_id=chat_id, parse_mode=parse_mode)
+        return [text]
 
     chunks: list[str] = []
     current = ""
@@ -128,8 +237,17 @@ def split_and_send(
 
     if current:
         chunks.append(current)
+    return chunks
 
-    return send_messages(chunks, chat_id=chat_id, parse_mode=parse_mode)
+
+def split_and_send(
+    text: str,
+    chat_id: Optional[str] = None,
+    parse_mode: str = "HTML",
+    max_len: int = 4096,
+) -> bool:
+    """Send text as one or more messages, split with split_message()."""
+    return send_messages(split_message(text, max_len=max_len), chat_id=chat_id, parse_mode=parse_mode)
 
 
 def is_configured() -> bool:
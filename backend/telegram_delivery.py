@@ -1,17 +1,32 @@
 """
 Shared snapshot delivery logic used by both the webhook handler and the poller.
 
-_deliver(chat_id, msg_type)  — fetches live data and sends snapshot(s).
+_deliver(chat_id, msg_type)  — renders snapshot(s) and sends them to chat_id.
+refresh_snapshot_cache()     — precomputes the scheduled sections; the API runs
+                               it every SNAPSHOT_REFRESH_SECONDS.
+
+Each msg_type is an ordered list of sections. Rendered sections are cached
+for SNAPSHOT_TTL_SECONDS, so a command only computes sections the scheduled
+refresh has not already rendered. When sections are built, the independent
+stages (macro data, the live swing overlay, options / gamma / SMA200 / Kelly
+sections) run concurrently.
 
 msg_type: "all" | "macro" | "mr" | "momentum" | "divergence" | "cov"
           | "covgreen" | "sma200" | "gammawalls" | "maxpain"
           | "kelly_hist" | "kelly_dyn" | "kelly_strategy"
+          | "rsima4h" | "cov4h"
 """
 
 from __future__ import annotations
 
+import contextvars
+import os
 import sys
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
+from typing import Callable
 
 # Allow importing backend modules when called from scripts/
 _here = Path(__file__).resolve().parent
@@ -19,176 +34,359 @@ if str(_here) not in sys.path:
     sys.path.insert(0, str(_here))
 
 
-def _deliver(chat_id: str, msg_type: str = "all") -> None:
-    """Fetch live data and send Telegram snapshot(s) to chat_id."""
-    from macro_rsi_calculator import (
-        fetch_all_macro_data,
-        compute_live_swing_percentiles,
-        compute_live_full_rows,
-    )
+SNAPSHOT_REFRESH_SECONDS = int(os.getenv("TELEGRAM_SNAPSHOT_REFRESH_SECONDS", "300"))
+SNAPSHOT_TTL_SECONDS = 2 * SNAPSHOT_REFRESH_SECONDS
+_MAX_WORKERS = 6
+
+# Sections sent for each message type, in order
+MESSAGE_SECTIONS: dict[str, tuple[str, ...]] = {
+    "all":            ("macro", "mr", "momentum", "cov", "optwatch"),
+    "macro":          ("macro",),
+    "mr":             ("mr",),
+    "momentum":       ("momentum",),
+    "divergence":     ("divergence",),
+    "cov":            ("cov",),
+    "covgreen":       ("covgreen",),
+    "sma200":         ("sma200",),
+    "gammawalls":     ("gammawalls",),
+    "maxpain":        ("maxpain",),
+    "kelly_hist":     ("kelly_hist",),
+    "kelly_dyn":      ("kelly_dyn",),
+    "kelly_strategy": ("kelly_strategy",),
+    "rsima4h":        ("rsima4h",),
+    "cov4h":          ("cov4h",),
+}
+
+# Sections kept warm by refresh_snapshot_cache()
+SCHEDULED_SECTIONS: tuple[str, ...] = (
+    "macro", "mr", "momentum", "cov", "optwatch",
+    "divergence", "covgreen", "sma200", "gammawalls", "maxpain",
+)
+
+_MACRO_SECTIONS = {"macro", "mr", "momentum"}
+_SWING_SECTIONS = {"mr", "momentum", "divergence", "cov", "covgreen"}
+# Sections that show four_h_percentile / first-order divergence
+_H4_SECTIONS = {"mr", "divergence"}
+
+# {section: (messages, rendered_at)}
+_section_cache: dict[str, tuple[list[str], float]] = {}
+# {section: build in flight}; a section is built by one caller at a time and
+# concurrent commands / the refresh job wait for it, while unrelated sections
+# build in parallel
+_section_builds: dict[str, Future] = {}
+_cache_lock = threading.Lock()
+
+
+# ── Section renderers ──────────────────────────────────────────────────────────
+
+def _render_optwatch() -> list[str]:
+    try:
+        from telegram_options_handler import handle_optwatch_brief
+        return [handle_optwatch_brief()]
+    except Exception as exc:
+        print(f"[delivery] optwatch brief error: {exc}")
+        return []
+
+
+def _render_sma200() -> list[str]:
+    from macdv_calculator import SWING_FRAMEWORK_TICKERS
+    from telegram_formatters import format_sma200_snapshot
+    return [format_sma200_snapshot(SWING_FRAMEWORK_TICKERS)]
+
+
+def _render_gammawalls() -> list[str]:
+    from telegram_formatters import format_gamma_walls
+    return [format_gamma_walls()]
+
+
+def _render_maxpain() -> list[str]:
+    from telegram_formatters import format_max_pain
+    return [format_max_pain()]
+
+
+def _render_kelly_hist() -> list[str]:
+    from macdv_calculator import SWING_FRAMEWORK_TICKERS
+    from kelly_analyzer import historical_kelly, format_historical_kelly
+    return [format_historical_kelly(historical_kelly(SWING_FRAMEWORK_TICKERS, lookback=2000),
+                                    title="Historical (2000-day)")]
+
+
+def _render_kelly_dyn() -> list[str]:
+    from macdv_calculator import SWING_FRAMEWORK_TICKERS
+    from kelly_analyzer import dynamic_kelly, format_dynamic_kelly, format_percentile_kelly
+    res = dynamic_kelly(SWING_FRAMEWORK_TICKERS, lookback=252)
+    return [format_dynamic_kelly(res), format_percentile_kelly(res)]
+
+
+def _render_kelly_strategy() -> list[str]:
+    from macdv_calculator import SWING_FRAMEWORK_TICKERS
+    from kelly_analyzer import strategy_kelly, format_strategy_kelly
+    return [format_strategy_kelly(strategy_kelly(SWING_FRAMEWORK_TICKERS, horizon=5), horizon=5)]
+
+
+def _render_rsima4h() -> list[str]:
+    from telegram_formatters import format_4h_rsima
+    return [format_4h_rsima()]
+
+
+def _render_cov4h() -> list[str]:
+    from telegram_formatters import format_4h_cov
+    return [format_4h_cov()]
+
+
+# Sections that need neither macro data nor the live swing rows
+_INDEPENDENT_RENDERERS: dict[str, Callable[[], list[str]]] = {
+    "optwatch":       _render_optwatch,
+    "sma200":         _render_sma200,
+    "gammawalls":     _render_gammawalls,
+    "maxpain":        _render_maxpain,
+    "kelly_hist":     _render_kelly_hist,
+    "kelly_dyn":      _render_kelly_dyn,
+    "kelly_strategy": _render_kelly_strategy,
+    "rsima4h":        _render_rsima4h,
+    "cov4h":          _render_cov4h,
+}
+# Independent sections that read daily history through the shared frame cache
+_FRAME_RENDERERS = {"sma200"}
+
+
+def _render_swing_section(section: str, swing_data: list[dict], macro_data: dict) -> list[str]:
     from telegram_formatters import (
-        _load_swing_snapshot,
-        _enrich_second_order,
         format_macro_dashboard,
         format_mean_reversion,
         format_momentum,
         format_divergence,
         format_cov_snapshot,
         format_cov_green_snapshot,
-        format_sma200_snapshot,
-        format_gamma_walls,
-        format_max_pain,
     )
-    from telegram_bot import split_and_send
+    if section == "macro":
+        return [format_macro_dashboard(macro_data)]
+    if section == "mr":
+        return [format_mean_reversion(swing_data, macro_data)]
+    if section == "momentum":
+        return [format_momentum(swing_data, macro_data)]
+    if section == "divergence":
+        return [format_divergence(swing_data, macro_data)]
+    if section == "cov":
+        return [format_cov_snapshot(swing_data)]
+    if section == "covgreen":
+        return [format_cov_green_snapshot(swing_data)]
+    raise ValueError(f"unknown snapshot section: {section}")
 
-    print(f"[delivery] type={msg_type}  chat={chat_id}")
 
-    # Only fetch macro data when it's actually needed
-    needs_macro = msg_type in ("all", "macro", "mr", "momentum")
-    macro_data = fetch_all_macro_data() if needs_macro else {}
-
-    swing_data = list(_load_swing_snapshot() or [])
-
-    needs_live = msg_type in ("all", "mr", "momentum", "divergence", "cov", "covgreen")
-    if needs_live and swing_data is not None:
-        # Inject live rows for tickers in the universe but absent from the snapshot
-        from macdv_calculator import SWING_FRAMEWORK_TICKERS
-        snapshot_tickers = {row.get("ticker") for row in swing_data}
-        new_tickers = [t for t in SWING_FRAMEWORK_TICKERS if t not in snapshot_tickers]
-        if new_tickers:
-            print(f"[delivery] computing live rows for new tickers: {new_tickers}")
-            new_rows = compute_live_full_rows(new_tickers)
-            swing_data.extend(new_rows)
-
-        # Overlay snapshot rows with live RSI-MA / CoV from yfinance
-        live = compute_live_swing_percentiles(swing_data)
-        for row in swing_data:
-            ld = live.get(row.get("ticker", ""), {})
-            if ld.get("current_percentile") is not None:
-                row["current_percentile"] = ld["current_percentile"]
-            if ld.get("price") is not None:
-                row["current_price"]    = ld["price"]
-                row["price_change_pct"] = ld.get("price_chg_pct")
-            if ld.get("rsi_ma") is not None:
-                row["rsi_ma"] = ld["rsi_ma"]
-            if ld.get("cov_dir_metric") is not None:
-                row["cov_dir_metric"] = ld["cov_dir_metric"]
-            if ld.get("cov_bar_color") is not None:
-                row["cov_bar_color"] = ld["cov_bar_color"]
-        # Re-enrich second-order after live percentile update
-        _enrich_second_order(swing_data)
-
-    # ── For divergence: fill in four_h_percentile live for any ticker missing it
-    if msg_type in ("divergence", "all"):
-        missing_4h = [
-            r["ticker"] for r in swing_data
-            if r.get("current_percentile") is not None
-            and r.get("four_h_percentile") is None
-            and r.get("ticker")
-        ]
-        if missing_4h:
-            print(f"[delivery] computing live 4H pct for {len(missing_4h)} tickers: {missing_4h}")
-            try:
-                from rsima_cov_4h_live import compute_live_4h_percentiles
-                h4_pcts = compute_live_4h_percentiles(missing_4h)
-                ticker_map = {r["ticker"]: r for r in swing_data}
-                # Default first-order divergence thresholds for tickers not in snapshot
-                _DEFAULT_P85 = 20.0
-                _DEFAULT_P95 = 30.0
-                for ticker, h4_pct in h4_pcts.items():
-                    if h4_pct is None:
-                        continue
-                    row = ticker_map.get(ticker)
-                    if row is None:
-                        continue
-                    daily_pct = row.get("current_percentile")
-                    row["four_h_percentile"]  = h4_pct
-                    if daily_pct is not None:
-                        div = float(daily_pct) - float(h4_pct)
-                        row["divergence_pct"]     = div
-                        row["abs_divergence_pct"] = abs(div)
-                        ad = abs(div)
-                        p85 = row.get("p85_threshold") or _DEFAULT_P85
-                        p95 = row.get("p95_threshold") or _DEFAULT_P95
-                        row.setdefault("p85_threshold", p85)
-                        row.setdefault("p95_threshold", p95)
-                        if ad <= p85:
-                            row["dislocation_level"] = "Normal"
-                            row["dislocation_color"] = "⚪"
-                        elif ad <= p95:
-                            row["dislocation_level"] = "Significant (P85)"
-                            row["dislocation_color"] = "⚠️"
-                        else:
-                            row["dislocation_level"] = "Extreme (P95)"
-                            row["dislocation_color"] = "⚡"
-            except Exception as exc:
-                print(f"[delivery] live 4H pct error: {exc}")
-
-    if msg_type in ("all", "macro"):
-        split_and_send(format_macro_dashboard(macro_data), chat_id=chat_id)
-
-    if msg_type in ("all", "mr"):
-        split_and_send(format_mean_reversion(swing_data, macro_data), chat_id=chat_id)
-
-    if msg_type in ("all", "momentum"):
-        split_and_send(format_momentum(swing_data, macro_data), chat_id=chat_id)
-
-    if msg_type in ("all", "cov"):
-        split_and_send(format_cov_snapshot(swing_data), chat_id=chat_id)
-
-    if msg_type == "all":
-        try:
-            from telegram_options_handler import handle_optwatch_brief
-            split_and_send(handle_optwatch_brief(), chat_id=chat_id)
-        except Exception as exc:
-            print(f"[delivery] optwatch brief error: {exc}")
-
-    if msg_type == "divergence":
-        split_and_send(format_divergence(swing_data, macro_data), chat_id=chat_id)
-
-    if msg_type == "covgreen":
-        split_and_send(format_cov_green_snapshot(swing_data), chat_id=chat_id)
-
-    if msg_type == "sma200":
-        from macdv_calculator import SWING_FRAMEWORK_TICKERS
-        split_and_send(format_sma200_snapshot(SWING_FRAMEWORK_TICKERS), chat_id=chat_id)
-
-    if msg_type == "gammawalls":
-        split_and_send(format_gamma_walls(), chat_id=chat_id)
-
-    if msg_type == "maxpain":
-        split_and_send(format_max_pain(), chat_id=chat_id)
-
-    if msg_type in ("kelly_hist", "kelly_dyn", "kelly_strategy"):
-        from macdv_calculator import SWING_FRAMEWORK_TICKERS
-        from kelly_analyzer import (
-            historical_kelly, dynamic_kelly, strategy_kelly,
-            format_historical_kelly, format_dynamic_kelly,
-            format_percentile_kelly, format_strategy_kelly,
-        )
-        if msg_type == "kelly_hist":
-            split_and_send(
-                format_historical_kelly(historical_kelly(SWING_FRAMEWORK_TICKERS, lookback=2000),
-                                        title="Historical (2000-day)"),
-                chat_id=chat_id,
-            )
-        elif msg_type == "kelly_dyn":
-            res = dynamic_kelly(SWING_FRAMEWORK_TICKERS, lookback=252)
-            split_and_send(format_dynamic_kelly(res), chat_id=chat_id)
-            split_and_send(format_percentile_kelly(res), chat_id=chat_id)
-        elif msg_type == "kelly_strategy":
-            split_and_send(
-                format_strategy_kelly(strategy_kelly(SWING_FRAMEWORK_TICKERS, horizon=5),
-                                      horizon=5),
-                chat_id=chat_id,
+# ── Live data stages ───────────────────────────────────────────────────────────
+
+def _live_swing_rows(swing_data: list[dict], fill_4h: bool) -> list[dict]:
+    """Overlay the swing snapshot with live rows, RSI-MA / CoV and (optionally) 4H percentiles."""
+    from macdv_calculator import SWING_FRAMEWORK_TICKERS
+    from macro_rsi_calculator import compute_live_swing_percentiles, compute_live_full_rows
+    from telegram_formatters import _enrich_second_order
+
+    # Inject live rows for tickers in the universe but absent from the snapshot
+    snapshot_tickers = {row.get("ticker") for row in swing_data}
+    new_tickers = [t for t in SWING_FRAMEWORK_TICKERS if t not in snapshot_tickers]
+    if new_tickers:
+        print(f"[delivery] computing live rows for new tickers: {new_tickers}")
+        new_rows = compute_live_full_rows(new_tickers)
+        swing_data.extend(new_rows)
+
+    # Overlay snapshot rows with live RSI-MA / CoV from yfinance
+    live = compute_live_swing_percentiles(swing_data)
+    for row in swing_data:
+        ld = live.get(row.get("ticker", ""), {})
+        if ld.get("current_percentile") is not None:
+            row["current_percentile"] = ld["current_percentile"]
+        if ld.get("price") is not None:
+            row["current_price"]    = ld["price"]
+            row["price_change_pct"] = ld.get("price_chg_pct")
+        if ld.get("rsi_ma") is not None:
+            row["rsi_ma"] = ld["rsi_ma"]
+        if ld.get("cov_dir_metric") is not None:
+            row["cov_dir_metric"] = ld["cov_dir_metric"]
+        if ld.get("cov_bar_color") is not None:
+            row["cov_bar_color"] = ld["cov_bar_color"]
+    # Re-enrich second-order after live percentile update
+    _enrich_second_order(swing_data)
+
+    if fill_4h:
+        _fill_live_4h(swing_data)
+    return swing_data
+
+
+def _fill_live_4h(swing_data: list[dict]) -> None:
+    """Fill in four_h_percentile (and first-order divergence) live for any ticker missing it."""
+    missing_4h = [
+        r["ticker"] for r in swing_data
+        if r.get("current_percentile") is not None
+        and r.get("four_h_percentile") is None
+        and r.get("ticker")
+    ]
+    if not missing_4h:
+        return
+    print(f"[delivery] computing live 4H pct for {len(missing_4h)} tickers: {missing_4h}")
+    try:
+        from rsima_cov_4h_live import compute_live_4h_percentiles
+        h4_pcts = compute_live_4h_percentiles(missing_4h)
+        ticker_map = {r["ticker"]: r for r in swing_data}
+        # Default first-order divergence thresholds for tickers not in snapshot
+        _DEFAULT_P85 = 20.0
+        _DEFAULT_P95 = 30.0
+        for ticker, h4_pct in h4_pcts.items():
+            if h4_pct is None:
+                continue
+            row = ticker_map.get(ticker)
+            if row is None:
+                continue
+            daily_pct = row.get("current_percentile")
+            row["four_h_percentile"]  = h4_pct
+            if daily_pct is not None:
+                div = float(daily_pct) - float(h4_pct)
+                row["divergence_pct"]     = div
+                row["abs_divergence_pct"] = abs(div)
+                ad = abs(div)
+                p85 = row.get("p85_threshold") or _DEFAULT_P85
+                p95 = row.get("p95_threshold") or _DEFAULT_P95
+                row.setdefault("p85_threshold", p85)
+                row.setdefault("p95_threshold", p95)
+                if ad <= p85:
+                    row["dislocation_level"] = "Normal"
+                    row["dislocation_color"] = "⚪"
+                elif ad <= p95:
+                    row["dislocation_level"] = "Significant (P85)"
+                    row["dislocation_color"] = "⚠️"
+                else:
+                    row["dislocation_level"] = "Extreme (P95)"
+                    row["dislocation_color"] = "⚡"
+    except Exception as exc:
+        print(f"[delivery] live 4H pct error: {exc}")
+
+
+# ── Building and caching ───────────────────────────────────────────────────────
+
+def build_sections(sections: list[str]) -> dict[str, list[str]]:
+    """
+    Render `sections` (messages per section, unsplit) from live data.
+
+    Independent sections start first; macro data and the live swing overlay
+    are computed concurrently once the union of daily symbols has been fetched
+    in a single download.
+    """
+    from macdv_calculator import SWING_FRAMEWORK_TICKERS
+    from macro_rsi_calculator import fetch_all_macro_data, macro_symbols, shared_frames
+    from telegram_formatters import _load_swing_snapshot
+    from ticker_utils import resolve_yahoo_symbol
+
+    needs_macro = any(s in _MACRO_SECTIONS for s in sections)
+    needs_swing = any(s in _SWING_SECTIONS for s in sections)
+    swing_data = list(_load_swing_snapshot() or []) if needs_swing else []
+
+    # Union of daily symbols, fetched once for every stage below
+    symbols = macro_symbols() if needs_macro else []
+    live_tickers: list[str] = []
+    if needs_swing:
+        live_tickers += [row.get("ticker") for row in swing_data] + list(SWING_FRAMEWORK_TICKERS)
+    if "sma200" in sections:
+        live_tickers += list(SWING_FRAMEWORK_TICKERS)
+    symbols += [resolve_yahoo_symbol(t) for t in dict.fromkeys(live_tickers) if t]
+
+    with ThreadPoolExecutor(max_workers=_MAX_WORKERS, thread_name_prefix="snapshot") as pool:
+        def submit(fn: Callable, *args) -> Future:
+            # Each task runs in a copy of this context, so it sees the shared frames
+            return pool.submit(contextvars.copy_context().run, fn, *args)
+
+        futures: dict[str, Future] = {
+            s: submit(_INDEPENDENT_RENDERERS[s])
+            for s in sections if s in _INDEPENDENT_RENDERERS and s not in _FRAME_RENDERERS
+        }
+        with shared_frames(symbols):
+            futures.update({s: submit(_INDEPENDENT_RENDERERS[s]) for s in sections if s in _FRAME_RENDERERS})
+            macro_future = submit(fetch_all_macro_data) if needs_macro else None
+            swing_future = (
+                submit(_live_swing_rows, swing_data, any(s in _H4_SECTIONS for s in sections))
+                if needs_swing else None
             )
+            macro_data = macro_future.result() if macro_future else {}
+            swing_data = swing_future.result() if swing_future else swing_data
+
+        rendered: dict[str, list[str]] = {}
+        for section in sections:
+            if section in futures:
+                rendered[section] = futures[section].result()
+            else:
+                rendered[section] = _render_swing_section(section, swing_data, macro_data)
+    return rendered
+
+
+def _fresh_sections(sections: list[str], max_age: float) -> dict[str, list[str]]:
+    now = time.time()
+    return {
+        s: _section_cache[s][0] for s in sections
+        if s in _section_cache and now - _section_cache[s][1] < max_age
+    }
+
+
+def _build_into_cache(sections: list[str], max_age: float) -> dict[str, list[str]]:
+    """
+    Messages for `sections`, building those missing from the cache or older
+    than max_age. Sections already being built by another caller are waited
+    on instead of built twice; only the sections this call claimed are built.
+    """
+    with _cache_lock:
+        cached = _fresh_sections(sections, max_age)
+        pending: dict[str, Future] = {}
+        owned: list[str] = []
+        for section in sections:
+            if section in cached or section in pending:
+                continue
+            future = _section_builds.get(section)
+            if future is None:
+                future = Future()
+                _section_builds[section] = future
+                owned.append(section)
+            pending[section] = future
+
+    if owned:
+        try:
+            built = build_sections(owned)
+        except BaseException as e:
+            with _cache_lock:
+                for section in owned:
+                    _section_builds.pop(section, None)
+            for section in owned:
+                pending[section].set_exception(e)
+            raise
+        now = time.time()
+        with _cache_lock:
+            for section in owned:
+                _section_cache[section] = (built[section], now)
+                _section_builds.pop(section, None)
+        for section in owned:
+            pending[section].set_result(built[section])
 
-    if msg_type == "rsima4h":
-        from telegram_formatters import format_4h_rsima
-        split_and_send(format_4h_rsima(), chat_id=chat_id)
+    cached.update({section: future.result() for section, future in pending.items()})
+    return cached
 
-    if msg_type == "cov4h":
-        from telegram_formatters import format_4h_cov
-        split_and_send(format_4h_cov(), chat_id=chat_id)
 
+def render_snapshot(msg_type: str, max_age: float = SNAPSHOT_TTL_SECONDS) -> list[str]:
+    """Messages for msg_type, rendering only sections missing from the cache or older than max_age."""
+    sections = list(MESSAGE_SECTIONS.get(msg_type, ()))
+    cached = _build_into_cache(sections, max_age)
+    return [text for s in sections for text in cached[s]]
+
+
+def refresh_snapshot_cache(sections: tuple[str, ...] = SCHEDULED_SECTIONS) -> None:
+    """Re-render `sections` into the message cache (scheduled job)."""
+    started = time.time()
+    built = _build_into_cache(list(sections), max_age=0)
+    print(f"[delivery] snapshot cache refreshed ({len(built)} sections, {time.time() - started:.1f}s)")
+
+
+def _deliver(chat_id: str, msg_type: str = "all") -> None:
+    """Send Telegram snapshot(s) to chat_id, rendering from the message cache when fresh."""
+    from telegram_bot import send_messages, split_message
+
+    print(f"[delivery] type={msg_type}  chat={chat_id}")
+    chunks = [chunk for text in render_snapshot(msg_type) for chunk in split_message(text)]
+    if chunks:
+        send_messages(chunks, chat_id=chat_id)
     print("[delivery] done.")
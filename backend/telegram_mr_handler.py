@@ -7,7 +7,7 @@ Three views:
   • Overlapping (DCA-cluster) (scale-in across the oversold streak — same doc)
 
 The menu uses Telegram inline keyboard buttons; taps come back as callback_query
-and are routed by scripts/telegram_poll.py.
+and are routed by telegram_poll_worker.resolve_callback.
 """
 
 from __future__ import annotations
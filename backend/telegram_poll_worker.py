@@ -0,0 +1,482 @@
+"""
+Telegram command worker — shared by long-polling and the webhook.
+
+Every update is acknowledged as soon as it arrives (the "⏳ Fetching …"
+reply, or answerCallbackQuery for button taps); the command itself runs on a
+bounded thread pool with a per-command timeout, so one slow /options scan or
+Kelly rebuild no longer holds up the updates behind it.
+
+  - An identical command already in flight for the same chat is not started
+    a second time.
+  - At most TELEGRAM_COMMAND_QUEUE commands wait for a free worker; beyond
+    that the bot replies that it is busy.
+  - metrics() reports queue depth and per-command latency histograms
+    (served on GET /telegram/status).
+
+Polling mode:  api.py lifespan / scripts/telegram_poll.py run poll_forever()
+Webhook mode:  POST /telegram/webhook passes each update to handle_update()
+"""
+
+from __future__ import annotations
+
+import asyncio
+import bisect
+import importlib
+import os
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Optional, Union
+
+import httpx
+
+from telegram_bot import submit_messages
+
+_MAX_WORKERS = int(os.getenv("TELEGRAM_COMMAND_WORKERS", "4"))
+_MAX_QUEUE = int(os.getenv("TELEGRAM_COMMAND_QUEUE", "16"))
+_DEFAULT_TIMEOUT = float(os.getenv("TELEGRAM_COMMAND_TIMEOUT", "180"))
+_SLOW_TIMEOUT = 2 * _DEFAULT_TIMEOUT     # universe-wide scans (/value refresh, /ffd)
+_FAST_TIMEOUT = 30.0                     # static reference text
+_POLL_TIMEOUT = 30                       # getUpdates long-poll seconds
+
+# Snapshot sections rendered by telegram_delivery._deliver
+COMMANDS = {
+    "/update":          "all",
+    "/macro":           "macro",
+    # NOTE: /mr is handled by a dedicated branch (live / non-overlap / overlap chooser)
+    "/momentum":        "momentum",
+    "/divergence":      "divergence",
+    "/cov":             "cov",
+    "/covgreen":        "covgreen",
+    "/200sma":          "sma200",
+    "/gammawalls":      "gammawalls",
+    "/maxpain":         "maxpain",
+    # Kelly Criterion
+    "/kelly_hist":      "kelly_hist",      # historical 2000-day Kelly ranked
+    "/kelly_dyn":       "kelly_dyn",       # dynamic 252-day Kelly + percentile table
+    "/kelly_strategy":  "kelly_strategy",  # strategy trade-return Kelly by RSI-MA bucket
+    "/rsima4h":         "rsima4h",
+    "/cov4h":           "cov4h",
+}
+
+# A reply is message text, or (text, reply_markup) for a message with inline buttons
+Reply = Union[str, tuple[str, dict]]
+
+
+@dataclass(frozen=True)
+class CommandJob:
+    """One command to run off the event loop."""
+    key: str                                # dedupe key, e.g. "/options qqq"
+    label: str                              # shown in error replies, e.g. "/options"
+    run: Callable[[str], list[Reply]]       # run(chat_id) -> replies still to send
+    ack: Optional[str] = None               # sent before the job is queued
+    timeout: float = _DEFAULT_TIMEOUT
+
+
+def _call(module: str, func: str, *args) -> Callable[[str], list[Reply]]:
+    """Job body calling module.func(*args); handlers are imported lazily (heavy deps)."""
+    def run(chat_id: str) -> list[Reply]:
+        return list(getattr(importlib.import_module(module), func)(*args))
+    return run
+
+
+def _text(module: str, func: str) -> Callable[[str], list[Reply]]:
+    """Job body for a handler that returns a single message."""
+    def run(chat_id: str) -> list[Reply]:
+        return [getattr(importlib.import_module(module), func)()]
+    return run
+
+
+def _deliver(msg_type: str) -> Callable[[str], list[Reply]]:
+    """Job body for a snapshot section; _deliver sends its own messages."""
+    def run(chat_id: str) -> list[Reply]:
+        from telegram_delivery import _deliver as deliver
+        deliver(chat_id, msg_type)
+        return []
+    return run
+
+
+def _sortino(active: str) -> Callable[[str], list[Reply]]:
+    def run(chat_id: str) -> list[Reply]:
+        from telegram_sortino_handler import handle_sortino_cov, handle_sortino_nocov, sortino_menu_markup
+        parts = handle_sortino_cov() if active == "cov" else handle_sortino_nocov()
+        return [*parts[:-1], (parts[-1], sortino_menu_markup(active))]
+    return run
+
+
+def _mr_menu(chat_id: str) -> list[Reply]:
+    from telegram_mr_handler import MENU_TEXT, mr_menu_markup
+    return [(MENU_TEXT, mr_menu_markup())]
+
+
+def _remainder(text: str, prefix: str) -> str:
+    return text[len(prefix):].strip().split("@")[0].strip()
+
+
+def _first_word(text: str) -> str:
+    return text.split()[0] if text.split() else ""
+
+
+def resolve_command(text: str) -> Optional[CommandJob]:
+    """Map a chat message to the job that answers it (None for non-commands)."""
+    text = text.strip()
+    if not text:
+        return None
+    lower = text.lower()
+    # Strip @botname suffix Telegram appends in groups/channels
+    # e.g. "/mr@MyBot" → "/mr"
+    cmd = lower.split()[0].split("@")[0]
+
+    if cmd in ("/help", "/guide"):
+        func = "get_help_message" if cmd == "/help" else "get_guide_message"
+        return CommandJob(cmd, cmd, _text("telegram_formatters", func), timeout=_FAST_TIMEOUT)
+    if cmd.startswith("/sizing"):
+        arg = _remainder(lower, "/sizing")
+        return CommandJob(f"/sizing {arg}", "/sizing",
+                          _call("telegram_sizing_reference", "handle_sizing_command", arg), timeout=_FAST_TIMEOUT)
+    if cmd.startswith("/variants"):
+        arg = _remainder(lower, "/variants")
+        return CommandJob(f"/variants {arg}", "/variants",
+                          _call("telegram_variance_reference", "handle_variants_command", arg), timeout=_FAST_TIMEOUT)
+    if cmd.startswith("/options"):
+        arg = _first_word(_remainder(lower, "/options"))
+        return CommandJob(f"/options {arg}", "/options",
+                          _call("telegram_options_handler", "handle_options_command", arg),
+                          ack="⏳ Scanning <b>options signals</b> (QQQ &amp; SPY)…")
+    if cmd.startswith("/iv"):
+        return CommandJob("/iv", "/iv", _call("telegram_options_handler", "handle_iv_command"),
+                          ack="⏳ Fetching <b>IV dashboard</b> (VIX / VXN / VIX9D)…")
+    if cmd.startswith("/optwatch"):
+        return CommandJob("/optwatch", "/optwatch", _call("telegram_options_handler", "handle_optwatch_command"),
+                          ack="⏳ Checking <b>RSI-MA percentiles</b> (QQQ &amp; SPY)…")
+    if cmd.startswith("/optlog"):
+        try:
+            n = int(_first_word(_remainder(text, "/optlog")) or 10)
+        except ValueError:
+            n = 10
+        return CommandJob(f"/optlog {n}", "/optlog", _call("telegram_options_handler", "handle_optlog_command", n))
+    if cmd.startswith("/optbacktest"):
+        return CommandJob("/optbacktest", "/optbacktest",
+                          _call("telegram_options_handler", "handle_optbacktest_command"))
+    if cmd == "/mr":
+        arg = _first_word(_remainder(lower, "/mr"))
+        if arg in ("nonoverlap", "nonoverlapping", "non-overlap", "no"):
+            return CommandJob("/mr nonoverlap", "/mr", _call("telegram_mr_handler", "handle_mr_nonoverlap"))
+        if arg in ("overlap", "overlapping", "dca"):
+            return CommandJob("/mr overlap", "/mr", _call("telegram_mr_handler", "handle_mr_overlap"))
+        if arg in ("live", "oversold"):
+            return CommandJob("/mr live", "/mr", _deliver("mr"), ack="⏳ Fetching <b>live oversold table</b>…")
+        return CommandJob("/mr", "/mr", _mr_menu, timeout=_FAST_TIMEOUT)
+    if cmd == "/value":
+        arg = _first_word(_remainder(text, "/value"))
+        if arg.lower() in ("refresh", "update", "rebuild", "fetch", "live"):
+            ack = "⏳ Re-fetching <b>all fundamentals live</b> (~34 stocks, may take a minute)…"
+        elif arg:
+            ack = f"⏳ Fetching <b>{arg.upper()}</b> fundamentals (live)…"
+        else:
+            ack = None
+        return CommandJob(f"/value {arg.lower()}", "/value", _call("telegram_value_handler", "handle_value_command", arg),
+                          ack=ack, timeout=_SLOW_TIMEOUT)
+    if cmd == "/ffd":
+        return CommandJob("/ffd", "/ffd", _call("telegram_ffd_handler", "handle_ffd_command", ""),
+                          ack="⏳ Fetching <b>live FFD readings</b> for 50 tickers (~30-60s)…", timeout=_SLOW_TIMEOUT)
+    if cmd == "/sortino":
+        return CommandJob("/sortino", "/sortino", _sortino("cov"))
+    if cmd in COMMANDS:
+        msg_type = COMMANDS[cmd]
+        return CommandJob(cmd, cmd, _deliver(msg_type), ack=f"⏳ Fetching <b>{msg_type}</b>…")
+    return None
+
+
+def resolve_callback(data: str) -> Optional[CommandJob]:
+    """Map an inline-button tap (callback_query data) to its job."""
+    if data == "mr:live":
+        return CommandJob("/mr live", "button", _deliver("mr"), ack="⏳ Fetching <b>live oversold table</b>…")
+    if data == "mr:nonoverlap":
+        return CommandJob("/mr nonoverlap", "button", _call("telegram_mr_handler", "handle_mr_nonoverlap"))
+    if data == "mr:overlap":
+        return CommandJob("/mr overlap", "button", _call("telegram_mr_handler", "handle_mr_overlap"))
+    if data in ("sortino:cov", "sortino:nocov"):
+        active = "cov" if data == "sortino:cov" else "nocov"
+        return CommandJob(f"/sortino {active}", "button", _sortino(active))
+    return None
+
+
+def _resolve(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+class _LatencyHistogram:
+    """Command latency counts per upper bound (seconds), plus outcome counters."""
+
+    BOUNDS = (0.5, 1, 2, 5, 10, 30, 60, 120, 300)
+
+    def __init__(self) -> None:
+        self.counts = [0] * (len(self.BOUNDS) + 1)
+        self.total = 0.0
+        self.errors = 0
+        self.timeouts = 0
+
+    def observe(self, seconds: float) -> None:
+        self.counts[bisect.bisect_left(self.BOUNDS, seconds)] += 1
+        self.total += seconds
+
+    def snapshot(self) -> dict:
+        n = sum(self.counts)
+        labels = [f"le_{b}s" for b in self.BOUNDS] + ["inf"]
+        return {
+            "count": n,
+            "errors": self.errors,
+            "timeouts": self.timeouts,
+            "mean_s": round(self.total / n, 3) if n else None,
+            "histogram": dict(zip(labels, self.counts)),
+        }
+
+
+@dataclass
+class _Counters:
+    queued: int = 0
+    running: int = 0
+    deduped: int = 0
+    rejected: int = 0
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+
+class TelegramPollWorker:
+    """Acknowledges updates immediately and runs their commands on a bounded pool."""
+
+    def __init__(
+        self,
+        token: Optional[str] = None,
+        chat_id: Optional[str] = None,
+        *,
+        max_workers: int = _MAX_WORKERS,
+        max_queue: int = _MAX_QUEUE,
+    ) -> None:
+        self.token = token if token is not None else os.getenv("TELEGRAM_BOT_TOKEN", "")
+        self.chat_id = chat_id if chat_id is not None else os.getenv("TELEGRAM_CHAT_ID", "")
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="telegram-cmd")
+        self._inflight: dict[tuple[str, str], asyncio.Task] = {}
+        self._tasks: set[asyncio.Task] = set()
+        self._counters = _Counters()
+        self._latency: dict[str, _LatencyHistogram] = {}
+        self._queue_wait = _LatencyHistogram()
+        self._client: Optional[httpx.AsyncClient] = None
+        self._client_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    # ── Telegram API ──────────────────────────────────────────────────────────
+
+    def _http(self) -> httpx.AsyncClient:
+        # The client's connection pool is bound to the loop that created it
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client_loop is not loop:
+            self._client = httpx.AsyncClient(timeout=15)
+            self._client_loop = loop
+        return self._client
+
+    async def _api(self, method: str, payload: dict, timeout: float = 15) -> dict:
+        resp = await self._http().post(
+            f"https://api.telegram.org/bot{self.token}/{method}", json=payload, timeout=timeout,
+        )
+        resp.raise_for_status()
+        return resp.json()
+
+    async def _answer_callback(self, callback_id: str) -> None:
+        """Acknowledge an inline-button tap so Telegram stops the spinner."""
+        try:
+            await self._api("answerCallbackQuery", {"callback_query_id": callback_id, "text": ""}, timeout=10)
+        except Exception as exc:
+            print(f"[poll] answer_callback error: {exc}")
+
+    def _reply(self, chat_id: str, replies: list[Reply]) -> None:
+        """Queue replies on the shared, rate-limited sender (per-chat order is kept)."""
+        texts: list[str] = []
+        for reply in replies:
+            if isinstance(reply, tuple):
+                submit_messages([*texts, reply[0]], chat_id=chat_id, reply_markup=reply[1])
+                texts = []
+            else:
+                texts.append(reply)
+        if texts:
+            submit_messages(texts, chat_id=chat_id)
+
+    def _spawn(self, coro) -> asyncio.Task:
+        task = asyncio.get_running_loop().create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    # ── Updates ───────────────────────────────────────────────────────────────
+
+    def _allowed(self, chat_id: str) -> bool:
+        return bool(chat_id) and (not self.chat_id or chat_id == str(self.chat_id))
+
+    async def handle_update(self, update: dict) -> Optional[str]:
+        """
+        Route one Telegram update. Returns the dispatch outcome
+        ("started" | "duplicate" | "busy") or None when nothing was run.
+        """
+        cb = update.get("callback_query")
+        if cb:
+            chat_id = str(((cb.get("message") or {}).get("chat") or {}).get("id", ""))
+            if not self._allowed(chat_id):
+                return None
+            data = cb.get("data", "")
+            print(f"[poll] callback: {data!r}")
+            self._spawn(self._answer_callback(cb.get("id", "")))
+            job = resolve_callback(data)
+        else:
+            msg = update.get("message") or update.get("edited_message") or {}
+            chat_id = str((msg.get("chat") or {}).get("id", ""))
+            text = (msg.get("text") or "").strip()
+            if not self._allowed(chat_id) or not text:
+                return None
+            job = resolve_command(text)
+            if job is not None:
+                print(f"[poll] received: {job.key!r}")
+        return self.dispatch(job, chat_id) if job is not None else None
+
+    def dispatch(self, job: CommandJob, chat_id: str) -> str:
+        """Acknowledge `job` and queue it; never blocks the event loop."""
+        key = (chat_id, job.key)
+        if key in self._inflight:
+            self._counters.deduped += 1
+            self._reply(chat_id, [f"⏳ <b>{job.key.strip()}</b> is already running — results will follow."])
+            return "duplicate"
+        if self._counters.queued >= self.max_queue:
+            self._counters.rejected += 1
+            self._reply(chat_id, [f"🚦 Busy — {self._counters.queued} command(s) waiting, try again shortly."])
+            return "busy"
+        if job.ack:
+            self._reply(chat_id, [job.ack])
+        with self._counters.lock:
+            self._counters.queued += 1
+        self._inflight[key] = self._spawn(self._run(job, chat_id, key))
+        return "started"
+
+    def _execute(self, job: CommandJob, chat_id: str, submitted: float, on_start: Callable[[], None]) -> list[Reply]:
+        with self._counters.lock:
+            self._counters.queued -= 1
+            self._counters.running += 1
+            self._queue_wait.observe(time.monotonic() - submitted)
+        on_start()
+        try:
+            return job.run(chat_id)
+        finally:
+            with self._counters.lock:
+                self._counters.running -= 1
+
+    async def _run(self, job: CommandJob, chat_id: str, key: tuple[str, str]) -> None:
+        hist = self._latency.setdefault(job.key.split()[0], _LatencyHistogram())
+        loop = asyncio.get_running_loop()
+        began = loop.create_future()
+        submitted = self._executor.submit(
+            self._execute, job, chat_id, time.monotonic(),
+            lambda: loop.call_soon_threadsafe(_resolve, began),
+        )
+        future = asyncio.wrap_future(submitted)
+        started = time.monotonic()
+        try:
+            # job.timeout covers running the command, not waiting for a free worker
+            await asyncio.wait({began, future}, return_when=asyncio.FIRST_COMPLETED)
+            started = time.monotonic()
+            replies = await asyncio.wait_for(asyncio.shield(future), job.timeout)
+            hist.observe(time.monotonic() - started)
+            self._reply(chat_id, replies)
+        except asyncio.TimeoutError:
+            hist.timeouts += 1
+            print(f"[poll] {job.key} timed out after {job.timeout:.0f}s")
+            self._reply(chat_id, [f"⌛ {job.label} timed out after {job.timeout:.0f}s"])
+            # A running worker thread cannot be interrupted; keep the dedupe slot until it ends
+            try:
+                await future
+            except Exception:
+                pass
+        except Exception as exc:
+            hist.errors += 1
+            hist.observe(time.monotonic() - started)
+            print(f"[poll] {job.key} error: {''.join(traceback.format_exception(exc))}")
+            self._reply(chat_id, [f"❌ {job.label} error: {exc}"])
+        finally:
+            # Never leave a command queued behind a cancelled run
+            if not began.done() and submitted.cancel():
+                with self._counters.lock:
+                    self._counters.queued -= 1
+            began.cancel()
+            self._inflight.pop(key, None)
+
+    def metrics(self) -> dict:
+        """Queue depth, in-flight commands and latency histograms per command."""
+        return {
+            "queue_depth": self._counters.queued,
+            "running": self._counters.running,
+            "max_queue": self.max_queue,
+            "in_flight": sorted(k for _, k in self._inflight),
+            "deduplicated": self._counters.deduped,
+            "rejected_busy": self._counters.rejected,
+            "queue_wait": self._queue_wait.snapshot(),
+            "commands": {name: h.snapshot() for name, h in sorted(self._latency.items())},
+        }
+
+    # ── Long-polling ──────────────────────────────────────────────────────────
+
+    async def poll_forever(self) -> None:
+        """getUpdates long-poll loop; each batch is dispatched without waiting on its commands."""
+        if not self.token or not self.chat_id:
+            return
+
+        # Remove any registered webhook so long-polling works (409 otherwise)
+        try:
+            await self._api("deleteWebhook", {"drop_pending_updates": False})
+            print("[poll] Webhook deleted — long-polling mode active")
+        except Exception as exc:
+            print(f"[poll] deleteWebhook warning: {exc}")
+
+        offset: Optional[int] = None
+        print(f"[poll] Telegram poller started for chat_id={self.chat_id}")
+
+        while True:
+            try:
+                params: dict = {"timeout": _POLL_TIMEOUT, "allowed_updates": ["message", "callback_query"]}
+                if offset is not None:
+                    params["offset"] = offset
+                result = await self._api("getUpdates", params, timeout=_POLL_TIMEOUT + 10)
+                for update in result.get("result", []):
+                    offset = update["update_id"] + 1
+                    try:
+                        await self.handle_update(update)
+                    except Exception as exc:
+                        print(f"[poll] update {update.get('update_id')} error: {exc}")
+            except asyncio.CancelledError:
+                raise
+            except httpx.HTTPStatusError as exc:
+                if exc.response.status_code == 409:
+                    # Another instance is still polling (deploy overlap) — wait it out
+                    print("[poll] 409 Conflict: old instance still running, waiting 15s")
+                    await asyncio.sleep(15)
+                else:
+                    print(f"[poll] HTTP error {exc.response.status_code}: {exc} — retrying in 10s")
+                    await asyncio.sleep(10)
+            except httpx.TransportError as exc:
+                print(f"[poll] network error: {exc} — retrying in 10s")
+                await asyncio.sleep(10)
+            except Exception as exc:
+                print(f"[poll] unexpected error: {exc} — retrying in 5s")
+                await asyncio.sleep(5)
+
+
+_worker: Optional[TelegramPollWorker] = None
+_worker_lock = threading.Lock()
+
+
+def get_worker() -> TelegramPollWorker:
+    """The process-wide worker used by both the poller and the webhook."""
+    global _worker
+    with _worker_lock:
+        if _worker is None:
+            _worker = TelegramPollWorker()
+        return _worker
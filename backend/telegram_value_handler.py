@@ -7,21 +7,19 @@ the swing universe.
                      average, for ROE, ROIC, UFCF/sh, FCF/sh, P/E, EPS, Book/sh,
                      Debt/Equity, Debt/Assets, plus latest quarter + YoY change.
 
-Data: precomputed snapshot at static_snapshots/fundamentals/value.json
-(refresh with `python scripts/compute_value_snapshot.py`). A single /value
+Data: per-ticker snapshot store at static_snapshots/fundamentals/stocks/
+(legacy value.json as fallback; refresh with
+`python scripts/compute_value_snapshot.py`). A single /value
 <TICKER> falls back to a live yfinance fetch if the ticker isn't in the snapshot.
 See fundamentals_value.py for the source rationale and the ~5yr history limit.
 """
 
 from __future__ import annotations
 
-import json
 from datetime import datetime, timezone
-from pathlib import Path
 
-from fundamentals_value import fetch_fundamentals, fetch_all, stock_universe, is_stock
-
-_SNAPSHOT = Path(__file__).resolve().parent / "static_snapshots" / "fundamentals" / "value.json"
+from fundamentals_snapshot import FundamentalsStore, build_snapshot
+from fundamentals_value import fetch_fundamentals, stock_universe, is_stock
 
 # metric key → (label, kind)  kind: pct | ratio | cur
 _METRICS = [
@@ -125,32 +123,36 @@ def _overlay_live_prices(snap: dict) -> dict:
 
 
 def _load_snapshot() -> dict | None:
-    if not _SNAPSHOT.exists():
-        return None
     try:
-        return json.loads(_SNAPSHOT.read_text())
+        return FundamentalsStore().snapshot()
     except Exception:
         return None
 
 
-def _save_snapshot(snap: dict) -> bool:
-    """Persist a freshly-fetched snapshot so subsequent /value reads are instant."""
-    try:
-        _SNAPSHOT.parent.mkdir(parents=True, exist_ok=True)
-        _SNAPSHOT.write_text(json.dumps(snap, indent=2, default=str))
-        return True
-    except Exception:
-        return False
+def refresh_overview() -> list[str]:
+    """
+    Refresh the whole stock universe live into the snapshot store, render.
+    Stocks whose latest statement period is unchanged keep their stored
+    statements (price / market cap still refresh); stocks whose fetch failed
+    keep their last good record and are listed as failed.
+    """
+    reused: list[str] = []
+    failed: list[str] = []
 
+    def count_status(rec: dict, status: str) -> None:
+        if status == "unchanged":
+            reused.append(rec["ticker"])
+        elif status in ("stale", "failed"):
+            failed.append(rec["ticker"])
 
-def refresh_overview() -> list[str]:
-    """Re-fetch fundamentals for the whole stock universe live, persist, render."""
-    snap = fetch_all()
-    _save_snapshot(snap)
-    ok = sum(1 for s in snap.get("stocks", {}).values() if not s.get("error"))
+    snap = build_snapshot(on_result=count_status)
     total = len(snap.get("stocks", {}))
     msgs = _overview(snap)
-    msgs.append(f"✅ <b>/value</b> data refreshed live — {ok}/{total} stocks updated.")
+    msgs.append(f"✅ <b>/value</b> data refreshed live — {total - len(failed)}/{total} stocks updated"
+                f" ({len(reused)} with unchanged statements).")
+    if failed:
+        msgs.append(f"⚠️ Fetch failed for {len(failed)}: {', '.join(sorted(failed))}"
+                    " — showing their last good data where available.")
     return msgs
 
 
@@ -199,19 +201,23 @@ def _parse_date(s):
 
 def _auto_refresh_stale(snap: dict) -> tuple[dict, list[str]]:
     """
-    Re-fetch only the stocks with stale earnings, merge into snap, persist.
+    Re-fetch only the stocks with stale earnings, merge into the store.
+    A stock whose latest quarter is still unchanged keeps its statements but
+    gets a new fetched_at, so it is not re-checked on every call.
     Returns (snap, refreshed_tickers). Cheap when nothing is stale (no fetches).
     """
     stale = _stale_tickers(snap)
     if not stale:
         return snap, []
+    store = FundamentalsStore()
+    merged = build_snapshot(stale, store=store)
     stocks = snap.setdefault("stocks", {})
     for tkr in stale:
-        fresh = fetch_fundamentals(tkr)
-        if not fresh.get("error") or tkr not in stocks:
-            stocks[tkr] = fresh
-    snap["last_auto_refresh"] = datetime.now(timezone.utc).isoformat()
-    _save_snapshot(snap)
+        if tkr in merged.get("stocks", {}):
+            stocks[tkr] = merged["stocks"][tkr]
+    snap["last_auto_refresh"] = store.update_meta(
+        last_auto_refresh=datetime.now(timezone.utc).isoformat()
+    )["last_auto_refresh"]
     return snap, stale
 
 
@@ -11,6 +11,7 @@ from pathlib import Path
 backend_dir = Path(__file__).parent.parent
 sys.path.insert(0, str(backend_dir / "api"))
 
+import nadaraya_watson
 from nadaraya_watson import calculate_nadaraya_watson_lower_band
 
 
@@ -254,5 +255,77 @@ class TestNadarayaWatsonLowerBand:
             assert isinstance(result['pct_from_lower_band'], (int, float)) or result['pct_from_lower_band'] is None
 
 
+def _reference_lower_band(closes, highs, lows, length, bandwidth, atr_period, atr_mult):
+    """Latest-bar lower band with the original per-element loops."""
+    k = min(length, closes.size)
+    weights = np.exp(-(np.arange(k, dtype=float) ** 2) / (2.0 * bandwidth ** 2))
+    nw = np.dot(closes[-k:][::-1], weights) / weights.sum()
+    tr = [highs[0] - lows[0]] + [
+        max(highs[i] - lows[i], abs(highs[i] - closes[i - 1]), abs(lows[i] - closes[i - 1]))
+        for i in range(1, closes.size)
+    ]
+    rma = float(np.mean(tr[:atr_period]))
+    for value in tr[atr_period:]:
+        rma = (rma * (atr_period - 1) + value) / atr_period
+    return nw - rma * atr_mult
+
+
+class TestNadarayaWatsonSeries:
+    """Test suite for the vectorized envelope series and the batch path."""
+
+    def test_series_matches_per_bar_reference(self):
+        rng = np.random.default_rng(7)
+        closes = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, 320)))
+        highs, lows = closes * 1.01, closes * 0.98
+
+        env = nadaraya_watson.nadaraya_watson_envelope(closes, highs, lows, 200, 8.0, 50, 2.0)
+
+        assert np.isnan(env['lower_band'][:49]).all()
+        for t in (50, 120, 200, 201, 320):
+            expected = _reference_lower_band(closes[:t], highs[:t], lows[:t], 200, 8.0, 50, 2.0)
+            assert env['lower_band'][t - 1] == pytest.approx(expected, rel=1e-12)
+        result = calculate_nadaraya_watson_lower_band(closes, highs=highs, lows=lows)
+        assert result['lower_band'] == pytest.approx(env['lower_band'][-1], rel=1e-12)
+
+    def test_batch_uses_one_shared_download(self, monkeypatch):
+        import pandas as pd
+        import yfinance
+
+        rng = np.random.default_rng(3)
+        index = pd.bdate_range(end="2024-06-28", periods=300)
+        frames = {}
+        for sym in ("AAA", "BBB"):
+            close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, index.size)))
+            frames[sym] = pd.DataFrame({"Close": close, "High": close * 1.01, "Low": close * 0.99}, index=index)
+        calls = []
+
+        def fake_download(symbols, **kwargs):
+            calls.append(list(symbols))
+            return pd.concat({s: frames[s] for s in symbols if s in frames}, axis=1)
+
+        monkeypatch.setattr(yfinance, "download", fake_download)
+        monkeypatch.setattr(nadaraya_watson, "_BARS_CACHE", {})
+        monkeypatch.setattr(
+            nadaraya_watson, "_download_ohlc",
+            lambda ticker, lookback_days: (_ for _ in ()).throw(ValueError(f"no data for {ticker}")),
+        )
+
+        req = nadaraya_watson.NadarayaWatsonBatchRequest(tickers=["aaa", "BBB", "MISSING"])
+        out = nadaraya_watson.calculate_nadaraya_watson_batch(req)
+
+        assert calls == [["AAA", "BBB", "MISSING"]]
+        assert sorted(out['results']) == ["AAA", "BBB"]
+        assert out['errors'] == {"MISSING": "no data for MISSING"}
+        expected = calculate_nadaraya_watson_lower_band(
+            frames["AAA"]["Close"].to_numpy(), highs=frames["AAA"]["High"].to_numpy(),
+            lows=frames["AAA"]["Low"].to_numpy(),
+        )
+        assert out['results']["AAA"]['lower_band'] == pytest.approx(expected['lower_band'], rel=1e-12)
+
+        # Single-ticker requests reuse the cached bars
+        calculate_nadaraya_watson_lower_band("BBB")
+        assert len(calls) == 1
+
+
 if __name__ == '__main__':
     pytest.main([__file__, '-v'])
@@ -0,0 +1,91 @@
+"""
+Multi-symbol yfinance downloads split into one frame per symbol.
+
+yf.download(group_by="ticker") returns (symbol, field) columns for a batch,
+flat columns for a single symbol, and reindexes every symbol onto the union
+of all symbols' dates. download_frames hides those quirks so callers only
+deal with one OHLCV frame (yfinance column names) per symbol.
+"""
+
+from __future__ import annotations
+
+import time
+from typing import Dict, List, Optional
+
+import pandas as pd
+import yfinance as yf
+
+DOWNLOAD_CHUNK_SIZE = 100
+
+
+def split_frames(raw: Optional[pd.DataFrame], symbols: List[str]) -> Dict[str, pd.DataFrame]:
+    """
+    Per-symbol frames from one yf.download(group_by="ticker") result.
+
+    Rows where every field is NaN (dates only other symbols traded) are
+    dropped; symbols without data map to an empty frame.
+    """
+    frames: Dict[str, pd.DataFrame] = {symbol: pd.DataFrame() for symbol in symbols}
+    if raw is None or raw.empty:
+        return frames
+    multi = isinstance(raw.columns, pd.MultiIndex)
+    for symbol in symbols:
+        frame = pd.DataFrame()
+        try:
+            if multi:
+                if symbol in raw.columns.get_level_values(0):
+                    frame = raw[symbol]
+                elif symbol in raw.columns.get_level_values(1):
+                    frame = raw.xs(symbol, level=1, axis=1)
+            elif len(symbols) == 1:
+                frame = raw
+        except Exception:
+            frame = pd.DataFrame()
+        frames[symbol] = frame.dropna(how="all").copy() if not frame.empty else pd.DataFrame()
+    return frames
+
+
+def download_frames(
+    symbols: List[str],
+    *,
+    period: Optional[str] = None,
+    start=None,
+    end=None,
+    interval: str = "1d",
+    auto_adjust: bool = True,
+    prepost: bool = False,
+    timeout: float = 10,
+    chunk_size: int = DOWNLOAD_CHUNK_SIZE,
+    deadline: Optional[float] = None,
+) -> Dict[str, pd.DataFrame]:
+    """
+    Download OHLCV for many Yahoo symbols, ``chunk_size`` symbols per request.
+
+    Pass either ``period`` or ``start``/``end``. Symbols missing from a response
+    (or whose request failed) map to an empty frame; chunks not started before
+    ``deadline`` (time.monotonic) are left out of the result.
+    """
+    symbols = list(dict.fromkeys(symbols))
+    window = {"start": start, "end": end} if start is not None else {"period": period}
+    frames: Dict[str, pd.DataFrame] = {}
+    for first in range(0, len(symbols), chunk_size):
+        if deadline is not None and time.monotonic() >= deadline:
+            break
+        chunk = symbols[first:first + chunk_size]
+        try:
+            raw = yf.download(
+                chunk,
+                **window,
+                interval=interval,
+                group_by="ticker",
+                auto_adjust=auto_adjust,
+                prepost=prepost,
+                progress=False,
+                threads=True,
+                timeout=timeout,
+            )
+        except Exception as e:
+            print(f"Bulk {interval} download failed for {len(chunk)} symbols: {e}")
+            raw = None
+        frames.update(split_frames(raw, chunk))
+    return frames
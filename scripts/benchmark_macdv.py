@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for MACDVCalculator.calculate_macdv.
+
+Times the full indicator and the color/trend classification step on synthetic
+10y daily (2,520 bars) and 2y hourly (~3,500 bars) series, and compares the
+classification against the previous per-bar loop + masked-write version.
+
+Usage:
+  python scripts/benchmark_macdv.py [--repeat 20]
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+_REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(_REPO_ROOT / "backend"))
+
+from macdv_calculator import MACDVCalculator, classify_macdv  # noqa: E402
+
+
+def _synthetic_ohlc(periods: int, freq: str, vol: float, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    index = pd.date_range("2015-01-02", periods=periods, freq=freq)
+    close = 100 * np.exp(np.cumsum(rng.normal(0.0002, vol, size=periods)))
+    open_ = np.roll(close, 1)
+    open_[0] = close[0]
+    return pd.DataFrame(
+        {
+            "open": open_,
+            "high": np.maximum(open_, close) * (1 + vol / 3),
+            "low": np.minimum(open_, close) * (1 - vol / 3),
+            "close": close,
+        },
+        index=index,
+    )
+
+
+def _loop_classification(val: pd.Series, signal: pd.Series) -> tuple:
+    """The pre-vectorization implementation, kept here as the timing baseline."""
+    in_range = (val > -50) & (val < 50)
+    bars_since_range = pd.Series(0, index=val.index)
+    current_count = 0
+    for i in range(len(val)):
+        current_count = current_count + 1 if in_range.iloc[i] else 0
+        bars_since_range.iloc[i] = current_count
+
+    color = pd.Series("gray", index=val.index, dtype=object)
+    ranging_mask = in_range & (bars_since_range >= 19)
+    color[ranging_mask] = "gray"
+    color[((val >= 150) & (val > signal)) | ((val <= -150) & (val < signal))] = "blue"
+    color[(val >= 50) & (val < 150) & (val > signal)] = "#0d6b57"
+    color[(val > -150) & (val < 50) & (val > signal)] = "green"
+    color[(val > -50) & (val < signal)] = "orange"
+    color[(val > -150) & (val <= -50) & (val < signal)] = "red"
+
+    trend = pd.Series("Neutral", index=val.index, dtype=object)
+    trend[val > 50] = "Bullish"
+    trend[val < -50] = "Bearish"
+    trend[ranging_mask] = "Ranging"
+    return color, trend
+
+
+def _best_of(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    calculator = MACDVCalculator()
+    cases = {
+        "10y daily": _synthetic_ohlc(2520, "B", 0.015),
+        "2y hourly": _synthetic_ohlc(252 * 7 * 2, "h", 0.004),
+    }
+
+    print(f"{'series':<12}{'bars':>7}{'macdv ms':>11}{'classify ms':>13}{'loop ms':>10}{'speedup':>9}")
+    for name, ohlc in cases.items():
+        df = calculator.calculate_macdv(ohlc)
+        val, signal = df["macdv_val"], df["macdv_signal"]
+        colors, trends = classify_macdv(val.to_numpy(), signal.to_numpy())
+        loop_colors, loop_trends = _loop_classification(val, signal)
+        assert colors.tolist() == loop_colors.tolist() and trends.tolist() == loop_trends.tolist()
+
+        full = _best_of(lambda: calculator.calculate_macdv(ohlc), args.repeat)
+        vectorized = _best_of(lambda: classify_macdv(val.to_numpy(), signal.to_numpy()), args.repeat)
+        loop = _best_of(lambda: _loop_classification(val, signal), max(1, args.repeat // 5))
+        print(
+            f"{name:<12}{len(ohlc):>7}{full * 1e3:>11.2f}{vectorized * 1e3:>13.3f}"
+            f"{loop * 1e3:>10.1f}{loop / vectorized:>8.0f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -2,19 +2,19 @@
 """
 Precompute the fundamentals/valuation snapshot for the /value Telegram command.
 
-Writes backend/static_snapshots/fundamentals/value.json so /value responds
-instantly without re-fetching ~34 stocks on every request.
+Writes one record per stock under backend/static_snapshots/fundamentals/stocks/
+so /value responds instantly without re-fetching ~34 stocks on every request.
+Stocks whose latest statement period matches the stored record keep their
+statements; pass --force to re-pull every stock.
 
 Usage:
-  python scripts/compute_value_snapshot.py
+  python scripts/compute_value_snapshot.py [--force]
 """
 
 from __future__ import annotations
 
-import json
+import argparse
 import sys
-import time
-from datetime import datetime, timezone
 from pathlib import Path
 
 _root = Path(__file__).resolve().parent.parent
@@ -22,35 +22,37 @@ _backend = _root / "backend"
 if str(_backend) not in sys.path:
     sys.path.insert(0, str(_backend))
 
-from fundamentals_value import fetch_fundamentals, stock_universe  # noqa: E402
+from fundamentals_snapshot import FundamentalsStore, build_snapshot  # noqa: E402
+from fundamentals_value import stock_universe  # noqa: E402
 
 
 def main() -> None:
-    out_dir = _backend / "static_snapshots" / "fundamentals"
-    out_dir.mkdir(parents=True, exist_ok=True)
-    out_path = out_dir / "value.json"
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--force", action="store_true", help="re-pull statements for every stock")
+    args = parser.parse_args()
 
+    store = FundamentalsStore()
     universe = stock_universe()
     print(f"[value] Computing fundamentals for {len(universe)} stocks...")
 
-    stocks = {}
-    for i, ticker in enumerate(universe, 1):
-        print(f"[value]   ({i}/{len(universe)}) {ticker} ...", flush=True)
-        rec = fetch_fundamentals(ticker)
+    done = {"n": 0, "unchanged": 0, "failed": 0}
+
+    def report(rec: dict, status: str) -> None:
+        done["n"] += 1
+        if status == "unchanged":
+            done["unchanged"] += 1
+        elif status in ("stale", "failed"):
+            done["failed"] += 1
+        label = "failed (kept stored record)" if status == "stale" else status
+        print(f"[value]   ({done['n']}/{len(universe)}) {rec['ticker']} {label}", flush=True)
         if rec.get("error"):
-            print(f"[value]       ! {ticker}: {rec['error']}")
-        stocks[ticker] = rec
-        time.sleep(0.6)   # be polite to Yahoo between tickers
-
-    snapshot = {
-        "generated_at": datetime.now(timezone.utc).isoformat(),
-        "source": "yfinance",
-        "universe": universe,
-        "stocks": stocks,
-    }
-    out_path.write_text(json.dumps(snapshot, indent=2, default=str))
+            print(f"[value]       ! {rec['ticker']}: {rec['error']}")
+
+    snapshot = build_snapshot(force=args.force, store=store, on_result=report)
+    stocks = snapshot.get("stocks", {})
     ok = sum(1 for r in stocks.values() if not r.get("error"))
-    print(f"[value] Wrote {out_path} — {ok}/{len(universe)} stocks OK.")
+    print(f"[value] Wrote {store.root} — {ok}/{len(universe)} stocks OK, "
+          f"{done['unchanged']} with unchanged statements, {done['failed']} failed to fetch.")
 
 
 if __name__ == "__main__":
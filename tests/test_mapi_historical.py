@@ -15,7 +15,8 @@ if BACKEND_DIR not in sys.path:
 import numpy as np
 import pandas as pd
 
-from mapi_historical import compute_mapi_historical_from_df
+import mapi_historical
+from mapi_historical import compute_mapi_historical_from_df, run_mapi_basket_historical_analysis
 
 
 def _synthetic_ohlc(days: int = 420, seed: int = 13) -> pd.DataFrame:
@@ -65,3 +66,44 @@ def test_mapi_historical_structure():
             assert "mean" in b["horizons"][f"{h}d"]
             assert "win_rate" in b["horizons"][f"{h}d"]
 
+
+
+def test_mapi_basket_panel_matches_single_ticker(monkeypatch):
+    frames = {"AAA": _synthetic_ohlc(seed=1), "BBB": _synthetic_ohlc(seed=2), "CCC": pd.DataFrame()}
+    monkeypatch.setattr(mapi_historical, "_fetch_basket_frames", lambda tickers: {t: frames[t] for t in tickers})
+
+    out = run_mapi_basket_historical_analysis(["aaa", "BBB", "CCC"], lookback_days=300)
+
+    assert [p["ticker"] for p in out["per_ticker"]] == ["AAA", "BBB"]
+    for per_ticker in out["per_ticker"]:
+        single = compute_mapi_historical_from_df(frames[per_ticker["ticker"]], lookback_days=300)
+        assert per_ticker["sample_size"] == single["sample_size"]
+        assert per_ticker["zone_stats"]["low"]["count"] == single["zone_stats"]["low"]["count"]
+        assert np.isclose(
+            per_ticker["bin_stats"][3]["horizons"]["7d"]["mean"], single["bin_stats"][3]["horizons"]["7d"]["mean"]
+        )
+
+    pooled = out["pooled"]
+    assert pooled["sample_size"] == sum(p["sample_size"] for p in out["per_ticker"])
+    assert pooled["zone_stats"]["all"]["count"] == pooled["sample_size"]
+    assert out["cross_sectional_strategies"]["min_percentile_pick"]["days"] > 0
+
+
+def test_daily_picks_keep_per_date_tie_break():
+    # Discrete percentiles tie often; 24 rows per date also exercise the
+    # unstable (introsort) path of the original per-date sort
+    rng = np.random.default_rng(5)
+    dates = np.repeat([f"2024-01-{d:02d}" for d in range(1, 29)], 24)
+    candidates = pd.DataFrame(
+        {
+            "date": dates,
+            "ticker": np.tile([f"T{i}" for i in range(24)], 28),
+            "composite_percentile": rng.integers(0, 6, size=len(dates)) * 5.0,
+            "fwd_return_7d": rng.normal(size=len(dates)),
+        }
+    ).sample(frac=1.0, random_state=3)
+
+    picks = mapi_historical._daily_picks(candidates)
+
+    expected = [grp.sort_values("composite_percentile").iloc[0]["ticker"] for _, grp in candidates.groupby("date")]
+    assert picks["ticker"].tolist() == expected
@@ -0,0 +1,187 @@
+import asyncio
+import os
+import sys
+from datetime import datetime, timezone
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+
+# Allow importing backend modules (repo layout: tests/ vs backend/)
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "../../backend"))
+
+import swing_framework_api as sfa  # noqa: E402
+
+
+def _row(ticker: str, percentile: float) -> dict:
+    return {"ticker": ticker, "current_percentile": percentile, "macdv_daily": 10.0}
+
+
+def _serve(monkeypatch, rows: list) -> None:
+    now = datetime.now(timezone.utc)
+    monkeypatch.setattr(sfa, "_current_state_cache", {"timestamp": now.isoformat(), "market_state": rows})
+    monkeypatch.setattr(sfa, "_current_state_cache_timestamp", now)
+
+
+def test_current_state_etag_and_since_delta(monkeypatch):
+    monkeypatch.setattr(sfa, "_daily_state_versions", sfa._StateVersionTracker())
+    app = FastAPI()
+    app.include_router(sfa.router)
+    client = TestClient(app)
+
+    _serve(monkeypatch, [_row("SPY", 10.0), _row("QQQ", 20.0)])
+    first = client.get("/api/swing-framework/current-state")
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+    token = first.json()["version"]
+
+    assert client.get("/api/swing-framework/current-state", headers={"If-None-Match": etag}).status_code == 304
+
+    _serve(monkeypatch, [_row("SPY", 10.0), _row("QQQ", 25.0)])
+    delta = client.get("/api/swing-framework/current-state", params={"since": token}).json()
+    assert delta["delta"] is True
+    assert [s["ticker"] for s in delta["changed"]] == ["QQQ"]
+    assert delta["order"] == ["SPY", "QQQ"]
+    assert delta["removed"] == []
+
+    _serve(monkeypatch, [_row("QQQ", 25.0)])
+    delta = client.get("/api/swing-framework/current-state", params={"since": delta["version"]}).json()
+    assert delta["changed"] == [] and delta["removed"] == ["SPY"]
+
+    stale = client.get("/api/swing-framework/current-state", params={"since": "0-1"}).json()
+    assert "delta" not in stale and [s["ticker"] for s in stale["market_state"]] == ["QQQ"]
+
+
+def test_version_tokens_are_derived_from_content():
+    # Two worker processes serving the same data must agree on the ETag
+    first, second = sfa._StateVersionTracker(), sfa._StateVersionTracker()
+    payload = {"timestamp": "t1", "market_state": [_row("SPY", 10.0), _row("QQQ", 20.0)]}
+    first.publish(payload)
+    second.publish({**payload, "timestamp": "t2"})
+    assert first.token == second.token
+    assert first.token.startswith(sfa._get_market_date(datetime.now(timezone.utc)).isoformat())
+
+    token = first.token
+    changed = {"market_state": [_row("SPY", 10.0), _row("QQQ", 21.0)]}
+    second.publish(changed)
+    delta = second.delta(changed, token)
+    assert [s["ticker"] for s in delta["changed"]] == ["QQQ"]
+
+    reordered = {"market_state": [_row("QQQ", 21.0), _row("SPY", 10.0)]}
+    second.publish(reordered)
+    assert second.token != delta["version"]
+    second.publish(changed)
+    assert second.token == delta["version"]
+
+
+
+def test_state_stream_filters_and_coalesces_backlog(monkeypatch):
+    async def _no_refresh(self):
+        return None
+
+    monkeypatch.setattr(sfa._StateStreamHub, "_refresh_loop", _no_refresh)
+    monkeypatch.setattr(sfa, "_STREAM_QUEUE_SIZE", 2)
+
+    async def scenario():
+        hub = sfa._StateStreamHub()
+        tracker = sfa._StateVersionTracker("daily", hub.broadcast)
+        spy_only = hub.subscribe(frozenset({"SPY"}), frozenset({"daily"}))
+        four_h_only = hub.subscribe(None, frozenset({"4h"}))
+
+        tracker.publish({"market_state": [_row("SPY", 10.0), _row("QQQ", 20.0)]})
+        tracker.publish({"market_state": [_row("SPY", 10.0), _row("QQQ", 21.0)]})
+        assert spy_only.queue.qsize() == 1
+        assert four_h_only.queue.empty()
+
+        event = spy_only.queue.get_nowait()
+        assert event["type"] == "diff" and [s["ticker"] for s in event["changed"]] == ["SPY"]
+
+        for pct in (11.0, 12.0, 13.0):
+            tracker.publish({"market_state": [_row("SPY", pct)]})
+        assert spy_only.queue.qsize() == 1
+        assert spy_only.queue.get_nowait()["type"] == "resync"
+
+        hub.unsubscribe(spy_only)
+        hub.unsubscribe(four_h_only)
+
+    asyncio.run(scenario())
+
+
+def test_stream_sends_snapshot_after_cold_start(monkeypatch):
+    async def _no_refresh(self):
+        return None
+
+    class _Request:
+        async def is_disconnected(self):
+            return False
+
+    monkeypatch.setattr(sfa._StateStreamHub, "_refresh_loop", _no_refresh)
+    monkeypatch.setattr(sfa, "_current_state_cache", None)
+    monkeypatch.setattr(sfa, "_current_state_4h_cache", None)
+
+    async def scenario():
+        hub = sfa._StateStreamHub()
+        monkeypatch.setattr(sfa, "_state_stream", hub)
+        monkeypatch.setattr(sfa, "_daily_state_versions", sfa._StateVersionTracker("daily", hub.broadcast))
+        response = await sfa.stream_market_state(_Request(), tickers="SPY", timeframes="daily")
+        events = response.body_iterator
+
+        first = asyncio.ensure_future(events.__anext__())
+        await asyncio.sleep(0)
+        assert not first.done()
+
+        sfa._daily_state_versions.publish({"market_state": [_row("SPY", 10.0), _row("QQQ", 20.0)]})
+        chunk = await asyncio.wait_for(first, timeout=1)
+        assert chunk.startswith("event: snapshot")
+        assert '"ticker":"SPY"' in chunk and '"QQQ"' not in chunk
+
+        sfa._daily_state_versions.publish({"market_state": [_row("SPY", 11.0), _row("QQQ", 20.0)]})
+        chunk = await asyncio.wait_for(events.__anext__(), timeout=1)
+        assert chunk.startswith("event: diff")
+        await events.aclose()
+
+    asyncio.run(scenario())
+
+
+def test_d7_stats_are_looked_up_for_the_full_universe(monkeypatch):
+    lookups = []
+
+    def fake_stats(tickers, **kwargs):
+        lookups.append(list(tickers))
+        return {"params": {"horizon": 7}, "table": {}}
+
+    async def no_op(response):
+        return response
+
+    async def no_4h(force_refresh=False):
+        return {"market_state": []}
+
+    monkeypatch.setattr(sfa, "get_cached_macdv_d7_band_stats", fake_stats)
+    monkeypatch.setattr(sfa, "get_current_market_state_4h", no_4h)
+    monkeypatch.setattr(sfa, "_daily_augment_memo", {})
+    for name in ("_augment_with_macdv_daily", "_augment_with_momentum_regime", "_augment_with_macdv_percentiles",
+                 "_augment_with_divergence_metrics", "_augment_with_second_order_divergence"):
+        monkeypatch.setattr(sfa, name, no_op)
+
+    rows = [{**_row(t, 10.0), "macdv_daily": 130.0} for t in ("SPY", "QQQ", "IWM")]
+
+    async def scenario():
+        await sfa._augment_daily_rows({"market_state": rows})
+        rows[1]["rsi_percentile_252"] = 55.0
+        await sfa._augment_daily_rows({"market_state": rows})
+
+    asyncio.run(scenario())
+
+    # Only QQQ is re-augmented on the second pass, but both lookups share one cache key
+    assert lookups == [["SPY", "QQQ", "IWM"], ["SPY", "QQQ", "IWM"]]
+
+
+def test_daily_row_fingerprint_sees_back_adjusted_history():
+    import pandas as pd
+
+    data = pd.DataFrame({"Close": [100.0, 101.0, 102.0]}, index=pd.date_range("2024-01-01", periods=3))
+    adjusted = data.copy()
+    adjusted.iloc[:-1, 0] *= 0.98  # a dividend adjusts every close before the ex-date
+    cohort = {"threshold": 5}
+    assert sfa._daily_row_fingerprint(data, cohort) == sfa._daily_row_fingerprint(data.copy(), cohort)
+    assert sfa._daily_row_fingerprint(data, cohort) != sfa._daily_row_fingerprint(adjusted, cohort)
@@ -0,0 +1,85 @@
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "../../backend"))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "../../backend/api"))
+
+import daily_trend_scanner as dts  # noqa: E402
+
+
+def _intraday(days: int) -> pd.DataFrame:
+    sessions = [
+        pd.date_range(d + pd.Timedelta(hours=4), d + pd.Timedelta(hours=19, minutes=55), freq="5min", tz=dts.NY_TZ)
+        for d in pd.bdate_range("2024-03-04", periods=days)
+    ]
+    index = sessions[0].append(sessions[1:]).tz_convert("UTC")
+    close = 100 + np.random.default_rng(days).normal(0, 0.2, len(index)).cumsum()
+    return pd.DataFrame({"Open": close, "High": close + 0.3, "Low": close - 0.3, "Close": close}, index=index)
+
+
+def _window(df: pd.DataFrame, date, start_mins: int, end_mins: int) -> pd.DataFrame:
+    mins = df.index.hour * 60 + df.index.minute
+    return df[(df.index.date == date) & (mins >= start_mins) & (mins < end_mins)]
+
+
+def test_levels_come_from_session_index_slices():
+    bars = dts.IntradayBars.build(_intraday(4), data_source="yfinance", days=4)
+    ny = _intraday(4).tz_convert(dts.NY_TZ)
+    current, prev = sorted(set(ny.index.date))[-1], sorted(set(ny.index.date))[-2]
+
+    levels, prev_close = dts._compute_levels(bars, orb_minutes=15)
+
+    premarket = _window(ny, current, 4 * 60, 9 * 60 + 30)
+    prev_rth = _window(ny, prev, 9 * 60 + 30, 16 * 60)
+    orb = _window(ny, current, 9 * 60 + 30, 9 * 60 + 45)
+    assert len(orb) == 3
+    assert levels == {
+        "pmh": premarket["High"].max(), "pml": premarket["Low"].min(),
+        "pdh": prev_rth["High"].max(), "pdl": prev_rth["Low"].min(),
+        "orb_high": orb["High"].max(), "orb_low": orb["Low"].min(),
+    }
+    assert prev_close == prev_rth["Close"].iloc[-1]
+
+    trimmed = bars.trimmed(2)
+    assert trimmed.dates == bars.dates[-2:]
+    assert dts._compute_levels(trimmed, orb_minutes=15) == (levels, prev_close)
+
+
+def test_concurrent_requests_share_one_download(monkeypatch):
+    calls = []
+    started, release = threading.Event(), threading.Event()
+
+    def download(symbol, *, interval, days):
+        calls.append((symbol, interval, days))
+        started.set()
+        release.wait(timeout=5)
+        return _intraday(days)
+
+    monkeypatch.setattr(dts, "_download_intraday", download)
+    monkeypatch.setattr(dts, "_bars_cache", {})
+    monkeypatch.setattr(dts, "_bars_inflight", {})
+    monkeypatch.setattr(dts, "_cache", {})
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        futures = [
+            pool.submit(dts.compute_daily_trend, "aaa", interval="5m", days=5, orb_minutes=5, include_candles=False),
+            pool.submit(dts.compute_daily_trend, "AAA", interval="5m", days=5, orb_minutes=15, include_candles=False),
+            pool.submit(dts.compute_daily_trend, "AAA", interval="5m", days=5, orb_minutes=30, include_candles=True),
+        ]
+        assert started.wait(timeout=5)
+        release.set()
+        payloads = [f.result(timeout=5) for f in futures]
+
+    assert calls == [("aaa", "5m", 5)]
+    assert {p["data_source"] for p in payloads} == {"yfinance"}
+    assert len({p["prev_close"] for p in payloads}) == 1
+
+    # A shorter span is trimmed from the cached download; a different interval is fetched
+    dts.compute_daily_trend("AAA", interval="5m", days=2, orb_minutes=5, include_candles=False)
+    dts.compute_daily_trend("AAA", interval="15m", days=2, orb_minutes=5, include_candles=False)
+    assert calls == [("aaa", "5m", 5), ("AAA", "15m", 2)]
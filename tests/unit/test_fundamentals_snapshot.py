@@ -0,0 +1,135 @@
+import json
+import os
+import sys
+import threading
+
+import pandas as pd
+
+
+# Allow importing backend modules (repo layout: tests/ vs backend/)
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "../../backend"))
+
+import fundamentals_snapshot  # noqa: E402
+import fundamentals_value  # noqa: E402
+
+
+def _statement(rows: dict) -> pd.DataFrame:
+    cols = [pd.Timestamp("2025-12-31"), pd.Timestamp("2024-12-31")]
+    return pd.DataFrame({c: rows for c in cols})
+
+
+class _FakeYahoo:
+    def __init__(self):
+        self.mrq = {"AAA": 1767139200, "BBB": 1767139200, "CCC": 1767139200}
+        self.statement_calls = []
+        self.fx_calls = []
+        self.fail = set()
+        self.lock = threading.Lock()
+
+    def ticker(self, symbol):
+        fake = self
+
+        class _Ticker:
+            @property
+            def info(self):
+                if symbol in fake.fail:
+                    raise RuntimeError("blocked")
+                return {
+                    "shortName": symbol, "currency": "KRW", "financialCurrency": "KRW",
+                    "marketCap": 1e12, "currentPrice": 100.0,
+                    "mostRecentQuarter": fake.mrq[symbol], "returnOnEquity": 0.1,
+                }
+
+            def _statement(self, rows):
+                if symbol in fake.fail:
+                    raise RuntimeError("blocked")
+                with fake.lock:
+                    fake.statement_calls.append(symbol)
+                return _statement(rows)
+
+            @property
+            def financials(self):
+                return self._statement({"Net Income": 10.0, "Diluted EPS": 2.0, "Total Revenue": 100.0})
+
+            quarterly_financials = financials
+
+            @property
+            def balance_sheet(self):
+                return self._statement({"Stockholders Equity": 50.0, "Total Assets": 200.0, "Total Debt": 20.0})
+
+            quarterly_balance_sheet = balance_sheet
+
+            @property
+            def cashflow(self):
+                return self._statement({"Free Cash Flow": 8.0})
+
+            quarterly_cashflow = cashflow
+
+            def history(self, period=None, **kwargs):
+                if symbol.endswith("USD=X"):
+                    with fake.lock:
+                        fake.fx_calls.append(symbol)
+                    return pd.DataFrame({"Close": [0.0007]}, index=pd.date_range("2026-01-01", periods=1))
+                return pd.DataFrame({"Close": [90.0, 100.0]}, index=pd.date_range("2024-06-30", periods=2, freq="365D"))
+
+        return _Ticker()
+
+
+def test_build_snapshot_skips_unchanged_statements_and_merges_per_ticker(monkeypatch, tmp_path):
+    yahoo = _FakeYahoo()
+    monkeypatch.setattr(fundamentals_value.yf, "Ticker", yahoo.ticker)
+    monkeypatch.setattr(fundamentals_value.time, "sleep", lambda s: None)  # _retry_df backoff
+    store = fundamentals_snapshot.FundamentalsStore(root=tmp_path / "stocks", legacy=None)
+    build = lambda tickers=None, **kw: fundamentals_snapshot.build_snapshot(  # noqa: E731
+        tickers, store=store, fetches_per_second=0, max_workers=3, **kw
+    )
+    monkeypatch.setattr(fundamentals_snapshot, "stock_universe", lambda: ["AAA", "BBB", "CCC"])
+
+    first = build()
+    assert sorted(first["stocks"]) == ["AAA", "BBB", "CCC"]
+    assert len(yahoo.statement_calls) == 3 * 6
+    assert yahoo.fx_calls == ["KRWUSD=X"]  # one FX download per run, shared by all tickers
+    assert first["stocks"]["AAA"]["market_cap_usd"] == 1e12 * 0.0007
+    assert sorted(p.name for p in (tmp_path / "stocks").iterdir()) == ["AAA.json", "BBB.json", "CCC.json", "meta.json"]
+
+    # Only BBB reported a new quarter; CCC's fetch fails and keeps its stored record
+    yahoo.statement_calls.clear()
+    yahoo.mrq["BBB"] = 1774915200
+    yahoo.fail.add("CCC")
+    store.save({**store.load("AAA"), "fetched_at": "2020-01-01"})
+    statuses = {}
+
+    def record_status(rec, status):
+        statuses[rec["ticker"]] = status
+
+    second = build(on_result=record_status)
+
+    assert sorted(set(yahoo.statement_calls)) == ["BBB"]
+    # CCC's failure is reported as such, not as unchanged statements
+    assert statuses == {"AAA": "unchanged", "BBB": "fetched", "CCC": "stale"}
+    assert second["stocks"]["BBB"]["most_recent_quarter"] == "2026-03-31"
+    assert second["stocks"]["CCC"] == first["stocks"]["CCC"]
+    assert "checked_at" in second["stocks"]["AAA"]
+    # A successful check moves fetched_at even though the statements were kept
+    assert second["stocks"]["AAA"]["fetched_at"] == second["stocks"]["AAA"]["checked_at"]
+    assert second["stocks"]["AAA"]["annual"] == first["stocks"]["AAA"]["annual"]
+
+    # A partial refresh merges into the store without narrowing the universe
+    yahoo.fail.clear()
+    partial = build(["CCC"], force=True)
+    assert sorted(partial["stocks"]) == ["AAA", "BBB", "CCC"]
+    assert json.loads((tmp_path / "stocks" / "meta.json").read_text())["universe"] == ["AAA", "BBB", "CCC"]
+
+
+def test_store_falls_back_to_legacy_snapshot(tmp_path):
+    legacy = tmp_path / "value.json"
+    legacy.write_text(json.dumps({
+        "generated_at": "2026-06-04T00:00:00+00:00", "source": "yfinance",
+        "universe": ["AAA", "BBB"], "stocks": {"AAA": {"ticker": "AAA", "v": 1}, "BBB": {"ticker": "BBB", "v": 1}},
+    }))
+    store = fundamentals_snapshot.FundamentalsStore(root=tmp_path / "stocks", legacy=legacy)
+    store.save({"ticker": "BBB", "v": 2})
+
+    snap = store.snapshot()
+    assert snap["generated_at"] == "2026-06-04T00:00:00+00:00"
+    assert snap["stocks"] == {"AAA": {"ticker": "AAA", "v": 1}, "BBB": {"ticker": "BBB", "v": 2}}
@@ -0,0 +1,122 @@
+import math
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+
+# Allow importing backend modules (repo layout: tests/ vs backend/)
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "../../backend"))
+
+import kelly_analyzer as ka  # noqa: E402
+
+
+def _closes() -> pd.DataFrame:
+    rng = np.random.default_rng(7)
+    index = pd.date_range("2018-01-01", periods=1400, freq="D")
+    data = {}
+    for i, ticker in enumerate(["AAA", "BBB", "BTC", "NEW"]):
+        data[ticker] = pd.Series(100 * np.exp(np.cumsum(rng.normal(0.0004, 0.02, len(index)))), index=index)
+    data["AAA"][index.dayofweek >= 5] = np.nan       # weekday calendar vs 7-day crypto
+    data["BBB"][index.dayofweek == 0] = np.nan       # a third calendar
+    data["NEW"].iloc[:-45] = np.nan                  # recent listing
+    return pd.DataFrame(data)
+
+
+def _reference_events(close: pd.Series, lo: float, hi: float, horizon: int) -> list[float]:
+    pct = ka.calculate_rsi_ma(close).rolling(252, min_periods=252).rank(pct=True) * 100
+    aligned = pd.DataFrame({"pct": pct, "close": close}).dropna()
+    in_bucket = ((aligned["pct"] >= lo) & (aligned["pct"] < hi)).to_numpy()
+    prices = aligned["close"].to_numpy()
+    rets, last = [], -999
+    for pos in range(len(aligned)):
+        if not in_bucket[pos] or (pos > 0 and in_bucket[pos - 1]) or pos - last < 2 * horizon:
+            continue
+        if pos + horizon >= len(aligned):
+            break
+        rets.append(math.log(prices[pos + horizon] / prices[pos]))
+        last = pos
+    return rets
+
+
+def test_panel_stats_match_per_ticker_series():
+    frame = _closes()
+    panel = ka.KellyPanel.from_frame(frame)
+    assert panel.lengths.tolist() == [frame[t].notna().sum() for t in frame.columns]
+
+    n, mu, sigma, f_star = panel.trailing_kelly(252)
+    bucket_f = panel.bucket_kelly(252)
+    for j, ticker in enumerate(frame.columns):
+        close = frame[ticker].dropna()
+        np.testing.assert_array_equal(panel.close[: len(close), j], close.to_numpy())
+
+        expected = ka._compute_kelly(np.log(close.iloc[-252:] / close.iloc[-252:].shift(1)).dropna())
+        np.testing.assert_allclose([mu[j], sigma[j], f_star[j]], expected, rtol=1e-9)
+
+        pct = ka.calculate_rsi_ma(close).rolling(252, min_periods=252).rank(pct=True) * 100
+        rets = np.log(close / close.shift(1))
+        for b, (lo, hi, _) in enumerate(ka.PERCENTILE_BUCKETS):
+            in_bucket = rets[(pct >= lo) & (pct < hi)].dropna()
+            _, _, ref_f = ka._compute_kelly(in_bucket)
+            if math.isnan(ref_f):
+                assert math.isnan(bucket_f[j, b])
+            else:
+                assert bucket_f[j, b] == ref_f or math.isclose(bucket_f[j, b], ref_f, rel_tol=1e-9)
+
+    assert n.tolist() == [251, 251, 251, 44]  # each window counts only that ticker's own bars
+
+
+def test_event_table_matches_sequential_entry_scan():
+    frame = _closes()
+    panel = ka.KellyPanel.from_frame(frame)
+    events = ka._entry_event_table(panel, horizon=5, rsi_ma_lookback=252)
+
+    for j, ticker in enumerate(frame.columns):
+        for b, (lo, hi, _) in enumerate(ka.PERCENTILE_BUCKETS):
+            got = events[(events["ticker"] == j) & (events["bucket"] == b)]["log_return"].tolist()
+            expected = _reference_events(frame[ticker].dropna(), lo, hi, horizon=5)
+            np.testing.assert_allclose(got, expected, rtol=1e-12)
+
+
+def test_non_positive_prices_keep_their_spacing_slot(monkeypatch):
+    panel = ka.KellyPanel.from_frame(_closes())
+    percentiles = panel.rsi_percentiles(252)
+    monkeypatch.setattr(panel, "rsi_percentiles", lambda lookback=252: percentiles)
+    entries = ka._entry_event_table(panel, horizon=5, rsi_ma_lookback=252)
+
+    bad = entries.iloc[::2]
+    panel.close = panel.close.copy()
+    panel.close[bad["bar"].to_numpy(), bad["ticker"].to_numpy()] = 0.0
+    events = ka._entry_event_table(panel, horizon=5, rsi_ma_lookback=252)
+
+    np.testing.assert_array_equal(events["bar"], entries["bar"])
+    np.testing.assert_array_equal(events["ticker"], entries["ticker"])
+    zeroed = set(zip(bad["ticker"], bad["bar"]))
+    untradable = np.array([
+        (t, b) in zeroed or (t, b + 5) in zeroed for t, b in zip(events["ticker"], events["bar"])
+    ])
+    assert events["log_return"][untradable].isna().all()
+    np.testing.assert_allclose(
+        events["log_return"][~untradable], entries["log_return"][~untradable], rtol=1e-12
+    )
+
+
+def test_full_analysis_downloads_once(monkeypatch):
+    frame = _closes()
+    calls = []
+
+    def download(tickers, **kwargs):
+        calls.append(kwargs["period"])
+        return pd.concat({"Close": frame[[t for t in tickers if t in frame.columns]]}, axis=1)
+
+    monkeypatch.setattr(ka.yf, "download", download)
+    res = ka.run_full_analysis(["AAA", "BTC", "NEW", "GONE"])
+
+    assert calls == ["2600d"]
+    errors = {r.ticker: r.error for r in res["strategy"]}
+    assert errors == {"AAA": None, "BTC": None, "NEW": "insufficient data", "GONE": "download failed"}
+    dyn = {r.ticker: r for r in res["dynamic"]}
+    assert dyn["NEW"].error == "insufficient data"  # under 60 bars
+    assert {r.ticker: r.error for r in res["historical"]}["NEW"] is None
+    assert set(dyn["BTC"].bucket_kelly) == {label for _, _, label in ka.PERCENTILE_BUCKETS}
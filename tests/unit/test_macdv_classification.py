@@ -0,0 +1,91 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+
+# Allow importing backend modules (repo layout: tests/ vs backend/)
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "../../backend"))
+
+from macdv_calculator import MACDVCalculator, _run_lengths, classify_macdv  # noqa: E402
+
+
+def _make_ohlc(index: pd.DatetimeIndex, *, seed: int, vol: float) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    # Regime-switching drift so every zone (ranging, rallying, risk, ...) is visited
+    drift = np.repeat(rng.normal(0, vol / 3, size=len(index) // 40 + 1), 40)[:len(index)]
+    close = 100 * np.exp(np.cumsum(drift + rng.normal(0, vol, size=len(index))))
+    open_ = np.roll(close, 1)
+    open_[0] = close[0]
+    return pd.DataFrame(
+        {
+            "open": open_,
+            "high": np.maximum(open_, close) * (1 + vol / 3),
+            "low": np.minimum(open_, close) * (1 - vol / 3),
+            "close": close,
+        },
+        index=index,
+    )
+
+
+def _reference_classification(val: pd.Series, signal: pd.Series) -> tuple:
+    """Per-bar loop and masked writes, as calculate_macdv originally did it."""
+    in_range = (val > -50) & (val < 50)
+    bars_since_range = pd.Series(0, index=val.index)
+    current_count = 0
+    for i in range(len(val)):
+        current_count = current_count + 1 if in_range.iloc[i] else 0
+        bars_since_range.iloc[i] = current_count
+
+    color = pd.Series("gray", index=val.index, dtype=object)
+    ranging_mask = in_range & (bars_since_range >= 19)
+    color[((val >= 150) & (val > signal)) | ((val <= -150) & (val < signal))] = "blue"
+    color[(val >= 50) & (val < 150) & (val > signal)] = "#0d6b57"
+    color[(val > -150) & (val < 50) & (val > signal)] = "green"
+    color[(val > -50) & (val < signal)] = "orange"
+    color[(val > -150) & (val <= -50) & (val < signal)] = "red"
+
+    trend = pd.Series("Neutral", index=val.index, dtype=object)
+    trend[val > 50] = "Bullish"
+    trend[val < -50] = "Bearish"
+    trend[ranging_mask] = "Ranging"
+    return color, trend
+
+
+def test_run_lengths_reset_on_false():
+    mask = np.array([True, True, False, True, True, True, False, False, True])
+    np.testing.assert_array_equal(_run_lengths(mask), [1, 2, 0, 1, 2, 3, 0, 0, 1])
+    assert _run_lengths(np.array([], dtype=bool)).size == 0
+
+
+@pytest.mark.parametrize(
+    "index, vol",
+    [
+        (pd.bdate_range("2014-01-01", periods=2520), 0.015),
+        (pd.date_range("2023-01-02 09:30", periods=3500, freq="h"), 0.004),
+    ],
+    ids=["daily_10y", "hourly_2y"],
+)
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_vectorized_classification_matches_loop(index, vol, seed):
+    df = MACDVCalculator().calculate_macdv(_make_ohlc(index, seed=seed, vol=vol))
+    color, trend = _reference_classification(df["macdv_val"], df["macdv_signal"])
+
+    assert df["macdv_color"].tolist() == color.tolist()
+    assert df["macdv_trend"].tolist() == trend.tolist()
+    # The synthetic series must actually exercise every branch
+    assert set(color) == {"gray", "blue", "#0d6b57", "green", "orange", "red"}
+    assert set(trend) == {"Neutral", "Bullish", "Bearish", "Ranging"}
+
+
+def test_classification_handles_boundaries_and_nan():
+    val = np.array([np.nan, 150.0, -150.0, 50.0, -50.0, 50.0, -50.0, 0.0, 20.0])
+    signal = np.array([0.0, 100.0, -100.0, 40.0, -40.0, 60.0, -60.0, 0.0, np.nan])
+    colors, trends = classify_macdv(val, signal)
+    expected_color, expected_trend = _reference_classification(pd.Series(val), pd.Series(signal))
+
+    assert colors.tolist() == expected_color.tolist()
+    assert trends.tolist() == expected_trend.tolist()
+    assert colors.tolist() == ["gray", "blue", "blue", "#0d6b57", "red", "orange", "green", "gray", "gray"]
@@ -0,0 +1,135 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+
+# Allow importing backend modules (repo layout: tests/ vs backend/)
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "../../backend"))
+
+import macdv_calculator as mc  # noqa: E402
+
+
+def _make_ohlcv(index: pd.DatetimeIndex, *, seed: int) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0.0003, 0.01, size=len(index))))
+    open_ = np.roll(close, 1)
+    open_[0] = close[0]
+    return pd.DataFrame(
+        {
+            "open": open_,
+            "high": np.maximum(open_, close) * 1.004,
+            "low": np.minimum(open_, close) * 0.996,
+            "close": close,
+            "volume": rng.integers(1_000, 5_000, size=len(index)).astype(float),
+        },
+        index=index,
+    )
+
+
+def _hourly_sessions(days: int) -> pd.DatetimeIndex:
+    sessions = pd.bdate_range("2024-01-02", periods=days, tz="America/New_York")
+    return pd.DatetimeIndex([
+        day + pd.Timedelta(hours=9, minutes=30) + pd.Timedelta(hours=h)
+        for day in sessions for h in range(7)
+    ])
+
+
+def test_resample_weekly_monthly_and_session_4h():
+    daily = _make_ohlcv(pd.bdate_range("2023-01-02", periods=300), seed=1)
+
+    weekly = mc.resample_ohlcv(daily, "W-MON")
+    assert (weekly.index.dayofweek == 0).all()
+    week = daily.loc["2023-03-06":"2023-03-10"]
+    row = weekly.loc["2023-03-06"]
+    assert row["open"] == week["open"].iloc[0] and row["close"] == week["close"].iloc[-1]
+    assert row["high"] == week["high"].max() and row["low"] == week["low"].min()
+    assert row["volume"] == week["volume"].sum()
+
+    monthly = mc.resample_ohlcv(daily, "MS")
+    assert (monthly.index.day == 1).all()
+    assert monthly["close"].iloc[-1] == daily["close"].iloc[-1]
+
+    hourly = _make_ohlcv(_hourly_sessions(5), seed=2)
+    four_h = mc.resample_ohlcv(hourly, "4h")
+    assert len(four_h) == 10
+    assert [ts.strftime("%H:%M") for ts in four_h.index[:2]] == ["09:30", "13:30"]
+    assert four_h["close"].iloc[1] == hourly["close"].iloc[6]
+
+
+def test_dashboard_downloads_base_series_once_and_caches(monkeypatch):
+    daily_index = pd.bdate_range(end="2024-06-28", periods=1400)
+    frames = {
+        "1d": {"AAA": _make_ohlcv(daily_index, seed=3), "BBB": pd.DataFrame()},
+        "1h": {"AAA": _make_ohlcv(_hourly_sessions(40), seed=4), "BBB": pd.DataFrame()},
+    }
+    calls = []
+
+    def fake_download(symbols, period, interval):
+        calls.append((interval, period))
+        return {s: frames[interval][s] for s in symbols}
+
+    monkeypatch.setattr(mc, "_download_bulk", fake_download)
+    monkeypatch.setattr(mc, "_dashboard_cache", {})
+
+    calculator = mc.MACDVCalculator()
+    timeframes = ["1mo", "1wk", "1d", "1h", "4h"]
+    dashboard = calculator.get_dashboard_data(["AAA", "BBB"], timeframes)
+    assert sorted(calls) == [("1d", "5y"), ("1h", "60d")]
+    assert dashboard["symbols"]["BBB"] == {}
+    assert set(dashboard["symbols"]["AAA"]) == set(timeframes)
+
+    daily = frames["1d"]["AAA"]
+    expected = calculator.calculate_macdv(daily[daily.index > daily.index[-1] - pd.DateOffset(years=1)]).iloc[-1]
+    assert dashboard["symbols"]["AAA"]["1d"]["macdv_val"] == expected["macdv_val"]
+    assert dashboard["symbols"]["AAA"]["1d"]["macdv_color"] == expected["macdv_color"]
+
+    assert calculator.get_dashboard_data(["AAA", "BBB"], timeframes) == dashboard
+    assert len(calls) == 2
+
+
+def test_max_period_is_an_unbounded_window():
+    daily = _make_ohlcv(pd.bdate_range("2010-01-04", periods=3000), seed=5)
+    assert mc._period_offset("max") is None
+    assert mc._period_days("max") > mc._period_days("5y")
+    pd.testing.assert_frame_equal(mc._trim_to_period(daily, "max"), daily)
+
+
+def test_dashboard_builds_are_single_flight_per_key(monkeypatch):
+    import threading
+
+    daily = _make_ohlcv(pd.bdate_range(end="2024-06-28", periods=400), seed=6)
+    started = {"AAA": threading.Event(), "BBB": threading.Event()}
+    release = threading.Event()
+    calls = []
+
+    def fake_download(symbols, period, interval):
+        calls.append(tuple(symbols))
+        started[symbols[0]].set()
+        if symbols[0] == "AAA":
+            assert release.wait(5)
+        return {s: daily for s in symbols}
+
+    monkeypatch.setattr(mc, "_download_bulk", fake_download)
+    monkeypatch.setattr(mc, "_dashboard_cache", {})
+    monkeypatch.setattr(mc, "_dashboard_builds", {})
+
+    calculator = mc.MACDVCalculator()
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(calculator.get_dashboard_data(["AAA"], ["1d"])))
+               for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    assert started["AAA"].wait(5)
+
+    # A different dashboard is not blocked behind the in-flight AAA build
+    other = calculator.get_dashboard_data(["BBB"], ["1d"])
+    assert set(other["symbols"]) == {"BBB"}
+
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    assert calls.count(("AAA",)) == 1
+    assert len(results) == 3 and all(r == results[0] for r in results)
+    assert mc._dashboard_builds == {}
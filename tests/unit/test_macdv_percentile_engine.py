@@ -0,0 +1,69 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+
+# Allow importing backend modules (repo layout: tests/ vs backend/)
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "../../backend"))
+
+from macdv_percentile_calculator import MACDVPercentileCalculator, rolling_group_percentile_ranks  # noqa: E402
+
+
+def _reference_ranks(values: pd.Series, lookback: int, member) -> pd.Series:
+    """Per-bar window slicing, as the percentile modes originally did it."""
+    out = pd.Series(np.nan, index=values.index)
+    for i in range(len(values)):
+        current = values.iloc[i]
+        if not member(current, current):
+            continue
+        window = values.iloc[max(0, i - lookback):i + 1]
+        population = window[[member(v, current) for v in window]]
+        if len(population) < 2:
+            out.iloc[i] = 50.0
+            continue
+        out.iloc[i] = round((population < current).sum() / len(population) * 100, 2)
+    return out
+
+
+def _zone(value: float):
+    for idx, (_, zone_min, zone_max) in enumerate(MACDVPercentileCalculator.ZONES):
+        if zone_min <= value < zone_max:
+            return idx
+    return None
+
+
+_MEMBERSHIP = {
+    "categorical": lambda v, cur: _zone(cur) is not None and _zone(v) == _zone(cur),
+    "global": lambda v, cur: True,
+    "asymmetric": lambda v, cur: (cur >= 0 and v >= 0) or (cur < 0 and v < 0),
+}
+
+
+def _macdv_like(n: int, seed: int) -> pd.Series:
+    rng = np.random.default_rng(seed)
+    values = np.round(np.cumsum(rng.normal(0, 12, size=n)) % 360 - 180, 2)
+    values[:25] = np.nan
+    values[200:215] = values[190]  # run of ties
+    return pd.Series(values, index=pd.bdate_range("2015-01-01", periods=n))
+
+
+@pytest.mark.parametrize("method", ["categorical", "global", "asymmetric"])
+@pytest.mark.parametrize("lookback", [20, 252])
+def test_percentile_modes_match_window_loop(method, lookback):
+    series = _macdv_like(700, seed=lookback)
+    calculator = MACDVPercentileCalculator(percentile_lookback=lookback)
+
+    actual = calculator.calculate_percentile_ranks(series, method=method)
+    expected = _reference_ranks(series, lookback, _MEMBERSHIP[method])
+    np.testing.assert_array_equal(actual.to_numpy(), expected.to_numpy())
+
+
+def test_rolling_group_ranks_small_windows():
+    values = np.array([1.0, 3.0, 2.0, np.nan, 2.0, 5.0])
+    groups = np.array([0, 0, 1, 0, 1, -1])
+    ranks = rolling_group_percentile_ranks(values, groups, lookback=2)
+    np.testing.assert_array_equal(ranks, [50.0, 50.0, 50.0, 0.0, 0.0, np.nan])
+    assert rolling_group_percentile_ranks(np.array([]), np.array([], dtype=int), 5).size == 0
@@ -0,0 +1,97 @@
+import json
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+
+# Allow importing backend modules (repo layout: tests/ vs backend/)
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "../../backend"))
+
+import precompute_macdv_references as pmr  # noqa: E402
+from macdv_reference_lookup import MACDVReferenceLookup  # noqa: E402
+
+
+def _make_ohlc(periods: int, *, seed: int) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range(end="2026-10-16", periods=periods)
+    close = 100 * np.exp(np.cumsum(rng.normal(0.0004, 0.015, size=periods)))
+    open_ = np.roll(close, 1)
+    open_[0] = close[0]
+    return pd.DataFrame(
+        {
+            "open": open_,
+            "high": np.maximum(open_, close) * 1.01,
+            "low": np.minimum(open_, close) * 0.99,
+            "close": close,
+        },
+        index=index,
+    )
+
+
+def _roundtrip(state: dict) -> dict:
+    return json.loads(json.dumps(state))
+
+
+def test_full_build_matches_direct_distribution():
+    df = _make_ohlc(1260, seed=1)
+    reference = pmr.reference_from_state("X", pmr.build_ticker_state(df))
+
+    values = pmr._new_calculator(252).calculate_macdv_with_percentiles(df)
+    macdv = values["macdv_val"].dropna()
+    overall = reference["overall_distribution"]
+    assert overall["count"] == len(macdv)
+    assert overall["median"] == macdv.median()
+    assert overall["percentiles"][5] == np.percentile(macdv, 5)
+    assert np.isclose(overall["mean"], macdv.mean()) and np.isclose(overall["std"], macdv.std())
+    assert reference["current_state"]["categorical_percentile"] == values["macdv_percentile"].iloc[-1]
+    assert reference["current_state"]["zone"] == values["macdv_zone"].iloc[-1]
+    assert reference["date_range"] == {
+        "start": df.index[0].strftime("%Y-%m-%d"),
+        "end": df.index[-1].strftime("%Y-%m-%d"),
+    }
+
+
+def test_incremental_update_matches_rebuild_even_after_price_adjustment():
+    df = _make_ohlc(1260, seed=2)
+    full = pmr.build_ticker_state(df)
+
+    # Older bars on a previous adjusted-close basis (e.g. before a dividend)
+    stale = df.iloc[:-20].copy()
+    stale[["open", "high", "low", "close"]] *= 0.97
+    updated = pmr.update_ticker_state(_roundtrip(pmr.build_ticker_state(stale)), df.iloc[-30:])
+
+    assert updated["last_bar"] == full["last_bar"]
+    assert updated["months"] == full["months"]
+    assert np.allclose(
+        [v for v in updated["macdv_tail"] if v is not None],
+        [v for v in full["macdv_tail"] if v is not None],
+    )
+    assert pmr.update_ticker_state(_roundtrip(full), df.iloc[-5:].drop(df.index[-1])) is None
+
+
+def test_generate_writes_per_ticker_files_and_lookup_loads_lazily(tmp_path, monkeypatch):
+    frames = {"AAA": _make_ohlc(1260, seed=3), "^VIX": _make_ohlc(1260, seed=4)}
+    calls = []
+
+    def fake_download(tickers, period=None, start=None):
+        calls.append((tuple(tickers), period, start))
+        if start is None:
+            return {t: frames[t].iloc[:-10] for t in tickers}
+        return {t: frames[t][frames[t].index >= start] for t in tickers}
+
+    monkeypatch.setattr(pmr, "_download_daily_bulk", fake_download)
+    first = pmr.generate_reference_database(["AAA", "^VIX"], reference_dir=tmp_path)
+    second = pmr.generate_reference_database(["AAA", "^VIX"], reference_dir=tmp_path)
+
+    assert [c[1] for c in calls] == ["5y", None]  # full build, then one incremental download
+    assert second["ticker_data"]["AAA"]["current_state"]["last_date"] == frames["AAA"].index[-1].strftime("%Y-%m-%d")
+    assert first["ticker_data"]["AAA"]["data_points"] + 10 == second["ticker_data"]["AAA"]["data_points"]
+
+    lookup = MACDVReferenceLookup(reference_dir=tmp_path)
+    assert lookup.list_available_tickers() == ["AAA", "^VIX"]
+    assert lookup.ticker_data == {}
+    assert lookup.get_ticker_info("^VIX")["current_state"] == second["ticker_data"]["^VIX"]["current_state"]
+    assert list(lookup.ticker_data) == ["^VIX"]
+    assert lookup.get_ticker_info("MISSING") is None
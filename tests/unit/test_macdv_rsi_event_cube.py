@@ -0,0 +1,83 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+
+# Allow importing backend modules (repo layout: tests/ vs backend/)
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "../../backend"))
+
+import macdv_rsi_event_cube as cube_mod  # noqa: E402
+from enhanced_backtester import EnhancedPerformanceMatrixBacktester  # noqa: E402
+from macdv_rsi_band_analysis import RSI_BANDS  # noqa: E402
+
+
+def _make_ohlcv(periods: int, *, seed: int) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range("2020-01-01", periods=periods)
+    drift = np.repeat(rng.normal(0.002, 0.004, size=periods // 40 + 1), 40)[:periods]
+    close = 100 * np.exp(np.cumsum(drift + rng.normal(0, 0.015, size=periods)))
+    open_ = np.roll(close, 1)
+    open_[0] = close[0]
+    return pd.DataFrame(
+        {
+            "Open": open_,
+            "High": np.maximum(open_, close) * 1.01,
+            "Low": np.minimum(open_, close) * 0.99,
+            "Close": close,
+            "Volume": 1e6,
+        },
+        index=index,
+    )
+
+
+def _reference_cell(events: pd.DataFrame, horizon: int, macdv_lo, macdv_hi, rlo, rhi) -> dict:
+    closes = events["close"].to_numpy()
+    rets = [
+        (closes[i + horizon] / closes[i] - 1.0) * 100.0
+        for i in range(len(events) - horizon)
+        if macdv_lo <= events["macdv_val"].iloc[i] < macdv_hi and rlo <= events["rsi_pct"].iloc[i] < rhi
+    ]
+    if not rets:
+        return {"n": 0, "win_rate": None, "mean": None, "median": None}
+    arr = np.asarray(rets)
+    return {"n": len(arr), "win_rate": (arr > 0).mean() * 100, "mean": arr.mean(), "median": np.median(arr)}
+
+
+def _assert_cell(actual: dict, expected: dict) -> None:
+    assert actual["n"] == expected["n"]
+    for key in ("win_rate", "mean", "median"):
+        if expected[key] is None:
+            assert actual[key] is None
+        else:
+            assert np.isclose(actual[key], expected[key], rtol=1e-12)
+
+
+def test_band_table_matches_per_entry_loop(monkeypatch, tmp_path):
+    frames = {"AAA": _make_ohlcv(800, seed=1), "BBB": _make_ohlcv(800, seed=2)}
+    monkeypatch.setattr(cube_mod, "_CUBE_DIR", tmp_path)
+    monkeypatch.setattr(cube_mod, "_mem_cube", {})
+    monkeypatch.setattr(
+        EnhancedPerformanceMatrixBacktester, "fetch_data",
+        lambda self, ticker, period="5y", use_sample_data=False: frames.get(ticker, pd.DataFrame()).copy(),
+    )
+
+    cube = cube_mod.load_event_cube(["AAA", "BBB", "MISSING"], period="3y")
+    assert cube.tickers == ["AAA", "BBB"]
+    assert {"d1", "d21"}.issubset(cube.events.columns)
+    assert list(tmp_path.glob("*.pkl")) and len(list(tmp_path.glob("*.pkl"))) == 2
+
+    for horizon, (lo, hi) in [(7, (50.0, 150.0)), (3, (-50.0, 50.0))]:
+        table = cube.band_table(horizon, RSI_BANDS, macdv_lo=lo, macdv_hi=hi)
+        for ticker in cube.tickers:
+            events = cube.events[cube.events["ticker"] == ticker].reset_index(drop=True)
+            for rlo, rhi, label in RSI_BANDS:
+                _assert_cell(table[ticker][label], _reference_cell(events, horizon, lo, hi, rlo, rhi))
+        assert table["ALL"]["40-50"]["n"] == sum(table[t]["40-50"]["n"] for t in cube.tickers)
+
+    # A second load within the TTL is served from the persisted cube without fetching
+    monkeypatch.setattr(cube_mod, "_mem_cube", {})
+    monkeypatch.setattr(EnhancedPerformanceMatrixBacktester, "fetch_data", lambda *a, **k: None)
+    reloaded = cube_mod.load_event_cube(["AAA", "BBB"], period="3y")
+    pd.testing.assert_frame_equal(reloaded.events, cube.events)
@@ -0,0 +1,104 @@
+import asyncio
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+
+# Allow importing backend modules (repo layout: tests/ vs backend/)
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "../../backend"))
+
+import macro_risk_metrics as mrm  # noqa: E402
+import yf_batch  # noqa: E402
+
+
+def _closes(periods: int = 700) -> pd.DataFrame:
+    rng = np.random.default_rng(3)
+    index = pd.bdate_range(end="2026-10-16", periods=periods)
+    return pd.DataFrame({
+        "^TNX": 4 + np.cumsum(rng.normal(0, 0.05, periods)),
+        "^IRX": 4.5 + np.cumsum(rng.normal(0, 0.05, periods)),
+        "SPY": 400 * np.exp(np.cumsum(rng.normal(0.0005, 0.01, periods))),
+        "^VIX": 18 * np.exp(np.cumsum(rng.normal(0, 0.05, periods))),
+    }, index=index)
+
+
+class _FakeDownload:
+    def __init__(self, closes: pd.DataFrame):
+        self.closes = closes
+        self.periods = []
+
+    def __call__(self, tickers, period, **kwargs):
+        self.periods.append(period)
+        days = int(period.rstrip("d"))
+        df = self.closes[self.closes.index > self.closes.index[-1] - pd.Timedelta(days=days)]
+        return pd.concat({"Close": df}, axis=1)
+
+
+def _expected(closes: pd.DataFrame) -> pd.DataFrame:
+    return mrm.derive_macro_series(closes.rename(columns=mrm._SYMBOLS))
+
+
+def test_incremental_refresh_matches_full_recompute(monkeypatch):
+    full = _closes()
+    full.loc[full.index[-300], "^IRX"] = np.nan   # bond-market holiday
+    download = _FakeDownload(full.iloc[:-3])
+    monkeypatch.setattr(yf_batch.yf, "download", download)
+    store = mrm.MacroSeriesStore()
+
+    store.refresh()
+    # Three new bars arrive and the previously last bar is revised
+    revised = full.copy()
+    revised.iloc[-4, revised.columns.get_loc("SPY")] *= 1.01
+    download.closes = revised
+    store.refresh()
+
+    assert download.periods == [f"{mrm.MACRO_HISTORY_DAYS}d", mrm._INCREMENTAL_PERIOD]
+    pd.testing.assert_frame_equal(store.frame, _expected(revised), check_freq=False)
+
+
+def test_vectorized_levels_match_scalar_thresholds():
+    spread = pd.Series([1.5, 0.5, 0.0, -0.5, -1.0, np.nan])
+    curve = mrm.yield_curve_series(spread)
+    assert curve["curve_severity"].tolist()[:5] == ["Normal", "Flat", "Flat", "Inverted", "Deeply Inverted"]
+    assert curve["curve_risk"].tolist()[:5] == ["Low", "Low", "Medium", "High", "High"]
+    assert curve.iloc[5].isna().all()
+
+    composite = mrm.composite_risk_series(
+        pd.Series(["Low", "Medium", "High", None]),
+        pd.Series(["Low", "Medium", "High", "Low"]),
+        pd.Series(["Medium", "High", "High", "Low"]),
+    )
+    np.testing.assert_allclose(composite["composite_score"].iloc[:3], [1.3, 2.3, 3.0])
+    assert composite["overall_risk_level"].tolist()[:3] == ["Low", "Medium", "High"]
+    assert np.isnan(composite["composite_score"].iloc[3])
+
+    metrics = mrm.calculate_composite_risk_score(
+        mrm.calculate_yield_curve_metrics(4.5, 4.0),
+        mrm.BreadthMetrics(80.0, "Bullish", "Low"),
+        mrm.MMFIMetrics(-7.0, "Bearish", "High"),
+    )
+    assert metrics["composite_score"] == 1.6 and metrics["overall_risk_level"] == "Medium"
+
+
+def test_endpoints_read_from_store(monkeypatch):
+    download = _FakeDownload(_closes())
+    monkeypatch.setattr(yf_batch.yf, "download", download)
+    monkeypatch.setattr(mrm, "macro_store", mrm.MacroSeriesStore())
+
+    current = asyncio.run(mrm.get_macro_risk_metrics())
+    history = asyncio.run(mrm.get_historical_risk_metrics(days=60))
+    assert download.periods == [f"{mrm.MACRO_HISTORY_DAYS}d"]
+
+    last = history["historical_data"][-1]
+    assert last["us_10y"] == current["yield_curve"]["us_10y"]
+    assert round(last["composite_score"], 2) == current["composite_risk"]["composite_score"]
+    assert last["overall_risk_level"] == current["composite_risk"]["overall_risk_level"]
+    assert all(row["spy_distance_from_ma200"] is not None for row in history["historical_data"])
+
+    # Oversized requests are capped instead of loading an unbounded history
+    history = asyncio.run(mrm.get_historical_risk_metrics(days=10**9))
+    assert history["period_days"] == mrm.MACRO_MAX_HISTORY_DAYS
+    assert download.periods[-1] == f"{mrm.MACRO_MAX_HISTORY_DAYS}d"
+    assert mrm.macro_store.history_days == mrm.MACRO_MAX_HISTORY_DAYS
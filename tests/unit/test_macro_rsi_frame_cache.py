@@ -0,0 +1,96 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+
+# Allow importing backend modules (repo layout: tests/ vs backend/)
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "../../backend"))
+
+import macro_rsi_calculator as mrc  # noqa: E402
+
+
+def _make_ohlcv(seed: int) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range(end=pd.Timestamp.now().normalize(), periods=800)
+    close = 100 * np.exp(np.cumsum(rng.normal(0.0003, 0.012, size=len(index))))
+    return pd.DataFrame(
+        {
+            "Open": close,
+            "High": close * 1.01,
+            "Low": close * 0.99,
+            "Close": close,
+            "Volume": 1e6,
+        },
+        index=index,
+    )
+
+
+def _fake_download(frames: dict, calls: list):
+    def download(symbols, period=None, **kwargs):
+        symbols = [symbols] if isinstance(symbols, str) else list(symbols)
+        calls.append((tuple(symbols), period))
+        cutoff = (pd.Timestamp.now() - mrc._period_offset(period)).normalize()
+        present = [s for s in symbols if s in frames]
+        if not present:
+            return pd.DataFrame()
+        return pd.concat({s: frames[s][frames[s].index >= cutoff] for s in present}, axis=1)
+
+    return download
+
+
+def test_shared_frames_downloads_union_once_and_matches_direct_calls(monkeypatch):
+    frames = {sym: _make_ohlcv(seed) for seed, sym in enumerate(["AAA", "BBB", "SPY", "^VIX", "XLK"])}
+    calls: list = []
+    monkeypatch.setattr(mrc.yf, "download", _fake_download(frames, calls))
+    monkeypatch.setattr(mrc.yf, "Ticker", lambda sym: (_ for _ in ()).throw(AssertionError(sym)))
+    monkeypatch.setattr(mrc, "_cache", {})
+
+    def run_all():
+        return (
+            mrc.fetch_all_macro_data(keys=["XLK", "SPY"]),
+            mrc.compute_live_ffd_values(["AAA", "BBB"]),
+            mrc.compute_live_full_rows(["AAA"]),
+            mrc.compute_live_sma200_distances(["AAA", "BBB", "XLK"]),
+        )
+
+    direct = run_all()
+    assert len(calls) == 4
+    assert {period for _, period in calls} == {"3y", "15mo", "2y"}
+
+    calls.clear()
+    monkeypatch.setattr(mrc, "_cache", {})
+    symbols = mrc.macro_symbols(["XLK", "SPY"]) + ["AAA", "BBB"]
+    with mrc.shared_frames(symbols):
+        shared = run_all()
+    assert calls == [(("XLK", "SPY", "AAA", "BBB"), "3y")]
+    assert shared == direct
+
+
+def test_shared_frames_fetches_unknown_symbols_on_demand_once(monkeypatch):
+    frames = {"AAA": _make_ohlcv(1), "BBB": _make_ohlcv(2)}
+    calls: list = []
+    monkeypatch.setattr(mrc.yf, "download", _fake_download(frames, calls))
+
+    class _EmptyTicker:
+        def __init__(self, sym):
+            calls.append(((sym,), "single"))
+
+        def history(self, period=None, auto_adjust=True):
+            return pd.DataFrame()
+
+    monkeypatch.setattr(mrc.yf, "Ticker", _EmptyTicker)
+
+    with mrc.shared_frames(["AAA"]) as cache:
+        with mrc.shared_frames() as inner:
+            assert inner is cache
+        distances = mrc.compute_live_sma200_distances(["AAA", "BBB", "MISSING"])
+        assert mrc._fetch_close("MISSING") is None
+    assert mrc._active_frames.get() is None
+
+    assert [(set(symbols), period) for symbols, period in calls] == [
+        ({"AAA"}, "3y"), ({"BBB", "MISSING"}, "3y"), ({"MISSING"}, "single"),
+    ]
+    assert distances["MISSING"]["error"] == "insufficient data"
+    assert distances["BBB"]["distance_pct"] is not None
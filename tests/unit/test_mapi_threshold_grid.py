@@ -0,0 +1,106 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+
+# Allow importing backend modules (repo layout: tests/ vs backend/)
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "../../backend"))
+
+from mapi_analysis import MAPIAnalyzer  # noqa: E402
+from mapi_calculator import MAPICalculator  # noqa: E402
+
+
+def _make_ohlc(periods: int, *, seed: int) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    index = pd.date_range("2020-01-01", periods=periods, freq="B")
+    close = 100 * np.exp(np.cumsum(rng.normal(0.0004, 0.012, size=periods)))
+    open_ = np.roll(close, 1)
+    open_[0] = close[0]
+    return pd.DataFrame(
+        {
+            "open": open_,
+            "high": np.maximum(open_, close) * 1.005,
+            "low": np.minimum(open_, close) * 0.995,
+            "close": close,
+            "volume": rng.integers(1_000_000, 5_000_000, size=periods),
+        },
+        index=index,
+    )
+
+
+def _reference_percentile_rank(values: np.ndarray, lookback: int) -> np.ndarray:
+    out = np.empty(len(values))
+    for i in range(len(values)):
+        window = values[max(0, i - lookback + 1):i + 1]
+        out[i] = 50.0 if len(window) < 2 else np.sum(window[:-1] < window[-1]) / (len(window) - 1) * 100
+    return out
+
+
+def _reference_trades(df, mapi, composite, edr, esv, holding_period):
+    signal = (
+        (mapi["composite_percentile_rank"] >= composite)
+        & (mapi["edr_percentile"] >= edr)
+        & (df["close"] > mapi["ema20"])
+        & (mapi["adx"] > 25)
+    )
+    if esv is not None:
+        signal &= mapi["esv_percentile"] >= esv
+    close = df["close"].to_numpy()
+    return np.array([
+        (close[i + holding_period] - close[i]) / close[i] * 100
+        for i in range(len(df) - holding_period)
+        if signal.iloc[i]
+    ])
+
+
+def test_percentile_rank_matches_expanding_then_rolling_window():
+    values = np.random.default_rng(0).normal(size=400)
+    values[10] = np.nan
+    values[200] = values[199]
+    ranks = MAPICalculator().calculate_percentile_rank(pd.Series(values), 60)
+    np.testing.assert_array_equal(ranks.to_numpy(), _reference_percentile_rank(values, 60))
+
+
+def test_threshold_grid_matches_per_cell_backtest():
+    df = _make_ohlc(900, seed=5)
+    analyzer = MAPIAnalyzer()
+    mapi = analyzer.calculator.calculate_mapi(df)
+    features = analyzer.build_feature_matrix(df, holding_periods=(3, 7))
+
+    composites, edrs, esvs = [30, 50, 70], [10, 40], [None, 50]
+    for holding_period in (3, 7):
+        grid = analyzer.evaluate_threshold_grid(features, composites, edrs, esvs, holding_period=holding_period)
+        assert len(grid) == len(composites) * len(edrs) * len(esvs)
+        for result in grid:
+            trades = _reference_trades(
+                df, mapi, result.composite_threshold, result.edr_threshold, result.esv_threshold, holding_period
+            )
+            assert result.total_trades == len(trades)
+            assert result.winning_trades == int((trades > 0).sum())
+            if len(trades):
+                assert np.isclose(result.avg_return, trades.mean())
+                drawdown = np.cumsum(trades) - np.maximum.accumulate(np.cumsum(trades))
+                assert np.isclose(result.max_drawdown, abs(drawdown.min()))
+
+
+def test_scan_universe_uses_bulk_frames_and_caches_stats(monkeypatch):
+    import mapi_analysis
+
+    frames = {"AAA": _make_ohlc(260, seed=1), "BBB": _make_ohlc(260, seed=2), "EMPTY": pd.DataFrame()}
+    monkeypatch.setattr(
+        mapi_analysis, "fetch_daily_history",
+        lambda symbols, period="1y", deadline=None: {s: frames.get(s, pd.DataFrame()) for s in symbols},
+    )
+    monkeypatch.setattr(mapi_analysis, "_historical_stats_cache", {})
+
+    analyzer = MAPIAnalyzer()
+    scan = analyzer.scan_universe(["aaa", "BBB", "EMPTY"], max_workers=1)
+    assert sorted(s.symbol for s in scan.signals) == ["AAA", "BBB"]
+    assert scan.failed == ["EMPTY"] and scan.timed_out == []
+    assert len(mapi_analysis._historical_stats_cache) == 2
+
+    expected = analyzer.signal_from_frame("AAA", frames["AAA"])
+    cached = next(s for s in analyzer.scan_universe(["AAA"], max_workers=1).signals)
+    assert cached == expected
@@ -1,3 +1,4 @@
+import asyncio
 import os
 import sys
 
@@ -49,3 +50,120 @@ def test_ext_lower_is_mean_when_dev_is_zero():
     levels = lower_extension._mbad_levels_for_index(df, idx=5, length=5, tick_size=0.01)
     assert levels["ext_lower"] == levels["basis"] == 100.0
 
+
+
+def _make_bars(periods: int, seed: int) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range(end=pd.Timestamp.now().normalize(), periods=periods)
+    close = np.round(100 * np.exp(np.cumsum(rng.normal(0, 0.02, size=periods))), 2)
+    open_ = np.roll(close, 1)
+    open_[0] = close[0]
+    open_[20:26] = close[20:26]  # zero-body bars collapse the inferred-volume weights
+    return pd.DataFrame(
+        {
+            "Open": open_,
+            "High": np.maximum(open_, close),
+            "Low": np.minimum(open_, close),
+            "Close": close,
+            "Volume": 1e6,
+        },
+        index=index,
+    )
+
+
+def _reference_levels(df: pd.DataFrame, idx: int, length: int) -> dict:
+    """One bar's MBAD levels computed with a plain per-window loop (PineScript order)."""
+    window = df.iloc[idx - length + 1 : idx + 1]
+    src = window["Close"].to_numpy(dtype=float)[::-1]
+    weights = np.arange(length, 0, -1, dtype=float) * np.abs(src - window["Open"].to_numpy(dtype=float)[::-1])
+    sum_w = float(np.sum(weights))
+    if sum_w <= 0:
+        weights = np.ones_like(src)
+        sum_w = float(length)
+    mean = float(np.sum(src * weights) / sum_w)
+    diffs = src - mean
+    dev = float(np.sqrt(max(float(np.sum(diffs**2 * weights) / sum_w), 0.0)))
+    skew = kurt = hskew = hkurt = 0.0
+    if dev > 0:
+        skew, kurt, hskew, hkurt = (float(np.sum(diffs**k * weights) / sum_w) / dev**k for k in (3, 4, 5, 6))
+    return {
+        "lim_lower": _round_to_tick(mean - dev * hkurt + dev * hskew),
+        "ext_lower": _round_to_tick(mean - dev * kurt + dev * skew),
+        "dev_lower": _round_to_tick(mean - dev),
+        "dev_lower2": _round_to_tick(mean - 2 * dev),
+        "basis": _round_to_tick(mean),
+        "dev_upper": _round_to_tick(mean + dev),
+        "ext_upper": _round_to_tick(mean + dev * kurt + dev * skew),
+        "lim_upper": _round_to_tick(mean + dev * hkurt + dev * hskew),
+    }
+
+
+def test_level_series_matches_per_bar_levels_exactly():
+    df = _make_bars(160, seed=7)
+    for length in (5, 30):
+        series = lower_extension.mbad_level_series(df, length)
+        assert series.iloc[: length - 1].isna().all().all()
+        for idx in range(length - 1, len(df)):
+            expected = _reference_levels(df, idx, length)
+            assert {name: series[name].iloc[idx] for name in expected} == expected
+
+
+def test_metrics_and_candles_share_one_download(monkeypatch):
+    bars = _make_bars(300, seed=11)
+    calls = []
+
+    def fake_download(symbol, start=None, end=None, **kwargs):
+        calls.append(symbol)
+        return bars[bars.index >= pd.Timestamp(start.date())].copy()
+
+    monkeypatch.setattr(lower_extension.yf, "download", fake_download)
+    monkeypatch.setattr(lower_extension, "_BARS_CACHE", {})
+    monkeypatch.setattr(lower_extension, "_LEVELS_CACHE", {})
+
+    metrics = lower_extension.calculate_mbad_levels("AAA", length=30, lookback_days=30)
+    candles = lower_extension._lower_extension_candles("AAA", days=60, length=30)
+
+    assert calls == ["AAA"]
+    assert candles["count"] == 60
+    assert candles["candles"][-1]["mbad"] == {
+        name: metrics["all_levels"][name] for name in candles["candles"][-1]["mbad"]
+    }
+
+
+def test_metrics_batch_uses_one_bulk_download_and_fills_cache(monkeypatch):
+    bars = {
+        "AAA": _make_bars(300, seed=1),
+        "BBB": _make_bars(300, seed=2).iloc[::2],  # sparser calendar than AAA
+        "CCC": _make_bars(300, seed=3),
+    }
+    calls = []
+
+    def fake_download(symbols, start=None, end=None, **kwargs):
+        calls.append(symbols)
+        day = pd.Timestamp(start.date())
+        if isinstance(symbols, str):
+            return bars[symbols][bars[symbols].index >= day].copy()
+        present = {s: bars[s][bars[s].index >= day] for s in symbols if s in bars}
+        return pd.concat(present, axis=1)
+
+    monkeypatch.setattr(lower_extension.yf, "download", fake_download)
+    for name in ("_BARS_CACHE", "_LEVELS_CACHE", "_METRICS_CACHE"):
+        monkeypatch.setattr(lower_extension, name, {})
+
+    request = lower_extension.LowerExtensionBatchRequest(tickers=["AAA", "BBB", "MISSING"])
+    response = asyncio.run(lower_extension.get_lower_extension_metrics_batch(request))
+
+    assert sorted(calls[0]) == ["AAA", "BBB", "MISSING"]
+    assert calls[1:] == ["MISSING"]  # only the ticker the bulk response lacked falls back
+    assert sorted(response["results"]) == ["AAA", "BBB"] and "MISSING" in response["errors"]
+
+    # A single-ticker call afterwards is a cache hit
+    assert lower_extension.get_or_calculate_mbad_levels("BBB") is response["results"]["BBB"]
+    assert len(calls) == 2
+
+    # Bulk results match the per-ticker download path
+    for name in ("_BARS_CACHE", "_LEVELS_CACHE"):
+        monkeypatch.setattr(lower_extension, name, {})
+    single = lower_extension.calculate_mbad_levels("BBB")
+    for key in ("levels", "all_levels", "pct_dist_lower_ext", "breach_count_30d", "historical_prices"):
+        assert single[key] == response["results"]["BBB"][key]
@@ -0,0 +1,106 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+
+# Allow importing backend modules (repo layout: tests/ vs backend/)
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "../../backend"))
+
+from position_manager import PositionManager  # noqa: E402
+
+
+def _manager(n: int = 420, seed: int = 11) -> PositionManager:
+    rng = np.random.default_rng(seed)
+    index = pd.date_range("2023-01-02", periods=n, freq="B")
+    close = pd.Series(50 * np.exp(np.cumsum(rng.normal(0, 0.02, n))), index=index)
+    # Slow daily percentile, fast 4h percentile: gaps open and close often
+    daily = pd.Series(np.clip(50 + np.cumsum(rng.normal(0, 6, n)), 0, 100), index=index)
+    fast = pd.Series(rng.uniform(0, 100, n), index=index)
+    fast = fast.where(rng.uniform(size=n) > 0.4, daily + rng.normal(0, 4, n))
+    daily.iloc[:20] = np.nan
+    fast.iloc[rng.choice(n, 10, replace=False)] = np.nan
+
+    manager = PositionManager.__new__(PositionManager)
+    manager.ticker = "TEST"
+    manager.daily_data = pd.DataFrame({"Close": close})
+    manager.daily_percentiles = daily
+    manager.hourly_4h_percentiles = fast
+    return manager
+
+
+def _legacy_outcome_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """Forward max/min and time-to-convergence as computed by the original row loops."""
+    def calc_max_metrics(idx, dataframe, periods=14):
+        if idx + periods >= len(dataframe):
+            return None, None
+        future_prices = dataframe['Close'].iloc[idx:idx+periods]
+        current_price = dataframe['Close'].iloc[idx]
+        max_dd = ((future_prices.min() - current_price) / current_price * 100)
+        max_up = ((future_prices.max() - current_price) / current_price * 100)
+        return max_dd, max_up
+
+    def calc_time_to_convergence(idx, dataframe):
+        if dataframe['divergence_gap'].iloc[idx] < 10:
+            return 0
+        for i in range(idx + 1, min(idx + 60, len(dataframe))):
+            if dataframe['divergence_gap'].iloc[i] < 10:
+                return (i - idx)
+        return None
+
+    df = df.copy()
+    max_metrics = [calc_max_metrics(i, df) for i in range(len(df))]
+    df['max_drawdown_14d'] = [m[0] if m else None for m in max_metrics]
+    df['max_upside_14d'] = [m[1] if m else None for m in max_metrics]
+    df['time_to_convergence_days'] = [calc_time_to_convergence(i, df) for i in range(len(df))]
+    return df.dropna()
+
+
+def test_divergence_outcomes_match_row_loops():
+    manager = _manager()
+    result = manager.analyze_divergence_outcomes()
+
+    base = pd.DataFrame({'daily_pct': manager.daily_percentiles,
+                         '4h_pct': manager.hourly_4h_percentiles}).dropna()
+    base['divergence_pct'] = base['daily_pct'] - base['4h_pct']
+    base['divergence_gap'] = abs(base['divergence_pct'])
+    base['Close'] = manager.daily_data['Close']
+    base['return_7d'] = (base['Close'].shift(-7) - base['Close']) / base['Close'] * 100
+    base['return_14d'] = (base['Close'].shift(-14) - base['Close']) / base['Close'] * 100
+    expected = _legacy_outcome_columns(base)
+
+    assert len(result) > 200
+    assert result['time_to_convergence_days'].gt(0).any()
+    pd.testing.assert_index_equal(result.index, expected.index)
+    for column in ('max_drawdown_14d', 'max_upside_14d', 'time_to_convergence_days'):
+        np.testing.assert_array_equal(result[column].to_numpy(dtype=float),
+                                      expected[column].to_numpy(dtype=float))
+
+
+def test_reentry_rules_use_the_same_convergence_events():
+    manager = _manager()
+    analysis_df = manager.analyze_divergence_outcomes()
+    rules = manager.get_reentry_rules(analysis_df)
+
+    events = []
+    for i in range(len(analysis_df) - 1):
+        if analysis_df['divergence_gap'].iloc[i] > 25 and analysis_df['divergence_gap'].iloc[i + 1] < 15:
+            events.append({'return_7d': analysis_df['return_7d'].iloc[i + 1],
+                           'daily_pct': analysis_df['daily_pct'].iloc[i + 1],
+                           'hourly_4h_pct': analysis_df['4h_pct'].iloc[i + 1]})
+    conv = pd.DataFrame(events)
+    scenarios = {
+        'convergence_oversold': (conv['daily_pct'] < 30) & (conv['hourly_4h_pct'] < 30),
+        'convergence_neutral': conv['daily_pct'].between(30, 70) & conv['hourly_4h_pct'].between(30, 70),
+        'convergence_overbought': (conv['daily_pct'] > 70) & (conv['hourly_4h_pct'] > 70),
+    }
+
+    assert rules
+    for name, mask in scenarios.items():
+        subset = conv[mask]
+        if len(subset) < 3:
+            assert name not in rules
+            continue
+        assert rules[name]['stats']['sample_size'] == len(subset)
+        assert rules[name]['stats']['avg_return_7d'] == round(subset['return_7d'].mean(), 2)
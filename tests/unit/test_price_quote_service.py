@@ -0,0 +1,116 @@
+import asyncio
+import os
+import sys
+
+import httpx
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "../../backend"))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "../../backend/api"))
+
+import price_fetcher  # noqa: E402
+
+
+def _service(monkeypatch, handler) -> price_fetcher.QuoteService:
+    real_client = httpx.AsyncClient
+    monkeypatch.setattr(
+        price_fetcher.httpx, "AsyncClient",
+        lambda **kwargs: real_client(transport=httpx.MockTransport(handler), **kwargs),
+    )
+    monkeypatch.setattr(price_fetcher.yf, "Ticker", lambda sym: (_ for _ in ()).throw(AssertionError(sym)))
+    return price_fetcher.QuoteService(ttl=60)
+
+
+def test_batch_uses_one_quote_call_and_coalesces_concurrent_requests(monkeypatch):
+    calls = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request.url.path)
+        await asyncio.sleep(0.05)
+        symbols = request.url.params["symbols"].split(",")
+        return httpx.Response(200, json={"quoteResponse": {"result": [
+            {"symbol": sym, "regularMarketPrice": 100.0 + i} for i, sym in enumerate(symbols)
+        ]}})
+
+    service = _service(monkeypatch, handler)
+
+    async def run():
+        return await asyncio.gather(
+            service.get_quotes(["AAPL", "SPX", "QQQ(NDX)", "BRK.B"]),
+            service.get_quotes(["AAPL", "SPX"]),
+        )
+
+    first, second = asyncio.run(run())
+    assert calls == ["/v7/finance/quote"]
+    assert set(first) == {"AAPL", "SPX", "QQQ(NDX)", "BRK.B"}
+    assert first["QQQ(NDX)"].source == "yahoo_quote"
+    assert {s: p.price for s, p in second.items()} == {s: first[s].price for s in ("AAPL", "SPX")}
+
+    # Served from the quote cache
+    asyncio.run(service.get_quotes(["BRK.B"]))
+    assert calls == ["/v7/finance/quote"]
+
+
+def test_fallbacks_follow_source_metrics(monkeypatch):
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request.url.host + request.url.path)
+        if request.url.path == "/v7/finance/quote":
+            return httpx.Response(401, json={})
+        if request.url.host == "finnhub.io":
+            return httpx.Response(200, json={"c": 50.0})
+        return httpx.Response(200, json={"chart": {"result": [{"meta": {"regularMarketPrice": 10.0}}]}})
+
+    service = _service(monkeypatch, handler)
+
+    quotes = asyncio.run(service.get_quotes(["AAPL", "VIX"]))
+    assert {s: (p.price, p.source) for s, p in quotes.items()} == {
+        "AAPL": (10.0, "yahoo_direct"), "VIX": (10.0, "yahoo_direct"),
+    }
+    assert service.stats["yahoo_quote"].failures == 1
+    assert service.source_order()[0] == "finnhub"  # still unmeasured, so it gets tried next
+
+    # Measured sources are ranked by expected seconds per successful quote
+    for name, ok, seconds in [("yahoo_quote", False, 0.05), ("yahoo_direct", True, 0.5),
+                              ("finnhub", True, 0.1), ("yfinance_history", True, 2.0)]:
+        service.stats[name] = price_fetcher._SourceStats(service.stats[name].rank)
+        service.stats[name].record(ok, seconds)
+    assert service.source_order() == ["finnhub", "yahoo_direct", "yahoo_quote", "yfinance_history"]
+
+    calls.clear()
+    service._cache.clear()
+    quotes = asyncio.run(service.get_quotes(["MSFT", "VIX"]))
+    assert quotes["MSFT"].source == "finnhub" and quotes["MSFT"].price == 50.0
+    # Indices are never sent to finnhub
+    assert quotes["VIX"].source == "yahoo_direct"
+    assert calls.count("finnhub.io/api/v1/quote") == 1
+
+
+def test_per_symbol_fallbacks_are_bounded(monkeypatch):
+    active = {"now": 0, "peak": 0}
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/v7/finance/quote":
+            return httpx.Response(401, json={})
+        active["now"] += 1
+        active["peak"] = max(active["peak"], active["now"])
+        await asyncio.sleep(0.01)
+        active["now"] -= 1
+        return httpx.Response(200, json={"chart": {"result": [{"meta": {"regularMarketPrice": 10.0}}]}})
+
+    service = _service(monkeypatch, handler)
+    service.stats["yahoo_quote"].record(False, 0.01)
+    symbols = [f"T{i}" for i in range(40)]
+    quotes = asyncio.run(service.get_quotes(symbols))
+    assert set(quotes) == set(symbols)
+    assert active["peak"] == price_fetcher._FALLBACK_CONCURRENCY
+
+
+def test_failure_rate_tracks_recent_calls():
+    stats = price_fetcher._SourceStats(0)
+    for _ in range(50):
+        stats.record(False, 0.1)
+    for _ in range(20):
+        stats.record(True, 0.1)
+    assert stats.failures == 50
+    assert stats.failure_rate < 0.02
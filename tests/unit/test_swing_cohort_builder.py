@@ -0,0 +1,104 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+
+# Allow importing backend modules (repo layout: tests/ vs backend/)
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "../../backend"))
+
+import swing_cohort_builder as scb  # noqa: E402
+from enhanced_backtester import EnhancedPerformanceMatrixBacktester  # noqa: E402
+
+
+def _make_ohlcv(periods: int, *, seed: int) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    index = pd.date_range("2020-01-01", periods=periods, freq="B")
+    close = 100 * np.exp(np.cumsum(rng.normal(0.0, 0.015, size=periods)))
+    open_ = np.roll(close, 1)
+    open_[0] = close[0]
+    return pd.DataFrame(
+        {
+            "Open": open_,
+            "High": np.maximum(open_, close) * 1.01,
+            "Low": np.minimum(open_, close) * 0.99,
+            "Close": close,
+        },
+        index=index,
+    )
+
+
+def _reference_exit(close, percentiles, entry_idx):
+    entry_price = close[entry_idx]
+    for day in range(1, scb.COHORT_MAX_HOLD_DAYS + 1):
+        idx = entry_idx + day
+        if (close[idx] - entry_price) / entry_price * 100 <= -scb.COHORT_STOP_LOSS_PCT:
+            return idx, "stop_loss"
+        if percentiles[idx] >= scb.COHORT_EXIT_PERCENTILE:
+            return idx, "target"
+    return entry_idx + scb.COHORT_MAX_HOLD_DAYS, "max_days"
+
+
+def test_rolling_percentile_ranks_match_backtester():
+    data = _make_ohlcv(700, seed=1)
+    backtester = EnhancedPerformanceMatrixBacktester(tickers=[], lookback_period=500)
+    indicator = backtester.calculate_rsi_ma_indicator(data)
+
+    expected = backtester.calculate_percentile_ranks(indicator).to_numpy()
+    actual = scb.rolling_percentile_ranks(indicator.to_numpy(), 500)
+
+    np.testing.assert_array_equal(np.isnan(actual), np.isnan(expected))
+    np.testing.assert_allclose(actual[~np.isnan(actual)], expected[~np.isnan(expected)])
+
+
+def test_trade_exits_match_find_exit_point_rules():
+    data = _make_ohlcv(900, seed=2)
+    state = scb.build_ticker_state("TEST", data, is_mean_reverter=True)
+    close = data["Close"].to_numpy()
+
+    assert len(state.trades) == len(data) - 499 - scb.COHORT_MAX_HOLD_DAYS
+    for row in state.trades.itertuples(index=False):
+        entry_idx = data.index.get_loc(pd.Timestamp(row.entry_date))
+        exit_idx, reason = _reference_exit(close, state.percentiles, entry_idx)
+        assert row.exit_reason == reason
+        assert row.exit_date == data.index[exit_idx].strftime("%Y-%m-%d")
+        assert row.regime == "mean_reversion"
+
+
+def test_incremental_update_only_appends_new_entries():
+    data = _make_ohlcv(900, seed=3)
+    base = scb.build_ticker_state("TEST", data.iloc[:-10], is_mean_reverter=False)
+    updated = scb.update_ticker_state(base, "TEST", data, is_mean_reverter=False)
+    cold = scb.build_ticker_state("TEST", data, is_mean_reverter=False)
+
+    pd.testing.assert_frame_equal(updated.trades, cold.trades)
+    assert scb.update_ticker_state(updated, "TEST", data, is_mean_reverter=False) is updated
+
+
+def test_incremental_update_with_sliding_start_equals_cold_build():
+    # The caller fetches a fixed period, so each refresh drops the oldest bars;
+    # the RSI-MA EWMs then start later and early ranks can move
+    data = _make_ohlcv(1300, seed=5)
+    state = scb.build_ticker_state("TEST", data.iloc[:1000], is_mean_reverter=True)
+    for start, end in ((3, 1004), (4, 1004), (40, 1060), (41, 1061), (300, 1300)):
+        window = data.iloc[start:end]
+        state = scb.update_ticker_state(state, "TEST", window, is_mean_reverter=True)
+        cold = scb.build_ticker_state("TEST", window, is_mean_reverter=True)
+
+        np.testing.assert_array_equal(state.percentiles, cold.percentiles)
+        np.testing.assert_array_equal(state.indicator, cold.indicator)
+        pd.testing.assert_frame_equal(state.trades, cold.trades)
+
+
+def test_aggregate_backtest_stats_cohorts_partition_trades():
+    data = _make_ohlcv(900, seed=4)
+    trades = scb.build_ticker_state("TEST", data, is_mean_reverter=False).trades
+    stats = scb.aggregate_backtest_stats(trades)
+
+    cohort_counts = sum(
+        stats[f"cohort_{name}"]["count"]
+        for name in scb.COHORT_NAMES
+        if stats[f"cohort_{name}"] is not None
+    )
+    assert cohort_counts == stats["total_trades"] == stats["cohort_all"]["count"]
@@ -0,0 +1,68 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+
+# Allow importing backend modules (repo layout: tests/ vs backend/)
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "../../backend"))
+
+import swing_duration_intraday as sdi  # noqa: E402
+
+
+def _reference_hours_below(pcts: list, threshold: float, entry_pct: float, interval: float):
+    if entry_pct > threshold:
+        return 0, None
+    for offset, pct in enumerate(pcts, start=1):
+        if pct > threshold:
+            return (offset - 1) * interval, offset * interval
+    return len(pcts) * interval, None
+
+
+def test_percentile_ranks_match_rolling_apply():
+    rng = np.random.default_rng(4)
+    series = pd.Series(rng.normal(50, 5, 600), index=pd.date_range("2024-01-01", periods=600, freq="4h"))
+    series.iloc[300] = np.nan
+
+    expected = series.rolling(window=50, min_periods=50).apply(
+        lambda x: (x < x.iloc[-1]).sum() / len(x) * 100, raw=False
+    )
+    pd.testing.assert_series_equal(sdi.calculate_percentile_ranks(series, window=50), expected)
+
+
+def test_progression_matrix_metrics_match_per_trade_loops():
+    rng = np.random.default_rng(9)
+    index = pd.date_range("2024-01-01", periods=400, freq="4h")
+    prices = pd.Series(100 * np.exp(np.cumsum(rng.normal(0, 0.01, 400))), index=index)
+    pcts = pd.Series(rng.uniform(0, 30, 400), index=index)
+    pcts.iloc[:20] = np.nan
+    pcts.iloc[150] = np.nan  # cuts the progressions of the entries just before it
+
+    prog = sdi.intraday_entry_progressions(pcts, prices, threshold=12.0, max_horizon_hours=40, interval_hours=4.0)
+    events = sdi.find_intraday_entry_events(pcts, prices, threshold=12.0, max_horizon_hours=40, interval_hours=4.0)
+
+    expected_positions = [i for i in range(20, 390) if pcts.iloc[i] <= 12.0]
+    assert prog.positions.tolist() == expected_positions
+    assert [e["entry_datetime"] for e in events] == list(index[expected_positions])
+    assert min(prog.valid_bars) < 10 and max(prog.valid_bars) == 10
+
+    hours_10, escape_10 = sdi._hours_below_threshold(prog, 10.0)
+    to_profit = sdi._hours_to_first_profit(prog)
+    for k, event in enumerate(events):
+        hours = sorted(event["progression"])
+        assert hours == [4.0 * (j + 1) for j in range(prog.valid_bars[k])]
+        path = [event["progression"][h]["percentile"] for h in hours]
+        below, escape = _reference_hours_below(path, 10.0, event["entry_percentile"], 4.0)
+        assert hours_10[k] == below
+        assert (np.isnan(escape_10[k]) and escape is None) or escape_10[k] == escape
+
+        profit = next((h for h in hours if event["progression"][h]["cumulative_return_pct"] > 0), None)
+        assert (np.isnan(to_profit[k]) and profit is None) or to_profit[k] == profit
+
+
+def test_analysis_on_sample_data_keeps_shape():
+    result = sdi.analyze_swing_duration_intraday("AAPL", entry_threshold=10.0, use_sample_data=True)
+    assert result["data_source"] == "sample_intraday"
+    assert result["sample_size"] == result["winners"]["count"] + result["losers"]["count"]
+    assert result["winners"]["threshold_10pct"]["sample_size"] == result["winners"]["count"]
@@ -0,0 +1,123 @@
+import json
+import os
+import sys
+import threading
+
+import httpx
+
+
+# Allow importing backend modules (repo layout: tests/ vs backend/)
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "../../backend"))
+
+import macro_rsi_calculator  # noqa: E402
+import telegram_bot  # noqa: E402
+import telegram_delivery  # noqa: E402
+import telegram_formatters  # noqa: E402
+
+
+def test_render_snapshot_builds_missing_sections_concurrently_and_caches(monkeypatch):
+    started = threading.Barrier(3, timeout=5)
+    calls = []
+
+    def slow(name, value):
+        def run(*args):
+            calls.append(name)
+            started.wait()  # macro, swing and gamma stages must all be in flight together
+            return value
+        return run
+
+    monkeypatch.setattr(telegram_delivery, "_section_cache", {})
+    monkeypatch.setattr(telegram_formatters, "_load_swing_snapshot", lambda: [])
+    monkeypatch.setattr(macro_rsi_calculator, "macro_symbols", lambda: [])
+    monkeypatch.setattr(macro_rsi_calculator, "fetch_all_macro_data", slow("macro", {"SPY": {}}))
+    monkeypatch.setattr(telegram_delivery, "_live_swing_rows", slow("swing", [{"ticker": "AAA"}]))
+    monkeypatch.setattr(
+        telegram_delivery, "_INDEPENDENT_RENDERERS",
+        {**telegram_delivery._INDEPENDENT_RENDERERS, "gammawalls": slow("gamma", ["GAMMA"])},
+    )
+    monkeypatch.setattr(
+        telegram_delivery, "_render_swing_section",
+        lambda section, swing, macro: [f"{section}:{len(swing)}:{sorted(macro)}"],
+    )
+    monkeypatch.setattr(telegram_delivery, "MESSAGE_SECTIONS", {
+        "combo": ("macro", "gammawalls", "cov"),
+        "cov": ("cov",),
+    })
+
+    assert telegram_delivery.render_snapshot("combo") == ["macro:1:['SPY']", "GAMMA", "cov:1:['SPY']"]
+    assert sorted(calls) == ["gamma", "macro", "swing"]
+
+    # Served from the message cache without recomputing anything
+    calls.clear()
+    assert telegram_delivery.render_snapshot("cov") == ["cov:1:['SPY']"]
+    assert calls == []
+    assert telegram_delivery.render_snapshot("unknown") == []
+
+
+def test_section_builds_only_serialise_the_same_section(monkeypatch):
+    gamma_started, release = threading.Event(), threading.Event()
+    builds = []
+
+    def fake_build(sections):
+        builds.append(list(sections))
+        if "gammawalls" in sections:
+            gamma_started.set()
+            assert release.wait(5)
+        return {s: [s.upper()] for s in sections}
+
+    monkeypatch.setattr(telegram_delivery, "_section_cache", {})
+    monkeypatch.setattr(telegram_delivery, "_section_builds", {})
+    monkeypatch.setattr(telegram_delivery, "build_sections", fake_build)
+    monkeypatch.setattr(telegram_delivery, "MESSAGE_SECTIONS", {
+        "gammawalls": ("gammawalls",),
+        "cov": ("cov",),
+        "combo": ("cov", "gammawalls"),
+    })
+
+    results = {}
+    first = threading.Thread(target=lambda: results.setdefault("first", telegram_delivery.render_snapshot("gammawalls")))
+    first.start()
+    assert gamma_started.wait(5)
+
+    # An unrelated section builds while the gamma build is still in flight
+    assert telegram_delivery.render_snapshot("cov") == ["COV"]
+    # A request needing the in-flight section waits for it instead of rebuilding
+    second = threading.Thread(target=lambda: results.setdefault("combo", telegram_delivery.render_snapshot("combo")))
+    second.start()
+    release.set()
+    first.join(5)
+    second.join(5)
+
+    assert results == {"first": ["GAMMAWALLS"], "combo": ["COV", "GAMMAWALLS"]}
+    assert builds == [["gammawalls"], ["cov"]]
+    assert telegram_delivery._section_builds == {}
+
+
+def test_sender_keeps_chat_order_and_retries_after_429(monkeypatch):
+    sent = []
+    throttled = {"done": False}
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        payload = json.loads(request.content)
+        if payload["text"] == "b" and not throttled["done"]:
+            throttled["done"] = True
+            return httpx.Response(429, json={"ok": False, "parameters": {"retry_after": 0}})
+        sent.append((payload["chat_id"], payload["text"]))
+        return httpx.Response(200, json={"ok": True})
+
+    real_client = httpx.AsyncClient
+    monkeypatch.setattr(
+        telegram_bot.httpx, "AsyncClient",
+        lambda **kwargs: real_client(transport=httpx.MockTransport(handler), **kwargs),
+    )
+    monkeypatch.setattr(telegram_bot, "_sender", None)
+    monkeypatch.setenv("TELEGRAM_BOT_TOKEN", "token")
+
+    first = telegram_bot.submit_messages(["a", "b", "c"], chat_id="1")
+    second = telegram_bot.submit_messages(["d"], chat_id="1")
+    assert first.result(timeout=5) and second.result(timeout=5)
+    assert sent == [("1", "a"), ("1", "b"), ("1", "c"), ("1", "d")]
+
+    chunks = telegram_bot.split_message("<pre>\n" + "\n".join(["x" * 50] * 200) + "\n</pre>", max_len=1000)
+    assert all(len(c) <= 1000 + len("\n</pre>") for c in chunks)
+    assert all(c.startswith("<pre>") and c.endswith("</pre>") for c in chunks)
@@ -0,0 +1,139 @@
+import asyncio
+import os
+import sys
+import threading
+
+# Allow importing backend modules (repo layout: tests/ vs backend/)
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "../../backend"))
+
+import telegram_poll_worker as tpw  # noqa: E402
+
+
+def _message(text: str, chat_id: int = 42) -> dict:
+    return {"update_id": 1, "message": {"chat": {"id": chat_id}, "text": text}}
+
+
+def test_resolve_command_routes_like_the_poll_loop():
+    options = tpw.resolve_command("/options@MyBot")
+    assert (options.key, options.label) == ("/options ", "/options") and options.ack
+    assert tpw.resolve_command("/options qqq extra").key == "/options qqq"
+    assert tpw.resolve_command("/optlog 5").key == "/optlog 5"
+    assert tpw.resolve_command("/optlog x").key == "/optlog 10"
+    assert tpw.resolve_command("/mr live").ack == "⏳ Fetching <b>live oversold table</b>…"
+    assert tpw.resolve_command("/mr").ack is None
+    assert tpw.resolve_command("/kelly_dyn").ack == "⏳ Fetching <b>kelly_dyn</b>…"
+    assert tpw.resolve_command("/value AAPL").key == "/value aapl"
+    assert tpw.resolve_callback("sortino:nocov").key == "/sortino nocov"
+    assert tpw.resolve_command("hello") is None
+    assert tpw.resolve_callback("unknown") is None
+
+
+def test_slow_command_does_not_block_later_updates(monkeypatch):
+    sent = []
+    monkeypatch.setattr(tpw, "submit_messages", lambda texts, chat_id=None, **kw: sent.append((chat_id, texts)))
+    release = threading.Event()
+    ran = []
+
+    def slow(chat_id):
+        ran.append("slow")
+        release.wait(timeout=5)
+        return ["slow done"]
+
+    def fast(chat_id):
+        return ["fast done"]
+
+    jobs = {
+        "/slow": tpw.CommandJob("/slow", "/slow", slow, ack="⏳ slow"),
+        "/fast": tpw.CommandJob("/fast", "/fast", fast),
+    }
+    monkeypatch.setattr(tpw, "resolve_command", lambda text: jobs.get(text))
+    worker = tpw.TelegramPollWorker(token="t", chat_id="42", max_workers=2)
+
+    async def scenario():
+        assert await worker.handle_update(_message("/slow")) == "started"
+        assert await worker.handle_update(_message("/slow")) == "duplicate"
+        assert await worker.handle_update(_message("/fast", chat_id=7)) is None  # other chats ignored
+        assert await worker.handle_update(_message("/fast")) == "started"
+        while ("42", ["fast done"]) not in sent:
+            await asyncio.sleep(0.01)
+        assert ("42", ["slow done"]) not in sent
+        assert worker.metrics()["in_flight"] == ["/slow"]
+        release.set()
+        while worker.metrics()["in_flight"]:
+            await asyncio.sleep(0.01)
+
+    asyncio.run(scenario())
+    assert ran == ["slow"]
+    assert sent[0] == ("42", ["⏳ slow"])
+    assert sent[-1] == ("42", ["slow done"])
+    metrics = worker.metrics()
+    assert metrics["deduplicated"] == 1 and metrics["queue_depth"] == 0 and metrics["running"] == 0
+    assert metrics["commands"]["/slow"]["count"] == 1
+    assert sum(metrics["commands"]["/fast"]["histogram"].values()) == 1
+
+
+def test_timeouts_errors_and_busy_queue(monkeypatch):
+    sent = []
+    monkeypatch.setattr(tpw, "submit_messages",
+                        lambda texts, chat_id=None, reply_markup=None: sent.append((texts, reply_markup)))
+    release = threading.Event()
+    worker = tpw.TelegramPollWorker(token="t", chat_id="42", max_workers=1, max_queue=1)
+
+    def boom(chat_id):
+        raise RuntimeError("no data")
+
+    async def scenario():
+        worker.dispatch(tpw.CommandJob("/hang", "/hang", lambda c: release.wait(5) and [], timeout=0.05), "42")
+        await asyncio.sleep(0.02)                                                # /hang occupies the worker
+        worker.dispatch(tpw.CommandJob("/boom", "/boom", boom), "42")            # waits for the single worker
+        assert worker.dispatch(tpw.CommandJob("/menu", "/menu", lambda c: []), "42") == "busy"
+        await asyncio.sleep(0.2)
+        assert (["⌛ /hang timed out after 0s"], None) in sent
+        release.set()
+        while worker.metrics()["in_flight"]:
+            await asyncio.sleep(0.01)
+        worker.dispatch(tpw.CommandJob("/menu", "/menu", lambda c: ["a", ("b", {"k": 1})]), "42")
+        while worker.metrics()["in_flight"]:
+            await asyncio.sleep(0.01)
+
+    asyncio.run(scenario())
+    assert (["❌ /boom error: no data"], None) in sent
+    assert sent[-1] == (["a", "b"], {"k": 1})
+    metrics = worker.metrics()
+    assert metrics["commands"]["/hang"]["timeouts"] == 1
+    assert metrics["commands"]["/boom"]["errors"] == 1
+    assert metrics["rejected_busy"] == 1
+
+
+def test_timeout_starts_when_the_command_runs(monkeypatch):
+    sent = []
+    monkeypatch.setattr(tpw, "submit_messages", lambda texts, chat_id=None, **kw: sent.append(texts))
+    release = threading.Event()
+    worker = tpw.TelegramPollWorker(token="t", chat_id="42", max_workers=1)
+
+    async def scenario():
+        worker.dispatch(tpw.CommandJob("/hang", "/hang", lambda c: release.wait(5) and ["hang done"]), "42")
+        worker.dispatch(tpw.CommandJob("/quick", "/quick", lambda c: ["quick done"], timeout=0.05), "42")
+        await asyncio.sleep(0.2)                      # /quick waits in the queue past its timeout
+        assert worker.metrics()["queue_depth"] == 1
+        release.set()
+        while worker.metrics()["in_flight"]:
+            await asyncio.sleep(0.01)
+
+        # A run cancelled while still queued gives back its queue slot
+        release.clear()
+        worker.dispatch(tpw.CommandJob("/hang", "/hang", lambda c: release.wait(5) and []), "42")
+        worker.dispatch(tpw.CommandJob("/never", "/never", lambda c: sent.append(["ran"]) or []), "42")
+        await asyncio.sleep(0.02)
+        worker._inflight[("42", "/never")].cancel()
+        await asyncio.sleep(0.02)
+        assert worker.metrics()["queue_depth"] == 0
+        assert worker.metrics()["in_flight"] == ["/hang"]
+        release.set()
+        while worker.metrics()["in_flight"]:
+            await asyncio.sleep(0.01)
+
+    asyncio.run(scenario())
+    assert ["quick done"] in sent and ["ran"] not in sent
+    assert not any("timed out" in text for texts in sent for text in texts)
+    assert worker.metrics()["commands"]["/quick"]["timeouts"] == 0
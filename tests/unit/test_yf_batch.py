@@ -0,0 +1,57 @@
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+
+# Allow importing backend modules (repo layout: tests/ vs backend/)
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "../../backend"))
+
+import yf_batch  # noqa: E402
+
+
+def _raw(symbols, fields=("Open", "High", "Low", "Close")):
+    index = pd.date_range("2024-01-01", periods=4, freq="D")
+    columns = pd.MultiIndex.from_product([symbols, fields])
+    raw = pd.DataFrame(np.arange(4 * len(columns), dtype=float).reshape(4, -1), index=index, columns=columns)
+    return raw
+
+
+def test_split_frames_handles_batch_single_and_missing_symbols():
+    raw = _raw(["AAA", "BBB"])
+    raw.loc[raw.index[0], "BBB"] = np.nan          # BBB did not trade on the first date
+    frames = yf_batch.split_frames(raw, ["AAA", "BBB", "ZZZ"])
+    assert list(frames["AAA"].columns) == ["Open", "High", "Low", "Close"]
+    assert len(frames["AAA"]) == 4 and len(frames["BBB"]) == 3
+    assert frames["ZZZ"].empty
+
+    # (field, symbol) ordering some yfinance versions return
+    swapped = raw.swaplevel(axis=1)
+    pd.testing.assert_frame_equal(yf_batch.split_frames(swapped, ["BBB"])["BBB"], frames["BBB"])
+
+    flat = raw["AAA"].copy()
+    pd.testing.assert_frame_equal(yf_batch.split_frames(flat, ["AAA"])["AAA"], frames["AAA"])
+    assert yf_batch.split_frames(flat, ["AAA", "BBB"])["BBB"].empty
+
+
+def test_download_frames_chunks_and_stops_at_deadline(monkeypatch):
+    calls = []
+
+    def fake_download(symbols, **kwargs):
+        calls.append((list(symbols), kwargs))
+        if "CCC" in symbols:
+            raise RuntimeError("rate limited")
+        return _raw(list(symbols))
+
+    monkeypatch.setattr(yf_batch.yf, "download", fake_download)
+    frames = yf_batch.download_frames(["AAA", "BBB", "AAA", "CCC", "DDD"], start="2024-01-01", chunk_size=2)
+    assert [c[0] for c in calls] == [["AAA", "BBB"], ["CCC", "DDD"]]
+    assert calls[0][1]["start"] == "2024-01-01" and "period" not in calls[0][1]
+    assert not frames["AAA"].empty and frames["CCC"].empty and frames["DDD"].empty
+
+    calls.clear()
+    frames = yf_batch.download_frames(["AAA", "BBB"], period="1y", chunk_size=1,
+                                      deadline=time.monotonic() - 1)
+    assert frames == {} and calls == []